@@ -6,4 +6,11 @@ class ContasConfig(AppConfig):
     name = 'contas'
 
     def ready(self):
-        from . import signals  # importa os signals
\ No newline at end of file
+        from . import signals  # importa os signals
+        from .signals import dre_mensal  # noqa: F401 - invalidação do DRE mensal
+        from .signals import classificacao_custos  # noqa: F401 - classificação fixo/variável
+        from .signals import cache_relatorios  # noqa: F401 - versão das tabelas do cache de relatórios
+        from .signals import saldo_mensal  # noqa: F401 - pontos de controle do saldo acumulado
+        from .signals import tipo_operacao  # noqa: F401 - tipo de operação das notas fiscais
+        from .signals import estoque_snapshot  # noqa: F401 - snapshots de estoque após edições retroativas
+        from .signals import saldo_estoque  # noqa: F401 - refresh da view de saldos após edições
@@ -0,0 +1,29 @@
+"""
+Atualiza a view materializada de saldos atuais de estoque
+(view_saldos_estoque_rapido), lida por estoque_atual, estoque_critico e
+pelos totais de valor do estoque.
+
+Uso típico:
+    python manage.py atualizar_saldos_estoque              # após movimentações lançadas fora da sincronização
+    python manage.py atualizar_saldos_estoque --bloqueante # sem CONCURRENTLY (mais rápido, bloqueia leituras)
+"""
+
+from django.core.management.base import BaseCommand
+
+from contas.services.saldo_estoque_service import VIEW_SALDOS, SaldoEstoqueService
+
+
+class Command(BaseCommand):
+    help = 'Atualiza a view materializada de saldos atuais de estoque'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bloqueante', action='store_true',
+            help='REFRESH sem CONCURRENTLY: bloqueia as leituras da view enquanto recalcula',
+        )
+
+    def handle(self, *args, **options):
+        if SaldoEstoqueService.atualizar(concorrente=not options['bloqueante']):
+            self.stdout.write(self.style.SUCCESS(f'{VIEW_SALDOS} atualizada'))
+        else:
+            self.stdout.write(f'{VIEW_SALDOS} é uma view comum neste banco; nada a atualizar')
@@ -0,0 +1,136 @@
+"""
+Mede o tempo e o número de consultas dos endpoints mais pesados e compara com
+uma baseline gravada (ver gerar_dados_sinteticos para popular o banco).
+
+Uso típico:
+    python manage.py benchmark_endpoints --salvar-baseline          # grava benchmarks/baseline.json
+    python manage.py benchmark_endpoints                            # compara com a baseline
+    python manage.py benchmark_endpoints --cenario dre --cenario resumo_mensal --repeticoes 10
+    python manage.py benchmark_endpoints --tolerancia 0.1 --estrito # falha se houver regressão
+"""
+
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from contas.services.benchmark_service import CAMINHO_BASELINE, CENARIOS, TOLERANCIA_PADRAO, BenchmarkService
+
+
+class Command(BaseCommand):
+    help = 'Benchmark dos endpoints principais com comparação contra a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cenario',
+            action='append',
+            choices=list(CENARIOS),
+            help='Cenário a medir (pode repetir). Padrão: todos'
+        )
+        parser.add_argument(
+            '--repeticoes',
+            type=int,
+            default=5,
+            help='Execuções medidas por cenário. Padrão: 5'
+        )
+        parser.add_argument(
+            '--data-inicial',
+            type=str,
+            help='Início do período (YYYY-MM-DD). Padrão: o da baseline ou 12 meses antes da data final'
+        )
+        parser.add_argument(
+            '--data-final',
+            type=str,
+            help='Fim do período (YYYY-MM-DD). Padrão: o da baseline ou hoje'
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            default=str(CAMINHO_BASELINE),
+            help=f'Arquivo da baseline. Padrão: {CAMINHO_BASELINE}'
+        )
+        parser.add_argument(
+            '--salvar-baseline',
+            action='store_true',
+            help='Grava os resultados como a nova baseline em vez de comparar'
+        )
+        parser.add_argument(
+            '--tolerancia',
+            type=float,
+            default=TOLERANCIA_PADRAO,
+            help=f'Variação da mediana aceita antes de indicar regressão. Padrão: {TOLERANCIA_PADRAO}'
+        )
+        parser.add_argument(
+            '--com-cache',
+            action='store_true',
+            help='Mantém o cache de relatórios entre as repetições'
+        )
+        parser.add_argument(
+            '--estrito',
+            action='store_true',
+            help='Termina com erro se algum cenário regredir'
+        )
+
+    def _data(self, valor):
+        try:
+            return datetime.strptime(valor, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError('Formato de data inválido. Use YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if not options['salvar_baseline']:
+            try:
+                baseline = BenchmarkService.carregar_baseline(options['baseline'])
+            except FileNotFoundError as e:
+                self.stdout.write(self.style.WARNING(f'{e}; os resultados não serão comparados'))
+
+        # Sem datas explícitas, o período é o da baseline, para a comparação ser justa
+        data_final = options['data_final'] or (baseline or {}).get('data_final')
+        data_final = self._data(data_final) if data_final else timezone.localdate()
+        data_inicial = options['data_inicial'] or (baseline or {}).get('data_inicial')
+        data_inicial = self._data(data_inicial) if data_inicial else data_final - relativedelta(months=12)
+
+        self.stdout.write(f'Período {data_inicial} a {data_final}, {options["repeticoes"]} repetições')
+        resultados = BenchmarkService.executar(
+            data_inicial, data_final, repeticoes=options['repeticoes'],
+            cenarios=options['cenario'], usar_cache=options['com_cache'],
+        )
+
+        if options['salvar_baseline'] or baseline is None:
+            self._tabela([
+                {'cenario': nome, 'atual': atual, 'baseline': None, 'variacao_tempo': None, 'situacao': ''}
+                for nome, atual in resultados.items()
+            ])
+            if options['salvar_baseline']:
+                caminho = BenchmarkService.salvar_baseline(resultados, data_inicial, data_final, options['baseline'])
+                self.stdout.write(self.style.SUCCESS(f'Baseline gravada em {caminho}'))
+            return
+
+        comparacoes = BenchmarkService.comparar(resultados, baseline, options['tolerancia'])
+        self._tabela(comparacoes)
+        regressoes = [comparacao['cenario'] for comparacao in comparacoes if comparacao['situacao'] == 'regressao']
+        if regressoes and options['estrito']:
+            raise CommandError(f'Regressão em: {", ".join(regressoes)}')
+        if regressoes:
+            self.stdout.write(self.style.WARNING(f'Regressão em: {", ".join(regressoes)}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Nenhuma regressão em relação à baseline'))
+
+    def _tabela(self, comparacoes):
+        self.stdout.write(
+            f"{'cenário':<34} {'status':>6} {'med ms':>9} {'p95 ms':>9} {'sql':>6} "
+            f"{'base ms':>9} {'base sql':>8} {'var':>7}  situação"
+        )
+        for comparacao in comparacoes:
+            atual, anterior = comparacao['atual'], comparacao['baseline'] or {}
+            variacao = comparacao['variacao_tempo']
+            linha = (
+                f"{comparacao['cenario']:<34} {atual['status']:>6} {atual['mediana_ms']:>9.1f} "
+                f"{atual['p95_ms']:>9.1f} {atual['consultas']:>6} "
+                f"{anterior.get('mediana_ms', ''):>9} {anterior.get('consultas', ''):>8} "
+                f"{'' if variacao is None else f'{variacao:+.0%}':>7}  {comparacao['situacao']}"
+            )
+            estilo = {'regressao': self.style.ERROR, 'melhora': self.style.SUCCESS}.get(comparacao['situacao'])
+            self.stdout.write(estilo(linha) if estilo else linha)
@@ -0,0 +1,29 @@
+"""
+Classifica as contas a pagar em custo fixo/variável (tipo_custo, categoria_custo).
+
+Uso típico:
+    python manage.py classificar_custos            # apenas contas sem classificação ou com regras antigas
+    python manage.py classificar_custos --todas    # reavalia todas (após sincronização em lote)
+"""
+
+from django.core.management.base import BaseCommand
+
+from contas.services.classificacao_custos_service import ClassificacaoCustosService, VERSAO_REGRAS
+
+
+class Command(BaseCommand):
+    help = 'Classifica as contas a pagar em custo fixo ou variável e grava a categoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Reavalia todas as contas, não só as pendentes'
+        )
+
+    def handle(self, *args, **options):
+        if options['todas']:
+            total = ClassificacaoCustosService.classificar_todas()
+        else:
+            total = ClassificacaoCustosService.classificar_pendentes()
+        self.stdout.write(self.style.SUCCESS(f'{total} contas a pagar classificadas (regras {VERSAO_REGRAS})'))
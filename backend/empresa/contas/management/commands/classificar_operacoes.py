@@ -0,0 +1,21 @@
+"""
+Grava o tipo de operação normalizado (tipo_operacao) das notas fiscais de
+entrada e saída a partir do texto de `operacao`.
+
+Uso típico:
+    python manage.py classificar_operacoes   # após cargas em lote ou mudança nas regras
+"""
+
+from django.core.management.base import BaseCommand
+
+from contas.services.tipo_operacao_service import TipoOperacaoService
+
+
+class Command(BaseCommand):
+    help = 'Classifica a operação das notas fiscais em tipo_operacao (venda, simples remessa, compra...)'
+
+    def handle(self, *args, **options):
+        atualizadas = TipoOperacaoService.classificar()
+        for tabela, total in atualizadas.items():
+            self.stdout.write(f'{tabela}: {total} notas atualizadas')
+        self.stdout.write(self.style.SUCCESS(f'{sum(atualizadas.values())} notas classificadas'))
@@ -0,0 +1,85 @@
+"""
+Mantém a tabela dre_mensal (DRE agregado dos meses fechados).
+
+Uso típico:
+    python manage.py dre_mensal --desde 2023-01            # preenche meses ausentes
+    python manage.py dre_mensal --rebuild --desde 2024-06  # recalcula após cargas em lote
+    python manage.py dre_mensal --invalidar --desde 2024-06
+"""
+
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from contas.models.access import DREMensal
+from contas.services.dre_mensal_service import DREMensalService
+
+
+class Command(BaseCommand):
+    help = 'Calcula, recalcula ou invalida os agregados mensais do DRE'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            type=str,
+            help='Primeiro mês (YYYY-MM). Padrão: 24 meses atrás'
+        )
+        parser.add_argument(
+            '--ate',
+            type=str,
+            help='Último mês (YYYY-MM). Padrão: último mês fechado'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recalcula também os meses já gravados no intervalo'
+        )
+        parser.add_argument(
+            '--invalidar',
+            action='store_true',
+            help='Apenas apaga os meses do intervalo (recalculados na próxima consulta)'
+        )
+
+    def handle(self, *args, **options):
+        mes_corrente = timezone.localdate().replace(day=1)
+        desde = self.parse_month(options.get('desde')) or mes_corrente - relativedelta(months=24)
+        ate = self.parse_month(options.get('ate')) or mes_corrente - relativedelta(months=1)
+
+        if desde > ate:
+            raise CommandError('--desde não pode ser posterior a --ate')
+
+        if options['invalidar']:
+            removidos = DREMensalService.invalidar(desde, ate)
+            self.stdout.write(self.style.SUCCESS(f'{removidos} meses invalidados de {desde:%m/%Y} a {ate:%m/%Y}'))
+            return
+
+        if options['rebuild']:
+            meses = DREMensalService.meses_do_periodo(desde, ate)
+        else:
+            gravados = set(DREMensal.objects.filter(mes__gte=desde, mes__lte=ate).values_list('mes', flat=True))
+            meses = [mes for mes in DREMensalService.meses_do_periodo(desde, ate) if mes not in gravados]
+
+        self.stdout.write(f'Calculando {len(meses)} meses...')
+        calculados = 0
+        for mes in meses:
+            if not DREMensalService.mes_fechado(mes):
+                self.stdout.write(self.style.WARNING(f'{mes:%m/%Y} ainda não fechou; ignorado'))
+                continue
+            try:
+                DREMensalService.gravar_mes(mes, DREMensalService.calcular_mes(mes))
+            except Exception as e:
+                raise CommandError(f'Erro ao calcular {mes:%m/%Y}: {str(e)}')
+            calculados += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{calculados} meses gravados em dre_mensal'))
+
+    def parse_month(self, month_str):
+        """Converte YYYY-MM em date (primeiro dia do mês)"""
+        if not month_str:
+            return None
+        try:
+            return datetime.strptime(month_str, '%Y-%m').date()
+        except ValueError:
+            raise CommandError(f'Mês inválido: {month_str}. Use YYYY-MM')
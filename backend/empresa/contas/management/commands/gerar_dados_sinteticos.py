@@ -0,0 +1,93 @@
+"""
+Gera (ou remove) o conjunto de dados sintéticos usado pelo benchmark_endpoints.
+
+Os dados são gravados no banco configurado, que deve ser um PostgreSQL local
+de desenvolvimento: hosts remotos são recusados sem --forcar.
+
+Uso típico:
+    python manage.py gerar_dados_sinteticos                        # escala 1, 12 meses
+    python manage.py gerar_dados_sinteticos --escala 20 --meses 24 --semente 7
+    python manage.py gerar_dados_sinteticos --limpar               # remove os dados gerados
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from contas.services.dados_sinteticos_service import DadosSinteticosService
+
+HOSTS_LOCAIS = {'', 'localhost', '127.0.0.1', '::1'}
+
+
+class Command(BaseCommand):
+    help = 'Gera dados sintéticos em escala configurável para o benchmark dos endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escala',
+            type=float,
+            default=1.0,
+            help='Multiplicador dos volumes (escala 1: 500 produtos, 900 notas, 1600 contas). Padrão: 1'
+        )
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=12,
+            help='Meses de histórico até a data final. Padrão: 12'
+        )
+        parser.add_argument(
+            '--semente',
+            type=int,
+            default=42,
+            help='Semente do gerador; a mesma semente gera os mesmos dados. Padrão: 42'
+        )
+        parser.add_argument(
+            '--data-final',
+            type=str,
+            help='Último dia do histórico (YYYY-MM-DD). Padrão: hoje'
+        )
+        parser.add_argument(
+            '--limpar',
+            action='store_true',
+            help='Remove os dados sintéticos gerados anteriormente'
+        )
+        parser.add_argument(
+            '--forcar',
+            action='store_true',
+            help='Permite gravar em um banco que não é local'
+        )
+
+    def handle(self, *args, **options):
+        host = connection.settings_dict.get('HOST') or ''
+        if host not in HOSTS_LOCAIS and not options['forcar']:
+            raise CommandError(f'O banco "{host}" não é local. Use --forcar para gravar nele mesmo assim.')
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f'Banco {connection.vendor}: os tempos medidos não são comparáveis aos do PostgreSQL'
+            ))
+
+        if options['limpar']:
+            removidos = DadosSinteticosService.limpar()
+            for tabela, quantidade in removidos.items():
+                self.stdout.write(f'{tabela:<30} {quantidade:>10}')
+            self.stdout.write(self.style.SUCCESS(f'{sum(removidos.values())} registros removidos'))
+            return
+
+        data_final = None
+        if options['data_final']:
+            try:
+                data_final = datetime.strptime(options['data_final'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Formato de data inválido. Use YYYY-MM-DD')
+
+        try:
+            totais = DadosSinteticosService.gerar(
+                escala=options['escala'], meses=options['meses'], semente=options['semente'], data_final=data_final
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for tabela, quantidade in totais.items():
+            self.stdout.write(f'{tabela:<30} {quantidade:>10}')
+        self.stdout.write(self.style.SUCCESS(f'{sum(totais.values())} registros gerados'))
@@ -123,12 +123,14 @@ class Command(BaseCommand):
         self.stdout.write(f"\nCalculating historical stock for {target_date}")
         self.stdout.write("=" * 60)
         
+        stock_map = StockCalculationService.calculate_stock_at_date_bulk(
+            target_date, produto_ids=[produto.id for produto in produtos]
+        )
+        
         results = []
         for produto in produtos:
             try:
-                historical_stock = StockCalculationService.calculate_stock_at_date(
-                    produto.id, target_date
-                )
+                historical_stock = stock_map.get(produto.id, Decimal('0'))
                 
                 # Get stock reset info
                 base_stock, reset_date = StockCalculationService.get_base_stock_reset(
@@ -231,6 +233,10 @@ class Command(BaseCommand):
         self.stdout.write(f"\nAnalyzing stock movements from {start_date} to {end_date}")
         self.stdout.write("=" * 80)
         
+        produto_ids = [produto.id for produto in produtos]
+        start_map = StockCalculationService.calculate_stock_at_date_bulk(start_date, produto_ids=produto_ids)
+        end_map = StockCalculationService.calculate_stock_at_date_bulk(end_date, produto_ids=produto_ids)
+        
         results = []
         for produto in produtos:
             try:
@@ -238,8 +244,8 @@ class Command(BaseCommand):
                     produto.id, start_date, end_date
                 )
                 
-                stock_at_start = StockCalculationService.calculate_stock_at_date(produto.id, start_date)
-                stock_at_end = StockCalculationService.calculate_stock_at_date(produto.id, end_date)
+                stock_at_start = start_map.get(produto.id, Decimal('0'))
+                stock_at_end = end_map.get(produto.id, Decimal('0'))
                 
                 result = {
                     'produto_id': produto.id,
@@ -342,10 +348,14 @@ class Command(BaseCommand):
             'products': []
         }
         
+        stock_map = StockCalculationService.calculate_stock_at_date_bulk(
+            target_date, produto_ids=[produto.id for produto in produtos]
+        )
+        
         for produto in produtos:
             try:
                 # Calculate historical stock
-                historical_stock = StockCalculationService.calculate_stock_at_date(produto.id, target_date)
+                historical_stock = stock_map.get(produto.id, Decimal('0'))
                 
                 # Get stock reset info
                 base_stock, reset_date = StockCalculationService.get_base_stock_reset(
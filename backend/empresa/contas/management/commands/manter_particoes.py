@@ -0,0 +1,65 @@
+"""
+Mantém as partições anuais de movimentacoes_estoque: cria as do ano atual
+e do seguinte, lista as existentes e faz VACUUM/REINDEX de um ano só.
+
+Uso típico:
+    python manage.py manter_particoes                            # cria as partições que faltam (ano atual e seguinte)
+    python manage.py manter_particoes --anos 2027 2028           # cria partições de anos específicos
+    python manage.py manter_particoes --listar                   # partições, linhas estimadas e tamanho
+    python manage.py manter_particoes --vacuum 2025              # VACUUM (ANALYZE) das partições de 2025
+    python manage.py manter_particoes --vacuum 2025 --reindex --tabela movimentacoes_estoque
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contas.services.particionamento_service import TABELAS_PARTICIONADAS, ParticionamentoService
+
+
+class Command(BaseCommand):
+    help = 'Cria, lista e mantém as partições anuais das tabelas históricas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tabela', action='append', choices=sorted(TABELAS_PARTICIONADAS),
+            help='Restringe a uma tabela (pode repetir; padrão: todas)',
+        )
+        parser.add_argument('--anos', type=int, nargs='+', help='Anos das partições a criar')
+        parser.add_argument('--listar', action='store_true', help='Lista as partições existentes')
+        parser.add_argument('--vacuum', type=int, metavar='ANO', help='VACUUM (ANALYZE) das partições do ano')
+        parser.add_argument('--reindex', action='store_true', help='Com --vacuum, também REINDEX CONCURRENTLY')
+
+    def handle(self, *args, **options):
+        if not ParticionamentoService.disponivel():
+            self.stdout.write('Particionamento disponível apenas no PostgreSQL; nada a fazer')
+            return
+        if options['reindex'] and options['vacuum'] is None:
+            raise CommandError('--reindex exige --vacuum ANO')
+
+        tabelas = options['tabela']
+        if options['listar']:
+            self.listar(tabelas or sorted(TABELAS_PARTICIONADAS))
+        elif options['vacuum'] is not None:
+            processadas = ParticionamentoService.manutencao(options['vacuum'], tabelas, reindex=options['reindex'])
+            if not processadas:
+                self.stdout.write(self.style.WARNING(f"Nenhuma partição de {options['vacuum']}"))
+            for nome in processadas:
+                self.stdout.write(self.style.SUCCESS(f'{nome} mantida'))
+        else:
+            criadas = ParticionamentoService.criar_particoes(tabelas, options['anos'])
+            for nome in criadas:
+                self.stdout.write(self.style.SUCCESS(f'{nome} criada'))
+            if not criadas:
+                self.stdout.write('Todas as partições já existem')
+
+    def listar(self, tabelas):
+        for tabela in tabelas:
+            particoes = ParticionamentoService.particoes(tabela)
+            if not particoes:
+                self.stdout.write(f'{tabela}: não particionada')
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(tabela))
+            for particao in particoes:
+                self.stdout.write(
+                    f"  {particao['nome']:<32} {particao['linhas']:>12,} linhas "
+                    f"{particao['bytes'] / 1024 / 1024:>10.1f} MB  {particao['limites']}"
+                )
@@ -0,0 +1,69 @@
+"""
+Mostra as estatísticas de desempenho por endpoint (PerfilRequisicoesMiddleware).
+
+Uso típico:
+    python manage.py perfil_endpoints                      # piores p95 de tempo
+    python manage.py perfil_endpoints --ordenar consultas --top 10 --sql
+    python manage.py perfil_endpoints --limpar
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contas.services.perfil_requisicoes_service import ORDENACOES, PerfilRequisicoesService
+
+
+class Command(BaseCommand):
+    help = 'Percentis de tempo, consultas e tamanho das respostas por endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ordenar',
+            choices=list(ORDENACOES),
+            default='tempo',
+            help='Critério de ordenação (p95). Padrão: tempo'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Quantidade de endpoints listados. Padrão: 20'
+        )
+        parser.add_argument(
+            '--sql',
+            action='store_true',
+            help='Mostra as consultas que mais se repetiram em cada endpoint'
+        )
+        parser.add_argument(
+            '--limpar',
+            action='store_true',
+            help='Apaga as estatísticas gravadas'
+        )
+
+    def handle(self, *args, **options):
+        if options['limpar']:
+            removidos = PerfilRequisicoesService.limpar()
+            self.stdout.write(self.style.SUCCESS(f'{removidos} endpoints removidos'))
+            return
+
+        try:
+            estatisticas = PerfilRequisicoesService.estatisticas(options['ordenar'])[:options['top']]
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not estatisticas:
+            self.stdout.write('Nenhuma requisição registrada')
+            return
+
+        self.stdout.write(
+            f"{'endpoint':<45} {'req':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'sql p95':>8} {'db p95':>8} {'bytes':>10}"
+        )
+        for resumo in estatisticas:
+            self.stdout.write(
+                f"{resumo['url_nome'][:45]:<45} {resumo['requisicoes']:>7} "
+                f"{resumo['tempo_ms']['p50']:>8.0f} {resumo['tempo_ms']['p95']:>8.0f} {resumo['tempo_ms']['p99']:>8.0f} "
+                f"{resumo['consultas']['p95']:>8} {resumo['tempo_db_ms']['p95']:>8.0f} {resumo['tamanho_medio_bytes']:>10}"
+            )
+            if options['sql']:
+                for repetida in resumo['consultas_repetidas']:
+                    self.stdout.write(self.style.WARNING(f"    {repetida['execucoes']}x {repetida['sql'][:160]}"))
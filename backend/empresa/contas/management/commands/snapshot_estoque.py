@@ -0,0 +1,80 @@
+"""
+Mantém a tabela estoque_snapshot (posição diária de estoque por produto).
+
+Uso típico:
+    python manage.py snapshot_estoque --rebuild          # carga completa
+    python manage.py snapshot_estoque                    # avanço diário (cron)
+    python manage.py snapshot_estoque --desde 2025-03-01 # reprocessa após correções retroativas
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contas.models.access import EstoqueSnapshot
+from contas.services.estoque_snapshot_service import EstoqueSnapshotService
+
+
+class Command(BaseCommand):
+    help = 'Constrói e avança os snapshots diários de estoque a partir das movimentações'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Apaga todos os snapshots e reconstrói a partir de todo o histórico'
+        )
+        parser.add_argument(
+            '--desde',
+            type=str,
+            help='Reprocessa a partir desta data (YYYY-MM-DD). Padrão: último snapshot gravado'
+        )
+        parser.add_argument(
+            '--ate',
+            type=str,
+            help='Processa até esta data (YYYY-MM-DD). Padrão: hoje'
+        )
+        parser.add_argument(
+            '--produto-ids',
+            type=str,
+            help='IDs de produtos separados por vírgula (reprocessamento parcial)'
+        )
+
+    def handle(self, *args, **options):
+        desde = self.parse_date(options.get('desde'))
+        ate = self.parse_date(options.get('ate'))
+
+        produto_ids = None
+        if options.get('produto_ids'):
+            try:
+                produto_ids = [int(pid.strip()) for pid in options['produto_ids'].split(',')]
+            except ValueError:
+                raise CommandError('IDs de produtos inválidos. Use inteiros separados por vírgula')
+
+        if options['rebuild']:
+            if desde:
+                raise CommandError('--rebuild e --desde não podem ser usados juntos')
+            apagados, _ = EstoqueSnapshot.objects.all().delete()
+            self.stdout.write(f'{apagados} snapshots removidos para reconstrução completa')
+
+        self.stdout.write('Atualizando snapshots de estoque...')
+        try:
+            resumo = EstoqueSnapshotService.atualizar_snapshots(
+                desde=desde, ate=ate, produto_ids=produto_ids
+            )
+        except Exception as e:
+            raise CommandError(f'Erro ao atualizar snapshots: {str(e)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshots atualizados de {resumo['desde'] or 'início do histórico'} até {resumo['ate']}: "
+            f"{resumo['removidos']} removidos, {resumo['gravados']} gravados"
+        ))
+
+    def parse_date(self, date_str):
+        """Converte YYYY-MM-DD em date"""
+        if not date_str:
+            return None
+        try:
+            return datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Data inválida: {date_str}. Use YYYY-MM-DD')
@@ -7,6 +7,7 @@ import json
 from pathlib import Path
 
 from contas.models.access import Produtos
+from contas.services.stock_calculation import StockCalculationService
 from contas.services.stock_validation import StockValidationService
 
 
@@ -166,29 +167,28 @@ class Command(BaseCommand):
             else:
                 produtos = Produtos.objects.filter(ativo=True)
             
+            discrepancy_ids = {d['produto_id'] for d in results['discrepancies']}
+            calculated_map = StockCalculationService.calculate_current_stock_bulk(
+                [produto.id for produto in produtos]
+            )
+            
             correct_count = 0
             for produto in produtos:
                 if correct_count >= results['correct_stock']:
                     break
-                    
-                # Check if this product is in discrepancies
-                is_discrepancy = any(
-                    d['produto_id'] == produto.id for d in results['discrepancies']
-                )
                 
-                if not is_discrepancy:
-                    try:
-                        calculated_stock = StockValidationService.validate_single_product(produto.id)
-                        if calculated_stock['is_correct']:
-                            self.stdout.write(
-                                self.style.SUCCESS(
-                                    f"Product {produto.codigo} ({produto.nome}): "
-                                    f"Stock={calculated_stock['stored_stock']:.2f} ✓"
-                                )
-                            )
-                            correct_count += 1
-                    except Exception:
-                        continue  # Skip products with validation errors
+                if produto.id in discrepancy_ids:
+                    continue
+                
+                stored_stock = Decimal(str(produto.estoque_atual))
+                if calculated_map.get(produto.id, Decimal('0')) == stored_stock:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"Product {produto.codigo} ({produto.nome}): "
+                            f"Stock={float(stored_stock):.2f} ✓"
+                        )
+                    )
+                    correct_count += 1
         
         # Show detailed analysis if available
         if 'analysis' in results:
@@ -244,30 +244,30 @@ class Command(BaseCommand):
                 else:
                     produtos = Produtos.objects.filter(ativo=True)
                 
+                discrepancy_ids = {d['produto_id'] for d in results['discrepancies']}
+                calculated_map = StockCalculationService.calculate_current_stock_bulk(
+                    [produto.id for produto in produtos]
+                )
+                
                 for produto in produtos:
-                    # Check if this product is in discrepancies
-                    is_discrepancy = any(
-                        d['produto_id'] == produto.id for d in results['discrepancies']
-                    )
+                    if produto.id in discrepancy_ids:
+                        continue
                     
-                    if not is_discrepancy:
-                        try:
-                            validation = StockValidationService.validate_single_product(produto.id)
-                            if validation['is_correct']:
-                                row = {
-                                    'produto_id': produto.id,
-                                    'produto_codigo': produto.codigo,
-                                    'produto_nome': produto.nome,
-                                    'calculated_stock': validation['calculated_stock'],
-                                    'stored_stock': validation['stored_stock'],
-                                    'difference': 0,
-                                    'abs_difference': 0,
-                                    'percentage_diff': 0,
-                                    'status': 'CORRECT'
-                                }
-                                writer.writerow(row)
-                        except Exception:
-                            continue  # Skip products with validation errors
+                    stored_stock = Decimal(str(produto.estoque_atual))
+                    calculated_stock = calculated_map.get(produto.id, Decimal('0'))
+                    if calculated_stock == stored_stock:
+                        row = {
+                            'produto_id': produto.id,
+                            'produto_codigo': produto.codigo,
+                            'produto_nome': produto.nome,
+                            'calculated_stock': float(calculated_stock),
+                            'stored_stock': float(stored_stock),
+                            'difference': 0,
+                            'abs_difference': 0,
+                            'percentage_diff': 0,
+                            'status': 'CORRECT'
+                        }
+                        writer.writerow(row)
         
         self.stdout.write(f'Results saved to {filepath}')
     
@@ -0,0 +1,64 @@
+# backend/empresa/contas/middleware.py
+"""
+Instrumentação das requisições da API.
+
+PerfilRequisicoesMiddleware mede tempo total, consultas ao banco (número,
+tempo e SQL repetido) e tamanho da resposta de cada requisição e registra
+por nome de URL em PerfilRequisicoesService. Requisições acima de
+LIMITE_LENTO_MS vão para o log com as consultas que mais se repetiram.
+Configurado em settings.PERFIL_REQUISICOES.
+"""
+
+import logging
+import time
+
+from django.db import connection
+
+from .services.perfil_requisicoes_service import Medicao, PerfilRequisicoesService, configuracao
+
+logger = logging.getLogger(__name__)
+
+
+class PerfilRequisicoesMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = configuracao()
+        if not config['ATIVO']:
+            return self.get_response(request)
+
+        medicao = Medicao()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(medicao):
+            response = self.get_response(request)
+        tempo_ms = (time.perf_counter() - inicio) * 1000
+
+        # Sem rota resolvida (404 de URL) não há endpoint para agrupar
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return response
+
+        url_nome = resolver_match.view_name or resolver_match.route
+        # Respostas em streaming são medidas até o início do envio
+        if response.streaming:
+            tamanho = int(response.get('Content-Length') or 0)
+        else:
+            tamanho = len(response.content)
+        try:
+            PerfilRequisicoesService.registrar(url_nome, tempo_ms, medicao, tamanho)
+        except Exception:
+            # A gravação periódica em perfil_endpoints não pode derrubar a resposta
+            logger.exception(f"Falha ao registrar o perfil de {url_nome}")
+
+        if tempo_ms >= config['LIMITE_LENTO_MS']:
+            repetidas = '; '.join(
+                f'{vezes}x {sql[:300]}' for sql, vezes in medicao.repetidas(config['TOP_REPETIDAS'])
+            )
+            logger.warning(
+                f"Requisição lenta {request.method} {request.get_full_path()} ({url_nome}): "
+                f"{tempo_ms:.0f} ms, {medicao.consultas} consultas ({medicao.tempo_db * 1000:.0f} ms no banco), "
+                f"{tamanho} bytes. Consultas repetidas: {repetidas or 'nenhuma'}"
+            )
+        return response
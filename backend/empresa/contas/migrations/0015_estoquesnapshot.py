@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:04
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0014_clientes_especificacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstoqueSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('quantidade', models.DecimalField(decimal_places=3, default=Decimal('0'), max_digits=12)),
+                ('custo_unitario', models.DecimalField(blank=True, decimal_places=4, max_digits=10, null=True)),
+                ('data_calculo', models.DateTimeField(auto_now=True)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots_estoque', to='contas.produtos')),
+            ],
+            options={
+                'db_table': 'estoque_snapshot',
+                'indexes': [models.Index(fields=['data'], name='estoque_sna_data_216aaa_idx')],
+                'unique_together': {('produto', 'data')},
+            },
+        ),
+    ]
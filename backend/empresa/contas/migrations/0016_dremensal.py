@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:12
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0015_estoquesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DREMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(unique=True)),
+                ('faturamento_bruto', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=18)),
+                ('faturamento_vendas', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=18)),
+                ('faturamento_servicos_contratos', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=18)),
+                ('faturamento_servicos_avulsos', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=18)),
+                ('cmv', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=18)),
+                ('cmv_vendas', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=18)),
+                ('cmv_contratos', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=18)),
+                ('cmv_outros', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=18)),
+                ('custos_fixos', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=18)),
+                ('custos_variaveis', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=18)),
+                ('detalhe_custos_fixos', models.JSONField(default=list)),
+                ('detalhe_custos_variaveis', models.JSONField(default=list)),
+                ('data_calculo', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'dre_mensal',
+                'ordering': ['mes'],
+            },
+        ),
+    ]
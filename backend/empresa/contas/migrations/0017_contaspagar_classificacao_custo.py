@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0016_dremensal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contaspagar',
+            name='categoria_custo',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Categoria de Custo'),
+        ),
+        migrations.AddField(
+            model_name='contaspagar',
+            name='tipo_custo',
+            field=models.CharField(blank=True, max_length=10, null=True, verbose_name='Tipo de Custo'),
+        ),
+        migrations.AddField(
+            model_name='contaspagar',
+            name='versao_classificacao',
+            field=models.CharField(blank=True, max_length=12, null=True, verbose_name='Versão das Regras de Classificação'),
+        ),
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(fields=['tipo_custo', 'categoria_custo'], name='contas_paga_tipo_cu_2d83f4_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0017_contaspagar_classificacao_custo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoTabela',
+            fields=[
+                ('tabela', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('versao', models.BigIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'versoes_tabelas',
+            },
+        ),
+    ]
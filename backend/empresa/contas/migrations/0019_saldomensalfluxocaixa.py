@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:44
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0018_versaotabela'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoMensalFluxoCaixa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(unique=True)),
+                ('movimento_realizado', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18)),
+                ('movimento_previsto', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18)),
+                ('data_calculo', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'saldos_mensais_fluxo_caixa',
+                'ordering': ['mes'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:45
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remover_duplicados(apps, schema_editor):
+    """Mantém o lançamento mais recente de cada conta antes de criar a restrição única."""
+    FluxoCaixaLancamento = apps.get_model('contas', 'FluxoCaixaLancamento')
+    automaticos = FluxoCaixaLancamento.objects.filter(
+        fonte_tipo__in=['contas_pagar', 'contas_receber'], fonte_id__isnull=False
+    )
+    duplicados = (
+        automaticos.values('fonte_tipo', 'fonte_id')
+        .annotate(quantidade=Count('id'), ultimo=Max('id'))
+        .filter(quantidade__gt=1)
+    )
+    for chave in duplicados:
+        automaticos.filter(fonte_tipo=chave['fonte_tipo'], fonte_id=chave['fonte_id']) \
+            .exclude(id=chave['ultimo']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0019_saldomensalfluxocaixa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fluxocaixalancamento',
+            name='hash_origem',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.RunPython(remover_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='fluxocaixalancamento',
+            constraint=models.UniqueConstraint(condition=models.Q(('fonte_tipo__in', ['contas_pagar', 'contas_receber'])), fields=('fonte_tipo', 'fonte_id'), name='uniq_lancamento_conta_sincronizada'),
+        ),
+    ]
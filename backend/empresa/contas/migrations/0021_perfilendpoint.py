@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0020_lancamento_hash_origem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilEndpoint',
+            fields=[
+                ('url_nome', models.CharField(max_length=200, primary_key=True, serialize=False)),
+                ('requisicoes', models.BigIntegerField(default=0)),
+                ('amostras', models.JSONField(default=list)),
+                ('repeticoes', models.JSONField(default=dict)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'perfil_endpoints',
+            },
+        ),
+    ]
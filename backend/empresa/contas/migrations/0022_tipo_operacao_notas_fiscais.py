@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+
+def classificar_notas(apps, schema_editor):
+    """Preenche tipo_operacao das notas existentes com as regras do serviço."""
+    from contas.services.tipo_operacao_service import TipoOperacaoService
+
+    for nome in ('NotasFiscaisSaida', 'NotasFiscaisEntrada'):
+        modelo = apps.get_model('contas', nome)
+        expressao = TipoOperacaoService.expressao(modelo)
+        modelo.objects.exclude(tipo_operacao=expressao).update(tipo_operacao=expressao)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0021_perfilendpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notasfiscaisentrada',
+            name='tipo_operacao',
+            field=models.CharField(choices=[('venda', 'Venda'), ('simples_remessa', 'Simples remessa'), ('compra', 'Compra'), ('locacao', 'Locação'), ('servico', 'Serviço'), ('devolucao', 'Devolução'), ('comodato', 'Comodato'), ('adiantamento', 'Adiantamento'), ('outros', 'Outros')], db_default='outros', default='outros', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='notasfiscaissaida',
+            name='tipo_operacao',
+            field=models.CharField(choices=[('venda', 'Venda'), ('simples_remessa', 'Simples remessa'), ('compra', 'Compra'), ('locacao', 'Locação'), ('servico', 'Serviço'), ('devolucao', 'Devolução'), ('comodato', 'Comodato'), ('adiantamento', 'Adiantamento'), ('outros', 'Outros')], db_default='outros', default='outros', max_length=20, verbose_name='Tipo de Operação'),
+        ),
+        migrations.AddIndex(
+            model_name='notasfiscaisentrada',
+            index=models.Index(fields=['tipo_operacao', 'data_emissao'], name='notas_fisca_tipo_op_b3a2c3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notasfiscaisentrada',
+            index=models.Index(fields=['tipo_operacao', 'data_entrada'], name='notas_fisca_tipo_op_a6b82d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notasfiscaissaida',
+            index=models.Index(fields=['tipo_operacao', 'data'], name='notas_fisca_tipo_op_9d7ae0_idx'),
+        ),
+        migrations.RunPython(classificar_notas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:02
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0022_tipo_operacao_notas_fiscais'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(fields=['status', 'vencimento'], name='contas_paga_status_0e8d31_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contaspagar',
+            index=models.Index(models.F('status'), django.db.models.functions.comparison.Coalesce('data_pagamento', 'vencimento'), name='cp_status_data_efetiva_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contasreceber',
+            index=models.Index(fields=['status', 'vencimento'], name='contas_rece_status_49dd67_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contasreceber',
+            index=models.Index(models.F('status'), django.db.models.functions.comparison.Coalesce('data_pagamento', 'vencimento'), name='cr_status_data_efetiva_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimentacoesestoque',
+            index=models.Index(fields=['data_movimentacao'], name='movimentaco_data_mo_46c5e6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimentacoesestoque',
+            index=models.Index(fields=['produto', 'data_movimentacao'], name='movimentaco_produto_021ebe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimentacoesestoque',
+            index=models.Index(fields=['tipo_movimentacao', 'data_movimentacao'], name='movimentaco_tipo_mo_0eb902_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saldosestoque',
+            index=models.Index(condition=models.Q(('quantidade__gt', 0)), fields=['quantidade'], name='saldos_estoque_positivo_idx'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Saldo atual por produto com a regra dos snapshots de estoque: o último
+# reset ("000000") define o saldo; as movimentações com documento
+# estritamente posteriores a ele somam (tipo E) ou subtraem (tipo S).
+SELECT_SALDOS = """
+    WITH resets AS (
+        SELECT produto_id, data_movimentacao, quantidade,
+               ROW_NUMBER() OVER (PARTITION BY produto_id ORDER BY data_movimentacao DESC, id DESC) AS ordem
+        FROM movimentacoes_estoque
+        WHERE documento_referencia = '000000' AND produto_id IS NOT NULL
+    ),
+    ultimo_reset AS (
+        SELECT produto_id, data_movimentacao, quantidade FROM resets WHERE ordem = 1
+    ),
+    movimentos AS (
+        SELECT m.produto_id,
+               SUM(CASE WHEN t.tipo = 'E' THEN m.quantidade
+                        WHEN t.tipo = 'S' THEN -m.quantidade
+                        ELSE 0 END) AS saldo
+        FROM movimentacoes_estoque m
+        LEFT JOIN tipos_movimentacao_estoque t ON t.id = m.tipo_movimentacao_id
+        LEFT JOIN ultimo_reset r ON r.produto_id = m.produto_id
+        WHERE m.produto_id IS NOT NULL
+          AND m.documento_referencia IS NOT NULL
+          AND m.documento_referencia <> '000000'
+          AND (r.data_movimentacao IS NULL OR m.data_movimentacao > r.data_movimentacao)
+        GROUP BY m.produto_id
+    ),
+    resumo AS (
+        SELECT produto_id, MAX(data_movimentacao) AS ultima_movimentacao, COUNT(*) AS total_movimentacoes
+        FROM movimentacoes_estoque
+        WHERE produto_id IS NOT NULL
+        GROUP BY produto_id
+    )
+    SELECT res.produto_id,
+           p.codigo AS produto_codigo,
+           p.nome AS produto_nome,
+           p.preco_custo AS custo_unitario,
+           COALESCE(r.quantidade, 0) + COALESCE(mv.saldo, 0) AS saldo_atual,
+           res.ultima_movimentacao,
+           res.total_movimentacoes
+    FROM resumo res
+    INNER JOIN produtos p ON p.id = res.produto_id
+    LEFT JOIN ultimo_reset r ON r.produto_id = res.produto_id
+    LEFT JOIN movimentos mv ON mv.produto_id = res.produto_id
+"""
+
+
+def criar_view(apps, schema_editor):
+    """
+    View materializada no PostgreSQL (com o índice único exigido pelo REFRESH
+    CONCURRENTLY); nos demais bancos, uma view comum com as mesmas colunas.
+    Substitui a view criada por scripts/otimizar_performance.py.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP MATERIALIZED VIEW IF EXISTS view_saldos_estoque_rapido')
+        schema_editor.execute(f'CREATE MATERIALIZED VIEW view_saldos_estoque_rapido AS {SELECT_SALDOS} WITH DATA')
+        schema_editor.execute(
+            'CREATE UNIQUE INDEX view_saldos_estoque_rapido_produto_idx ON view_saldos_estoque_rapido (produto_id)'
+        )
+    else:
+        schema_editor.execute('DROP VIEW IF EXISTS view_saldos_estoque_rapido')
+        schema_editor.execute(f'CREATE VIEW view_saldos_estoque_rapido AS {SELECT_SALDOS}')
+
+
+def remover_view(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP MATERIALIZED VIEW IF EXISTS view_saldos_estoque_rapido')
+    else:
+        schema_editor.execute('DROP VIEW IF EXISTS view_saldos_estoque_rapido')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0023_indices_filtros_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoEstoqueRapido',
+            fields=[
+                ('produto', models.OneToOneField(db_column='produto_id', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='saldo_rapido', serialize=False, to='contas.produtos')),
+                ('produto_codigo', models.CharField(max_length=20, null=True)),
+                ('produto_nome', models.CharField(max_length=100, null=True)),
+                ('custo_unitario', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('saldo_atual', models.DecimalField(decimal_places=3, max_digits=14)),
+                ('ultima_movimentacao', models.DateTimeField(null=True)),
+                ('total_movimentacoes', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'view_saldos_estoque_rapido',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(criar_view, remover_view),
+    ]
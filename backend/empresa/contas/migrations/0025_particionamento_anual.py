@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:10
+
+import importlib
+
+from django.db import migrations
+
+
+def _view_saldos():
+    """criar_view/remover_view da 0024: a view materializada lê movimentacoes_estoque."""
+    return importlib.import_module('contas.migrations.0024_view_saldos_estoque_rapido')
+
+
+def particionar(apps, schema_editor):
+    """
+    Converte movimentacoes_estoque em tabela particionada por ano, com os
+    dados existentes. A cópia reescreve a tabela: em produção, rodar numa
+    janela sem sincronização.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from contas.services.particionamento_service import TABELAS_PARTICIONADAS, ParticionamentoService
+
+    _view_saldos().remover_view(apps, schema_editor)
+    with schema_editor.connection.cursor() as cursor:
+        for tabela in TABELAS_PARTICIONADAS:
+            ParticionamentoService.particionar(cursor, tabela)
+    _view_saldos().criar_view(apps, schema_editor)
+
+
+def desparticionar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from contas.services.particionamento_service import TABELAS_PARTICIONADAS, ParticionamentoService
+
+    _view_saldos().remover_view(apps, schema_editor)
+    with schema_editor.connection.cursor() as cursor:
+        for tabela in TABELAS_PARTICIONADAS:
+            ParticionamentoService.desparticionar(cursor, tabela)
+    _view_saldos().criar_view(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0024_view_saldos_estoque_rapido'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
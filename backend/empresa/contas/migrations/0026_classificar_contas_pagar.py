@@ -0,0 +1,55 @@
+from django.db import migrations
+from django.db.models import F
+from django.utils import timezone
+
+
+def classificar_contas(apps, schema_editor):
+    """
+    Preenche tipo_custo/categoria_custo das contas existentes com as regras do
+    serviço: sem classificação elas ficam fora do DRE e dos relatórios de custos.
+    """
+    from contas.services.classificacao_custos_service import ClassificacaoCustosService, VERSAO_REGRAS
+
+    ContasPagar = apps.get_model('contas', 'ContasPagar')
+    campos = ['tipo_custo', 'categoria_custo', 'versao_classificacao']
+    contas = ContasPagar.objects.filter(versao_classificacao__isnull=True).select_related('fornecedor').order_by()
+
+    alteradas, total = [], 0
+    for conta in contas.iterator(chunk_size=ClassificacaoCustosService.BATCH_SIZE):
+        fornecedor = conta.fornecedor
+        conta.tipo_custo, conta.categoria_custo = ClassificacaoCustosService.classificar(
+            fornecedor.nome if fornecedor else None,
+            fornecedor.tipo if fornecedor else None,
+            fornecedor.especificacao if fornecedor else None,
+            conta.historico,
+        )
+        conta.versao_classificacao = VERSAO_REGRAS
+        alteradas.append(conta)
+        if len(alteradas) >= ClassificacaoCustosService.BATCH_SIZE:
+            ContasPagar.objects.bulk_update(alteradas, campos)
+            total += len(alteradas)
+            alteradas = []
+    if alteradas:
+        ContasPagar.objects.bulk_update(alteradas, campos)
+        total += len(alteradas)
+    if not total:
+        return
+
+    # Relatórios em cache e meses do DRE gravados antes da classificação têm custos zerados
+    VersaoTabela = apps.get_model('contas', 'VersaoTabela')
+    if not VersaoTabela.objects.filter(tabela='contas_pagar').update(
+        versao=F('versao') + 1, atualizado_em=timezone.now()
+    ):
+        VersaoTabela.objects.create(tabela='contas_pagar', versao=1)
+    apps.get_model('contas', 'DREMensal').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0025_particionamento_anual'),
+    ]
+
+    operations = [
+        migrations.RunPython(classificar_contas, migrations.RunPython.noop),
+    ]
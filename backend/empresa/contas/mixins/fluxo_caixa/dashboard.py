@@ -4,7 +4,7 @@ import logging
 import traceback
 from dateutil.relativedelta import relativedelta
 from typing import Dict, Any, List
-from django.db.models import Sum, Avg, Count, F, Q, Case, When, DecimalField, Value, BooleanField
+from django.db.models import Sum, Avg, Count, F, Q, Value, BooleanField
 from django.db.models.functions import TruncDate, TruncMonth
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -12,6 +12,7 @@ from rest_framework.response import Response
 from contas.models.access import ContratosLocacao
 from contas.models.fluxo_caixa import FluxoCaixaLancamento
 from contas.services.fluxo_caixa_service import FluxoCaixaService
+from contas.services.saldo_mensal_service import SaldoMensalService
 # Configure logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.ERROR)
@@ -215,18 +216,8 @@ class DashboardMixin:
     
     def _obter_saldo_inicial(self, data):
         try:
-            lancamentos_anteriores = self.get_queryset().filter(data__lt=data)
-            
-            saldo_inicial = lancamentos_anteriores.aggregate(
-                saldo=Sum(
-                    Case(
-                        When(tipo='entrada', then='valor'),
-                        When(tipo='saida', then=F('valor') * -1),
-                        default=0,
-                        output_field=DecimalField()
-                    )
-                )
-            )['saldo'] or 0
+            movimento = SaldoMensalService.movimento_ate(data)
+            saldo_inicial = movimento['movimento_realizado'] + movimento['movimento_previsto']
             
             return float(saldo_inicial)
         
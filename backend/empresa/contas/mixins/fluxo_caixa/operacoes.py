@@ -7,6 +7,8 @@ from typing import List, Dict, Any
 import pandas as pd
 from datetime import datetime
 
+from contas.services.saldo_mensal_service import SaldoMensalService
+
 class FluxoCaixaOperacoesMixin:
     """Mixin para operações do fluxo de caixa"""
 
@@ -54,6 +56,7 @@ class FluxoCaixaOperacoesMixin:
 
             # Importa os lançamentos
             self.get_queryset().model.objects.bulk_create(lancamentos)
+            SaldoMensalService.invalidar(min((l.data for l in lancamentos), default=None))
 
             return Response({
                 'message': f'{len(lancamentos)} lançamentos importados com sucesso'
@@ -4,11 +4,10 @@ from dateutil.relativedelta import relativedelta
 from typing import Dict, Any, List
 from django.db.models import Sum, Avg, Count, F, Q, Case, When, DecimalField, Max
 from django.db.models.functions import ExtractMonth, ExtractYear, TruncDate
-from django.http import HttpResponse
 from rest_framework.decorators import action
 from rest_framework.response import Response
-import pandas as pd
-import io
+
+from contas.services.exportacao_service import FORMATO_DATA, FORMATO_MOEDA, Coluna, ExportacaoService, Planilha
 
 class ReportsMixin:
     """
@@ -35,16 +34,15 @@ class ReportsMixin:
                 data__range=[data_inicial, data_final]
             ).select_related('cliente', 'fornecedor')
 
+            # Exportação: linhas lidas direto do banco, sem montar o relatório
+            if formato in ('csv', 'excel'):
+                return ExportacaoService.resposta(
+                    formato, 'fluxo_caixa', self._planilhas_fluxo_caixa(lancamentos)
+                )
+
             # Gera relatório
             relatorio = self._gerar_relatorio_fluxo_caixa(lancamentos, data_inicial, data_final)
-
-            # Formata saída
-            if formato == 'csv':
-                return self._exportar_csv(relatorio, 'fluxo_caixa')
-            elif formato == 'excel':
-                return self._exportar_excel(relatorio, 'fluxo_caixa')
-            else:
-                return Response(relatorio)
+            return Response(relatorio)
 
         except Exception as e:
             return Response({'error': str(e)}, status=400)
@@ -122,12 +120,9 @@ class ReportsMixin:
             relatorio = self._gerar_relatorio_dre(lancamentos, data_inicial, data_final)
 
             # Formata saída
-            if formato == 'csv':
-                return self._exportar_csv(relatorio, 'dre')
-            elif formato == 'excel':
-                return self._exportar_excel(relatorio, 'dre')
-            else:
-                return Response(relatorio)
+            if formato in ('csv', 'excel'):
+                return ExportacaoService.resposta(formato, 'dre', self._planilhas_dre(relatorio))
+            return Response(relatorio)
 
         except Exception as e:
             return Response({'error': str(e)}, status=400)
@@ -230,12 +225,11 @@ class ReportsMixin:
             relatorio = self._gerar_relatorio_inadimplencia(lancamentos, data_base)
 
             # Formata saída
-            if formato == 'csv':
-                return self._exportar_csv(relatorio, 'inadimplencia')
-            elif formato == 'excel':
-                return self._exportar_excel(relatorio, 'inadimplencia')
-            else:
-                return Response(relatorio)
+            if formato in ('csv', 'excel'):
+                return ExportacaoService.resposta(
+                    formato, 'inadimplencia', self._planilhas_inadimplencia(relatorio)
+                )
+            return Response(relatorio)
 
         except Exception as e:
             return Response({'error': str(e)}, status=400)
@@ -290,34 +284,54 @@ class ReportsMixin:
             'por_faixa_atraso': faixas_atraso
         }
 
-    def _exportar_csv(self, dados, nome_arquivo):
-        """Exporta dados para CSV"""
-        # Converte dados para DataFrame
-        df = pd.DataFrame(dados)
-        
-        # Gera CSV
-        output = io.StringIO()
-        df.to_csv(output, index=False)
-        
-        # Prepara response
-        response = HttpResponse(output.getvalue(), content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}.csv"'
-        return response
-
-    def _exportar_excel(self, dados, nome_arquivo):
-        """Exporta dados para Excel"""
-        # Converte dados para DataFrame
-        df = pd.DataFrame(dados)
-        
-        # Gera Excel
-        output = io.BytesIO()
-        df.to_excel(output, index=False)
-        output.seek(0)
-        
-        # Prepara response
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}.xlsx"'
-        return response
\ No newline at end of file
+    def _planilhas_fluxo_caixa(self, lancamentos):
+        """Contas a receber e a pagar do período, uma aba cada, lidas em lotes"""
+        colunas = ['ID', Coluna('Data', FORMATO_DATA), 'Descrição', Coluna('Valor', FORMATO_MOEDA),
+                   'Categoria', 'Cliente/Fornecedor', 'Realizado']
+        return [
+            Planilha('Contas a Receber', colunas, ExportacaoService.linhas(
+                lancamentos.filter(tipo='entrada').order_by('data', 'id'),
+                'id', 'data', 'descricao', 'valor', 'categoria', 'cliente__nome', 'realizado'
+            )),
+            Planilha('Contas a Pagar', colunas, ExportacaoService.linhas(
+                lancamentos.filter(tipo='saida').order_by('data', 'id'),
+                'id', 'data', 'descricao', 'valor', 'categoria', 'fornecedor__nome', 'realizado'
+            )),
+        ]
+
+    def _planilhas_dre(self, relatorio):
+        """DRE em linhas (grupo, item, valor) e a análise por categoria"""
+        linhas = [
+            (grupo, item, valor)
+            for grupo in ('receitas', 'custos_despesas', 'resultados')
+            for item, valor in relatorio[grupo].items()
+        ]
+        return [
+            Planilha('DRE', ['Grupo', 'Item', 'Valor'], linhas),
+            Planilha(
+                'Categorias',
+                ['Categoria', Coluna('Receitas', FORMATO_MOEDA), Coluna('Custos', FORMATO_MOEDA)],
+                (
+                    (item['categoria'], item['receitas'], item['custos'])
+                    for item in relatorio['analise_categorias'].iterator(chunk_size=ExportacaoService.CHUNK_SIZE)
+                )
+            ),
+        ]
+
+    def _planilhas_inadimplencia(self, relatorio):
+        """Inadimplência por cliente e por faixa de atraso"""
+        return [
+            Planilha(
+                'Por Cliente',
+                ['Cliente', 'Nome', Coluna('Total', FORMATO_MOEDA), 'Quantidade', 'Maior Atraso (dias)'],
+                (
+                    (item['cliente'], item['nome'], item['total'], item['quantidade'], item['maior_atraso'])
+                    for item in relatorio['por_cliente']
+                )
+            ),
+            Planilha(
+                'Por Faixa de Atraso',
+                ['Faixa', Coluna('Total', FORMATO_MOEDA), 'Quantidade'],
+                ((faixa['faixa'], faixa['total'], faixa['quantidade']) for faixa in relatorio['por_faixa_atraso'])
+            ),
+        ]
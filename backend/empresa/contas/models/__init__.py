@@ -1,3 +1,3 @@
 # contas/models/__init__.py
 from .access import *
-from .fluxo_caixa import FluxoCaixaLancamento, SaldoDiario, ConfiguracaoFluxoCaixa
\ No newline at end of file
+from .fluxo_caixa import FluxoCaixaLancamento, SaldoDiario, SaldoMensalFluxoCaixa, ConfiguracaoFluxoCaixa
\ No newline at end of file
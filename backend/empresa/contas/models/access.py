@@ -1,7 +1,21 @@
 import datetime
 from django.db import models
+from django.db.models.functions import Coalesce
 from decimal import Decimal
 
+# Tipo de operação normalizado das notas fiscais (services/tipo_operacao_service.py)
+TIPOS_OPERACAO_NF = [
+    ('venda', 'Venda'),
+    ('simples_remessa', 'Simples remessa'),
+    ('compra', 'Compra'),
+    ('locacao', 'Locação'),
+    ('servico', 'Serviço'),
+    ('devolucao', 'Devolução'),
+    ('comodato', 'Comodato'),
+    ('adiantamento', 'Adiantamento'),
+    ('outros', 'Outros'),
+]
+
 class ContasBancarias(models.Model):
     banco = models.CharField(
         max_length=20,
@@ -107,8 +121,6 @@ class ContagensInventario(models.Model):
     def __str__(self):
         return f"Contagem {self.id}"
 
-from django.db import models
-from decimal import Decimal
 
 class ContasPagar(models.Model):
     STATUS_CHOICES = [
@@ -219,6 +231,25 @@ class ContasPagar(models.Model):
         null=True,
         blank=True
     )
+    # Classificação de custo (services/classificacao_custos_service.py)
+    tipo_custo = models.CharField(
+        max_length=10,
+        verbose_name='Tipo de Custo',
+        null=True,
+        blank=True
+    )
+    categoria_custo = models.CharField(
+        max_length=255,
+        verbose_name='Categoria de Custo',
+        null=True,
+        blank=True
+    )
+    versao_classificacao = models.CharField(
+        max_length=12,
+        verbose_name='Versão das Regras de Classificação',
+        null=True,
+        blank=True
+    )
 
     class Meta:
         db_table = 'contas_pagar'
@@ -231,6 +262,12 @@ class ContasPagar(models.Model):
             models.Index(fields=['fornecedor']),
             models.Index(fields=['status']),
             models.Index(fields=['data_pagamento']),
+            models.Index(fields=['tipo_custo', 'categoria_custo']),
+            models.Index(fields=['status', 'vencimento']),
+            # Data efetiva (pagamento ou vencimento) dos relatórios de realizado
+            models.Index(
+                models.F('status'), Coalesce('data_pagamento', 'vencimento'), name='cp_status_data_efetiva_idx'
+            ),
         ]
 
     def __str__(self):
@@ -461,6 +498,10 @@ class ContasReceber(models.Model):
             models.Index(fields=['data_pagamento']),
             models.Index(fields=['nosso_numero']),
             models.Index(fields=['documento']),
+            models.Index(fields=['status', 'vencimento']),
+            models.Index(
+                models.F('status'), Coalesce('data_pagamento', 'vencimento'), name='cr_status_data_efetiva_idx'
+            ),
         ]
 
     def __str__(self):
@@ -621,6 +662,11 @@ class MovimentacoesEstoque(models.Model):
 
     class Meta:
         db_table = 'movimentacoes_estoque'
+        indexes = [
+            models.Index(fields=['data_movimentacao']),
+            models.Index(fields=['produto', 'data_movimentacao']),
+            models.Index(fields=['tipo_movimentacao', 'data_movimentacao']),
+        ]
 
     def __str__(self):
         return f"Movimentação {self.id}"
@@ -731,6 +777,11 @@ class SaldosEstoque(models.Model):
 
     class Meta:
         db_table = 'saldos_estoque'
+        indexes = [
+            models.Index(
+                fields=['quantidade'], condition=models.Q(quantidade__gt=0), name='saldos_estoque_positivo_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"Saldo {self.produto_id} - {self.local_id}"
@@ -894,8 +945,6 @@ class Inventarios(models.Model):
     def __str__(self):
         return f"{self.codigo} - {self.status}"
 
-from django.db import models
-from decimal import Decimal
 
 class NotasFiscaisEntrada(models.Model):
     # Campos chave e relacionamentos
@@ -995,6 +1044,9 @@ class NotasFiscaisEntrada(models.Model):
     condicoes_pagamento = models.CharField(max_length=100, null=True, blank=True)
     parcelas = models.CharField(max_length=100, null=True, blank=True)
     operacao = models.CharField(max_length=50, null=True, blank=True)
+    tipo_operacao = models.CharField(
+        max_length=20, choices=TIPOS_OPERACAO_NF, default='outros', db_default='outros'
+    )
 
     # Informações adicionais
     comprador = models.CharField(max_length=100, null=True, blank=True)
@@ -1009,6 +1061,8 @@ class NotasFiscaisEntrada(models.Model):
         indexes = [
             models.Index(fields=['data_emissao']),
             models.Index(fields=['data_entrada']),
+            models.Index(fields=['tipo_operacao', 'data_emissao']),
+            models.Index(fields=['tipo_operacao', 'data_entrada']),
             models.Index(fields=['fornecedor', 'numero_nota']),
             models.Index(fields=['id']),  # Adicionado índice explícito no id
         ]
@@ -1439,6 +1493,13 @@ class NotasFiscaisSaida(models.Model):
         null=True,
         blank=True
     )
+    tipo_operacao = models.CharField(
+        max_length=20,
+        choices=TIPOS_OPERACAO_NF,
+        verbose_name='Tipo de Operação',
+        default='outros',
+        db_default='outros'
+    )
     cfop = models.CharField(
         max_length=10,
         verbose_name='CFOP',
@@ -1500,6 +1561,7 @@ class NotasFiscaisSaida(models.Model):
         indexes = [
             models.Index(fields=['numero_nota']),
             models.Index(fields=['data']),
+            models.Index(fields=['tipo_operacao', 'data']),
             models.Index(fields=['cliente']),
             models.Index(fields=['vendedor']),
         ]
@@ -1983,6 +2045,127 @@ class EstoqueInicial(models.Model):
         super().save(*args, **kwargs)
 
 
+class EstoqueSnapshot(models.Model):
+    """
+    Posição de estoque de um produto ao final de um dia.
+
+    Uma linha é gravada apenas nos dias em que o produto teve movimentação;
+    a posição em qualquer data é a do snapshot mais recente até ela.
+    Mantido pelo comando snapshot_estoque.
+    """
+    produto = models.ForeignKey('Produtos', on_delete=models.CASCADE, related_name='snapshots_estoque')
+    data = models.DateField()
+    quantidade = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal('0'))
+    custo_unitario = models.DecimalField(max_digits=10, decimal_places=4, null=True, blank=True)
+    data_calculo = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'estoque_snapshot'
+        unique_together = ['produto', 'data']
+        indexes = [
+            models.Index(fields=['data']),
+        ]
+
+    def __str__(self):
+        return f"Snapshot {self.produto_id} - {self.data}: {self.quantidade}"
+
+
+class SaldoEstoqueRapido(models.Model):
+    """
+    Saldo atual de cada produto com movimentação, lido da view materializada
+    view_saldos_estoque_rapido (migração 0024).
+
+    Mesma regra dos snapshots: o último reset ("000000") define o saldo e as
+    movimentações posteriores somam ou subtraem conforme o tipo. A view é
+    atualizada ao final da sincronização do estoque (SaldoEstoqueService).
+    """
+    produto = models.OneToOneField(
+        'Produtos', on_delete=models.DO_NOTHING, primary_key=True, db_column='produto_id',
+        related_name='saldo_rapido'
+    )
+    produto_codigo = models.CharField(max_length=20, null=True)
+    produto_nome = models.CharField(max_length=100, null=True)
+    custo_unitario = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    saldo_atual = models.DecimalField(max_digits=14, decimal_places=3)
+    ultima_movimentacao = models.DateTimeField(null=True)
+    total_movimentacoes = models.IntegerField()
+
+    class Meta:
+        managed = False
+        db_table = 'view_saldos_estoque_rapido'
+
+    def __str__(self):
+        return f"Saldo {self.produto_id}: {self.saldo_atual}"
+
+
+class DREMensal(models.Model):
+    """
+    Agregado do DRE de um mês fechado (sem impostos), com o detalhamento de
+    custos por categoria.
+
+    A linha é apagada quando NFs ou contas a pagar do mês mudam e recalculada
+    na próxima consulta; o mês corrente nunca é gravado.
+    Mantido por DREMensalService e pelo comando dre_mensal.
+    """
+    mes = models.DateField(unique=True)  # Primeiro dia do mês
+    faturamento_bruto = models.DecimalField(max_digits=18, decimal_places=4, default=Decimal('0'))
+    faturamento_vendas = models.DecimalField(max_digits=18, decimal_places=4, default=Decimal('0'))
+    faturamento_servicos_contratos = models.DecimalField(max_digits=18, decimal_places=4, default=Decimal('0'))
+    faturamento_servicos_avulsos = models.DecimalField(max_digits=18, decimal_places=4, default=Decimal('0'))
+    cmv = models.DecimalField(max_digits=18, decimal_places=4, default=Decimal('0'))
+    cmv_vendas = models.DecimalField(max_digits=18, decimal_places=4, default=Decimal('0'))
+    cmv_contratos = models.DecimalField(max_digits=18, decimal_places=4, default=Decimal('0'))
+    cmv_outros = models.DecimalField(max_digits=18, decimal_places=4, default=Decimal('0'))
+    custos_fixos = models.DecimalField(max_digits=18, decimal_places=4, default=Decimal('0'))
+    custos_variaveis = models.DecimalField(max_digits=18, decimal_places=4, default=Decimal('0'))
+    detalhe_custos_fixos = models.JSONField(default=list)  # [{'categoria', 'valor'}]
+    detalhe_custos_variaveis = models.JSONField(default=list)
+    data_calculo = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'dre_mensal'
+        ordering = ['mes']
+
+    def __str__(self):
+        return f"DRE {self.mes:%m/%Y}"
+
+
+class VersaoTabela(models.Model):
+    """
+    Contador de alterações por tabela, usado na chave do cache de relatórios.
+
+    Incrementado pelos sinais de save/delete dos modelos rastreados e pelo
+    bulk_loader da sincronização (no mesmo commit da carga).
+    """
+    tabela = models.CharField(max_length=100, primary_key=True)  # db_table do modelo
+    versao = models.BigIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'versoes_tabelas'
+
+    def __str__(self):
+        return f"{self.tabela} v{self.versao}"
+
+
+class PerfilEndpoint(models.Model):
+    """
+    Amostras recentes de desempenho de um endpoint (nome da URL), gravadas
+    periodicamente pelo PerfilRequisicoesMiddleware de cada processo.
+    """
+    url_nome = models.CharField(max_length=200, primary_key=True)
+    requisicoes = models.BigIntegerField(default=0)
+    amostras = models.JSONField(default=list)  # [[tempo_ms, consultas, tempo_db_ms, tamanho_bytes], ...]
+    repeticoes = models.JSONField(default=dict)  # {sql: maior número de execuções numa requisição}
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'perfil_endpoints'
+
+    def __str__(self):
+        return f"{self.url_nome} ({self.requisicoes} requisições)"
+
+
 class NotasFiscaisConsumo(models.Model):
     id = models.AutoField(primary_key=True)
     numero_nota = models.CharField(max_length=20, null=True, blank=True)
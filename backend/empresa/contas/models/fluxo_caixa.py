@@ -56,6 +56,8 @@ class FluxoCaixaLancamento(models.Model):
     
     fonte_tipo = models.CharField(max_length=20, choices=FONTE_CHOICES)
     fonte_id = models.IntegerField(null=True, blank=True)
+    # md5 do conteúdo da origem na última sincronização (SincronizacaoFluxoService)
+    hash_origem = models.CharField(max_length=32, null=True, blank=True)
     
     data_realizacao = models.DateTimeField(null=True, blank=True)
     data_estorno = models.DateTimeField(null=True, blank=True)
@@ -109,6 +111,13 @@ class FluxoCaixaLancamento(models.Model):
             models.Index(fields=['realizado']),
             models.Index(fields=['cliente'])
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fonte_tipo', 'fonte_id'],
+                condition=models.Q(fonte_tipo__in=['contas_pagar', 'contas_receber']),
+                name='uniq_lancamento_conta_sincronizada',
+            ),
+        ]
 
     def clean(self):
         if self.data_realizacao and self.data_realizacao.date() < self.data:
@@ -241,6 +250,25 @@ class SaldoDiario(models.Model):
     def __str__(self):
         return f"Saldo do dia {self.data}"
 
+class SaldoMensalFluxoCaixa(models.Model):
+    """
+    Ponto de controle do saldo acumulado: soma (entradas - saídas) de todos
+    os lançamentos com data anterior ao mês, separada em realizados e
+    previstos. Apagado quando um lançamento anterior ao mês muda e
+    recalculado na próxima consulta. Mantido por SaldoMensalService.
+    """
+    mes = models.DateField(unique=True)  # Primeiro dia do mês
+    movimento_realizado = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0'))
+    movimento_previsto = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0'))
+    data_calculo = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'saldos_mensais_fluxo_caixa'
+        ordering = ['mes']
+
+    def __str__(self):
+        return f"Saldo acumulado até {self.mes:%m/%Y}"
+
 class ConfiguracaoFluxoCaixa(models.Model):
     """
     Configurações gerais do fluxo de caixa
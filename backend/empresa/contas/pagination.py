@@ -0,0 +1,25 @@
+# backend/empresa/contas/pagination.py
+"""
+Paginação padrão das listagens dos ViewSets do router.
+
+Keyset (cursor): a próxima página é buscada com WHERE id < último id visto
+ORDER BY id DESC LIMIT n, usando o índice da chave primária, então o custo de
+cada página não depende da posição nem do tamanho da tabela (sem OFFSET nem
+COUNT(*)). Um ViewSet pode trocar a ordem com `ordenacao_paginacao`, que deve
+terminar em uma coluna única e indexada.
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        ordenacao = getattr(view, 'ordenacao_paginacao', None)
+        if ordenacao:
+            return tuple(ordenacao)
+        return super().get_ordering(request, queryset, view)
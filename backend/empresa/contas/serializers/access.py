@@ -4,22 +4,40 @@ from rest_framework import serializers
 from ..models.access import *
 
 
-class CategoriaSerializer(serializers.ModelSerializer):
+class CamposSelecionaveisSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer com seleção de campos nas leituras: ?fields=id,nome
+    devolve só esses campos (nomes desconhecidos são ignorados).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        campos = request.query_params.get('fields')
+        if campos:
+            pedidos = {campo.strip() for campo in campos.split(',')}
+            for nome in set(self.fields) - pedidos:
+                self.fields.pop(nome)
+
+
+class CategoriaSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Categorias
         fields = ['id', 'nome']
         
-class CategoriasProdutosSerializer(serializers.ModelSerializer):
+class CategoriasProdutosSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = CategoriasProdutos
         fields = '__all__'
         
-class ClienteSerializer(serializers.ModelSerializer):
+class ClienteSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Clientes
         fields = ['id', 'nome']
 
-class ContratoLocacaoSerializer(serializers.ModelSerializer):
+class ContratoLocacaoSerializer(CamposSelecionaveisSerializer):
     cliente = ClienteSerializer(read_only=True)
     
     class Meta:
@@ -33,16 +51,16 @@ class ContratoLocacaoSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)
         # Garante que valorpacela seja sempre um número decimal válido
-        if data['valorpacela'] == '""' or data['valorpacela'] is None:
+        if 'valorpacela' in data and (data['valorpacela'] == '""' or data['valorpacela'] is None):
             data['valorpacela'] = '0.00'
         return data
         
-class ContagensInventarioSerializer(serializers.ModelSerializer):
+class ContagensInventarioSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = ContagensInventario
         fields = '__all__'
         
-class ContasReceberSerializer(serializers.ModelSerializer):
+class ContasReceberSerializer(CamposSelecionaveisSerializer):
     cliente_nome = serializers.CharField(source='cliente.nome', read_only=True)
 
     class Meta:
@@ -53,7 +71,7 @@ class ContasReceberSerializer(serializers.ModelSerializer):
         ]
         depth = 1  # Para incluir os dados do cliente/fornecedor
 
-class ContasPagarSerializer(serializers.ModelSerializer):
+class ContasPagarSerializer(CamposSelecionaveisSerializer):
     fornecedor_nome = serializers.CharField(source='fornecedor.nome', read_only=True)
     fornecedor_tipo = serializers.CharField(source='fornecedor.tipo', read_only=True)
     fornecedor_especificacao = serializers.CharField(source='fornecedor.especificacao', read_only=True)
@@ -66,7 +84,7 @@ class ContasPagarSerializer(serializers.ModelSerializer):
         ]
         depth = 1
         
-class ContratosLocacaoSerializer(serializers.ModelSerializer):
+class ContratosLocacaoSerializer(CamposSelecionaveisSerializer):
     cliente = ClienteSerializer()
     
 
@@ -74,144 +92,144 @@ class ContratosLocacaoSerializer(serializers.ModelSerializer):
         model = ContratosLocacao
         fields = '__all__'
         
-class CustosAdicionaisFreteSerializer(serializers.ModelSerializer):
+class CustosAdicionaisFreteSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = CustosAdicionaisFrete
         fields = '__all__'
         
-class DespesasSerializer(serializers.ModelSerializer):
+class DespesasSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Despesas
         fields = '__all__'
         
-class EmpresasSerializer(serializers.ModelSerializer):
+class EmpresasSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Empresas
         fields = '__all__'
         
-class FornecedoresSerializer(serializers.ModelSerializer):
+class FornecedoresSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Fornecedores
         fields = '__all__'
         
-class FretesSerializer(serializers.ModelSerializer):
+class FretesSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Fretes
         fields = '__all__'
         
-class FuncionariosSerializer(serializers.ModelSerializer):
+class FuncionariosSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Funcionarios
         fields = '__all__'
         
-class GruposSerializer(serializers.ModelSerializer):
+class GruposSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Grupos
         fields = '__all__'
         
-class HistoricoRastreamentoSerializer(serializers.ModelSerializer):
+class HistoricoRastreamentoSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = HistoricoRastreamento
         fields = '__all__'
         
-class InventariosSerializer(serializers.ModelSerializer):
+class InventariosSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Inventarios
         fields = '__all__'
         
         
-class ItensNfEntradaSerializer(serializers.ModelSerializer):
+class ItensNfEntradaSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = ItensNfEntrada
         fields = '__all__'
         
 
         
-class LocaisEstoqueSerializer(serializers.ModelSerializer):
+class LocaisEstoqueSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = LocaisEstoque
         fields = '__all__'
         
-class LotesSerializer(serializers.ModelSerializer):
+class LotesSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Lotes
         fields = '__all__'
         
-class MarcasSerializer(serializers.ModelSerializer):
+class MarcasSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Marcas
         fields = '__all__'
         
-class MovimentacoesEstoqueSerializer(serializers.ModelSerializer):
+class MovimentacoesEstoqueSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = MovimentacoesEstoque
         fields = '__all__'
         
-class NotasFiscaisEntradaSerializer(serializers.ModelSerializer):
+class NotasFiscaisEntradaSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = NotasFiscaisEntrada
         fields = '__all__'
         
-class NotasFiscaisSaidaSerializer(serializers.ModelSerializer):
+class NotasFiscaisSaidaSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = NotasFiscaisSaida
         fields = '__all__'
         
-class OcorrenciasFreteSerializer(serializers.ModelSerializer):
+class OcorrenciasFreteSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = OcorrenciasFrete
         fields = '__all__'
         
-class PagamentosFuncionariosSerializer(serializers.ModelSerializer):
+class PagamentosFuncionariosSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = PagamentosFuncionarios
         fields = '__all__'
         
-class PosicoesEstoqueSerializer(serializers.ModelSerializer):
+class PosicoesEstoqueSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = PosicoesEstoque
         fields = '__all__'
         
-class ProdutoSerializer(serializers.ModelSerializer):
+class ProdutoSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Produtos
         fields = ['id', 'nome', 'codigo']
 
-class ItensNfSaidaSerializer(serializers.ModelSerializer):
+class ItensNfSaidaSerializer(CamposSelecionaveisSerializer):
     produto = ProdutoSerializer(read_only=True)  # Inclui todos os dados do produto
 
     class Meta:
         model = ItensNfSaida
         fields = '__all__'
 
-class ItemContratoLocacaoSerializer(serializers.ModelSerializer):
+class ItemContratoLocacaoSerializer(CamposSelecionaveisSerializer):
     categoria = CategoriaSerializer(read_only=True)
 
     class Meta:
         model = ItensContratoLocacao
         fields = ['id', 'numeroserie', 'modelo', 'inicio','fim', 'categoria']
         
-class RegioesEntregaSerializer(serializers.ModelSerializer):
+class RegioesEntregaSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = RegioesEntrega
         fields = '__all__'
         
-class SaldosEstoqueSerializer(serializers.ModelSerializer):
+class SaldosEstoqueSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = SaldosEstoque
         fields = '__all__'
         
-class TabelasFreteSerializer(serializers.ModelSerializer):
+class TabelasFreteSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = TabelasFrete
         fields = '__all__'
         
-class TiposMovimentacaoEstoqueSerializer(serializers.ModelSerializer):
+class TiposMovimentacaoEstoqueSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = TiposMovimentacaoEstoque
         fields = '__all__'
         
-class TransportadorasSerializer(serializers.ModelSerializer):
+class TransportadorasSerializer(CamposSelecionaveisSerializer):
     class Meta:
         model = Transportadoras
         fields = '__all__'
@@ -0,0 +1,117 @@
+# backend/empresa/contas/services/agrupamento_temporal_service.py
+"""
+Agrupamento de lançamentos por dia, semana ou mês.
+
+Os totais são calculados no banco: uma única consulta com TruncDay /
+TruncWeek / TruncMonth e somas condicionais (tipo, realizado), em vez de
+percorrer os lançamentos para cada dia do período. Para telas que precisam
+da lista de movimentos de cada período há agrupar_itens, que distribui os
+itens nos períodos numa única passada.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Count, DateField, Q, QuerySet, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+DIA = 'dia'
+SEMANA = 'semana'  # semanas começam na segunda-feira
+MES = 'mes'
+
+TRUNCAGENS = {DIA: TruncDay, SEMANA: TruncWeek, MES: TruncMonth}
+
+CAMPOS_FLUXO = ['entradas', 'saidas', 'entradas_realizadas', 'saidas_realizadas']
+
+
+class AgrupamentoTemporalService:
+    """Totais e listas de lançamentos por período."""
+
+    @staticmethod
+    def inicio_periodo(data, periodo: str) -> date:
+        """Primeiro dia do período (dia, segunda-feira da semana ou dia 1 do mês)."""
+        if isinstance(data, datetime):
+            data = data.date()
+        if periodo == SEMANA:
+            return data - timedelta(days=data.weekday())
+        if periodo == MES:
+            return data.replace(day=1)
+        return data
+
+    @staticmethod
+    def periodos(data_inicial: date, data_final: date, periodo: str) -> Iterator[date]:
+        """Início de cada período entre as datas, inclusive os sem movimento."""
+        atual = AgrupamentoTemporalService.inicio_periodo(data_inicial, periodo)
+        passo = {DIA: relativedelta(days=1), SEMANA: relativedelta(weeks=1), MES: relativedelta(months=1)}[periodo]
+        while atual <= data_final:
+            yield atual
+            atual += passo
+
+    @staticmethod
+    def agregar(queryset: QuerySet, campo_data: str, periodo: str = DIA, output_field=None,
+                **agregados) -> Dict[date, dict]:
+        """
+        {início do período: {agregado: valor}} em uma consulta
+        (GROUP BY da data truncada). Os agregados são expressões do ORM; as
+        chaves são date, ou datetime com output_field=DateTimeField().
+        """
+        truncar = TRUNCAGENS[periodo]
+        linhas = (
+            queryset
+            .annotate(inicio_periodo=truncar(campo_data, output_field=output_field or DateField()))
+            .values('inicio_periodo')
+            .annotate(**agregados)
+            .order_by('inicio_periodo')
+        )
+        return {linha.pop('inicio_periodo'): linha for linha in linhas}
+
+    @staticmethod
+    def agregados_fluxo(campo_valor: str = 'valor') -> Dict[str, object]:
+        """Somas de entradas/saídas (total e realizadas) e quantidade de lançamentos."""
+        return {
+            'entradas': Sum(campo_valor, filter=Q(tipo='entrada')),
+            'saidas': Sum(campo_valor, filter=Q(tipo='saida')),
+            'entradas_realizadas': Sum(campo_valor, filter=Q(tipo='entrada', realizado=True)),
+            'saidas_realizadas': Sum(campo_valor, filter=Q(tipo='saida', realizado=True)),
+            'quantidade': Count('id'),
+        }
+
+    @staticmethod
+    def _sem_nulos(totais: dict) -> dict:
+        for campo in CAMPOS_FLUXO:
+            totais[campo] = totais.get(campo) or Decimal('0')
+        return totais
+
+    @staticmethod
+    def totais_fluxo(queryset: QuerySet) -> dict:
+        """Totais de entradas/saídas (realizadas e previstas) do queryset em uma consulta."""
+        return AgrupamentoTemporalService._sem_nulos(
+            queryset.aggregate(**AgrupamentoTemporalService.agregados_fluxo())
+        )
+
+    @staticmethod
+    def fluxo_por_periodo(queryset: QuerySet, data_inicial: date, data_final: date,
+                          periodo: str = DIA, campo_data: str = 'data') -> Dict[date, dict]:
+        """
+        Totais de fluxo de cada período entre as datas (períodos sem lançamento
+        vêm zerados), na ordem cronológica.
+        """
+        totais = AgrupamentoTemporalService.agregar(
+            queryset, campo_data, periodo, **AgrupamentoTemporalService.agregados_fluxo()
+        )
+        vazio = {'quantidade': 0}
+        return {
+            inicio: AgrupamentoTemporalService._sem_nulos(dict(totais.get(inicio, vazio)))
+            for inicio in AgrupamentoTemporalService.periodos(data_inicial, data_final, periodo)
+        }
+
+    @staticmethod
+    def agrupar_itens(itens: Iterable, obter_data: Callable, periodo: str = DIA) -> Dict[date, List]:
+        """Distribui os itens (ex.: movimentos para listas de detalhe) nos períodos, numa passada."""
+        grupos = defaultdict(list)
+        for item in itens:
+            grupos[AgrupamentoTemporalService.inicio_periodo(obter_data(item), periodo)].append(item)
+        return grupos
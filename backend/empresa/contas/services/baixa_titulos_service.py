@@ -0,0 +1,136 @@
+# backend/empresa/contas/services/baixa_titulos_service.py
+"""
+Baixa e estorno de títulos (contas a pagar/receber) em lote.
+
+Em vez de um save() por título (com os signals de cada um), os títulos são
+atualizados num único UPDATE, os lançamentos do fluxo de caixa das contas
+num segundo, e os saldos diários são recalculados uma vez a partir da
+menor data afetada. O que os signals fariam em cada save é feito uma vez
+para o lote: versão das tabelas do cache de relatórios, DRE mensal dos
+meses envolvidos e pontos de controle do saldo.
+"""
+
+import logging
+from datetime import datetime, time
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import F, Min, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ..models.access import ContasPagar, ContasReceber
+from ..models.fluxo_caixa import FluxoCaixaLancamento
+from .cache_relatorios_service import CacheRelatoriosService
+from .dre_mensal_service import DREMensalService
+from .fluxo_caixa_service import FluxoCaixaService
+from .saldo_mensal_service import SaldoMensalService
+
+logger = logging.getLogger(__name__)
+
+# fonte_tipo dos lançamentos de cada modelo (signals/fluxo_caixa.py e sincronização)
+FONTES_LANCAMENTO = {
+    ContasPagar: ['conta_pagar', 'contas_pagar'],
+    ContasReceber: ['conta_receber', 'contas_receber'],
+}
+
+# Campo com o valor pago/recebido, base do valor_total_pago calculado em clean()
+CAMPO_VALOR_PAGO = {
+    ContasPagar: 'valor_pago',
+    ContasReceber: 'recebido',
+}
+
+ZERO = Value(Decimal('0.00'))
+
+
+class BaixaTitulosService:
+    """Baixa e estorno de títulos com número fixo de consultas."""
+
+    @staticmethod
+    def _como_datetime(valor) -> datetime:
+        """Aceita datetime, date ou texto ISO; datas viram meia-noite no fuso local."""
+        if isinstance(valor, str):
+            valor = parse_datetime(valor) or parse_date(valor)
+        if valor is None:
+            raise ValueError("Data de pagamento inválida")
+        if not isinstance(valor, datetime):
+            valor = datetime.combine(valor, time.min)
+        return timezone.make_aware(valor) if timezone.is_naive(valor) else valor
+
+    @staticmethod
+    def _valor_total_pago(modelo, valor_pago):
+        """Mesmo cálculo de clean(): valor pago + juros + tarifas (- desconto nos recebimentos)."""
+        total = Value(Decimal(str(valor_pago))) + Coalesce(F('juros'), ZERO) + Coalesce(F('tarifas'), ZERO)
+        if modelo is ContasReceber:
+            total = total - Coalesce(F('desconto'), ZERO)
+        return total
+
+    @staticmethod
+    def _atualizar(modelo, ids: Iterable[int], status_atual: str, campos: dict,
+                   campos_lancamento: dict, nova_data: Optional[datetime]) -> List[int]:
+        with transaction.atomic():
+            titulos = list(
+                modelo.objects.select_for_update()
+                .filter(id__in=list(ids), status=status_atual)
+                .values_list('id', 'data_pagamento', 'vencimento')
+            )
+            if not titulos:
+                return []
+            ids_titulos = [titulo_id for titulo_id, _, _ in titulos]
+
+            modelo.objects.filter(id__in=ids_titulos).update(**campos)
+
+            lancamentos = FluxoCaixaLancamento.objects.filter(
+                fonte_tipo__in=FONTES_LANCAMENTO[modelo], fonte_id__in=ids_titulos
+            )
+            desde = lancamentos.aggregate(desde=Min('data'))['desde']
+            lancamentos.update(**campos_lancamento)
+
+            if desde:
+                FluxoCaixaService.recalcular_saldos_diarios(desde=desde)
+                SaldoMensalService.invalidar(desde)
+
+            CacheRelatoriosService.incrementar(modelo._meta.db_table)
+            if modelo is ContasPagar:
+                # O DRE usa a data de pagamento (ou o vencimento) das contas a pagar
+                datas = [pagamento or vencimento for _, pagamento, vencimento in titulos] + [nova_data]
+                datas = [data for data in datas if data is not None]
+                if datas:
+                    DREMensalService.invalidar(min(datas), max(datas))
+
+        logger.info(f"{modelo.__name__}: {len(ids_titulos)} títulos atualizados em lote ({campos.get('status')})")
+        return ids_titulos
+
+    @staticmethod
+    def baixar(modelo, ids: Iterable[int], data_pagamento, forma_pagamento: str, valor_pago) -> List[int]:
+        """
+        Baixa os títulos em aberto entre `ids` e marca seus lançamentos como
+        realizados. Retorna os ids baixados.
+        """
+        data_pagamento = BaixaTitulosService._como_datetime(data_pagamento)
+        campos = {
+            'status': 'P',
+            'data_pagamento': data_pagamento,
+            'forma_pagamento': forma_pagamento,
+            CAMPO_VALOR_PAGO[modelo]: Decimal(str(valor_pago)),
+            'valor_total_pago': BaixaTitulosService._valor_total_pago(modelo, valor_pago),
+        }
+        campos_lancamento = {'realizado': True, 'data_realizacao': data_pagamento}
+        return BaixaTitulosService._atualizar(modelo, ids, 'A', campos, campos_lancamento, data_pagamento)
+
+    @staticmethod
+    def estornar(modelo, ids: Iterable[int]) -> List[int]:
+        """
+        Estorna a baixa dos títulos pagos entre `ids` e volta seus
+        lançamentos para previstos. Retorna os ids estornados.
+        """
+        campos = {
+            'status': 'A',
+            'data_pagamento': None,
+            CAMPO_VALOR_PAGO[modelo]: Decimal('0.00'),
+            'valor_total_pago': BaixaTitulosService._valor_total_pago(modelo, Decimal('0.00')),
+        }
+        campos_lancamento = {'realizado': False, 'data_realizacao': None}
+        return BaixaTitulosService._atualizar(modelo, ids, 'P', campos, campos_lancamento, None)
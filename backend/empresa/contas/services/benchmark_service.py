@@ -0,0 +1,173 @@
+# backend/empresa/contas/services/benchmark_service.py
+"""
+Benchmark dos endpoints mais pesados.
+
+Cada cenário é uma requisição GET a um endpoint com os parâmetros derivados
+do período medido. As requisições passam pela pilha completa do Django
+(test Client, middlewares incluídos); o cache de relatórios é limpo antes de
+cada repetição, salvo se pedido o contrário, para medir o cálculo e não a
+leitura do cache. Para cada cenário ficam a mediana, o p95 e o mínimo do
+tempo, o número de consultas e o tamanho da resposta.
+
+Os resultados podem ser gravados como baseline (JSON) e comparados com uma
+execução posterior: tempo acima da tolerância ou mais consultas que a
+baseline contam como regressão.
+"""
+
+import json
+import logging
+import statistics
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache_relatorios_service import ALIAS_CACHE
+from .perfil_requisicoes_service import percentil
+
+logger = logging.getLogger(__name__)
+
+# nome do cenário: (nome da URL, parâmetros a partir de (data_inicial, data_final))
+CENARIOS = {
+    'estoque_atual': (
+        'estoque-controle-estoque-atual',
+        lambda inicio, fim: {'data': fim.isoformat(), 'limite': 500},
+    ),
+    'movimentacoes_periodo': (
+        'estoque-controle-movimentacoes-periodo',
+        lambda inicio, fim: {'data_inicio': inicio.isoformat(), 'data_fim': fim.isoformat()},
+    ),
+    'dre': (
+        'dre',
+        lambda inicio, fim: {'data_inicio': inicio.isoformat(), 'data_fim': fim.isoformat()},
+    ),
+    'resumo_mensal': (
+        'fluxo-caixa-realizado-resumo-mensal',
+        lambda inicio, fim: {'data_inicio': inicio.isoformat(), 'data_fim': fim.isoformat()},
+    ),
+    'suprimentos_por_contrato': (
+        'suprimentos-por-contrato',
+        lambda inicio, fim: {'data_inicial': inicio.isoformat(), 'data_final': fim.isoformat()},
+    ),
+    'contas_nao_pagas_por_data_corte': (
+        'contas-nao-pagas-por-data-corte',
+        lambda inicio, fim: {'data_corte': fim.isoformat()},
+    ),
+}
+
+TOLERANCIA_PADRAO = 0.20  # Variação de tempo (mediana) aceita em relação à baseline
+CAMINHO_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+def _host() -> str:
+    """Primeiro host aceito por ALLOWED_HOSTS, para o Client não receber 400."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+class BenchmarkService:
+    """Execução dos cenários, baseline e comparação."""
+
+    @staticmethod
+    def executar(data_inicial: date, data_final: date, repeticoes: int = 5,
+                 cenarios: Optional[Iterable[str]] = None, usar_cache: bool = False) -> Dict[str, dict]:
+        """
+        Mede cada cenário `repeticoes` vezes, depois de uma execução de
+        aquecimento que não entra na conta. Retorna {cenário: medidas}.
+        """
+        cenarios = list(cenarios or CENARIOS)
+        desconhecidos = [nome for nome in cenarios if nome not in CENARIOS]
+        if desconhecidos:
+            raise ValueError(f"Cenários desconhecidos: {', '.join(desconhecidos)}. Use {', '.join(CENARIOS)}")
+
+        client = Client(HTTP_HOST=_host())
+        cache = caches[ALIAS_CACHE]
+        resultados = {}
+        for nome in cenarios:
+            url_nome, parametros = CENARIOS[nome]
+            url = reverse(url_nome)
+            parametros = parametros(data_inicial, data_final)
+
+            client.get(url, parametros)
+            tempos, consultas = [], []
+            for _ in range(repeticoes):
+                if not usar_cache:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as capturadas:
+                    inicio = time.perf_counter()
+                    resposta = client.get(url, parametros)
+                    tempos.append((time.perf_counter() - inicio) * 1000)
+                consultas.append(len(capturadas))
+
+            resultados[nome] = {
+                'url': url,
+                'parametros': parametros,
+                'status': resposta.status_code,
+                'mediana_ms': round(statistics.median(tempos), 1),
+                'p95_ms': round(percentil(tempos, 95), 1),
+                'min_ms': round(min(tempos), 1),
+                'consultas': max(consultas),
+                'bytes': len(resposta.content),
+            }
+            logger.info(f"Benchmark {nome}: {resultados[nome]}")
+        return resultados
+
+    @staticmethod
+    def salvar_baseline(resultados: Dict[str, dict], data_inicial: date, data_final: date,
+                        caminho: Path = CAMINHO_BASELINE) -> Path:
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        baseline = {
+            'gerado_em': timezone.now().isoformat(),
+            'banco': connection.vendor,
+            'data_inicial': data_inicial.isoformat(),
+            'data_final': data_final.isoformat(),
+            'resultados': resultados,
+        }
+        caminho.write_text(json.dumps(baseline, indent=2, ensure_ascii=False), encoding='utf-8')
+        return caminho
+
+    @staticmethod
+    def carregar_baseline(caminho: Path = CAMINHO_BASELINE) -> dict:
+        caminho = Path(caminho)
+        if not caminho.exists():
+            raise FileNotFoundError(f"Baseline não encontrada: {caminho}")
+        return json.loads(caminho.read_text(encoding='utf-8'))
+
+    @staticmethod
+    def comparar(resultados: Dict[str, dict], baseline: dict,
+                 tolerancia: float = TOLERANCIA_PADRAO) -> List[dict]:
+        """
+        Situação de cada cenário em relação à baseline: 'regressao' (tempo
+        acima da tolerância, mais consultas ou erro), 'melhora', 'estavel' ou
+        'novo' (ausente da baseline).
+        """
+        comparacoes = []
+        for nome, atual in resultados.items():
+            anterior = baseline.get('resultados', {}).get(nome)
+            comparacao = {'cenario': nome, 'atual': atual, 'baseline': anterior, 'variacao_tempo': None}
+            if anterior is None:
+                comparacao['situacao'] = 'novo'
+                comparacoes.append(comparacao)
+                continue
+
+            variacao = atual['mediana_ms'] / anterior['mediana_ms'] - 1 if anterior['mediana_ms'] else 0
+            comparacao['variacao_tempo'] = round(variacao, 3)
+            if atual['status'] != 200 or variacao > tolerancia or atual['consultas'] > anterior['consultas']:
+                comparacao['situacao'] = 'regressao'
+            elif variacao < -tolerancia or atual['consultas'] < anterior['consultas']:
+                comparacao['situacao'] = 'melhora'
+            else:
+                comparacao['situacao'] = 'estavel'
+            comparacoes.append(comparacao)
+        return comparacoes
@@ -0,0 +1,118 @@
+# backend/empresa/contas/services/cache_relatorios_service.py
+"""
+Cache das respostas dos relatórios pesados (DRE, faturamento, custos,
+fluxo realizado, valor do estoque, suprimentos por contrato).
+
+A chave da resposta inclui a versão de cada tabela consultada
+(versoes_tabelas), os parâmetros da requisição e a data do dia. Sinais de
+save/delete (signals/cache_relatorios.py) e o bulk_loader da sincronização
+incrementam a versão da tabela alterada, então uma resposta antiga deixa de
+ser encontrada sem precisar ser apagada; ela expira pelo TIMEOUT do cache.
+"""
+
+import functools
+import hashlib
+import logging
+from typing import Dict, Iterable, Tuple
+
+from django.core.cache import caches
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.response import Response
+
+from ..models.access import (
+    Clientes, ContasPagar, ContasReceber, ContratosLocacao, EstoqueSnapshot, Fornecedores, Grupos,
+    ItensContratoLocacao, ItensNfEntrada, ItensNfSaida, MovimentacoesEstoque, NotasFiscaisEntrada,
+    NotasFiscaisSaida, NotasFiscaisServico, Produtos, SaldoEstoqueRapido, SaldosEstoque, VersaoTabela
+)
+
+logger = logging.getLogger(__name__)
+
+ALIAS_CACHE = 'relatorios'
+
+MODELOS_FINANCEIRO = (ContasPagar, ContasReceber, Fornecedores, Clientes, ContratosLocacao)
+MODELOS_NOTAS = (NotasFiscaisSaida, ItensNfSaida, NotasFiscaisEntrada, ItensNfEntrada, NotasFiscaisServico)
+# Reconstruídos em lote (REFRESH da view, snapshots diários): a versão é
+# incrementada por quem os reconstrói, não por signals
+MODELOS_DERIVADOS = (SaldoEstoqueRapido, EstoqueSnapshot)
+MODELOS_ESTOQUE = (MovimentacoesEstoque, Produtos, Grupos, SaldosEstoque) + MODELOS_DERIVADOS
+
+# Modelos cujos save/delete incrementam a versão da tabela
+MODELOS_RASTREADOS = tuple(
+    modelo for modelo in MODELOS_FINANCEIRO + MODELOS_NOTAS + MODELOS_ESTOQUE + (ItensContratoLocacao,)
+    if modelo not in MODELOS_DERIVADOS
+)
+
+
+class CacheRelatoriosService:
+    """Versões das tabelas e chaves do cache de relatórios."""
+
+    @staticmethod
+    def versoes(tabelas: Iterable[str]) -> Tuple[int, ...]:
+        """Versão de cada tabela (0 se nunca alterada), numa única consulta."""
+        tabelas = tuple(tabelas)
+        atuais = dict(VersaoTabela.objects.filter(tabela__in=tabelas).values_list('tabela', 'versao'))
+        return tuple(atuais.get(tabela, 0) for tabela in tabelas)
+
+    @staticmethod
+    def incrementar(tabela: str) -> None:
+        agora = timezone.now()
+        if VersaoTabela.objects.filter(tabela=tabela).update(versao=F('versao') + 1, atualizado_em=agora):
+            return
+        try:
+            _, criada = VersaoTabela.objects.get_or_create(tabela=tabela, defaults={'versao': 1})
+        except IntegrityError:
+            criada = False
+        if not criada:
+            VersaoTabela.objects.filter(tabela=tabela).update(versao=F('versao') + 1, atualizado_em=agora)
+
+    @staticmethod
+    def chave(nome: str, request, kwargs: Dict, tabelas: Tuple[str, ...]) -> str:
+        parametros = sorted((campo, tuple(valores)) for campo, valores in request.query_params.lists())
+        conteudo = repr((
+            parametros,
+            sorted(kwargs.items()),
+            tabelas,
+            CacheRelatoriosService.versoes(tabelas),
+            timezone.localdate().isoformat(),
+        ))
+        return f"relatorio:{nome}:{hashlib.md5(conteudo.encode('utf-8')).hexdigest()}"
+
+
+def cache_por_versao(*modelos, timeout=None):
+    """
+    Decorador para GET de APIView, funções @api_view e actions de ViewSet.
+
+    Só respostas 200 são guardadas; a resposta em cache é devolvida com o
+    cabeçalho X-Cache: HIT. Use abaixo de @api_view/@action.
+    """
+    tabelas = tuple(sorted({modelo._meta.db_table for modelo in modelos}))
+
+    def decorador(funcao):
+        nome = f"{funcao.__module__}.{funcao.__qualname__}"
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            request = next(arg for arg in args if hasattr(arg, 'query_params'))
+            cache = caches[ALIAS_CACHE]
+            chave = CacheRelatoriosService.chave(nome, request, kwargs, tabelas)
+
+            dados = cache.get(chave)
+            if dados is not None:
+                resposta = Response(dados)
+                resposta['X-Cache'] = 'HIT'
+                return resposta
+
+            resposta = funcao(*args, **kwargs)
+            if resposta.status_code == 200:
+                try:
+                    cache.set(chave, resposta.data, timeout if timeout is not None else cache.default_timeout)
+                except Exception as e:
+                    logger.warning(f"Relatório {nome} não pôde ser guardado em cache: {e}")
+                resposta['X-Cache'] = 'MISS'
+            return resposta
+
+        return envoltorio
+
+    return decorador
@@ -0,0 +1,248 @@
+# backend/empresa/contas/services/classificacao_custos_service.py
+"""
+Classificação de contas a pagar em custo fixo ou variável e categoria.
+
+As regras (antes repetidas em DREView e nos relatórios de custos) ficam nas
+tabelas abaixo e o resultado é gravado em contas_pagar (tipo_custo,
+categoria_custo). versao_classificacao guarda o hash das regras: quando
+elas mudam, as contas passam a ser reclassificadas. A classificação é feita
+no save da conta e do fornecedor (signals/classificacao_custos.py), na
+sincronização (classificar_todas), após o migrate (contas pendentes) e por
+`manage.py classificar_custos`; as consultas só leem tipo_custo/categoria_custo.
+"""
+
+import hashlib
+import logging
+from typing import NamedTuple, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+from ..models.access import ContasPagar
+from .cache_relatorios_service import CacheRelatoriosService
+from .dre_mensal_service import DREMensalService
+
+logger = logging.getLogger(__name__)
+
+
+class Regra(NamedTuple):
+    """
+    Categoria aplicada quando o texto contém um termo de cada grupo em `termos`,
+    nenhum termo de `exceto` e, no nome do fornecedor, um termo de cada grupo
+    de `termos_nome`.
+    """
+    categoria: str
+    termos: Tuple[Tuple[str, ...], ...]
+    exceto: Tuple[str, ...] = ()
+    termos_nome: Tuple[Tuple[str, ...], ...] = ()
+
+
+# Nome do fornecedor contendo uma destas palavras indica custo fixo
+KEYWORDS_FIXOS = (
+    'FOLHA', 'PROLABORE', 'PRO-LABORE', 'ALUGUEL', 'SALARIO', 'SALÁRIO',
+    'INSS', 'FGTS', 'CONTADOR', 'CONTABILIDADE', 'LUZ', 'ENERGIA',
+    'ÁGUA', 'AGUA', 'TELEFONE', 'INTERNET', 'SEGURO',
+)
+
+# Categorias de custo fixo, testadas no nome do fornecedor
+REGRAS_FIXAS = (
+    Regra('Pessoal', (('FOLHA', 'SALARIO', 'SALÁRIO'),)),
+    Regra('Pró-Labore', (('PROLABORE', 'PRO-LABORE'),)),
+    Regra('Impostos', (('INSS', 'FGTS', 'DARF'),)),
+    Regra('Aluguel', (('ALUGUEL',),)),
+    Regra('Utilidades', (('LUZ', 'ENERGIA', 'AGUA', 'ÁGUA'),)),
+    Regra('Telecom', (('TELEFONE', 'INTERNET'),)),
+    Regra('Contabilidade', (('CONTADOR', 'CONTABILIDADE'),)),
+    Regra('Seguros', (('SEGURO',),)),
+)
+
+# Categorias de custo variável, testadas em "nome do fornecedor + histórico", na ordem
+REGRAS_VARIAVEIS = (
+    # Financeiras
+    Regra('Tarifas Bancárias', (('TARIFA',), ('BANC', 'BOLETO', 'PIX', 'CHEQUE', 'MANUTENÇ', 'RELACION',
+                                              'BAIXA', 'REGISTRO', 'ALTERAÇ', 'CONCESS'))),
+    Regra('Juros', (('JUROS',),)),
+    Regra('Empréstimos', (('EMPREST', 'EMPRÉSTIMO', 'CONSIGNAD'),)),
+    Regra('Operações Financeiras', (('COMPRA DE TIT',),)),
+    Regra('Operações Financeiras', (('DESCONTO',),), exceto=('TARIFA',)),
+    # Operacionais / logística
+    Regra('Frete', (('FRETE', 'TRANSPORT'),)),
+    Regra('Combustível', (('COMBUSTIVEL', 'COMBUSTÍVEL'),)),
+    Regra('Estacionamento', (('ESTACIONAMENTO',),)),
+    Regra('Manutenção Veículos', (('MANUTENÇÃ',), ('VEIC',))),
+    Regra('Manutenção Veículos', (('VIA MOTOS', 'ÓLEO', 'OLEO', 'REVISÃO'),)),
+    Regra('Despesas de Viagem', (('VIAGEM', 'PASSAGEM'),)),
+    Regra('Rastreamento', (('RASTREAMENTO',),)),
+    # Alimentação
+    Regra('Alimentação', (('REFEIÇÃO', 'REFEICAO'),)),
+    Regra('Materiais Copa', (('COPA', 'CAFÉ', 'CAFE', 'AGUA', 'ÁGUA'),)),
+    # Materiais
+    Regra('Materiais Assist. Técnica', (('ASSIST',), ('TECN',))),
+    Regra('Materiais Assist. Técnica', (('ASSIST.TECN',),)),
+    Regra('Materiais Escritório', (('ESCRITORIO', 'ESCRITÓRIO'),)),
+    # Serviços
+    Regra('Serviços Terceiros', (('DIARISTA', 'SERV.TERCEIROS', 'SERVIÇOS TERCEIROS'),)),
+    Regra('Contabilidade', (('CONTADOR', 'CONTABIL', 'CONTÁBIL'),)),
+    Regra('Certificação Digital', (('CERTIFICAÇ', 'CERTIFICADO DIGITAL'),)),
+    Regra('Treinamento', (('TREINAMENTO', 'CURSO'),)),
+    Regra('Marketing', (('MARKETING', 'IMPULSIONAMENTO'),)),
+    Regra('Software/Sistemas', (('INTERMAX', 'SISTEMA'),)),
+    # Telecomunicações e utilidades
+    Regra('Telecomunicações', (('CONTA', 'NIO'),), termos_nome=(('OI',),)),
+    Regra('Telecomunicações', (('TELEFONE',),)),
+    Regra('Energia Elétrica', (('COELCE', 'ENERGIA', 'LUZ'),)),
+    # Impostos e taxas
+    Regra('ICMS', (('ICMS', 'IMPOSTO'),)),
+    Regra('Impostos', (('SIMPLES', 'DARF'),)),
+    Regra('Associações/Sindicatos', (('CDL', 'SINDICATO'),)),
+    # Pessoal
+    Regra('Confraternização', (('CONFRATERNIZAÇ', 'ANIVERSÁRIO'),)),
+    Regra('Ajuda de Custo', (('AJUDA CUSTO',),)),
+    # Comerciais
+    Regra('Comissão', (('COMISSAO', 'COMISSÃO', 'REPRESENTANTE'),)),
+    Regra('Diversos', (('DIVERSOS',),)),
+)
+
+# Sem regra aplicável: nome com um destes termos é tratado como fornecedor comercial
+TERMOS_EMPRESA = ('LTDA', 'ME', 'EIRELI', 'EPP', 'S/A', 'S.A.', 'COMERCIO', 'COMÉRCIO', 'DISTRIBUI', 'IMPORTA')
+
+VERSAO_REGRAS = hashlib.md5(
+    repr((KEYWORDS_FIXOS, REGRAS_FIXAS, REGRAS_VARIAVEIS, TERMOS_EMPRESA)).encode('utf-8')
+).hexdigest()[:12]
+
+TIPO_FIXO = 'FIXO'
+TIPO_VARIAVEL = 'VARIAVEL'
+
+
+def _aplica(regra: Regra, texto: str, nome: str) -> bool:
+    return (
+        all(any(termo in texto for termo in grupo) for grupo in regra.termos)
+        and not any(termo in texto for termo in regra.exceto)
+        and all(any(termo in nome for termo in grupo) for grupo in regra.termos_nome)
+    )
+
+
+class ClassificacaoCustosService:
+    """Classificação fixo/variável das contas a pagar e sua persistência."""
+
+    BATCH_SIZE = 2000  # Tamanho do lote para bulk_update
+
+    CAMPOS = ['tipo_custo', 'categoria_custo', 'versao_classificacao']
+
+    @staticmethod
+    def categoria_fixa(nome: Optional[str], tipo_original: Optional[str]) -> str:
+        nome = str(nome or '').upper()
+        tipo_original = str(tipo_original or '').upper()
+        for regra in REGRAS_FIXAS:
+            if _aplica(regra, nome, nome):
+                return regra.categoria
+        return tipo_original if tipo_original and tipo_original != 'N/A' else 'Outros Fixos'
+
+    @staticmethod
+    def categoria_variavel(nome_fornecedor: Optional[str], historico: Optional[str],
+                           especificacao_original: Optional[str]) -> str:
+        nome = str(nome_fornecedor if nome_fornecedor is not None else '').upper()
+        texto = nome + ' ' + str(historico if historico is not None else '').upper()
+        for regra in REGRAS_VARIAVEIS:
+            if _aplica(regra, texto, nome):
+                return regra.categoria
+
+        # Especificação original do fornecedor, quando útil
+        if especificacao_original and especificacao_original.strip() and especificacao_original != 'Sem Especificação':
+            return especificacao_original[:255]
+        if any(termo in nome for termo in TERMOS_EMPRESA):
+            return 'Fornecedor'
+        return 'Outros'
+
+    @staticmethod
+    def classificar(nome_fornecedor: Optional[str], tipo_fornecedor: Optional[str],
+                    especificacao: Optional[str], historico: Optional[str]) -> Tuple[str, str]:
+        """(tipo_custo, categoria_custo) de uma conta a pagar."""
+        nome = str(nome_fornecedor or '').upper()
+        if any(keyword in nome for keyword in KEYWORDS_FIXOS):
+            return TIPO_FIXO, ClassificacaoCustosService.categoria_fixa(nome_fornecedor, tipo_fornecedor)
+        return TIPO_VARIAVEL, ClassificacaoCustosService.categoria_variavel(
+            nome_fornecedor, historico, especificacao
+        )
+
+    @staticmethod
+    def aplicar(conta: ContasPagar) -> bool:
+        """Preenche a classificação da conta (sem salvar). Retorna True se algo mudou."""
+        fornecedor = conta.fornecedor
+        tipo_custo, categoria = ClassificacaoCustosService.classificar(
+            fornecedor.nome if fornecedor else None,
+            fornecedor.tipo if fornecedor else None,
+            fornecedor.especificacao if fornecedor else None,
+            conta.historico,
+        )
+        novo = (tipo_custo, categoria, VERSAO_REGRAS)
+        if (conta.tipo_custo, conta.categoria_custo, conta.versao_classificacao) == novo:
+            return False
+        conta.tipo_custo, conta.categoria_custo, conta.versao_classificacao = novo
+        return True
+
+    @staticmethod
+    def _classificar_queryset(queryset: QuerySet) -> int:
+        contas = queryset.select_related('fornecedor').only(
+            'id', 'historico', 'data_pagamento', 'vencimento',
+            'fornecedor__nome', 'fornecedor__tipo', 'fornecedor__especificacao',
+            *ClassificacaoCustosService.CAMPOS
+        ).order_by()
+
+        alteradas, total, meses = [], 0, set()
+        for conta in contas.iterator(chunk_size=ClassificacaoCustosService.BATCH_SIZE):
+            if ClassificacaoCustosService.aplicar(conta):
+                alteradas.append(conta)
+                data = conta.data_pagamento or conta.vencimento
+                if data is not None:
+                    meses.add(DREMensalService.inicio_do_mes(data))
+            if len(alteradas) >= ClassificacaoCustosService.BATCH_SIZE:
+                ContasPagar.objects.bulk_update(alteradas, ClassificacaoCustosService.CAMPOS)
+                total += len(alteradas)
+                alteradas = []
+        if alteradas:
+            ContasPagar.objects.bulk_update(alteradas, ClassificacaoCustosService.CAMPOS)
+            total += len(alteradas)
+        if total:
+            CacheRelatoriosService.incrementar(ContasPagar._meta.db_table)
+        if meses:
+            # bulk_update não dispara os signals do DRE mensal
+            DREMensalService.invalidar(min(meses), max(meses))
+        return total
+
+    @staticmethod
+    def classificar_pendentes(queryset: Optional[QuerySet] = None) -> int:
+        """
+        Classifica as contas do queryset ainda sem classificação ou com regras
+        antigas. Retorna o número de contas atualizadas.
+        """
+        if queryset is None:
+            queryset = ContasPagar.objects.all()
+        pendentes = queryset.filter(
+            Q(versao_classificacao__isnull=True) | ~Q(versao_classificacao=VERSAO_REGRAS)
+        )
+        total = ClassificacaoCustosService._classificar_queryset(pendentes)
+        if total:
+            logger.info(f"Classificação de custos: {total} contas a pagar classificadas")
+        return total
+
+    @staticmethod
+    def classificar_todas() -> int:
+        """
+        Reavalia todas as contas (usado após cargas em lote, em que nome ou
+        especificação do fornecedor podem ter mudado). Só grava as que mudaram.
+        """
+        return ClassificacaoCustosService._classificar_queryset(ContasPagar.objects.all())
+
+    @staticmethod
+    def total_fornecedores(tipo_custo: str) -> int:
+        """Fornecedores com alguma conta a pagar classificada com o tipo de custo."""
+        return ContasPagar.objects.filter(
+            tipo_custo=tipo_custo, fornecedor__isnull=False
+        ).values('fornecedor_id').distinct().count()
+
+    @staticmethod
+    def reclassificar_fornecedor(fornecedor_id: int) -> int:
+        """Reavalia as contas do fornecedor (nome, tipo ou especificação mudaram)."""
+        return ClassificacaoCustosService._classificar_queryset(
+            ContasPagar.objects.filter(fornecedor_id=fornecedor_id)
+        )
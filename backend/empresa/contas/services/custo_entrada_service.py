@@ -0,0 +1,186 @@
+# backend/empresa/contas/services/custo_entrada_service.py
+"""
+Serviço de histórico de custos de entrada.
+
+Carrega de uma vez o histórico de entradas dos produtos envolvidos em uma
+requisição e responde "custo unitário do produto X na data D" por busca
+binária em memória, substituindo a consulta por item vendido usada no CMV
+e nos relatórios de faturamento/margem.
+
+Duas fontes são suportadas, cada uma com a regra que as views já usavam:
+- ItensNfEntrada: última entrada com nota_fiscal.data_entrada <= D
+- MovimentacoesEstoque: última entrada (tipos 1 e 3) com quantidade e
+  custo_unitario positivos e data_movimentacao no dia D ou antes
+"""
+
+import logging
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, time
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models.access import ItensNfEntrada, MovimentacoesEstoque
+from .filtro_datas_service import FiltroDatasService
+
+logger = logging.getLogger(__name__)
+
+
+class HistoricoCustoEntrada:
+    """
+    Histórico de entradas por produto, ordenado por (chave, id).
+
+    As chaves de um mesmo histórico são todas do mesmo tipo (datetime para NFs
+    de entrada, date para movimentações), e as consultas usam o mesmo tipo.
+    """
+
+    def __init__(self):
+        self._chaves = defaultdict(list)
+        self._registros = defaultdict(list)
+
+    def adicionar(self, produto_id: int, chave, registro: dict) -> None:
+        """Acrescenta um registro; deve ser chamado em ordem crescente de chave."""
+        self._chaves[produto_id].append(chave)
+        self._registros[produto_id].append(registro)
+
+    def ultimo_registro(self, produto_id: int, chave) -> Optional[dict]:
+        """Último registro do produto com chave <= `chave` (None se não houver)."""
+        chaves = self._chaves.get(produto_id)
+        if not chaves:
+            return None
+        posicao = bisect_right(chaves, chave)
+        if posicao == 0:
+            return None
+        return self._registros[produto_id][posicao - 1]
+
+    def __contains__(self, produto_id: int) -> bool:
+        return produto_id in self._chaves
+
+
+class CustoEntradaService:
+    """Consulta em lote do custo da última entrada de cada produto."""
+
+    TIPOS_ENTRADA = [1, 3]  # Entrada e Estoque Inicial
+
+    @staticmethod
+    def _como_datetime(valor) -> datetime:
+        """Converte uma data em datetime no início do dia, como o ORM faz ao comparar com DateTimeField."""
+        if isinstance(valor, datetime):
+            return valor
+        valor = datetime.combine(valor, time.min)
+        return timezone.make_aware(valor) if settings.USE_TZ else valor
+
+    @staticmethod
+    def _como_date(valor) -> date:
+        if isinstance(valor, datetime):
+            return timezone.localtime(valor).date() if timezone.is_aware(valor) else valor.date()
+        return valor
+
+    # ------------------------------------------------------------------
+    # Notas fiscais de entrada
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def historico_nf_entrada(produto_ids: Iterable[int], ate) -> HistoricoCustoEntrada:
+        """
+        Histórico de ItensNfEntrada dos produtos até `ate` (uma consulta).
+
+        Cada registro traz id, data_entrada, valor_unitario, valor_total e
+        quantidade, para que quem consulta aplique sua própria regra de custo.
+        """
+        historico = HistoricoCustoEntrada()
+        produto_ids = {pid for pid in produto_ids if pid is not None}
+        if not produto_ids:
+            return historico
+
+        itens = ItensNfEntrada.objects.filter(
+            produto_id__in=produto_ids,
+            nota_fiscal__data_entrada__lte=CustoEntradaService._como_datetime(ate),
+        ).order_by(
+            'produto_id', 'nota_fiscal__data_entrada', 'id'
+        ).values(
+            'id', 'produto_id', 'nota_fiscal__data_entrada',
+            'valor_unitario', 'valor_total', 'quantidade',
+        )
+
+        for item in itens.iterator():
+            historico.adicionar(item['produto_id'], item['nota_fiscal__data_entrada'], item)
+        return historico
+
+    @staticmethod
+    def ultimas_entradas_nf(pares: Iterable[Tuple[int, object]]) -> Dict[Tuple[int, object], Optional[dict]]:
+        """
+        Forma em lote: para cada par (produto_id, data) retorna o último
+        ItensNfEntrada com data de entrada <= data (None se não houver).
+        """
+        pares = list(pares)
+        if not pares:
+            return {}
+
+        ate = max(CustoEntradaService._como_datetime(data) for _, data in pares)
+        historico = CustoEntradaService.historico_nf_entrada({pid for pid, _ in pares}, ate)
+        return {
+            (produto_id, data): historico.ultimo_registro(produto_id, CustoEntradaService._como_datetime(data))
+            for produto_id, data in pares
+        }
+
+    # ------------------------------------------------------------------
+    # Movimentações de estoque
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def historico_movimentacoes(produto_ids: Iterable[int], ate: date) -> HistoricoCustoEntrada:
+        """Histórico de entradas com custo em MovimentacoesEstoque até o dia `ate` (uma consulta)."""
+        historico = HistoricoCustoEntrada()
+        produto_ids = {pid for pid in produto_ids if pid is not None}
+        if not produto_ids:
+            return historico
+
+        entradas = MovimentacoesEstoque.objects.filter(
+            FiltroDatasService.entre('data_movimentacao', data_final=ate),
+            produto_id__in=produto_ids,
+            tipo_movimentacao__id__in=CustoEntradaService.TIPOS_ENTRADA,
+            quantidade__gt=0,
+            custo_unitario__gt=0,
+        ).order_by(
+            'produto_id', 'data_movimentacao', 'id'
+        ).values(
+            'id', 'produto_id', 'data_movimentacao', 'custo_unitario', 'documento_referencia',
+        )
+
+        for mov in entradas.iterator():
+            historico.adicionar(
+                mov['produto_id'], CustoEntradaService._como_date(mov['data_movimentacao']), mov
+            )
+        return historico
+
+    @staticmethod
+    def precos_ultima_entrada(produto_ids: Iterable[int], data_limite: date) -> Dict[int, dict]:
+        """
+        Último preço de entrada de cada produto até `data_limite`, mesmo anterior
+        ao período, no formato {'preco', 'data', 'documento', 'encontrado'}.
+        """
+        produto_ids = list(produto_ids)
+        data_limite = CustoEntradaService._como_date(data_limite)
+        historico = CustoEntradaService.historico_movimentacoes(produto_ids, data_limite)
+
+        precos = {}
+        for produto_id in produto_ids:
+            entrada = historico.ultimo_registro(produto_id, data_limite)
+            if entrada:
+                precos[produto_id] = {
+                    'preco': float(entrada['custo_unitario']),
+                    'data': entrada['data_movimentacao'].strftime('%Y-%m-%d %H:%M:%S'),
+                    'documento': entrada['documento_referencia'] or '',
+                    'encontrado': True
+                }
+            else:
+                precos[produto_id] = {
+                    'preco': 0.0,
+                    'data': None,
+                    'documento': '',
+                    'encontrado': False
+                }
+        return precos
@@ -0,0 +1,350 @@
+# backend/empresa/contas/services/dados_sinteticos_service.py
+"""
+Geração de dados sintéticos para o benchmark dos endpoints.
+
+Cria grupos, produtos, clientes, fornecedores, contratos de locação com
+itens, notas fiscais de entrada e saída com itens, as movimentações de
+estoque correspondentes (com resets "000000" no início do período e no meio
+dele para parte dos produtos) e contas a pagar/receber. Tudo é gravado com
+bulk_create e gerado por um random.Random com semente fixa: a mesma escala,
+semente e data final produzem sempre os mesmos dados.
+
+Os registros gerados são marcados com PREFIXO (nome, código, número da nota,
+histórico), o que permite removê-los com `limpar` sem tocar nos demais.
+"""
+
+import logging
+import random
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.utils import timezone
+
+from ..models.access import (
+    CategoriasProdutos, Clientes, ContasPagar, ContasReceber, ContratosLocacao, Fornecedores, Grupos,
+    ItensContratoLocacao, ItensNfEntrada, ItensNfSaida, MovimentacoesEstoque, NotasFiscaisEntrada,
+    NotasFiscaisSaida, Produtos, TiposMovimentacaoEstoque,
+)
+from .cache_relatorios_service import MODELOS_RASTREADOS, CacheRelatoriosService
+from .dre_mensal_service import DREMensalService
+from .estoque_snapshot_service import EstoqueSnapshotService
+from .saldo_estoque_service import SaldoEstoqueService
+from .tipo_operacao_service import TipoOperacaoService
+
+logger = logging.getLogger(__name__)
+
+PREFIXO = 'SINT'
+DOCUMENTO_RESET = '000000'
+
+# Quantidades com escala 1; grupos e categorias não crescem com a escala
+VOLUMES_BASE = {
+    'produtos': 500,
+    'clientes': 100,
+    'fornecedores': 40,
+    'contratos': 30,
+    'notas_entrada': 300,
+    'notas_saida': 600,
+    'contas_pagar': 800,
+    'contas_receber': 800,
+}
+GRUPOS = 10
+CATEGORIAS = 5
+MAX_ITENS_POR_NOTA = 6
+PERCENTUAL_RESET_INTERMEDIARIO = 10
+
+# Especificações usadas pela classificação fixo/variável de contas-nao-pagas-por-data-corte
+ESPECIFICACOES_FORNECEDOR = ['FORNECEDORES', 'FRETE', 'SALARIOS', 'LUZ', 'IMPOSTOS', 'TELEFONE', None]
+OPERACOES_SAIDA = [('VENDA', '5102', 7), ('SIMPLES REMESSA', '5949', 3)]
+FORMAS_PAGAMENTO = ['BOLETO', 'PIX', 'TRANSFERENCIA', 'DINHEIRO']
+MODELOS_EQUIPAMENTO = ['MP 2014', 'MP 301', 'IM 430', 'SP 3710', 'MP C2004']
+
+
+def _dinheiro(rng: random.Random, minimo: float, maximo: float) -> Decimal:
+    return Decimal(str(round(rng.uniform(minimo, maximo), 2)))
+
+
+class DadosSinteticosService:
+    """Carga e remoção do conjunto de dados sintéticos."""
+
+    BATCH_SIZE = 2000
+
+    @staticmethod
+    def volumes(escala: float) -> Dict[str, int]:
+        """Quantidade de registros principais de cada tipo para a escala."""
+        if escala <= 0:
+            raise ValueError("A escala deve ser maior que zero")
+        volumes = {nome: max(1, int(quantidade * escala)) for nome, quantidade in VOLUMES_BASE.items()}
+        volumes.update(grupos=GRUPOS, categorias=CATEGORIAS)
+        return volumes
+
+    @staticmethod
+    def _criar(modelo, objetos: List) -> List:
+        return modelo.objects.bulk_create(objetos, batch_size=DadosSinteticosService.BATCH_SIZE)
+
+    @staticmethod
+    def _tipo_movimentacao(tipo: str) -> TiposMovimentacaoEstoque:
+        descricao = 'Entrada' if tipo == 'E' else 'Saída'
+        tipo_movimentacao, _ = TiposMovimentacaoEstoque.objects.get_or_create(
+            codigo=f'{PREFIXO}{tipo}', defaults={'descricao': f'{descricao} (sintética)', 'tipo': tipo}
+        )
+        return tipo_movimentacao
+
+    @staticmethod
+    def gerar(escala: float = 1.0, meses: int = 12, semente: int = 42,
+              data_final: Optional[date] = None) -> Dict[str, int]:
+        """
+        Grava um conjunto de dados sintéticos cobrindo os `meses` anteriores a
+        `data_final` (padrão: hoje). Retorna a quantidade gravada por tabela.
+        """
+        volumes = DadosSinteticosService.volumes(escala)
+        rng = random.Random(semente)
+        data_final = data_final or timezone.localdate()
+        data_inicial = data_final - relativedelta(months=meses)
+        segundos_periodo = int((data_final - data_inicial).total_seconds())
+        inicio_periodo = timezone.make_aware(datetime.combine(data_inicial, time.min))
+
+        def momento() -> datetime:
+            return inicio_periodo + timedelta(seconds=rng.randrange(segundos_periodo))
+
+        criar = DadosSinteticosService._criar
+        totais = {}
+
+        with transaction.atomic():
+            entrada = DadosSinteticosService._tipo_movimentacao('E')
+            saida = DadosSinteticosService._tipo_movimentacao('S')
+
+            grupos = criar(Grupos, [Grupos(nome=f'{PREFIXO} Grupo {i}') for i in range(1, volumes['grupos'] + 1)])
+            categorias = criar(CategoriasProdutos, [
+                CategoriasProdutos(nome=f'{PREFIXO} Categoria {i}') for i in range(1, volumes['categorias'] + 1)
+            ])
+
+            produtos = []
+            for i in range(1, volumes['produtos'] + 1):
+                custo = _dinheiro(rng, 5, 500)
+                produtos.append(Produtos(
+                    codigo=f'{PREFIXO}{i:06d}',
+                    nome=f'{PREFIXO} Produto {i}',
+                    grupo_id=rng.choice(grupos).id,
+                    preco_custo=custo,
+                    preco_venda=(custo * Decimal(str(round(rng.uniform(1.2, 2.0), 2)))).quantize(Decimal('0.01')),
+                    estoque_atual=0,
+                    ativo=True,
+                ))
+            produtos = criar(Produtos, produtos)
+
+            clientes = criar(Clientes, [
+                Clientes(nome=f'{PREFIXO} Cliente {i}') for i in range(1, volumes['clientes'] + 1)
+            ])
+            fornecedores = criar(Fornecedores, [
+                Fornecedores(nome=f'{PREFIXO} Fornecedor {i}', especificacao=rng.choice(ESPECIFICACOES_FORNECEDOR))
+                for i in range(1, volumes['fornecedores'] + 1)
+            ])
+
+            # Contratos começam até seis meses antes do período; parte não tem fim
+            contratos = []
+            for i in range(1, volumes['contratos'] + 1):
+                inicio = data_inicial + timedelta(days=rng.randrange(-180, (data_final - data_inicial).days))
+                parcela = _dinheiro(rng, 300, 3000)
+                contratos.append(ContratosLocacao(
+                    cliente=rng.choice(clientes),
+                    contrato=f'{PREFIXO}-{i}',
+                    tipocontrato='LOCACAO',
+                    valorpacela=parcela,
+                    valorcontrato=parcela * 12,
+                    numeroparcelas='12',
+                    inicio=inicio,
+                    fim=None if rng.random() < 0.2 else inicio + relativedelta(months=rng.choice([12, 24, 36])),
+                ))
+            contratos = criar(ContratosLocacao, contratos)
+            itens_contrato = criar(ItensContratoLocacao, [
+                ItensContratoLocacao(
+                    contrato=contrato,
+                    numeroserie=f'{contrato.contrato}-{j}',
+                    modelo=rng.choice(MODELOS_EQUIPAMENTO),
+                    categoria=rng.choice(categorias),
+                    inicio=contrato.inicio,
+                    fim=contrato.fim,
+                )
+                for contrato in contratos for j in range(1, rng.randint(1, 5) + 1)
+            ])
+            clientes_contrato = sorted({contrato.cliente for contrato in contratos}, key=lambda cliente: cliente.id)
+
+            # Notas com itens; cada item gera uma movimentação de estoque
+            notas_entrada, itens_entrada = [], []
+            for i in range(1, volumes['notas_entrada'] + 1):
+                quando = momento()
+                nota = NotasFiscaisEntrada(
+                    numero_nota=f'{PREFIXO}E{i}', fornecedor=rng.choice(fornecedores),
+                    data_emissao=quando, data_entrada=quando,
+                )
+                itens = []
+                for produto in rng.sample(produtos, min(len(produtos), rng.randint(1, MAX_ITENS_POR_NOTA))):
+                    quantidade = Decimal(rng.randint(1, 50))
+                    valor_unitario = (produto.preco_custo * Decimal(str(round(rng.uniform(0.9, 1.1), 2)))).quantize(Decimal('0.01'))
+                    itens.append(ItensNfEntrada(
+                        nota_fiscal=nota, produto=produto, data=quando, quantidade=quantidade,
+                        valor_unitario=valor_unitario, valor_total=quantidade * valor_unitario,
+                    ))
+                nota.valor_produtos = nota.valor_total = sum(item.valor_total for item in itens)
+                TipoOperacaoService.aplicar(nota)
+                notas_entrada.append(nota)
+                itens_entrada += itens
+            criar(NotasFiscaisEntrada, notas_entrada)
+            criar(ItensNfEntrada, itens_entrada)
+
+            notas_saida, itens_saida = [], []
+            operacoes = [(operacao, cfop) for operacao, cfop, _ in OPERACOES_SAIDA]
+            pesos = [peso for _, _, peso in OPERACOES_SAIDA]
+            for i in range(1, volumes['notas_saida'] + 1):
+                quando = momento()
+                operacao, cfop = rng.choices(operacoes, weights=pesos)[0]
+                cliente = rng.choice(clientes_contrato if operacao == 'SIMPLES REMESSA' else clientes)
+                nota = NotasFiscaisSaida(
+                    numero_nota=f'{PREFIXO}S{i}', data=quando, cliente=cliente, operacao=operacao, cfop=cfop,
+                )
+                itens = []
+                for produto in rng.sample(produtos, min(len(produtos), rng.randint(1, MAX_ITENS_POR_NOTA))):
+                    quantidade = Decimal(rng.randint(1, 10))
+                    itens.append(ItensNfSaida(
+                        nota_fiscal=nota, produto=produto, data=quando, quantidade=quantidade,
+                        valor_unitario=produto.preco_venda, valor_total=quantidade * produto.preco_venda,
+                    ))
+                nota.valor_produtos = nota.valor_total_nota = sum(item.valor_total for item in itens)
+                TipoOperacaoService.aplicar(nota)
+                notas_saida.append(nota)
+                itens_saida += itens
+            criar(NotasFiscaisSaida, notas_saida)
+            criar(ItensNfSaida, itens_saida)
+
+            # Reset de todos os produtos no início do período e de parte deles no meio
+            movimentacoes = []
+            for produto in produtos:
+                resets = [inicio_periodo]
+                if rng.randrange(100) < PERCENTUAL_RESET_INTERMEDIARIO:
+                    resets.append(momento())
+                for quando in resets:
+                    movimentacoes.append(MovimentacoesEstoque(
+                        data_movimentacao=quando, tipo_movimentacao=entrada, produto=produto,
+                        quantidade=Decimal(rng.randint(0, 100)), custo_unitario=produto.preco_custo,
+                        documento_referencia=DOCUMENTO_RESET, observacoes=PREFIXO,
+                    ))
+            for item in itens_entrada:
+                movimentacoes.append(MovimentacoesEstoque(
+                    data_movimentacao=item.data, tipo_movimentacao=entrada, produto=item.produto,
+                    quantidade=item.quantidade, custo_unitario=item.valor_unitario, valor_total=item.valor_total,
+                    nota_fiscal_entrada=item.nota_fiscal, documento_referencia=item.nota_fiscal.numero_nota,
+                    observacoes=PREFIXO,
+                ))
+            for item in itens_saida:
+                movimentacoes.append(MovimentacoesEstoque(
+                    data_movimentacao=item.data, tipo_movimentacao=saida, produto=item.produto,
+                    quantidade=item.quantidade, custo_unitario=item.produto.preco_custo,
+                    nota_fiscal_saida=item.nota_fiscal, documento_referencia=item.nota_fiscal.numero_nota,
+                    observacoes=PREFIXO,
+                ))
+            criar(MovimentacoesEstoque, movimentacoes)
+
+            # estoque_atual coerente com as movimentações (mesma regra do cálculo de estoque)
+            por_produto = defaultdict(list)
+            for mov in movimentacoes:
+                por_produto[mov.produto_id].append(mov)
+            for produto in produtos:
+                saldo = Decimal('0')
+                for mov in sorted(por_produto[produto.id],
+                                  key=lambda m: (m.data_movimentacao, m.documento_referencia == DOCUMENTO_RESET)):
+                    if mov.documento_referencia == DOCUMENTO_RESET:
+                        saldo = mov.quantidade
+                    elif mov.tipo_movimentacao_id == entrada.id:
+                        saldo += mov.quantidade
+                    else:
+                        saldo -= mov.quantidade
+                produto.estoque_atual = int(saldo)
+            Produtos.objects.bulk_update(produtos, ['estoque_atual'], batch_size=DadosSinteticosService.BATCH_SIZE)
+
+            # Contas vencidas ficam em sua maioria pagas; as futuras, em aberto
+            contas = {ContasPagar: [], ContasReceber: []}
+            for modelo, pessoas, chave in (
+                (ContasPagar, fornecedores, 'contas_pagar'), (ContasReceber, clientes, 'contas_receber'),
+            ):
+                for i in range(1, volumes[chave] + 1):
+                    emissao = momento()
+                    vencimento = emissao + timedelta(days=rng.randint(0, 60))
+                    valor = _dinheiro(rng, 50, 5000)
+                    paga = vencimento.date() < data_final and rng.random() < 0.8
+                    campos = {
+                        'data': emissao,
+                        'vencimento': vencimento,
+                        'valor': valor,
+                        'historico': f'{PREFIXO} {chave} {i}',
+                        'status': 'P' if paga else 'A',
+                        'data_pagamento': vencimento + timedelta(days=rng.randint(-5, 5)) if paga else None,
+                        'valor_total_pago': valor if paga else Decimal('0.00'),
+                        'forma_pagamento': rng.choice(FORMAS_PAGAMENTO) if paga else None,
+                    }
+                    if modelo is ContasPagar:
+                        contas[modelo].append(ContasPagar(fornecedor=rng.choice(pessoas), valor_pago=campos['valor_total_pago'], **campos))
+                    else:
+                        contas[modelo].append(ContasReceber(cliente=rng.choice(pessoas), recebido=campos['valor_total_pago'], **campos))
+            for modelo, objetos in contas.items():
+                criar(modelo, objetos)
+
+            totais = {
+                'grupos': len(grupos),
+                'categorias_produtos': len(categorias),
+                'produtos': len(produtos),
+                'clientes': len(clientes),
+                'fornecedores': len(fornecedores),
+                'contratos_locacao': len(contratos),
+                'itens_contrato_locacao': len(itens_contrato),
+                'notas_fiscais_entrada': len(notas_entrada),
+                'itens_nf_entrada': len(itens_entrada),
+                'notas_fiscais_saida': len(notas_saida),
+                'itens_nf_saida': len(itens_saida),
+                'movimentacoes_estoque': len(movimentacoes),
+                'contas_pagar': len(contas[ContasPagar]),
+                'contas_receber': len(contas[ContasReceber]),
+            }
+            DadosSinteticosService._apos_carga(data_inicial, [produto.id for produto in produtos])
+
+        logger.info(f"Dados sintéticos gerados (escala {escala}, {meses} meses, semente {semente}): {totais}")
+        return totais
+
+    @staticmethod
+    def _apos_carga(desde: date, produto_ids: List[int]) -> None:
+        """O que os signals e a sincronização fariam: cache de relatórios, DRE mensal, snapshots e saldos."""
+        for modelo in MODELOS_RASTREADOS:
+            CacheRelatoriosService.incrementar(modelo._meta.db_table)
+        DREMensalService.invalidar(desde)
+        if EstoqueSnapshotService.ultima_data_snapshot():
+            EstoqueSnapshotService.atualizar_snapshots(desde=desde, produto_ids=produto_ids)
+        SaldoEstoqueService.atualizar()
+
+    @staticmethod
+    def limpar() -> Dict[str, int]:
+        """Remove os registros marcados com PREFIXO, na ordem das dependências."""
+        consultas = [
+            ('movimentacoes_estoque', MovimentacoesEstoque.objects.filter(produto__codigo__startswith=PREFIXO)),
+            ('notas_fiscais_saida', NotasFiscaisSaida.objects.filter(numero_nota__startswith=PREFIXO)),
+            ('notas_fiscais_entrada', NotasFiscaisEntrada.objects.filter(numero_nota__startswith=PREFIXO)),
+            ('contas_pagar', ContasPagar.objects.filter(historico__startswith=PREFIXO)),
+            ('contas_receber', ContasReceber.objects.filter(historico__startswith=PREFIXO)),
+            ('itens_contrato_locacao', ItensContratoLocacao.objects.filter(contrato__contrato__startswith=f'{PREFIXO}-')),
+            ('contratos_locacao', ContratosLocacao.objects.filter(contrato__startswith=f'{PREFIXO}-')),
+            ('produtos', Produtos.objects.filter(codigo__startswith=PREFIXO)),
+            ('clientes', Clientes.objects.filter(nome__startswith=f'{PREFIXO} ')),
+            ('fornecedores', Fornecedores.objects.filter(nome__startswith=f'{PREFIXO} ')),
+            ('grupos', Grupos.objects.filter(nome__startswith=f'{PREFIXO} ')),
+            ('categorias_produtos', CategoriasProdutos.objects.filter(nome__startswith=f'{PREFIXO} ')),
+            ('tipos_movimentacao_estoque', TiposMovimentacaoEstoque.objects.filter(codigo__startswith=PREFIXO)),
+        ]
+        removidos = {}
+        with transaction.atomic():
+            for tabela, queryset in consultas:
+                removidos[tabela] = queryset.delete()[0]
+        SaldoEstoqueService.atualizar()
+        logger.info(f"Dados sintéticos removidos: {removidos}")
+        return removidos
@@ -0,0 +1,146 @@
+# backend/empresa/contas/services/dre_mensal_service.py
+"""
+Serviço de agregados mensais do DRE.
+
+Meses fechados são calculados uma única vez (faturamento, CMV e custos por
+categoria, sem impostos) e gravados em dre_mensal; a linha do mês é apagada
+quando NFs ou contas a pagar daquele mês mudam (signals/dre_mensal.py e,
+para as cargas em lote, a tarefa dre_mensal da sincronização) e
+recalculada na próxima leitura. O mês corrente é sempre calculado na hora.
+"""
+
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from django.utils import timezone
+
+from ..models.access import DREMensal
+
+logger = logging.getLogger(__name__)
+
+
+class DREMensalService:
+    """Leitura e manutenção dos agregados mensais do DRE."""
+
+    CAMPOS_VALOR = [
+        'faturamento_bruto', 'faturamento_vendas',
+        'faturamento_servicos_contratos', 'faturamento_servicos_avulsos',
+        'cmv', 'cmv_vendas', 'cmv_contratos', 'cmv_outros',
+        'custos_fixos', 'custos_variaveis',
+    ]
+
+    @staticmethod
+    def inicio_do_mes(data) -> date:
+        if isinstance(data, datetime):
+            data = timezone.localtime(data).date() if timezone.is_aware(data) else data.date()
+        return data.replace(day=1)
+
+    @staticmethod
+    def mes_fechado(mes: date) -> bool:
+        """Um mês está fechado quando termina antes do início do mês corrente."""
+        return mes < timezone.localdate().replace(day=1)
+
+    @staticmethod
+    def meses_do_periodo(data_inicio: date, data_fim: date) -> List[date]:
+        meses = []
+        mes = DREMensalService.inicio_do_mes(data_inicio)
+        while mes <= data_fim:
+            meses.append(mes)
+            mes += relativedelta(months=1)
+        return meses
+
+    @staticmethod
+    def calcular_mes(mes: date) -> Dict[str, object]:
+        """
+        Calcula o DRE do mês com as mesmas regras de DREView, sem impostos e
+        sem as listas de itens (somente totais e categorias de custo).
+        """
+        from ..views.dre_views import DREView
+
+        dre_view = DREView()
+        dre_view.PERCENTUAL_IMPOSTOS = Decimal(0)
+
+        fim_mes = mes + relativedelta(months=1, days=-1)
+        data_inicio_dt = datetime.combine(mes, datetime.min.time())
+        data_fim_dt = datetime.combine(fim_mes, datetime.max.time())
+
+        faturamento_bruto, faturamento_vendas, faturamento_servicos_contratos, faturamento_servicos_avulsos, \
+            *_ = dre_view._calcular_faturamento(data_inicio_dt, data_fim_dt)
+        cmv, cmv_vendas, cmv_contratos, cmv_outros, *_ = dre_view._calcular_cmv_real(data_inicio_dt, data_fim_dt)
+        custos_fixos, custos_variaveis, detalhe_fixos, detalhe_variaveis = \
+            dre_view._calcular_custos(data_inicio_dt, data_fim_dt, com_itens=False)
+
+        def sem_itens(detalhe):
+            return [{'categoria': item['categoria'], 'valor': item['valor']} for item in detalhe]
+
+        return {
+            'faturamento_bruto': faturamento_bruto,
+            'faturamento_vendas': faturamento_vendas,
+            'faturamento_servicos_contratos': faturamento_servicos_contratos,
+            'faturamento_servicos_avulsos': faturamento_servicos_avulsos,
+            'cmv': cmv,
+            'cmv_vendas': cmv_vendas,
+            'cmv_contratos': cmv_contratos,
+            'cmv_outros': cmv_outros,
+            'custos_fixos': custos_fixos,
+            'custos_variaveis': custos_variaveis,
+            'detalhe_custos_fixos': sem_itens(detalhe_fixos),
+            'detalhe_custos_variaveis': sem_itens(detalhe_variaveis),
+        }
+
+    @staticmethod
+    def _como_dict(registro: DREMensal) -> Dict[str, object]:
+        dados = {campo: getattr(registro, campo) for campo in DREMensalService.CAMPOS_VALOR}
+        dados['detalhe_custos_fixos'] = registro.detalhe_custos_fixos
+        dados['detalhe_custos_variaveis'] = registro.detalhe_custos_variaveis
+        return dados
+
+    @staticmethod
+    def gravar_mes(mes: date, dados: Dict[str, object]) -> DREMensal:
+        registro, _ = DREMensal.objects.update_or_create(mes=mes, defaults=dados)
+        return registro
+
+    @staticmethod
+    def obter_meses(data_inicio: date, data_fim: date) -> List[Tuple[date, Dict[str, object]]]:
+        """
+        DRE de cada mês do período, em ordem: [(mes, dados)].
+
+        Meses fechados vêm de dre_mensal (uma consulta) e os ausentes são
+        calculados e gravados; o mês corrente e os futuros são calculados na hora.
+        """
+        meses = DREMensalService.meses_do_periodo(data_inicio, data_fim)
+        if not meses:
+            return []
+
+        gravados = {
+            registro.mes: registro
+            for registro in DREMensal.objects.filter(mes__gte=meses[0], mes__lte=meses[-1])
+        }
+
+        resultado = []
+        for mes in meses:
+            if mes in gravados:
+                dados = DREMensalService._como_dict(gravados[mes])
+            else:
+                dados = DREMensalService.calcular_mes(mes)
+                if DREMensalService.mes_fechado(mes):
+                    DREMensalService.gravar_mes(mes, dados)
+            resultado.append((mes, dados))
+        return resultado
+
+    @staticmethod
+    def invalidar(desde, ate: Optional[object] = None) -> int:
+        """
+        Apaga os agregados a partir do mês de `desde` (até o mês de `ate`,
+        inclusive, quando informado). Retorna o número de meses invalidados.
+        """
+        registros = DREMensal.objects.filter(mes__gte=DREMensalService.inicio_do_mes(desde))
+        if ate is not None:
+            registros = registros.filter(mes__lte=DREMensalService.inicio_do_mes(ate))
+        removidos, _ = registros.delete()
+        if removidos:
+            logger.info(f"DRE mensal invalidado: desde={desde}, ate={ate}, meses={removidos}")
+        return removidos
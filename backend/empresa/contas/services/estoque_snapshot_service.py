@@ -0,0 +1,358 @@
+# backend/empresa/contas/services/estoque_snapshot_service.py
+"""
+Serviço de snapshots diários de estoque.
+
+Mantém a tabela estoque_snapshot (quantidade e custo unitário por produto ao
+final de cada dia com movimentação) e responde consultas de posição histórica
+a partir do snapshot mais próximo somado às movimentações posteriores a ele.
+
+Segue a mesma regra de StockCalculationService (stock_calculation.py):
+movimentações com documento_referencia "000000" redefinem o saldo, as demais
+(com documento) somam ou subtraem conforme o tipo da movimentação.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, OuterRef, QuerySet, Subquery, Value, When
+from django.utils import timezone
+
+from ..models.access import EstoqueSnapshot, MovimentacoesEstoque, Produtos
+from .cache_relatorios_service import CacheRelatoriosService
+
+logger = logging.getLogger(__name__)
+
+
+class EstoqueSnapshotService:
+    """Leitura e manutenção dos snapshots diários de estoque."""
+
+    BATCH_SIZE = 5000  # Tamanho do lote para bulk_create
+
+    # ------------------------------------------------------------------
+    # Utilitários
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _fim_do_dia(dia: date) -> datetime:
+        return timezone.make_aware(datetime.combine(dia, time.max))
+
+    @staticmethod
+    def _dia_da_movimentacao(data_movimentacao: datetime) -> date:
+        if timezone.is_aware(data_movimentacao):
+            return timezone.localtime(data_movimentacao).date()
+        return data_movimentacao.date()
+
+    @staticmethod
+    def _movimentacoes_ordenadas(queryset: QuerySet) -> QuerySet:
+        """
+        Movimentações relevantes para o saldo, na ordem em que devem ser aplicadas.
+
+        Em empate de horário o reset vem por último, reproduzindo a regra de
+        StockCalculationService (só contam movimentos estritamente após o reset).
+        """
+        return queryset.filter(
+            produto__isnull=False,
+            documento_referencia__isnull=False,
+        ).annotate(
+            eh_reset=Case(
+                When(documento_referencia='000000', then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        ).order_by(
+            'produto_id', 'data_movimentacao', 'eh_reset', 'id'
+        ).values(
+            'produto_id', 'data_movimentacao', 'quantidade', 'custo_unitario',
+            'documento_referencia', 'tipo_movimentacao__tipo',
+        )
+
+    @staticmethod
+    def _aplicar_movimentacao(estado: dict, mov: dict) -> None:
+        """Aplica uma movimentação ao estado {'quantidade', 'custo_unitario'} de um produto."""
+        tipo = mov['tipo_movimentacao__tipo']
+        quantidade = mov['quantidade'] or Decimal('0')
+
+        if mov['documento_referencia'] == '000000':
+            estado['quantidade'] = quantidade
+        elif tipo == 'E':
+            estado['quantidade'] += quantidade
+        elif tipo == 'S':
+            estado['quantidade'] -= quantidade
+
+        custo = mov['custo_unitario']
+        if tipo == 'E' and custo and custo > 0:
+            estado['custo_unitario'] = custo
+
+    @staticmethod
+    def _filtrar_produtos(produto_ids: Optional[Iterable[int]] = None, grupo_id: Optional[int] = None) -> QuerySet:
+        produtos = Produtos.objects.all()
+        if produto_ids is not None:
+            if not isinstance(produto_ids, QuerySet):
+                produto_ids = list(produto_ids)
+            produtos = produtos.filter(id__in=produto_ids)
+        if grupo_id is not None:
+            produtos = produtos.filter(grupo_id=grupo_id)
+        return produtos
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def ultima_data_snapshot() -> Optional[date]:
+        """Data do snapshot mais recente gravado (None se a tabela estiver vazia)."""
+        return EstoqueSnapshot.objects.aggregate(ultima=Max('data'))['ultima']
+
+    @staticmethod
+    def posicoes_na_data(
+        data: date,
+        produto_ids: Optional[Iterable[int]] = None,
+        grupo_id: Optional[int] = None,
+    ) -> Dict[int, dict]:
+        """
+        Posição de estoque de cada produto ao final de `data`.
+
+        Lê o snapshot mais recente de cada produto até a data e aplica apenas as
+        movimentações posteriores à cobertura dos snapshots. Cargas parciais
+        (atualizar_snapshots com produto_ids) pressupõem a carga completa.
+
+        Retorna {produto_id: {'quantidade', 'custo_unitario', 'preco_custo'}};
+        custo_unitario é o da última entrada (None se não houver).
+        """
+        produtos = EstoqueSnapshotService._filtrar_produtos(produto_ids, grupo_id)
+
+        snapshot_mais_recente = EstoqueSnapshot.objects.filter(
+            produto_id=OuterRef('pk'),
+            data__lte=data,
+        ).order_by('-data')
+
+        linhas = produtos.annotate(
+            snap_quantidade=Subquery(snapshot_mais_recente.values('quantidade')[:1]),
+            snap_custo=Subquery(snapshot_mais_recente.values('custo_unitario')[:1]),
+        ).values_list('id', 'snap_quantidade', 'snap_custo', 'preco_custo')
+
+        posicoes = {}
+        for produto_id, snap_quantidade, snap_custo, preco_custo in linhas:
+            posicoes[produto_id] = {
+                'quantidade': snap_quantidade if snap_quantidade is not None else Decimal('0'),
+                'custo_unitario': snap_custo,
+                'preco_custo': preco_custo,
+            }
+
+        if not posicoes:
+            return posicoes
+
+        # Delta: movimentações entre a cobertura dos snapshots e a data pedida.
+        # Como o snapshot é gravado em todo dia com movimentação, nenhum produto
+        # se moveu entre o próprio snapshot e a cobertura geral da tabela.
+        cobertura = EstoqueSnapshot.objects.filter(data__lte=data).aggregate(ultima=Max('data'))['ultima']
+        movimentacoes = MovimentacoesEstoque.objects.filter(
+            produto_id__in=list(posicoes.keys()),
+            data_movimentacao__lte=EstoqueSnapshotService._fim_do_dia(data),
+        )
+        if cobertura is not None:
+            movimentacoes = movimentacoes.filter(
+                data_movimentacao__gt=EstoqueSnapshotService._fim_do_dia(cobertura)
+            )
+
+        for mov in EstoqueSnapshotService._movimentacoes_ordenadas(movimentacoes).iterator():
+            EstoqueSnapshotService._aplicar_movimentacao(posicoes[mov['produto_id']], mov)
+
+        return posicoes
+
+    @staticmethod
+    def quantidades_na_data(
+        data: date,
+        produto_ids: Optional[Iterable[int]] = None,
+        grupo_id: Optional[int] = None,
+    ) -> Dict[int, Decimal]:
+        """Atalho de posicoes_na_data que retorna apenas {produto_id: quantidade}."""
+        return {
+            produto_id: posicao['quantidade']
+            for produto_id, posicao in EstoqueSnapshotService.posicoes_na_data(data, produto_ids, grupo_id).items()
+        }
+
+    @staticmethod
+    def quantidades_nas_datas(
+        datas: Iterable[date],
+        produto_ids: Optional[Iterable[int]] = None,
+    ) -> Dict[int, Dict[date, Decimal]]:
+        """
+        Quantidade de cada produto ao final de cada data, com a regra de
+        posicoes_na_data: a posição na primeira data vem dos snapshots e as
+        seguintes aplicam, em ordem, as movimentações entre as datas (uma
+        consulta a mais, qualquer que seja o número de datas).
+
+        Retorna {produto_id: {data: quantidade}}.
+        """
+        datas = sorted(set(datas))
+        if not datas:
+            return {}
+        posicoes = EstoqueSnapshotService.posicoes_na_data(datas[0], produto_ids)
+        resultado = {produto_id: {datas[0]: posicao['quantidade']} for produto_id, posicao in posicoes.items()}
+        if len(datas) == 1 or not posicoes:
+            return resultado
+
+        movimentacoes = MovimentacoesEstoque.objects.filter(
+            produto_id__in=list(posicoes.keys()),
+            data_movimentacao__gt=EstoqueSnapshotService._fim_do_dia(datas[0]),
+            data_movimentacao__lte=EstoqueSnapshotService._fim_do_dia(datas[-1]),
+        )
+        por_produto = defaultdict(list)
+        for mov in EstoqueSnapshotService._movimentacoes_ordenadas(movimentacoes).iterator(
+            chunk_size=EstoqueSnapshotService.BATCH_SIZE
+        ):
+            por_produto[mov['produto_id']].append(mov)
+
+        for produto_id, posicao in posicoes.items():
+            movs = por_produto.get(produto_id, [])
+            indice = 0
+            for data in datas[1:]:
+                while indice < len(movs) and \
+                        EstoqueSnapshotService._dia_da_movimentacao(movs[indice]['data_movimentacao']) <= data:
+                    EstoqueSnapshotService._aplicar_movimentacao(posicao, movs[indice])
+                    indice += 1
+                resultado[produto_id][data] = posicao['quantidade']
+        return resultado
+
+    @staticmethod
+    def valor_estoque_na_data(data: date, produto_ids: Optional[Iterable[int]] = None) -> Decimal:
+        """
+        Valor do estoque ao final de `data`: quantidade positiva x custo unitário
+        do snapshot (última entrada), com fallback para produtos.preco_custo.
+        """
+        posicoes = EstoqueSnapshotService.posicoes_na_data(data, produto_ids)
+
+        total = Decimal('0')
+        for posicao in posicoes.values():
+            if posicao['quantidade'] <= 0:
+                continue
+            custo = posicao['custo_unitario'] or posicao['preco_custo'] or Decimal('0')
+            total += posicao['quantidade'] * custo
+        return total
+
+    # ------------------------------------------------------------------
+    # Manutenção
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def reprocessar_produto(produto_id: Optional[int], data_movimentacao: Optional[datetime]) -> bool:
+        """
+        Refaz os snapshots do produto a partir do dia de uma movimentação
+        incluída, alterada ou excluída dentro da cobertura dos snapshots
+        (movimentações posteriores à cobertura já entram como delta).
+        Retorna True se os snapshots foram refeitos.
+        """
+        cobertura = EstoqueSnapshotService.ultima_data_snapshot()
+        if produto_id is None or data_movimentacao is None or cobertura is None:
+            return False
+        dia = EstoqueSnapshotService._dia_da_movimentacao(data_movimentacao)
+        if dia > cobertura:
+            return False
+        # Até a cobertura, para não gravar dias que os demais produtos ainda não têm
+        EstoqueSnapshotService.atualizar_snapshots(desde=dia, ate=cobertura, produto_ids=[produto_id])
+        return True
+
+    @staticmethod
+    def atualizar_snapshots(
+        desde: Optional[date] = None,
+        ate: Optional[date] = None,
+        produto_ids: Optional[Iterable[int]] = None,
+    ) -> Dict[str, object]:
+        """
+        Constrói ou avança os snapshots.
+
+        - Sem `desde`, retoma a partir do último snapshot gravado (o próprio dia
+          é refeito para absorver movimentações lançadas depois da última
+          execução); com a tabela vazia faz a carga completa.
+        - Snapshots a partir de `desde` são apagados e regravados somente com as
+          movimentações desse intervalo, partindo da posição do dia anterior.
+
+        Retorna um resumo com o intervalo processado e as linhas gravadas.
+        """
+        if desde is None:
+            desde = EstoqueSnapshotService.ultima_data_snapshot()
+        ate = ate or timezone.localdate()
+
+        if produto_ids is not None:
+            produto_ids = list(produto_ids)
+
+        with transaction.atomic():
+            snapshots_antigos = EstoqueSnapshot.objects.all()
+            movimentacoes = MovimentacoesEstoque.objects.filter(
+                data_movimentacao__lte=EstoqueSnapshotService._fim_do_dia(ate)
+            )
+            if produto_ids is not None:
+                snapshots_antigos = snapshots_antigos.filter(produto_id__in=produto_ids)
+                movimentacoes = movimentacoes.filter(produto_id__in=produto_ids)
+
+            if desde is not None:
+                snapshots_antigos = snapshots_antigos.filter(data__gte=desde)
+                movimentacoes = movimentacoes.filter(
+                    data_movimentacao__gt=EstoqueSnapshotService._fim_do_dia(desde - timedelta(days=1))
+                )
+            removidos, _ = snapshots_antigos.delete()
+
+            # Posição de partida: véspera de `desde`, lida dos snapshots restantes
+            if desde is not None:
+                base = EstoqueSnapshotService.posicoes_na_data(desde - timedelta(days=1), produto_ids)
+            else:
+                base = {}
+
+            novos = []
+            gravados = 0
+            produto_atual = None
+            estado = None
+            dia_atual = None
+
+            def registrar():
+                novos.append(EstoqueSnapshot(
+                    produto_id=produto_atual,
+                    data=dia_atual,
+                    quantidade=estado['quantidade'],
+                    custo_unitario=estado['custo_unitario'],
+                ))
+
+            for mov in EstoqueSnapshotService._movimentacoes_ordenadas(movimentacoes).iterator(chunk_size=EstoqueSnapshotService.BATCH_SIZE):
+                dia = EstoqueSnapshotService._dia_da_movimentacao(mov['data_movimentacao'])
+
+                if mov['produto_id'] != produto_atual or dia != dia_atual:
+                    if produto_atual is not None:
+                        registrar()
+                    if mov['produto_id'] != produto_atual:
+                        produto_atual = mov['produto_id']
+                        estado = dict(base.get(produto_atual) or {
+                            'quantidade': Decimal('0'), 'custo_unitario': None
+                        })
+                    dia_atual = dia
+
+                EstoqueSnapshotService._aplicar_movimentacao(estado, mov)
+
+                if len(novos) >= EstoqueSnapshotService.BATCH_SIZE:
+                    EstoqueSnapshot.objects.bulk_create(novos)
+                    gravados += len(novos)
+                    novos = []
+
+            if produto_atual is not None:
+                registrar()
+            if novos:
+                EstoqueSnapshot.objects.bulk_create(novos, batch_size=EstoqueSnapshotService.BATCH_SIZE)
+                gravados += len(novos)
+            if removidos or gravados:
+                # bulk_create/delete não disparam os signals do cache de relatórios
+                CacheRelatoriosService.incrementar(EstoqueSnapshot._meta.db_table)
+
+        logger.info(
+            f"Snapshots de estoque atualizados: desde={desde}, ate={ate}, "
+            f"removidos={removidos}, gravados={gravados}"
+        )
+        return {
+            'desde': desde,
+            'ate': ate,
+            'removidos': removidos,
+            'gravados': gravados,
+        }
@@ -0,0 +1,123 @@
+# backend/empresa/contas/services/exportacao_service.py
+"""
+Exportação de relatórios em CSV e XLSX com memória constante.
+
+As linhas vêm de iteradores (em geral queryset.values_list(...).iterator(),
+que no PostgreSQL usa cursor no servidor), nunca de listas ou DataFrames.
+O CSV é gerado linha a linha dentro de um StreamingHttpResponse; o XLSX é
+escrito pelo xlsxwriter em modo constant_memory (uma linha por vez em disco)
+num arquivo temporário, devolvido como download binário e apagado ao fechar.
+"""
+
+import csv
+import tempfile
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence, Union
+
+import xlsxwriter
+from django.db.models import QuerySet
+from django.http import FileResponse, StreamingHttpResponse
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+FORMATO_DATA = 'data'
+FORMATO_MOEDA = 'moeda'
+
+
+class Coluna(NamedTuple):
+    titulo: str
+    formato: Optional[str] = None  # FORMATO_DATA, FORMATO_MOEDA ou None
+
+
+class Planilha(NamedTuple):
+    nome: str
+    colunas: Sequence[Union[Coluna, str]]
+    linhas: Iterable[Sequence]
+
+
+class _Eco:
+    """Pseudo-arquivo para csv.writer: devolve a linha em vez de guardá-la."""
+
+    def write(self, valor):
+        return valor
+
+
+def _coluna(coluna: Union[Coluna, str]) -> Coluna:
+    return coluna if isinstance(coluna, Coluna) else Coluna(coluna)
+
+
+class ExportacaoService:
+    """Respostas de download (CSV em streaming, XLSX em arquivo temporário)."""
+
+    CHUNK_SIZE = 2000  # Linhas buscadas por vez no cursor do servidor
+
+    @staticmethod
+    def linhas(queryset: QuerySet, *campos: str) -> Iterator[tuple]:
+        """Tuplas dos campos, lidas em lotes sem cache do queryset."""
+        return queryset.values_list(*campos).iterator(chunk_size=ExportacaoService.CHUNK_SIZE)
+
+    @staticmethod
+    def _linhas_csv(planilhas: Sequence[Planilha]) -> Iterator[str]:
+        escritor = csv.writer(_Eco())
+        for indice, planilha in enumerate(planilhas):
+            if len(planilhas) > 1:
+                if indice:
+                    yield escritor.writerow([])
+                yield escritor.writerow([planilha.nome])
+            yield escritor.writerow([_coluna(c).titulo for c in planilha.colunas])
+            for linha in planilha.linhas:
+                yield escritor.writerow(['' if valor is None else valor for valor in linha])
+
+    @staticmethod
+    def csv(nome_arquivo: str, planilhas: Sequence[Planilha]) -> StreamingHttpResponse:
+        """CSV em streaming; com mais de uma planilha, cada bloco vem precedido do nome."""
+        resposta = StreamingHttpResponse(
+            ExportacaoService._linhas_csv(planilhas), content_type='text/csv; charset=utf-8'
+        )
+        resposta['Content-Disposition'] = f'attachment; filename="{nome_arquivo}.csv"'
+        return resposta
+
+    @staticmethod
+    def xlsx(nome_arquivo: str, planilhas: Sequence[Planilha]) -> FileResponse:
+        """Pasta de trabalho com uma aba por planilha, escrita em modo constant_memory."""
+        arquivo = tempfile.TemporaryFile(suffix='.xlsx')
+        try:
+            workbook = xlsxwriter.Workbook(arquivo, {
+                'constant_memory': True,
+                'remove_timezone': True,
+                'default_date_format': 'dd/mm/yyyy',
+            })
+            formatos = {
+                None: None,
+                FORMATO_DATA: workbook.add_format({'num_format': 'dd/mm/yyyy'}),
+                FORMATO_MOEDA: workbook.add_format({'num_format': 'R$ #,##0.00'}),
+            }
+            cabecalho = workbook.add_format({'bold': True, 'bg_color': '#CCCCCC'})
+
+            for planilha in planilhas:
+                colunas = [_coluna(c) for c in planilha.colunas]
+                formatos_coluna = [formatos[c.formato] for c in colunas]
+                aba = workbook.add_worksheet(planilha.nome[:31])
+                for coluna, definicao in enumerate(colunas):
+                    aba.write(0, coluna, definicao.titulo, cabecalho)
+                for linha, valores in enumerate(planilha.linhas, start=1):
+                    for coluna, valor in enumerate(valores):
+                        if valor is not None:
+                            aba.write(linha, coluna, valor, formatos_coluna[coluna])
+            workbook.close()
+            arquivo.seek(0)
+        except Exception:
+            arquivo.close()
+            raise
+
+        return FileResponse(
+            arquivo, as_attachment=True, filename=f'{nome_arquivo}.xlsx', content_type=CONTENT_TYPE_XLSX
+        )
+
+    @staticmethod
+    def resposta(formato: str, nome_arquivo: str, planilhas: Sequence[Planilha]):
+        """Download no formato pedido ('csv'; 'excel'/'xlsx')."""
+        if formato == 'csv':
+            return ExportacaoService.csv(nome_arquivo, planilhas)
+        if formato in ('excel', 'xlsx'):
+            return ExportacaoService.xlsx(nome_arquivo, planilhas)
+        raise ValueError(f"Formato de exportação inválido: {formato}")
@@ -0,0 +1,66 @@
+# backend/empresa/contas/services/filtro_datas_service.py
+"""
+Filtros por dia em campos DateTimeField sem converter a coluna.
+
+`campo__date__range=[d1, d2]` vira `campo::date BETWEEN d1 AND d2` (no
+SQLite, `django_datetime_cast_date(campo, ...)`): o banco calcula o cast em
+todas as linhas e o índice B-tree da coluna não serve. Aqui o período de dias
+é convertido num intervalo semiaberto de instantes,
+`campo >= início de d1 AND campo < início de d2 + 1 dia`, que usa o índice da
+coluna (ou o índice de expressão, quando o campo é uma anotação como
+Coalesce('data_pagamento', 'vencimento')).
+
+Os limites são a meia-noite no fuso corrente, o mesmo que o lookup __date
+usa, então o resultado é idêntico ao do filtro original.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+
+class FiltroDatasService:
+    """Filtros de período (em dias) que o banco resolve pelo índice."""
+
+    @staticmethod
+    def _como_date(valor) -> date:
+        if isinstance(valor, datetime):
+            return timezone.localtime(valor).date() if timezone.is_aware(valor) else valor.date()
+        return valor
+
+    @staticmethod
+    def inicio_do_dia(dia) -> datetime:
+        """Meia-noite do dia no fuso corrente (ingênua se USE_TZ=False)."""
+        inicio = datetime.combine(FiltroDatasService._como_date(dia), time.min)
+        return timezone.make_aware(inicio) if settings.USE_TZ else inicio
+
+    @staticmethod
+    def intervalo(data_inicial, data_final) -> Tuple[datetime, datetime]:
+        """[início, fim) equivalente aos dias de data_inicial a data_final, inclusive."""
+        return (
+            FiltroDatasService.inicio_do_dia(data_inicial),
+            FiltroDatasService.inicio_do_dia(FiltroDatasService._como_date(data_final) + timedelta(days=1)),
+        )
+
+    @staticmethod
+    def entre(campo: str, data_inicial=None, data_final=None) -> Q:
+        """
+        Equivale a campo__date__range=[data_inicial, data_final]; sem um dos
+        limites, a campo__date__gte / campo__date__lte.
+        """
+        filtros = {}
+        if data_inicial is not None:
+            filtros[f'{campo}__gte'] = FiltroDatasService.inicio_do_dia(data_inicial)
+        if data_final is not None:
+            filtros[f'{campo}__lt'] = FiltroDatasService.inicio_do_dia(
+                FiltroDatasService._como_date(data_final) + timedelta(days=1)
+            )
+        return Q(**filtros)
+
+    @staticmethod
+    def antes(campo: str, dia) -> Q:
+        """Equivale a campo__date__lt=dia."""
+        return Q(**{f'{campo}__lt': FiltroDatasService.inicio_do_dia(dia)})
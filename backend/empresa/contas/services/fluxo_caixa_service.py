@@ -5,6 +5,7 @@ from datetime import datetime, date, timedelta
 from django.db import transaction
 import traceback
 from django.db.models import Sum, Q, Prefetch
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -27,6 +28,32 @@ from ..models.access import (
     NotasFiscaisSaida,
     NotasFiscaisServico
 )
+from .saldo_mensal_service import SaldoMensalService
+from .tipo_operacao_service import (
+    ADIANTAMENTO, COMODATO, COMPRA, DEVOLUCAO, LOCACAO, SERVICO, SIMPLES_REMESSA, VENDA,
+)
+
+# Categoria do lançamento pelo tipo de operação da nota (tipo_operacao_service.py)
+CATEGORIAS_POR_OPERACAO = {
+    'nfs': {
+        VENDA: 'vendas',
+        LOCACAO: 'aluguel',
+        SERVICO: 'servicos',
+        DEVOLUCAO: 'devolucao',
+        COMODATO: 'comodato',
+        SIMPLES_REMESSA: 'simplesRemessa',
+        ADIANTAMENTO: 'adiantamento',
+    },
+    'nfe': {
+        COMPRA: 'compra',
+        SERVICO: 'servicos',
+        DEVOLUCAO: 'devolucao',
+        COMODATO: 'comodato',
+        SIMPLES_REMESSA: 'simplesRemessa',
+        ADIANTAMENTO: 'adiantamento',
+    },
+}
+
 # Configurar logging
 logging.config.dictConfig(LOGGING)
 logger = logging.getLogger('fluxo_caixa')
@@ -64,7 +91,7 @@ class FluxoCaixaService:
                 elif fonte_tipo == 'nfs':
                     # Verificar tipo de operação da NF
                     nota = NotasFiscaisSaida.objects.get(id=fonte_id)
-                    if nota.operacao and 'LOCACAO' in nota.operacao.upper():
+                    if nota.tipo_operacao == LOCACAO:
                         categoria = 'locacao_maquinas'
                     else:
                         categoria = 'vendas'
@@ -98,7 +125,7 @@ class FluxoCaixaService:
         
     def _determinar_categoria_por_operacao(nota, tipo_documento='nfs'):
         """
-        Determina a categoria do lançamento baseado na operação da nota fiscal
+        Determina a categoria do lançamento pelo tipo de operação da nota fiscal
 
         Args:
             nota: NotaFiscalSaida ou NotaFiscalEntrada
@@ -107,57 +134,13 @@ class FluxoCaixaService:
         Returns:
             str: categoria do lançamento
         """
-        try:
-            if not nota.operacao:
-                logger.warning(f"Nota {nota.numero_nota} sem operação definida")
-                return 'vendas' if tipo_documento == 'nfs' else 'compra'
-
-            operacao = nota.operacao.upper()
-
-            # Log para debug
-            logger.debug(f"Determinando categoria para nota {nota.numero_nota} - Operação: {operacao}")
-
-            # Mapeamento de termos nas operações para categorias
-            if tipo_documento == 'nfs':
-                # Notas fiscais de saída
-                if any(termo in operacao for termo in ['VENDA', 'REVENDA']):
-                    return 'vendas'
-                elif any(termo in operacao for termo in ['ALUGUEL', 'LOCACAO', 'LOCAÇÃO']):
-                    return 'aluguel'
-                elif any(termo in operacao for termo in ['SERVICO', 'SERVIÇO', 'MANUTENCAO', 'MANUTENÇÃO']):
-                    return 'servicos'
-                elif 'DEVOLUCAO' in operacao or 'DEVOLUÇÃO' in operacao:
-                    return 'devolucao'
-                elif 'COMODATO' in operacao:
-                    return 'comodato'
-                elif 'SIMPLES REMESSA' in operacao:
-                    return 'simplesRemessa'
-                elif 'ADIANTAMENTO' in operacao:
-                    return 'adiantamento'
-                else:
-                    logger.warning(f"Operação não mapeada para NFS {nota.numero_nota}: {operacao}")
-                    return 'vendas'  # default para notas de saída
-            else:
-                # Notas fiscais de entrada
-                if any(termo in operacao for termo in ['COMPRA', 'AQUISICAO']):
-                    return 'compra'
-                elif any(termo in operacao for termo in ['SERVICO', 'SERVIÇO', 'MANUTENCAO', 'MANUTENÇÃO']):
-                    return 'servicos'
-                elif 'DEVOLUCAO' in operacao or 'DEVOLUÇÃO' in operacao:
-                    return 'devolucao'
-                elif 'COMODATO' in operacao:
-                    return 'comodato'
-                elif 'SIMPLES REMESSA' in operacao:
-                    return 'simplesRemessa'
-                elif 'ADIANTAMENTO' in operacao:
-                    return 'adiantamento'
-                else:
-                    logger.warning(f"Operação não mapeada para NFE {nota.numero_nota}: {operacao}")
-                    return 'compra'  # default para notas de entrada
-
-        except Exception as e:
-            logger.error(f"Erro ao determinar categoria da nota {nota.numero_nota}: {str(e)}")
-            return 'vendas' if tipo_documento == 'nfs' else 'compra'
+        categorias = CATEGORIAS_POR_OPERACAO[tipo_documento]
+        categoria = categorias.get(nota.tipo_operacao)
+        if categoria is None:
+            # Sem operação ou operação não mapeada: vendas nas saídas, compra nas entradas
+            categoria = 'vendas' if tipo_documento == 'nfs' else 'compra'
+            logger.warning(f"Operação não mapeada para {tipo_documento.upper()} {nota.numero_nota}: {nota.operacao}")
+        return categoria
         
 
     @staticmethod
@@ -383,12 +366,12 @@ class FluxoCaixaService:
                     ))
 
                     if len(lancamentos) >= 1000:  # BATCH_SIZE
-                        FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+                        FluxoCaixaService._criar_em_lote(lancamentos)
                         lancamentos = []
 
                 # Criar lote final
                 if lancamentos:
-                    FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+                    FluxoCaixaService._criar_em_lote(lancamentos)
 
                 total_sincronizado = FluxoCaixaLancamento.objects.filter(
                     fonte_tipo='nfs'
@@ -454,12 +437,12 @@ class FluxoCaixaService:
                     ))
 
                     if len(lancamentos) >= 1000:  # BATCH_SIZE
-                        FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+                        FluxoCaixaService._criar_em_lote(lancamentos)
                         lancamentos = []
 
                 # Criar lote final
                 if lancamentos:
-                    FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+                    FluxoCaixaService._criar_em_lote(lancamentos)
 
                 total_sincronizado = FluxoCaixaLancamento.objects.filter(
                     fonte_tipo='nfe'
@@ -537,12 +520,12 @@ class FluxoCaixaService:
                     ))
 
                     if len(lancamentos) >= 1000:  # BATCH_SIZE
-                        FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+                        FluxoCaixaService._criar_em_lote(lancamentos)
                         lancamentos = []
 
                 # Criar lote final
                 if lancamentos:
-                    FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+                    FluxoCaixaService._criar_em_lote(lancamentos)
 
                 total_sincronizado = FluxoCaixaLancamento.objects.filter(
                     fonte_tipo='nfserv'
@@ -594,12 +577,12 @@ class FluxoCaixaService:
                     ))
 
                     if len(lancamentos) >= FluxoCaixaService.BATCH_SIZE:
-                        FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+                        FluxoCaixaService._criar_em_lote(lancamentos)
                         lancamentos = []
 
                 # Criar lote final de contas a pagar
                 if lancamentos:
-                    FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+                    FluxoCaixaService._criar_em_lote(lancamentos)
 
                 # Contas a Receber - em lote
                 lancamentos = []
@@ -626,12 +609,12 @@ class FluxoCaixaService:
                     ))
 
                     if len(lancamentos) >= FluxoCaixaService.BATCH_SIZE:
-                        FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+                        FluxoCaixaService._criar_em_lote(lancamentos)
                         lancamentos = []
 
                 # Criar lote final de contas a receber
                 if lancamentos:
-                    FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+                    FluxoCaixaService._criar_em_lote(lancamentos)
 
                 return "Sincronização concluída com sucesso"
 
@@ -693,8 +676,7 @@ class FluxoCaixaService:
                 )
 
                 # Atualiza saldos
-                FluxoCaixaService.atualizar_saldo_diario(lancamento.data)
-                FluxoCaixaService.atualizar_saldo_diario(data_estorno.date())
+                FluxoCaixaService.atualizar_saldo_diario(min(lancamento.data, data_estorno.date()))
 
                 return lancamento
         except FluxoCaixaLancamento.DoesNotExist:
@@ -702,43 +684,104 @@ class FluxoCaixaService:
         except Exception as e:
             raise Exception(f"Erro ao estornar lançamento: {str(e)}")
 
+    @staticmethod
+    def _criar_em_lote(lancamentos):
+        """bulk_create de lançamentos, invalidando os pontos de controle do saldo"""
+        FluxoCaixaLancamento.objects.bulk_create(lancamentos)
+        SaldoMensalService.invalidar(min((l.data for l in lancamentos if l.data), default=None))
+
     @staticmethod
     def atualizar_saldo_diario(data):
-        """Atualiza ou cria o saldo diário para uma data específica"""
+        """Atualiza o saldo diário da data e os saldos dos dias seguintes"""
         try:
-            # Busca saldo anterior
-            saldo_anterior = SaldoDiario.objects.filter(
-                data__lt=data
-            ).order_by('-data').first()
+            FluxoCaixaService.recalcular_saldos_diarios(desde=data)
+        except Exception as e:
+            raise Exception(f"Erro ao atualizar saldo diário: {str(e)}")
 
-            saldo_inicial = saldo_anterior.saldo_final if saldo_anterior else \
-                          FluxoCaixaService.get_configuracao().saldo_inicial
+    # Totais por dia em um GROUP BY e saldo acumulado por window function.
+    # Dias com saldo já gravado e sem lançamentos entram zerados, mantendo a
+    # sequência de saldos.
+    SQL_SALDOS_DIARIOS = """
+        WITH totais AS (
+            SELECT data,
+                   SUM(CASE WHEN tipo = 'entrada' THEN valor ELSE 0 END) AS entradas,
+                   SUM(CASE WHEN tipo = 'saida' THEN valor ELSE 0 END) AS saidas,
+                   SUM(CASE WHEN tipo = 'entrada' AND realizado THEN valor ELSE 0 END) AS entradas_realizadas,
+                   SUM(CASE WHEN tipo = 'saida' AND realizado THEN valor ELSE 0 END) AS saidas_realizadas
+              FROM {lancamentos}
+             WHERE data >= %s AND data_estorno IS NULL
+             GROUP BY data
+        ),
+        dias AS (
+            SELECT data FROM {saldos} WHERE data >= %s
+            UNION
+            SELECT data FROM totais
+        )
+        SELECT saldo.id AS id,
+               dias.data AS data,
+               COALESCE(totais.entradas, 0) AS total_entradas,
+               COALESCE(totais.saidas, 0) AS total_saidas,
+               COALESCE(totais.entradas_realizadas, 0) AS total_entradas_realizadas,
+               COALESCE(totais.saidas_realizadas, 0) AS total_saidas_realizadas,
+               %s + SUM(COALESCE(totais.entradas, 0) - COALESCE(totais.saidas, 0))
+                    OVER (ORDER BY dias.data) AS saldo_final
+          FROM dias
+          LEFT JOIN totais ON totais.data = dias.data
+          LEFT JOIN {saldos} saldo ON saldo.data = dias.data
+         ORDER BY dias.data
+    """
 
-            # Busca ou cria saldo do dia
-            saldo_diario, created = SaldoDiario.objects.get_or_create(
-                data=data,
-                defaults={'saldo_inicial': saldo_inicial}
-            )
+    @staticmethod
+    def recalcular_saldos_diarios(desde=None):
+        """
+        Recalcula os saldos diários a partir de `desde` (todos, se None).
 
-            if not created:
-                saldo_diario.saldo_inicial = saldo_inicial
+        Os dias anteriores não são tocados: o saldo de partida é o saldo final
+        do último dia antes de `desde`, ou o saldo inicial da configuração.
+        Uma consulta calcula totais e saldos; a gravação é um bulk_update dos
+        dias existentes e um bulk_create dos novos. Retorna o número de dias
+        recalculados.
+        """
+        desde = FluxoCaixaService._converter_para_date(desde) or date.min
 
-            saldo_diario.processado = False
-            saldo_diario.save()  # Isso vai disparar o cálculo dos totais
+        with transaction.atomic():
+            saldo_anterior = SaldoDiario.objects.filter(data__lt=desde).order_by('-data').first()
+            if saldo_anterior:
+                saldo_partida = saldo_anterior.saldo_final
+            else:
+                config = FluxoCaixaService.get_configuracao()
+                saldo_partida = config.saldo_inicial if config else Decimal('0')
 
-            # Atualiza saldos futuros
-            saldos_futuros = SaldoDiario.objects.filter(data__gt=data)
-            for saldo in saldos_futuros:
-                saldo_anterior = SaldoDiario.objects.filter(
-                    data__lt=saldo.data
-                ).order_by('-data').first()
-                
-                saldo.saldo_inicial = saldo_anterior.saldo_final
-                saldo.processado = False
-                saldo.save()
+            sql = FluxoCaixaService.SQL_SALDOS_DIARIOS.format(
+                lancamentos=FluxoCaixaLancamento._meta.db_table,
+                saldos=SaldoDiario._meta.db_table,
+            )
+            saldos = list(SaldoDiario.objects.raw(sql, [desde, desde, saldo_partida]))
+
+            agora = timezone.now()
+            for saldo in saldos:
+                saldo.saldo_inicial = saldo.saldo_final - saldo.total_entradas + saldo.total_saidas
+                saldo.total_entradas_previstas = saldo.total_entradas - saldo.total_entradas_realizadas
+                saldo.total_saidas_previstas = saldo.total_saidas - saldo.total_saidas_realizadas
+                saldo.data_atualizacao = agora
+                saldo.processado = True
+
+            SaldoDiario.objects.bulk_update(
+                [saldo for saldo in saldos if saldo.id is not None],
+                [
+                    'saldo_inicial', 'total_entradas', 'total_saidas', 'saldo_final',
+                    'total_entradas_realizadas', 'total_saidas_realizadas',
+                    'total_entradas_previstas', 'total_saidas_previstas',
+                    'data_atualizacao', 'processado',
+                ],
+                batch_size=FluxoCaixaService.BATCH_SIZE,
+            )
+            SaldoDiario.objects.bulk_create(
+                [saldo for saldo in saldos if saldo.id is None],
+                batch_size=FluxoCaixaService.BATCH_SIZE,
+            )
 
-        except Exception as e:
-            raise Exception(f"Erro ao atualizar saldo diário: {str(e)}")
+        return len(saldos)
 
     @staticmethod
     def _converter_para_date(data_valor):
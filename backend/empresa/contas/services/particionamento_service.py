@@ -0,0 +1,300 @@
+# backend/empresa/contas/services/particionamento_service.py
+"""
+Particionamento por ano (PARTITION BY RANGE) das tabelas históricas.
+
+movimentacoes_estoque guarda anos de histórico do Access. No PostgreSQL
+ela vira uma tabela particionada pela coluna de data, com uma partição por ano (<tabela>_<ano>, de 1º de janeiro
+UTC a 1º de janeiro do ano seguinte) e uma partição padrão (<tabela>_padrao)
+para datas nulas ou de anos sem partição. Assim:
+
+- consultas com filtro de período na coluna de data (FiltroDatasService)
+  leem só as partições dos anos do período;
+- VACUUM e REINDEX passam a ser feitos ano a ano (manutencao);
+- as cargas da sincronização continuam inserindo na tabela pai e o banco
+  roteia cada linha para a partição do seu ano.
+
+A conversão das tabelas existentes é feita pela migração 0025 (particionar
+/ desparticionar). A partição do ano seguinte é criada por criar_particoes,
+chamado pela sincronização e pelo comando manter_particoes; linhas que já
+tenham caído na partição padrão são movidas para a partição nova.
+
+A chave primária de uma tabela particionada precisa conter a coluna de
+partição: vira (id, data) quando a data é NOT NULL e, quando a data aceita
+nulo, uma restrição UNIQUE (id, data). O id continua vindo de uma sequência,
+então segue único na prática. Em outros bancos nada é feito.
+
+Os itens de NF (itens_nf_entrada, itens_nf_saida) não são particionados: os
+relatórios filtram os itens pela data da nota, não pela coluna data do
+item, e não haveria poda de partições.
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+
+from ..models.access import MovimentacoesEstoque
+
+logger = logging.getLogger(__name__)
+
+# Tabela -> coluna de partição
+TABELAS_PARTICIONADAS = {
+    MovimentacoesEstoque._meta.db_table: 'data_movimentacao',
+}
+
+
+class ParticionamentoService:
+    """Conversão, criação de partições anuais e manutenção por ano."""
+
+    @staticmethod
+    def disponivel() -> bool:
+        return connection.vendor == 'postgresql'
+
+    @staticmethod
+    def nome_particao(tabela: str, ano: Optional[int] = None) -> str:
+        """<tabela>_<ano>, ou <tabela>_padrao sem ano."""
+        return f'{tabela}_{ano}' if ano is not None else f'{tabela}_padrao'
+
+    @staticmethod
+    def limites(ano: int) -> Tuple[str, str]:
+        """Limites [início, fim) da partição do ano, em UTC."""
+        return f'{ano}-01-01 00:00:00+00', f'{ano + 1}-01-01 00:00:00+00'
+
+    @staticmethod
+    def anos_correntes(hoje: Optional[date] = None) -> List[int]:
+        """Ano atual e o seguinte: as partições que precisam existir antes das cargas."""
+        ano = (hoje or date.today()).year
+        return [ano, ano + 1]
+
+    @staticmethod
+    def _tabelas(tabelas: Optional[Iterable[str]]) -> Dict[str, str]:
+        if tabelas is None:
+            return dict(TABELAS_PARTICIONADAS)
+        desconhecidas = set(tabelas) - set(TABELAS_PARTICIONADAS)
+        if desconhecidas:
+            raise ValueError(f"Tabelas sem particionamento: {', '.join(sorted(desconhecidas))}")
+        return {tabela: TABELAS_PARTICIONADAS[tabela] for tabela in tabelas}
+
+    # -- consulta -----------------------------------------------------------------
+
+    @staticmethod
+    def particionada(cursor, tabela: str) -> bool:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))', [tabela]
+        )
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def particoes(tabela: str) -> List[dict]:
+        """Partições da tabela com limites, linhas estimadas e tamanho em bytes."""
+        if not ParticionamentoService.disponivel():
+            return []
+        with connection.cursor() as cursor:
+            if not ParticionamentoService.particionada(cursor, tabela):
+                return []
+            cursor.execute(
+                """
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint,
+                       pg_total_relation_size(c.oid)
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = %s::regclass
+                ORDER BY c.relname
+                """,
+                [tabela],
+            )
+            return [
+                {'nome': nome, 'limites': limites, 'linhas': max(linhas, 0), 'bytes': tamanho}
+                for nome, limites, linhas, tamanho in cursor.fetchall()
+            ]
+
+    # -- partições anuais ---------------------------------------------------------------
+
+    @staticmethod
+    def criar_particoes(tabelas: Optional[Iterable[str]] = None, anos: Optional[Iterable[int]] = None) -> List[str]:
+        """
+        Cria as partições que faltam (padrão: ano atual e o seguinte) nas
+        tabelas já particionadas e devolve os nomes criados.
+        """
+        tabelas = ParticionamentoService._tabelas(tabelas)
+        if not ParticionamentoService.disponivel():
+            return []
+        anos = list(anos) if anos is not None else ParticionamentoService.anos_correntes()
+        criadas = []
+        with connection.cursor() as cursor:
+            for tabela, coluna in tabelas.items():
+                if not ParticionamentoService.particionada(cursor, tabela):
+                    continue
+                existentes = {particao['nome'] for particao in ParticionamentoService.particoes(tabela)}
+                for ano in anos:
+                    nome = ParticionamentoService.nome_particao(tabela, ano)
+                    if nome in existentes:
+                        continue
+                    with transaction.atomic():
+                        ParticionamentoService._criar_particao(cursor, tabela, coluna, ano)
+                    logger.info(f"Partição {nome} criada")
+                    criadas.append(nome)
+        return criadas
+
+    @staticmethod
+    def _criar_particao(cursor, tabela: str, coluna: str, ano: int):
+        """
+        Cria a partição fora da tabela, move para ela as linhas do ano que
+        estão na partição padrão e só então a anexa (ATTACH falharia com
+        essas linhas ainda na padrão).
+        """
+        nome = ParticionamentoService.nome_particao(tabela, ano)
+        padrao = ParticionamentoService.nome_particao(tabela)
+        inicio, fim = ParticionamentoService.limites(ano)
+        cursor.execute(f'CREATE TABLE {nome} (LIKE {tabela} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f"WITH movidas AS (DELETE FROM {padrao} WHERE {coluna} >= '{inicio}' AND {coluna} < '{fim}' "
+            f"RETURNING *) INSERT INTO {nome} SELECT * FROM movidas"
+        )
+        cursor.execute(f"ALTER TABLE {tabela} ATTACH PARTITION {nome} FOR VALUES FROM ('{inicio}') TO ('{fim}')")
+
+    # -- manutenção -----------------------------------------------------------------------
+
+    @staticmethod
+    def manutencao(ano: Optional[int] = None, tabelas: Optional[Iterable[str]] = None,
+                   reindex: bool = False) -> List[str]:
+        """
+        VACUUM (ANALYZE) e, opcionalmente, REINDEX CONCURRENTLY da partição do
+        ano (da partição padrão, sem ano) em cada tabela. Não pode rodar dentro
+        de transação. Devolve as partições processadas.
+        """
+        tabelas = ParticionamentoService._tabelas(tabelas)
+        if not ParticionamentoService.disponivel():
+            return []
+        processadas = []
+        for tabela in tabelas:
+            nome = ParticionamentoService.nome_particao(tabela, ano)
+            if nome not in {particao['nome'] for particao in ParticionamentoService.particoes(tabela)}:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'VACUUM (ANALYZE) {nome}')
+                if reindex:
+                    cursor.execute(f'REINDEX TABLE CONCURRENTLY {nome}')
+            processadas.append(nome)
+        return processadas
+
+    # -- conversão (migração 0025) ----------------------------------------------------------
+
+    @staticmethod
+    def particionar(cursor, tabela: str) -> bool:
+        """Converte a tabela em particionada por ano, com os dados; False se já era."""
+        if ParticionamentoService.particionada(cursor, tabela):
+            return False
+        ParticionamentoService._recriar(cursor, tabela, particionada=True)
+        return True
+
+    @staticmethod
+    def desparticionar(cursor, tabela: str) -> bool:
+        """Volta a tabela a uma tabela comum com chave primária (id); False se já era."""
+        if not ParticionamentoService.particionada(cursor, tabela):
+            return False
+        ParticionamentoService._recriar(cursor, tabela, particionada=False)
+        return True
+
+    @staticmethod
+    def _recriar(cursor, tabela: str, particionada: bool):
+        """
+        Renomeia a tabela para <tabela>_legado, cria a nova com as mesmas
+        colunas, copia as linhas e recria índices, chaves estrangeiras e a
+        sequência do id com os nomes originais. Views que dependem da tabela
+        precisam ser removidas antes e recriadas depois.
+        """
+        coluna = TABELAS_PARTICIONADAS[tabela]
+        legado = f'{tabela}_legado'
+
+        # Índices fora das restrições (os de partições seguem o índice pai)
+        cursor.execute(
+            """
+            SELECT i.relname, pg_get_indexdef(i.oid)
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = %s::regclass
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+            """,
+            [tabela],
+        )
+        indices = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('f', 'p', 'u')",
+            [tabela],
+        )
+        restricoes = cursor.fetchall()
+        cursor.execute(
+            "SELECT attidentity <> '' FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attname = %s",
+            [tabela, 'id'],
+        )
+        identidade = cursor.fetchone()[0]
+        cursor.execute(
+            'SELECT NOT attnotnull FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s',
+            [tabela, coluna],
+        )
+        data_nula = cursor.fetchone()[0]
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [tabela])
+        sequencia = cursor.fetchone()[0]
+
+        cursor.execute(f'ALTER TABLE {tabela} RENAME TO {legado}')
+        for nome, _ in indices:
+            cursor.execute(f'DROP INDEX {nome}')
+        for nome, tipo, _ in restricoes:
+            if tipo in ('p', 'u'):
+                cursor.execute(f'ALTER TABLE {legado} RENAME CONSTRAINT {nome} TO {nome[:55]}_legado')
+
+        # A sequência do id passa para a tabela nova (identity não existe em
+        # tabela particionada: vira uma sequência comum com o mesmo nome)
+        if identidade:
+            cursor.execute(f'ALTER TABLE {legado} ALTER COLUMN id DROP IDENTITY')
+            sequencia = f'{tabela}_id_seq'
+            cursor.execute(f'CREATE SEQUENCE {sequencia}')
+        else:
+            cursor.execute(f'ALTER SEQUENCE {sequencia} OWNED BY NONE')
+
+        particao = f' PARTITION BY RANGE ({coluna})' if particionada else ''
+        cursor.execute(
+            f'CREATE TABLE {tabela} (LIKE {legado} INCLUDING DEFAULTS INCLUDING CONSTRAINTS '
+            f'INCLUDING STORAGE INCLUDING COMMENTS){particao}'
+        )
+        cursor.execute(f"ALTER TABLE {tabela} ALTER COLUMN id SET DEFAULT nextval('{sequencia}'::regclass)")
+
+        if not particionada:
+            cursor.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT {tabela}_pkey PRIMARY KEY (id)')
+        elif data_nula:
+            cursor.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT {tabela}_id_{coluna}_uniq UNIQUE (id, {coluna})')
+        else:
+            cursor.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT {tabela}_pkey PRIMARY KEY (id, {coluna})')
+
+        if particionada:
+            cursor.execute(
+                f"SELECT DISTINCT EXTRACT(YEAR FROM {coluna} AT TIME ZONE 'UTC')::int FROM {legado} "
+                f"WHERE {coluna} IS NOT NULL"
+            )
+            anos = {ano for (ano,) in cursor.fetchall()} | set(ParticionamentoService.anos_correntes())
+            for ano in sorted(anos):
+                inicio, fim = ParticionamentoService.limites(ano)
+                cursor.execute(
+                    f"CREATE TABLE {ParticionamentoService.nome_particao(tabela, ano)} PARTITION OF {tabela} "
+                    f"FOR VALUES FROM ('{inicio}') TO ('{fim}')"
+                )
+            cursor.execute(f'CREATE TABLE {ParticionamentoService.nome_particao(tabela)} PARTITION OF {tabela} DEFAULT')
+
+        cursor.execute(f'INSERT INTO {tabela} SELECT * FROM {legado}')
+
+        # Índices depois da cópia; no pai particionado eles se propagam às partições
+        for _, definicao in indices:
+            cursor.execute(definicao.replace(' ON ONLY ', ' ON ', 1))
+        for nome, tipo, definicao in restricoes:
+            if tipo == 'f':
+                cursor.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT {nome} {definicao}')
+
+        cursor.execute(f'ALTER SEQUENCE {sequencia} OWNED BY {tabela}.id')
+        cursor.execute(f"SELECT setval('{sequencia}', COALESCE((SELECT MAX(id) FROM {tabela}), 0) + 1, false)")
+        cursor.execute(f'DROP TABLE {legado}')
+        cursor.execute(f'ANALYZE {tabela}')
+        logger.info(f"Tabela {tabela} {'particionada por ano' if particionada else 'desparticionada'}")
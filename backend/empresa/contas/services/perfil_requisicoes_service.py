@@ -0,0 +1,188 @@
+# backend/empresa/contas/services/perfil_requisicoes_service.py
+"""
+Perfil de desempenho por endpoint.
+
+O PerfilRequisicoesMiddleware (contas/middleware.py) mede cada requisição:
+tempo total, número e tempo das consultas, SQL executado mais de uma vez
+(N+1) e tamanho da resposta. As amostras ficam em memória por nome de URL e
+são somadas às de perfil_endpoints a cada INTERVALO_GRAVACAO segundos, de
+modo que a tabela reúne todos os processos. O endpoint /perfil-endpoints/ e
+o comando perfil_endpoints calculam os percentis das últimas AMOSTRAS
+requisições de cada endpoint a partir dela.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models.access import PerfilEndpoint
+
+CONFIGURACAO_PADRAO = {
+    'ATIVO': True,
+    'AMOSTRAS': 500,           # Amostras mantidas por endpoint (janela dos percentis)
+    'INTERVALO_GRAVACAO': 60,  # Segundos entre gravações em perfil_endpoints
+    'LIMITE_LENTO_MS': 1000,   # Requisições mais lentas vão para o log com o SQL repetido
+    'TOP_REPETIDAS': 5,        # Consultas repetidas registradas por requisição
+}
+
+MAX_REPETICOES_GRAVADAS = 20
+
+ORDENACOES = {
+    'tempo': lambda resumo: resumo['tempo_ms']['p95'],
+    'consultas': lambda resumo: resumo['consultas']['p95'],
+    'tempo_db': lambda resumo: resumo['tempo_db_ms']['p95'],
+    'requisicoes': lambda resumo: resumo['requisicoes'],
+}
+
+_LISTA_PARAMETROS = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def configuracao() -> dict:
+    return {**CONFIGURACAO_PADRAO, **getattr(settings, 'PERFIL_REQUISICOES', {})}
+
+
+def assinatura_sql(sql: str) -> str:
+    """SQL sem os valores (o Django já os passa à parte), com listas IN (...) colapsadas."""
+    return _LISTA_PARAMETROS.sub('IN (...)', sql)
+
+
+class Medicao:
+    """Consultas de uma requisição, coletadas via connection.execute_wrapper."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_db = 0.0
+        self.assinaturas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo_db += time.perf_counter() - inicio
+            self.consultas += 1
+            self.assinaturas[assinatura_sql(sql)] += 1
+
+    def repetidas(self, limite: int) -> List[Tuple[str, int]]:
+        """As consultas executadas mais vezes, entre as que se repetiram."""
+        return [(sql, vezes) for sql, vezes in self.assinaturas.most_common(limite) if vezes > 1]
+
+
+def percentil(valores: List[float], posicao: float) -> float:
+    if not valores:
+        return 0
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(posicao / 100 * len(ordenados)) - 1)]
+
+
+class PerfilRequisicoesService:
+    """Registro e leitura das estatísticas por endpoint."""
+
+    _lock = threading.Lock()
+    _pendentes: Dict[str, dict] = {}
+    _ultima_gravacao = time.monotonic()
+
+    @classmethod
+    def registrar(cls, url_nome: str, tempo_ms: float, medicao: Medicao, tamanho: int) -> None:
+        config = configuracao()
+        amostra = [round(tempo_ms, 1), medicao.consultas, round(medicao.tempo_db * 1000, 1), tamanho]
+        with cls._lock:
+            pendente = cls._pendentes.setdefault(url_nome, {
+                'requisicoes': 0, 'amostras': deque(maxlen=config['AMOSTRAS']), 'repeticoes': {},
+            })
+            pendente['requisicoes'] += 1
+            pendente['amostras'].append(amostra)
+            for sql, vezes in medicao.repetidas(config['TOP_REPETIDAS']):
+                pendente['repeticoes'][sql] = max(vezes, pendente['repeticoes'].get(sql, 0))
+            gravar = time.monotonic() - cls._ultima_gravacao >= config['INTERVALO_GRAVACAO']
+        if gravar:
+            cls.gravar()
+
+    @classmethod
+    def gravar(cls) -> int:
+        """Soma as amostras pendentes deste processo às de perfil_endpoints."""
+        with cls._lock:
+            pendentes, cls._pendentes = cls._pendentes, {}
+            cls._ultima_gravacao = time.monotonic()
+        if not pendentes:
+            return 0
+
+        limite = configuracao()['AMOSTRAS']
+        agora = timezone.now()
+        with transaction.atomic():
+            existentes = {
+                perfil.url_nome: perfil
+                for perfil in PerfilEndpoint.objects.select_for_update().filter(url_nome__in=list(pendentes))
+            }
+            novos, alterados = [], []
+            for url_nome, pendente in pendentes.items():
+                perfil = existentes.get(url_nome)
+                if perfil is None:
+                    perfil = PerfilEndpoint(url_nome=url_nome)
+                    novos.append(perfil)
+                else:
+                    alterados.append(perfil)
+                perfil.requisicoes += pendente['requisicoes']
+                perfil.amostras = (list(perfil.amostras) + list(pendente['amostras']))[-limite:]
+                repeticoes = dict(perfil.repeticoes)
+                for sql, vezes in pendente['repeticoes'].items():
+                    repeticoes[sql] = max(vezes, repeticoes.get(sql, 0))
+                perfil.repeticoes = dict(
+                    sorted(repeticoes.items(), key=lambda item: -item[1])[:MAX_REPETICOES_GRAVADAS]
+                )
+                perfil.atualizado_em = agora
+
+            # Outro processo pode criar o mesmo endpoint ao mesmo tempo; a amostra é descartada
+            PerfilEndpoint.objects.bulk_create(novos, ignore_conflicts=True)
+            PerfilEndpoint.objects.bulk_update(alterados, ['requisicoes', 'amostras', 'repeticoes', 'atualizado_em'])
+        return len(pendentes)
+
+    @staticmethod
+    def resumo(perfil: PerfilEndpoint) -> dict:
+        """Percentis das amostras gravadas de um endpoint."""
+        tempos = [amostra[0] for amostra in perfil.amostras]
+        consultas = [amostra[1] for amostra in perfil.amostras]
+        tempos_db = [amostra[2] for amostra in perfil.amostras]
+        tamanhos = [amostra[3] for amostra in perfil.amostras]
+        return {
+            'url_nome': perfil.url_nome,
+            'requisicoes': perfil.requisicoes,
+            'amostras': len(perfil.amostras),
+            'tempo_ms': {
+                'p50': percentil(tempos, 50), 'p95': percentil(tempos, 95),
+                'p99': percentil(tempos, 99), 'max': max(tempos, default=0),
+            },
+            'consultas': {
+                'p50': percentil(consultas, 50), 'p95': percentil(consultas, 95), 'max': max(consultas, default=0),
+            },
+            'tempo_db_ms': {'p50': percentil(tempos_db, 50), 'p95': percentil(tempos_db, 95)},
+            'tamanho_medio_bytes': int(sum(tamanhos) / len(tamanhos)) if tamanhos else 0,
+            'consultas_repetidas': [
+                {'sql': sql, 'execucoes': vezes} for sql, vezes in list(perfil.repeticoes.items())[:5]
+            ],
+            'atualizado_em': perfil.atualizado_em,
+        }
+
+    @classmethod
+    def estatisticas(cls, ordenar: str = 'tempo') -> List[dict]:
+        """Resumo de cada endpoint, do pior para o melhor pelo critério `ordenar`."""
+        if ordenar not in ORDENACOES:
+            raise ValueError(f"Ordenação inválida: {ordenar}. Use {', '.join(ORDENACOES)}")
+        cls.gravar()
+        resumos = [cls.resumo(perfil) for perfil in PerfilEndpoint.objects.all()]
+        return sorted(resumos, key=ORDENACOES[ordenar], reverse=True)
+
+    @classmethod
+    def limpar(cls) -> int:
+        """Descarta as amostras pendentes e as gravadas."""
+        with cls._lock:
+            cls._pendentes = {}
+        removidos, _ = PerfilEndpoint.objects.all().delete()
+        return removidos
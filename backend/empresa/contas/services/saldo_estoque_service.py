@@ -0,0 +1,98 @@
+# backend/empresa/contas/services/saldo_estoque_service.py
+"""
+Saldo atual de estoque lido da view materializada view_saldos_estoque_rapido.
+
+A view (migração 0024, modelo SaldoEstoqueRapido) guarda uma linha por
+produto com o saldo calculado pela regra dos snapshots, então o estoque de
+hoje é uma leitura por chave primária, sem agregar movimentações. No
+PostgreSQL ela é atualizada com REFRESH MATERIALIZED VIEW CONCURRENTLY ao
+final da sincronização do estoque (tarefa saldos_estoque) e, fora do
+caminho da requisição, alguns segundos após o commit de edições de
+movimentações pela API (signals/saldo_estoque.py), sem bloquear as
+leituras; nos demais bancos é uma view comum e está sempre atual. Cada
+refresh incrementa a versão da view no cache de relatórios, então uma
+resposta calculada antes dele com a view antiga não é reaproveitada.
+
+Datas passadas vêm dos snapshots diários (EstoqueSnapshotService), com a
+mesma regra, então hoje e ontem só diferem pelas movimentações entre eles.
+Nos dois casos saldo negativo conta como zero, como no cálculo retroativo
+antigo (StockCalculationService).
+"""
+
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.db import connection
+from django.db.models import QuerySet
+
+from ..models.access import SaldoEstoqueRapido
+from .cache_relatorios_service import CacheRelatoriosService
+from .estoque_snapshot_service import EstoqueSnapshotService
+
+logger = logging.getLogger(__name__)
+
+VIEW_SALDOS = SaldoEstoqueRapido._meta.db_table
+
+
+class SaldoEstoqueService:
+    """Leitura e atualização dos saldos atuais de estoque."""
+
+    @staticmethod
+    def atualizar(concorrente: bool = True) -> bool:
+        """
+        Recalcula a view materializada. Retorna False quando o banco não usa
+        view materializada (nada a fazer).
+        """
+        if connection.vendor != 'postgresql':
+            return False
+        modo = 'CONCURRENTLY ' if concorrente else ''
+        with connection.cursor() as cursor:
+            cursor.execute(f'REFRESH MATERIALIZED VIEW {modo}{VIEW_SALDOS}')
+        CacheRelatoriosService.incrementar(VIEW_SALDOS)
+        logger.info(f"View {VIEW_SALDOS} atualizada")
+        return True
+
+    @staticmethod
+    def quantidades_atuais(produto_ids: Optional[Iterable[int]] = None) -> Dict[int, Decimal]:
+        """{produto_id: saldo atual}; produtos sem movimentação não aparecem (saldo zero)."""
+        saldos = SaldoEstoqueRapido.objects.all()
+        if produto_ids is not None:
+            # Querysets viram subconsulta; demais iteráveis viram lista de IDs
+            if not isinstance(produto_ids, QuerySet):
+                produto_ids = list(produto_ids)
+            saldos = saldos.filter(produto_id__in=produto_ids)
+        return dict(saldos.values_list('produto_id', 'saldo_atual'))
+
+    @staticmethod
+    def quantidades_na_data(data: date, produto_ids: Optional[Iterable[int]] = None) -> Dict[int, Decimal]:
+        """Saldos da view para hoje (ou datas futuras), dos snapshots para datas passadas; negativos viram zero."""
+        if data >= date.today():
+            quantidades = SaldoEstoqueService.quantidades_atuais(produto_ids)
+        else:
+            quantidades = EstoqueSnapshotService.quantidades_na_data(data, produto_ids)
+        return {produto_id: max(Decimal('0'), quantidade) for produto_id, quantidade in quantidades.items()}
+
+    @staticmethod
+    def quantidades_nas_datas(datas: Iterable[date], produto_ids: Iterable[int]) -> Dict[int, Dict[date, Decimal]]:
+        """
+        {produto_id: {data: saldo}} com a regra de quantidades_na_data em cada
+        data: a view para hoje (ou datas futuras), os snapshots para as passadas.
+        """
+        produto_ids = list(produto_ids)
+        datas = set(datas)
+        passadas = [data for data in datas if data < date.today()]
+        futuras = datas.difference(passadas)
+
+        resultado = {produto_id: {} for produto_id in produto_ids}
+        for produto_id, pontos in EstoqueSnapshotService.quantidades_nas_datas(passadas, produto_ids).items():
+            resultado[produto_id].update(pontos)
+        if futuras:
+            atuais = SaldoEstoqueService.quantidades_atuais(produto_ids)
+            for produto_id in produto_ids:
+                resultado[produto_id].update(dict.fromkeys(futuras, atuais.get(produto_id, Decimal('0'))))
+        return {
+            produto_id: {data: max(Decimal('0'), quantidade) for data, quantidade in pontos.items()}
+            for produto_id, pontos in resultado.items()
+        }
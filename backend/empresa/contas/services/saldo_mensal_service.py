@@ -0,0 +1,112 @@
+# backend/empresa/contas/services/saldo_mensal_service.py
+"""
+Pontos de controle mensais do saldo acumulado do fluxo de caixa.
+
+O saldo até uma data é o ponto de controle do mês (soma de tudo que veio
+antes do dia 1, gravado em saldos_mensais_fluxo_caixa) mais uma agregação
+dos dias do próprio mês, então o custo não cresce com o histórico. Pontos
+ausentes são calculados a partir do último existente com um único GROUP BY
+por mês. Alterar um lançamento apaga os pontos dos meses seguintes à sua
+data (signals/saldo_mensal.py); cargas em lote chamam `invalidar`.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Case, DecimalField, F, Q, Sum, When
+from django.utils.dateparse import parse_date
+
+from ..models.fluxo_caixa import FluxoCaixaLancamento, SaldoMensalFluxoCaixa
+from .agrupamento_temporal_service import MES, AgrupamentoTemporalService
+
+
+def _movimento(**filtro):
+    """Soma de entradas menos saídas dos lançamentos que atendem o filtro."""
+    return Sum(
+        Case(
+            When(tipo='entrada', then=F('valor')),
+            When(tipo='saida', then=-F('valor')),
+            default=Decimal('0'),
+            output_field=DecimalField(max_digits=18, decimal_places=2),
+        ),
+        filter=Q(**filtro),
+    )
+
+
+AGREGADOS_MOVIMENTO = {
+    'movimento_realizado': _movimento(realizado=True),
+    'movimento_previsto': _movimento(realizado=False),
+}
+
+
+class SaldoMensalService:
+    """Saldo acumulado por pontos de controle mensais."""
+
+    @staticmethod
+    def como_date(data) -> date:
+        """Datas de lançamento podem chegar como datetime ou texto ISO."""
+        if isinstance(data, str):
+            return parse_date(data)
+        return data.date() if isinstance(data, datetime) else data
+
+    @staticmethod
+    def _sem_nulos(totais: dict) -> Dict[str, Decimal]:
+        return {campo: totais.get(campo) or Decimal('0') for campo in AGREGADOS_MOVIMENTO}
+
+    @staticmethod
+    def ponto_controle(mes: date) -> SaldoMensalFluxoCaixa:
+        """
+        Ponto de controle do mês; se não existe, calcula e grava os pontos
+        desde o último existente até ele.
+        """
+        ponto = SaldoMensalFluxoCaixa.objects.filter(mes=mes).first()
+        if ponto:
+            return ponto
+
+        anterior = SaldoMensalFluxoCaixa.objects.filter(mes__lt=mes).order_by('-mes').first()
+        lancamentos = FluxoCaixaLancamento.objects.filter(data__lt=mes)
+        if anterior:
+            lancamentos = lancamentos.filter(data__gte=anterior.mes)
+            acumulado = {campo: getattr(anterior, campo) for campo in AGREGADOS_MOVIMENTO}
+        else:
+            acumulado = SaldoMensalService._sem_nulos({})
+
+        por_mes = AgrupamentoTemporalService.agregar(lancamentos, 'data', MES, **AGREGADOS_MOVIMENTO)
+
+        # O ponto de cada mês soma os meses anteriores a ele
+        novos = []
+        atual = anterior.mes if anterior else min(por_mes, default=mes)
+        while atual < mes:
+            for campo, valor in SaldoMensalService._sem_nulos(por_mes.get(atual, {})).items():
+                acumulado[campo] += valor
+            atual += relativedelta(months=1)
+            novos.append(SaldoMensalFluxoCaixa(mes=atual, **acumulado))
+        if not novos:
+            novos.append(SaldoMensalFluxoCaixa(mes=mes, **acumulado))
+
+        SaldoMensalFluxoCaixa.objects.bulk_create(novos, ignore_conflicts=True)
+        return novos[-1]
+
+    @staticmethod
+    def movimento_ate(data) -> Dict[str, Decimal]:
+        """
+        Soma de entradas menos saídas dos lançamentos com data anterior à
+        informada: {'movimento_realizado', 'movimento_previsto'}.
+        """
+        data = SaldoMensalService.como_date(data)
+        mes = data.replace(day=1)
+        ponto = SaldoMensalService.ponto_controle(mes)
+        restante = SaldoMensalService._sem_nulos(
+            FluxoCaixaLancamento.objects.filter(data__gte=mes, data__lt=data).aggregate(**AGREGADOS_MOVIMENTO)
+        )
+        return {campo: getattr(ponto, campo) + restante[campo] for campo in AGREGADOS_MOVIMENTO}
+
+    @staticmethod
+    def invalidar(data) -> int:
+        """Apaga os pontos de controle que incluem lançamentos da data."""
+        if data is None:
+            return 0
+        apagados, _ = SaldoMensalFluxoCaixa.objects.filter(mes__gt=SaldoMensalService.como_date(data)).delete()
+        return apagados
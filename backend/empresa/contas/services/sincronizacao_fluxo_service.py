@@ -0,0 +1,168 @@
+# backend/empresa/contas/services/sincronizacao_fluxo_service.py
+"""
+Sincronização de contas a pagar/receber com os lançamentos do fluxo de caixa.
+
+Cada conta gera no máximo um lançamento, identificado por (fonte_tipo,
+fonte_id) e protegido por restrição única. Em vez de apagar e recriar os
+lançamentos do período, o conteúdo esperado de cada conta é resumido num
+hash (hash_origem) e comparado com o gravado: só contas novas são inseridas,
+só as alteradas são atualizadas e só os lançamentos sem conta
+correspondente no período são apagados. Reabrir um período sem mudanças
+não escreve nada.
+"""
+
+import hashlib
+import logging
+from datetime import date
+from typing import Dict, List
+
+from django.db import transaction
+from django.db.models import Q
+
+from ..models.access import ContasPagar, ContasReceber
+from ..models.fluxo_caixa import FluxoCaixaLancamento
+from .filtro_datas_service import FiltroDatasService
+from .saldo_mensal_service import SaldoMensalService
+
+logger = logging.getLogger(__name__)
+
+FONTE_CONTAS_PAGAR = 'contas_pagar'
+FONTE_CONTAS_RECEBER = 'contas_receber'
+
+# Lançamentos de NF no período são removidos e não regenerados, para não
+# duplicar os valores já lançados pelas contas
+FONTES_NOTAS = ['nfe', 'nfs']
+
+CAMPOS_SINCRONIZADOS = [
+    'data', 'valor', 'tipo', 'descricao', 'categoria', 'realizado', 'observacoes', 'fornecedor_id', 'cliente_id',
+]
+
+
+def _hash(valores: Dict[str, object]) -> str:
+    return hashlib.md5(
+        '|'.join(str(valores[campo]) for campo in CAMPOS_SINCRONIZADOS).encode('utf-8')
+    ).hexdigest()
+
+
+class SincronizacaoFluxoService:
+    """Upsert por diferença dos lançamentos gerados por contas."""
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def _valores_conta(conta, tipo: str) -> Dict[str, object]:
+        """Campos do lançamento de uma conta (data de pagamento se paga, senão vencimento)."""
+        paga = conta.status == 'P'
+        data_lancamento = conta.data_pagamento.date() if paga and conta.data_pagamento else conta.vencimento.date()
+        if tipo == 'saida':
+            pessoa = f'Conta a Pagar - {conta.fornecedor.nome if conta.fornecedor else "Sem fornecedor"}'
+            categoria = 'Contas a Pagar'
+        else:
+            pessoa = f'Conta a Receber - {conta.cliente.nome if conta.cliente else "Sem cliente"}'
+            categoria = 'Contas a Receber'
+        return {
+            'data': data_lancamento,
+            'valor': conta.valor_total_pago if paga and conta.valor_total_pago else conta.valor,
+            'tipo': tipo,
+            'descricao': pessoa,
+            'categoria': categoria,
+            'realizado': paga,
+            'observacoes': conta.historico or f'Vencimento: {conta.vencimento.strftime("%d/%m/%Y")}'
+            if conta.vencimento else '',
+            'fornecedor_id': conta.fornecedor_id if tipo == 'saida' else None,
+            'cliente_id': conta.cliente_id if tipo == 'entrada' else None,
+        }
+
+    @staticmethod
+    def lancamentos_esperados(data_inicial: date, data_final: date) -> Dict[tuple, Dict[str, object]]:
+        """{(fonte_tipo, fonte_id): campos do lançamento} das contas com data no período."""
+        periodo = (
+            FiltroDatasService.entre('vencimento', data_inicial, data_final) |
+            FiltroDatasService.entre('data_pagamento', data_inicial, data_final)
+        )
+        origens = [
+            (FONTE_CONTAS_PAGAR, 'saida', ContasPagar.objects.filter(periodo).select_related('fornecedor')),
+            (FONTE_CONTAS_RECEBER, 'entrada', ContasReceber.objects.filter(periodo).select_related('cliente')),
+        ]
+        esperados = {}
+        for fonte_tipo, tipo, contas in origens:
+            for conta in contas.iterator(chunk_size=SincronizacaoFluxoService.BATCH_SIZE):
+                if not conta.vencimento and not (conta.status == 'P' and conta.data_pagamento):
+                    continue
+                valores = SincronizacaoFluxoService._valores_conta(conta, tipo)
+                # Só entram as contas cuja data de lançamento cai no período
+                if data_inicial <= valores['data'] <= data_final:
+                    esperados[(fonte_tipo, conta.id)] = valores
+        return esperados
+
+    @staticmethod
+    def sincronizar_contas(data_inicial: date, data_final: date) -> Dict[str, int]:
+        """
+        Aplica ao fluxo de caixa só as diferenças entre as contas do período e
+        os lançamentos gravados. Retorna a quantidade de inseridos,
+        atualizados, removidos e inalterados.
+        """
+        esperados = SincronizacaoFluxoService.lancamentos_esperados(data_inicial, data_final)
+
+        ids_por_fonte = {FONTE_CONTAS_PAGAR: [], FONTE_CONTAS_RECEBER: []}
+        for fonte_tipo, fonte_id in esperados:
+            ids_por_fonte[fonte_tipo].append(fonte_id)
+
+        # Lançamentos do período e, fora dele, os das contas esperadas (a chave é única)
+        filtro = Q(data__range=[data_inicial, data_final])
+        for fonte_tipo, ids in ids_por_fonte.items():
+            if ids:
+                filtro |= Q(fonte_tipo=fonte_tipo, fonte_id__in=ids)
+        existentes = FluxoCaixaLancamento.objects.filter(
+            filtro, fonte_tipo__in=[FONTE_CONTAS_PAGAR, FONTE_CONTAS_RECEBER] + FONTES_NOTAS
+        ).only('id', 'data', 'fonte_tipo', 'fonte_id', 'hash_origem')
+
+        novos: List[FluxoCaixaLancamento] = []
+        alterados: List[FluxoCaixaLancamento] = []
+        removidos: List[FluxoCaixaLancamento] = []
+        datas_alteradas = []
+        inalterados = 0
+
+        for lancamento in existentes:
+            valores = esperados.pop((lancamento.fonte_tipo, lancamento.fonte_id), None)
+            if valores is None:
+                removidos.append(lancamento)
+                datas_alteradas.append(lancamento.data)
+                continue
+            hash_origem = _hash(valores)
+            if lancamento.hash_origem == hash_origem:
+                inalterados += 1
+                continue
+            datas_alteradas += [lancamento.data, valores['data']]
+            for campo, valor in valores.items():
+                setattr(lancamento, campo, valor)
+            lancamento.hash_origem = hash_origem
+            alterados.append(lancamento)
+
+        for (fonte_tipo, fonte_id), valores in esperados.items():
+            novos.append(FluxoCaixaLancamento(
+                fonte_tipo=fonte_tipo, fonte_id=fonte_id, hash_origem=_hash(valores), **valores
+            ))
+            datas_alteradas.append(valores['data'])
+
+        with transaction.atomic():
+            if removidos:
+                FluxoCaixaLancamento.objects.filter(id__in=[l.id for l in removidos]).delete()
+            if alterados:
+                FluxoCaixaLancamento.objects.bulk_update(
+                    alterados, CAMPOS_SINCRONIZADOS + ['hash_origem'],
+                    batch_size=SincronizacaoFluxoService.BATCH_SIZE,
+                )
+            if novos:
+                FluxoCaixaLancamento.objects.bulk_create(novos, batch_size=SincronizacaoFluxoService.BATCH_SIZE)
+            if datas_alteradas:
+                SaldoMensalService.invalidar(min(datas_alteradas))
+
+        resultado = {
+            'inseridos': len(novos),
+            'atualizados': len(alterados),
+            'removidos': len(removidos),
+            'inalterados': inalterados,
+        }
+        logger.info(f"Sincronização de contas {data_inicial} a {data_final}: {resultado}")
+        return resultado
@@ -5,14 +5,15 @@ This service handles historical stock calculations, properly managing stock rese
 (documento_referencia "000000") and regular stock movements.
 """
 
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Optional, Tuple, Dict, Any
-from django.db.models import QuerySet
+from typing import Optional, Tuple, Dict, Any, Iterable
+from django.db.models import QuerySet, OuterRef, Subquery, Sum, Case, When, F, Value, DecimalField
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 import logging
 
-from ..models.access import MovimentacoesEstoque, Produtos, TiposMovimentacaoEstoque
+from ..models.access import MovimentacoesEstoque, Produtos, TiposMovimentacaoEstoque, EstoqueSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +64,13 @@ class StockCalculationService:
                 produto_id, target_datetime
             )
             
+            # A daily snapshot newer than the reset replaces it as starting point
+            snapshot_stock, snapshot_end = StockCalculationService.get_base_stock_snapshot(
+                produto_id, target_datetime
+            )
+            if snapshot_end and (reset_date is None or snapshot_end >= reset_date):
+                base_stock, reset_date = snapshot_stock, snapshot_end
+            
             # Step 2: Apply movements after reset date up to target date
             final_stock = StockCalculationService.apply_movements_after_reset(
                 produto_id, reset_date, target_datetime, base_stock
@@ -79,6 +87,111 @@ class StockCalculationService:
             logger.error(f"Error calculating stock for product {produto_id} on {target_date}: {str(e)}")
             raise
     
+    @staticmethod
+    def calculate_stock_at_date_bulk(
+        target_date: date,
+        produto_ids: Optional[Iterable[int]] = None,
+        grupo_id: Optional[int] = None
+    ) -> Dict[int, Decimal]:
+        """
+        Calculate stock for many products at a specific date in a single query.
+        
+        Same algorithm as calculate_stock_at_date, expressed as correlated
+        subqueries so the database resolves the last reset and the movement
+        balance for every product in one round trip.
+        
+        Args:
+            target_date: Date to calculate stock for
+            produto_ids: IDs of the products (None means all products)
+            grupo_id: Restrict the calculation to a product group
+            
+        Returns:
+            Dict[int, Decimal]: Stock quantity at the target date per product ID
+        """
+        try:
+            if isinstance(target_date, date) and not isinstance(target_date, datetime):
+                target_datetime = datetime.combine(target_date, datetime.max.time())
+                target_datetime = timezone.make_aware(target_datetime)
+            else:
+                target_datetime = target_date
+            
+            produtos = Produtos.objects.all()
+            if produto_ids is not None:
+                # Querysets are kept lazy so they become a subquery
+                if not isinstance(produto_ids, QuerySet):
+                    produto_ids = list(produto_ids)
+                produtos = produtos.filter(id__in=produto_ids)
+            if grupo_id is not None:
+                produtos = produtos.filter(grupo_id=grupo_id)
+            
+            quantity_field = DecimalField(max_digits=10, decimal_places=3)
+            
+            # Most recent "000000" reset before target date
+            last_reset = MovimentacoesEstoque.objects.filter(
+                produto_id=OuterRef('pk'),
+                documento_referencia='000000',
+                data_movimentacao__lte=target_datetime
+            ).order_by('-data_movimentacao')
+            
+            # Regular movements after the reset, signed by movement type
+            movements_balance = MovimentacoesEstoque.objects.filter(
+                produto_id=OuterRef('pk'),
+                documento_referencia__isnull=False,
+                data_movimentacao__lte=target_datetime,
+                data_movimentacao__gt=OuterRef('reset_since')
+            ).exclude(
+                documento_referencia='000000'
+            ).order_by().values('produto_id').annotate(
+                balance=Sum(Case(
+                    When(tipo_movimentacao__tipo='E', then=F('quantidade')),
+                    When(tipo_movimentacao__tipo='S', then=-F('quantidade')),
+                    default=Value(Decimal('0')),
+                    output_field=quantity_field
+                ))
+            ).values('balance')
+            
+            rows = produtos.annotate(
+                base_stock=Coalesce(
+                    Subquery(last_reset.values('quantidade')[:1], output_field=quantity_field),
+                    Value(Decimal('0')),
+                    output_field=quantity_field
+                ),
+                # Without a reset every movement counts, so fall back to the earliest datetime
+                reset_since=Coalesce(
+                    Subquery(last_reset.values('data_movimentacao')[:1]),
+                    Value(timezone.make_aware(datetime(1900, 1, 1)))
+                ),
+            ).annotate(
+                movements=Coalesce(
+                    Subquery(movements_balance, output_field=quantity_field),
+                    Value(Decimal('0')),
+                    output_field=quantity_field
+                )
+            ).values_list('id', 'base_stock', 'movements')
+            
+            return {
+                produto_id: Decimal(base_stock) + Decimal(movements)
+                for produto_id, base_stock, movements in rows
+            }
+            
+        except Exception as e:
+            logger.error(f"Error calculating bulk stock on {target_date}: {str(e)}")
+            raise
+    
+    @staticmethod
+    def calculate_current_stock_bulk(produto_ids: Optional[Iterable[int]] = None) -> Dict[int, Decimal]:
+        """
+        Calculate current stock for many products using today's date.
+        
+        Args:
+            produto_ids: IDs of the products (None means all products)
+            
+        Returns:
+            Dict[int, Decimal]: Calculated current stock per product ID
+        """
+        today = timezone.now().date()
+        return StockCalculationService.calculate_stock_at_date_bulk(today, produto_ids=produto_ids)
+    
     @staticmethod
     def get_base_stock_reset(produto_id: int, target_date: datetime) -> Tuple[Decimal, Optional[datetime]]:
         """
@@ -114,6 +227,39 @@ class StockCalculationService:
             logger.error(f"Error finding stock reset for product {produto_id}: {str(e)}")
             raise
     
+    @staticmethod
+    def get_base_stock_snapshot(produto_id: int, target_date: datetime) -> Tuple[Decimal, Optional[datetime]]:
+        """
+        Find the most recent daily snapshot (EstoqueSnapshot) fully covered by target date.
+        
+        Args:
+            produto_id: ID of the product
+            target_date: Target date to search before
+            
+        Returns:
+            Tuple[Decimal, Optional[datetime]]: (snapshot_quantity, end of the snapshot day)
+            If no snapshot found, returns (Decimal('0'), None)
+        """
+        # The snapshot holds the end-of-day position, so the target must reach the end of that day
+        last_day = timezone.localtime(target_date).date() if timezone.is_aware(target_date) else target_date.date()
+        if target_date.time() != datetime.max.time():
+            last_day -= timedelta(days=1)
+        
+        snapshot = EstoqueSnapshot.objects.filter(
+            produto_id=produto_id,
+            data__lte=last_day
+        ).order_by('-data').first()
+        
+        if not snapshot:
+            return Decimal('0'), None
+        
+        snapshot_end = timezone.make_aware(datetime.combine(snapshot.data, datetime.max.time()))
+        logger.debug(
+            f"Found stock snapshot for product {produto_id}: "
+            f"quantity={snapshot.quantidade}, date={snapshot.data}"
+        )
+        return snapshot.quantidade, snapshot_end
+    
     @staticmethod
     def apply_movements_after_reset(
         produto_id: int, 
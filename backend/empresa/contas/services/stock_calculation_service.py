@@ -1,9 +1,12 @@
 # backend/empresa/contas/services/stock_calculation_service.py
-from datetime import datetime, date, time
-from django.db.models import Sum, Q
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Iterable, List, Optional
+from dateutil.relativedelta import relativedelta
+from django.db.models import Sum, Q, FilteredRelation, QuerySet
 from decimal import Decimal
 
 from ..models.access import MovimentacoesEstoque, Produtos
+from .saldo_estoque_service import SaldoEstoqueService
 
 class StockCalculationService:
     """
@@ -63,4 +66,114 @@ class StockCalculationService:
         # Garante que o estoque final não seja negativo
         estoque_na_data = max(Decimal('0'), estoque_na_data)
             
-        return estoque_na_data
\ No newline at end of file
+        return estoque_na_data
+
+    @staticmethod
+    def calculate_stock_at_date_bulk(
+        target_date: date,
+        produto_ids: Optional[Iterable[int]] = None,
+        grupo_id: Optional[int] = None,
+    ) -> Dict[int, Decimal]:
+        """
+        Versão em lote de calculate_stock_at_date.
+
+        Recebe uma lista de produtos (ou um grupo inteiro) e resolve todas as
+        quantidades com uma única consulta agregada: as movimentações posteriores
+        à data alvo entram por um LEFT JOIN filtrado e são somadas por produto.
+
+        Retorna um dicionário {produto_id: quantidade_na_data}. Produtos
+        inexistentes simplesmente não aparecem no resultado.
+        """
+        produtos = Produtos.objects.all()
+        if produto_ids is not None:
+            # Querysets viram subconsulta; demais iteráveis viram lista de IDs
+            if not isinstance(produto_ids, QuerySet):
+                produto_ids = list(produto_ids)
+            produtos = produtos.filter(id__in=produto_ids)
+        if grupo_id is not None:
+            produtos = produtos.filter(grupo_id=grupo_id)
+
+        # Para data atual, o estoque_atual já é a resposta
+        if target_date >= date.today():
+            return {
+                produto_id: Decimal(estoque_atual or 0)
+                for produto_id, estoque_atual in produtos.values_list('id', 'estoque_atual')
+            }
+
+        target_datetime_end = datetime.combine(target_date, time.max)
+
+        linhas = produtos.annotate(
+            movs_posteriores=FilteredRelation(
+                'movimentacoesestoque',
+                condition=(
+                    Q(movimentacoesestoque__data_movimentacao__gt=target_datetime_end)
+                    & (
+                        Q(movimentacoesestoque__documento_referencia__isnull=True)
+                        | ~Q(movimentacoesestoque__documento_referencia='000000')
+                    )
+                ),
+            ),
+        ).values('id', 'estoque_atual').annotate(
+            total_entradas=Sum(
+                'movs_posteriores__quantidade',
+                filter=Q(movs_posteriores__tipo_movimentacao_id__in=[1, 3]),  # 1: Entrada, 3: Inicial
+            ),
+            total_saidas=Sum(
+                'movs_posteriores__quantidade',
+                filter=Q(movs_posteriores__tipo_movimentacao_id=2),  # 2: Saída
+            ),
+        ).order_by()
+
+        resultado = {}
+        for linha in linhas:
+            estoque_atual = Decimal(linha['estoque_atual'] or 0)
+            entradas_posteriores = linha['total_entradas'] or Decimal('0')
+            saidas_posteriores = linha['total_saidas'] or Decimal('0')
+            estoque_na_data = estoque_atual - entradas_posteriores + saidas_posteriores
+            resultado[linha['id']] = max(Decimal('0'), estoque_na_data)
+
+        return resultado
+
+    @staticmethod
+    def timeline_dates(
+        start_date: date,
+        end_date: date,
+        interval: str = 'daily',
+        max_points: Optional[int] = None,
+    ) -> List[date]:
+        """
+        Datas dos pontos de uma timeline: diária, semanal (a cada 7 dias) ou
+        mensal por mês de calendário (mesmo dia do mês, ajustado ao fim do mês).
+        """
+        datas = []
+        passo = 0
+        while max_points is None or len(datas) < max_points:
+            if interval == 'monthly':
+                ponto = start_date + relativedelta(months=passo)
+            elif interval == 'weekly':
+                ponto = start_date + timedelta(weeks=passo)
+            else:
+                ponto = start_date + timedelta(days=passo)
+            if ponto > end_date:
+                break
+            datas.append(ponto)
+            passo += 1
+        return datas
+
+    @staticmethod
+    def calculate_stock_timeline(
+        produto_ids: Iterable[int],
+        dates: Iterable[date],
+    ) -> Dict[int, Dict[date, Decimal]]:
+        """
+        Estoque de vários produtos em várias datas.
+
+        Usa a mesma regra dos demais endpoints de estoque
+        (SaldoEstoqueService.quantidades_na_data): a view de saldos para hoje
+        e os snapshots diários para datas passadas, com resets "000000" e
+        saldo negativo contando como zero. As datas passadas são resolvidas
+        numa passada só sobre as movimentações entre elas.
+
+        Retorna {produto_id: {data: quantidade}}.
+        """
+        return SaldoEstoqueService.quantidades_nas_datas(dates, produto_ids)
@@ -56,11 +56,22 @@ class StockValidationService:
                 'summary': {}
             }
 
+            # Calculate current stock for every product in one query
+            try:
+                calculated_map = StockCalculationService.calculate_current_stock_bulk(
+                    [produto.id for produto in produtos]
+                )
+                calculation_error = None
+            except Exception as e:
+                calculated_map = {}
+                calculation_error = e
+
             # Validate each product
             for produto in produtos:
                 try:
-                    # Calculate current stock
-                    calculated_stock = StockCalculationService.calculate_current_stock(produto.id)
+                    if calculation_error is not None:
+                        raise calculation_error
+                    calculated_stock = calculated_map.get(produto.id, Decimal('0'))
                     stored_stock = Decimal(str(produto.estoque_atual))
                     
                     # Check for discrepancy
@@ -140,9 +151,21 @@ class StockValidationService:
             discrepancies = []
             produtos = Produtos.objects.filter(ativo=True)
             
+            # Calculate current stock for every product in one query
+            try:
+                calculated_map = StockCalculationService.calculate_current_stock_bulk(
+                    [produto.id for produto in produtos]
+                )
+                calculation_error = None
+            except Exception as e:
+                calculated_map = {}
+                calculation_error = e
+            
             for produto in produtos:
                 try:
-                    calculated_stock = StockCalculationService.calculate_current_stock(produto.id)
+                    if calculation_error is not None:
+                        raise calculation_error
+                    calculated_stock = calculated_map.get(produto.id, Decimal('0'))
                     stored_stock = Decimal(str(produto.estoque_atual))
                     difference = abs(calculated_stock - stored_stock)
                     
@@ -0,0 +1,208 @@
+# backend/empresa/contas/services/suprimentos_contrato_service.py
+"""
+Suprimentos (notas de SIMPLES REMESSA) e faturamento por contrato de locação.
+
+O relatório é montado com três consultas, qualquer que seja o número de
+contratos e notas:
+- contratos vigentes no período, com o nome do cliente;
+- notas de remessa do período para os clientes desses contratos;
+- custo de aquisição de cada nota, somando quantidade x custo da última
+  entrada do produto até a data da nota (subconsulta correlacionada por item,
+  resolvida pelo banco com o índice de produto em itens_nf_entrada).
+
+A distribuição das notas pelos contratos e o faturamento proporcional aos
+dias vigentes são calculados numa única passada em memória.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List
+
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from ..models.access import ContratosLocacao, ItensNfEntrada, ItensNfSaida, NotasFiscaisSaida
+from .tipo_operacao_service import SIMPLES_REMESSA
+
+ZERO = Decimal('0.00')
+DIAS_MES = 30
+
+
+def _dinheiro(**kwargs) -> DecimalField:
+    return DecimalField(max_digits=18, decimal_places=4, **kwargs)
+
+
+class SuprimentosContratoService:
+    """Relatório de suprimentos por contrato com número fixo de consultas."""
+
+    @staticmethod
+    def contratos_vigentes(data_inicial: date, data_final: date, contrato_id=None, cliente_id=None) -> List[dict]:
+        """Contratos com início até data_final e fim a partir de data_inicial (ou sem fim)."""
+        contratos = ContratosLocacao.objects.filter(
+            Q(inicio__lte=data_final) & (Q(fim__gte=data_inicial) | Q(fim__isnull=True))
+        )
+        if contrato_id:
+            contratos = contratos.filter(id=contrato_id)
+        if cliente_id:
+            contratos = contratos.filter(cliente_id=cliente_id)
+        return list(contratos.order_by('id').values(
+            'id', 'contrato', 'inicio', 'fim', 'valorpacela', 'valorcontrato', 'numeroparcelas',
+            'cliente_id', 'cliente__nome',
+        ))
+
+    @staticmethod
+    def custo_por_nota(notas) -> Dict[int, Decimal]:
+        """
+        {nota_id: custo de aquisição}: soma de quantidade x valor unitário da
+        última entrada (data de entrada <= data da nota) de cada item.
+        """
+        ultima_entrada = ItensNfEntrada.objects.filter(
+            produto_id=OuterRef('produto_id'),
+            nota_fiscal__data_entrada__lte=OuterRef('nota_fiscal__data'),
+        ).order_by('-nota_fiscal__data_entrada', '-id').values('valor_unitario')[:1]
+
+        custo_item = ExpressionWrapper(
+            Coalesce(F('quantidade'), Value(ZERO)) *
+            Coalesce(Subquery(ultima_entrada, output_field=_dinheiro()), Value(ZERO)),
+            output_field=_dinheiro(),
+        )
+        linhas = (
+            ItensNfSaida.objects.filter(nota_fiscal__in=notas)
+            .values('nota_fiscal_id')
+            .annotate(custo=Sum(custo_item))
+        )
+        return {linha['nota_fiscal_id']: linha['custo'] or ZERO for linha in linhas}
+
+    @staticmethod
+    def faturamento_proporcional(contrato: dict, data_inicial: date, data_final: date) -> dict:
+        """Parcela mensal proporcional aos dias de vigência dentro do período (mês de 30 dias)."""
+        inicio_efetivo = max(data_inicial, contrato['inicio'])
+        fim_efetivo = min(data_final, contrato['fim']) if contrato['fim'] else data_final
+        dias_vigentes = (fim_efetivo - inicio_efetivo).days + 1
+        return {
+            'dias_vigentes': dias_vigentes,
+            'faturamento_proporcional': (contrato['valorpacela'] or ZERO) * dias_vigentes / DIAS_MES,
+            'inicio_efetivo': inicio_efetivo,
+            'fim_efetivo': fim_efetivo,
+        }
+
+    @staticmethod
+    def relatorio(data_inicial: date, data_final: date, contrato_id=None, cliente_id=None) -> dict:
+        """Resposta completa de /contratos_locacao/suprimentos/."""
+        contratos = SuprimentosContratoService.contratos_vigentes(data_inicial, data_final, contrato_id, cliente_id)
+
+        notas_query = NotasFiscaisSaida.objects.filter(
+            tipo_operacao=SIMPLES_REMESSA,
+            data__range=[data_inicial, data_final],
+            cliente_id__in={contrato['cliente_id'] for contrato in contratos if contrato['cliente_id']},
+        )
+        notas = list(notas_query.order_by('-data', 'id').values(
+            'id', 'numero_nota', 'data', 'operacao', 'cfop', 'valor_total_nota', 'obs', 'cliente_id',
+        ))
+        custo_por_nota = SuprimentosContratoService.custo_por_nota(notas_query) if notas else {}
+
+        notas_por_cliente = defaultdict(list)
+        for nota in notas:
+            notas_por_cliente[nota['cliente_id']].append(nota)
+
+        resultados = []
+        total_faturamento_periodo = ZERO
+        for contrato in contratos:
+            # Um cliente com vários contratos tem as notas atribuídas ao primeiro deles
+            notas_contrato = notas_por_cliente.pop(contrato['cliente_id'], [])
+            valor_total_notas = sum((nota['valor_total_nota'] or ZERO for nota in notas_contrato), ZERO)
+            custo_aquisicao = sum((custo_por_nota.get(nota['id'], ZERO) for nota in notas_contrato), ZERO)
+
+            calculo = SuprimentosContratoService.faturamento_proporcional(contrato, data_inicial, data_final)
+            faturamento = calculo['faturamento_proporcional']
+            dias_vigentes = calculo['dias_vigentes']
+            total_faturamento_periodo += faturamento
+
+            resultados.append({
+                'contrato_id': contrato['id'],
+                'contrato_numero': contrato['contrato'],
+                'vigencia': {
+                    'inicio': contrato['inicio'].strftime('%Y-%m-%d') if contrato['inicio'] else None,
+                    'fim': contrato['fim'].strftime('%Y-%m-%d') if contrato['fim'] else None,
+                    'ativo_no_periodo': True,  # Já filtrado por vigência
+                    'periodo_efetivo': {
+                        'inicio': calculo['inicio_efetivo'].strftime('%Y-%m-%d'),
+                        'fim': calculo['fim_efetivo'].strftime('%Y-%m-%d'),
+                        'dias_vigentes': dias_vigentes,
+                    }
+                },
+                'valores_contratuais': {
+                    'valor_mensal': float(contrato['valorpacela'] or 0),
+                    'valor_total_contrato': float(contrato['valorcontrato'] or 0),
+                    'numero_parcelas': contrato['numeroparcelas'],
+                    'faturamento_proporcional': float(faturamento),
+                    'calculo': f"R$ {float(contrato['valorpacela'] or 0):.2f} × {dias_vigentes} dias ÷ {DIAS_MES} dias"
+                },
+                'cliente': {
+                    'id': contrato['cliente_id'],
+                    'nome': contrato['cliente__nome'],
+                },
+                'suprimentos': {
+                    'total_valor': float(valor_total_notas),
+                    'custo_aquisicao': float(custo_aquisicao),
+                    'quantidade_notas': len(notas_contrato),
+                    'notas': [SuprimentosContratoService._nota(nota, custo_por_nota) for nota in notas_contrato],
+                },
+                'analise_financeira': {
+                    'faturamento_proporcional': float(faturamento),
+                    'custo_suprimentos': float(custo_aquisicao),
+                    'margem_bruta': float(faturamento - custo_aquisicao),
+                    'percentual_margem': float(
+                        (faturamento - custo_aquisicao) / faturamento * 100 if faturamento > 0 else 0
+                    ),
+                    'observacao': f"Faturamento proporcional a {dias_vigentes} dias do período"
+                }
+            })
+
+        # Custo total único: cada nota conta uma vez, mesmo com vários contratos do cliente
+        custo_total = sum((custo_por_nota.get(nota['id'], ZERO) for nota in notas), ZERO)
+        return {
+            'periodo': {
+                'data_inicial': data_inicial.strftime('%Y-%m-%d'),
+                'data_final': data_final.strftime('%Y-%m-%d')
+            },
+            'filtros_aplicados': {
+                'vigencia_considerada': True,
+                'contrato_id': contrato_id,
+                'cliente_id': cliente_id,
+                'observacao': 'Apenas contratos vigentes no período são incluídos'
+            },
+            'resumo': {
+                'total_contratos_vigentes': len(resultados),
+                'total_suprimentos': float(custo_total),
+                'total_notas': len(notas),
+                'contratos_com_atividade': len([r for r in resultados if r['suprimentos']['quantidade_notas'] > 0])
+            },
+            'resumo_financeiro': {
+                'faturamento_total_proporcional': float(total_faturamento_periodo),
+                'custo_total_suprimentos': float(custo_total),
+                'margem_bruta_total': float(total_faturamento_periodo - custo_total),
+                'percentual_margem_total': float(
+                    (total_faturamento_periodo - custo_total) / total_faturamento_periodo * 100
+                    if total_faturamento_periodo > 0 else 0
+                ),
+                'metodo_calculo': 'proporcional',
+                'observacao': 'Faturamento calculado proporcionalmente aos dias vigentes no período (base: 30 dias/mês)'
+            },
+            'resultados': resultados
+        }
+
+    @staticmethod
+    def _nota(nota: dict, custo_por_nota: Dict[int, Decimal]) -> dict:
+        obs = nota['obs'] or ''
+        return {
+            'id': nota['id'],
+            'numero_nota': nota['numero_nota'],
+            'data': nota['data'].strftime('%Y-%m-%d') if nota['data'] else None,
+            'operacao': nota['operacao'] or '',
+            'cfop': nota['cfop'] or '',
+            'valor_total_nota': float(nota['valor_total_nota'] or 0),
+            'custo_aquisicao': float(custo_por_nota.get(nota['id'], ZERO)),
+            'obs': obs[:100] + '...' if len(obs) > 100 else obs,
+        }
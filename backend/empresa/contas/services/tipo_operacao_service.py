@@ -0,0 +1,108 @@
+# backend/empresa/contas/services/tipo_operacao_service.py
+"""
+Tipo de operação normalizado das notas fiscais (tipo_operacao).
+
+A operação vem do Access como texto livre ("VENDA DE MERCADORIA", "COMPRA
+P/ REVENDA", "SIMPLES REMESSA"...) e os relatórios filtravam com
+operacao__icontains, um ILIKE '%...%' que percorre a tabela inteira. O tipo
+fica gravado em tipo_operacao, indexado junto com a data, e os filtros
+viram igualdades.
+
+O tipo é o da primeira regra com um termo contido na operação. A ordem
+segue a que as telas já usavam: nas notas de saída VENDA vem primeiro e
+SIMPLES REMESSA logo depois; nas de entrada, COMPRA (inclusive "COMPRA P/
+REVENDA"). É gravado no save (signals/tipo_operacao.py) e, para as cargas
+em lote da sincronização, por `classificar`, um UPDATE por tabela que só
+alcança as notas cujo tipo não corresponde à operação.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import Case, CharField, Q, Value, When
+
+from ..models.access import NotasFiscaisEntrada, NotasFiscaisSaida
+from .cache_relatorios_service import CacheRelatoriosService
+
+logger = logging.getLogger(__name__)
+
+VENDA = 'venda'
+SIMPLES_REMESSA = 'simples_remessa'
+COMPRA = 'compra'
+LOCACAO = 'locacao'
+SERVICO = 'servico'
+DEVOLUCAO = 'devolucao'
+COMODATO = 'comodato'
+ADIANTAMENTO = 'adiantamento'
+OUTROS = 'outros'
+
+TERMOS_SERVICO = ('SERVICO', 'SERVIÇO', 'MANUTENCAO', 'MANUTENÇÃO')
+TERMOS_DEVOLUCAO = ('DEVOLUCAO', 'DEVOLUÇÃO')
+
+# (tipo, termos) na ordem de precedência, pelo nome do modelo (vale também nas migrações)
+REGRAS: Dict[str, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {
+    'NotasFiscaisSaida': (
+        (VENDA, ('VENDA',)),
+        (SIMPLES_REMESSA, ('SIMPLES REMESSA',)),
+        (LOCACAO, ('ALUGUEL', 'LOCACAO', 'LOCAÇÃO')),
+        (SERVICO, TERMOS_SERVICO),
+        (DEVOLUCAO, TERMOS_DEVOLUCAO),
+        (COMODATO, ('COMODATO',)),
+        (ADIANTAMENTO, ('ADIANTAMENTO',)),
+    ),
+    'NotasFiscaisEntrada': (
+        (COMPRA, ('COMPRA',)),
+        (SERVICO, TERMOS_SERVICO),
+        (DEVOLUCAO, TERMOS_DEVOLUCAO),
+        (COMODATO, ('COMODATO',)),
+        (SIMPLES_REMESSA, ('SIMPLES REMESSA',)),
+        (ADIANTAMENTO, ('ADIANTAMENTO',)),
+    ),
+}
+
+MODELOS = (NotasFiscaisSaida, NotasFiscaisEntrada)
+
+
+class TipoOperacaoService:
+    """Classificação da operação das notas fiscais."""
+
+    @staticmethod
+    def classificar_operacao(modelo, operacao: Optional[str]) -> str:
+        """Tipo da operação para as notas do modelo (OUTROS se nenhuma regra se aplica)."""
+        operacao = (operacao or '').upper()
+        for tipo, termos in REGRAS[modelo.__name__]:
+            if any(termo in operacao for termo in termos):
+                return tipo
+        return OUTROS
+
+    @staticmethod
+    def expressao(modelo) -> Case:
+        """A mesma classificação como expressão SQL, para atualizar em lote."""
+        return Case(
+            *[
+                When(Q(*[Q(operacao__icontains=termo) for termo in termos], _connector=Q.OR), then=Value(tipo))
+                for tipo, termos in REGRAS[modelo.__name__]
+            ],
+            default=Value(OUTROS),
+            output_field=CharField(),
+        )
+
+    @staticmethod
+    def aplicar(nota) -> None:
+        nota.tipo_operacao = TipoOperacaoService.classificar_operacao(type(nota), nota.operacao)
+
+    @staticmethod
+    def classificar(modelos: Iterable = MODELOS) -> Dict[str, int]:
+        """
+        Grava o tipo das notas em que ele não corresponde à operação (carga em
+        lote, regras alteradas). Retorna as notas atualizadas por tabela.
+        """
+        atualizadas = {}
+        for modelo in modelos:
+            expressao = TipoOperacaoService.expressao(modelo)
+            total = modelo.objects.exclude(tipo_operacao=expressao).update(tipo_operacao=expressao)
+            atualizadas[modelo._meta.db_table] = total
+            if total:
+                CacheRelatoriosService.incrementar(modelo._meta.db_table)
+        logger.info(f"Tipo de operação das notas fiscais: {atualizadas}")
+        return atualizadas
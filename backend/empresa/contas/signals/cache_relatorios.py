@@ -0,0 +1,19 @@
+"""
+Versão das tabelas usadas pelo cache de relatórios (versoes_tabelas).
+
+Cada save/delete de um modelo rastreado incrementa a versão da sua tabela, no
+mesmo commit da alteração. queryset.update() e bulk_create não disparam
+signals: cargas da sincronização incrementam a versão pelo bulk_loader.
+"""
+from django.db.models.signals import post_delete, post_save
+
+from ..services.cache_relatorios_service import MODELOS_RASTREADOS, CacheRelatoriosService
+
+
+def incrementar_versao(sender, **kwargs):
+    CacheRelatoriosService.incrementar(sender._meta.db_table)
+
+
+for modelo in MODELOS_RASTREADOS:
+    post_save.connect(incrementar_versao, sender=modelo, dispatch_uid=f'cache_relatorios_post_save_{modelo.__name__}')
+    post_delete.connect(incrementar_versao, sender=modelo, dispatch_uid=f'cache_relatorios_post_delete_{modelo.__name__}')
@@ -0,0 +1,43 @@
+"""
+Classificação de custo das contas a pagar (tipo_custo / categoria_custo).
+
+A conta é classificada ao ser salva; alterações no fornecedor (nome, tipo,
+especificação) reclassificam as contas dele em seguida. Cargas em lote são
+reclassificadas pela sincronização (`manage.py classificar_custos`). Após o
+migrate de um deploy, as contas ainda sem classificação ou com regras de
+outra VERSAO_REGRAS são reclassificadas.
+"""
+from django.apps import apps as apps_instalados
+from django.db.models.signals import post_migrate, post_save, pre_save
+
+from ..models.access import ContasPagar, Fornecedores
+from ..services.classificacao_custos_service import ClassificacaoCustosService
+
+
+def classificar_conta_pagar(sender, instance, **kwargs):
+    ClassificacaoCustosService.aplicar(instance)
+
+
+def reclassificar_contas_do_fornecedor(sender, instance, created, **kwargs):
+    if not created:
+        ClassificacaoCustosService.reclassificar_fornecedor(instance.pk)
+
+
+def classificar_pendentes_apos_migrate(sender, apps=apps_instalados, **kwargs):
+    # Migrate parcial ou reverso: as colunas da classificação podem não existir ainda
+    try:
+        campos = {campo.name for campo in apps.get_model('contas', 'ContasPagar')._meta.get_fields()}
+        apps.get_model('contas', 'VersaoTabela')
+        apps.get_model('contas', 'DREMensal')
+    except LookupError:
+        return
+    if 'versao_classificacao' in campos:
+        ClassificacaoCustosService.classificar_pendentes()
+
+
+pre_save.connect(classificar_conta_pagar, sender=ContasPagar, dispatch_uid='classificacao_custos_conta_pagar')
+post_save.connect(reclassificar_contas_do_fornecedor, sender=Fornecedores, dispatch_uid='classificacao_custos_fornecedor')
+post_migrate.connect(
+    classificar_pendentes_apos_migrate, sender=apps_instalados.get_app_config('contas'),
+    dispatch_uid='classificacao_custos_post_migrate'
+)
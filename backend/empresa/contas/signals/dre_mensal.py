@@ -0,0 +1,111 @@
+"""
+Invalidação dos agregados mensais do DRE (dre_mensal).
+
+Alterações em NFs de saída/serviço e contas a pagar invalidam o mês da
+movimentação; NFs de entrada mudam o custo da última entrada usado no CMV,
+então invalidam do mês da entrada em diante. O preço de custo do produto é
+o fallback do CMV e invalida da primeira venda do produto em diante; um
+contrato de locação reclassifica as remessas do cliente na sua vigência.
+Em alterações, o período anterior do registro também é invalidado. As
+cargas da sincronização, que não disparam signals, são invalidadas pela
+tarefa dre_mensal (sincronizacao/migrate_dre_mensal.py) e a
+reclassificação de custos em lote por ClassificacaoCustosService. Cargas
+de produtos e contratos pela sincronização não invalidam o agregado: após
+mudanças de preço de custo ou vigência em lote, use
+`manage.py dre_mensal --invalidar --desde <mês>`.
+"""
+from django.db.models import Min
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from ..models.access import (
+    ContasPagar, ContratosLocacao, ItensNfEntrada, ItensNfSaida, NotasFiscaisEntrada, NotasFiscaisSaida,
+    NotasFiscaisServico, Produtos
+)
+from ..services.dre_mensal_service import DREMensalService
+
+
+def _no_mes(data):
+    return (data, data) if data else None
+
+
+def _em_diante(data):
+    return (data, None) if data else None
+
+
+def _periodo_conta_pagar(conta):
+    return _no_mes(conta.data_pagamento or conta.vencimento)
+
+
+def _periodo_item_nf_saida(item):
+    return _no_mes(NotasFiscaisSaida.objects.filter(pk=item.nota_fiscal_id).values_list('data', flat=True).first())
+
+
+def _periodo_item_nf_entrada(item):
+    return _em_diante(
+        NotasFiscaisEntrada.objects.filter(pk=item.nota_fiscal_id).values_list('data_entrada', flat=True).first()
+    )
+
+
+def _periodo_produto(produto):
+    primeira_venda = ItensNfSaida.objects.filter(produto_id=produto.pk).aggregate(
+        data=Min('nota_fiscal__data')
+    )['data']
+    return _em_diante(primeira_venda)
+
+
+def _periodo_contrato(contrato):
+    # Sem início o contrato nunca é considerado vigente (DREView._calcular_cmv_real)
+    return (contrato.inicio, contrato.fim) if contrato.inicio else None
+
+
+# modelo -> período (desde, ate) de dre_mensal afetado pelo registro; ate=None invalida em diante
+PERIODOS_POR_MODELO = {
+    ContasPagar: _periodo_conta_pagar,
+    NotasFiscaisSaida: lambda nota: _no_mes(nota.data),
+    NotasFiscaisServico: lambda nota: _no_mes(nota.data),
+    ItensNfSaida: _periodo_item_nf_saida,
+    NotasFiscaisEntrada: lambda nota: _em_diante(nota.data_entrada),
+    ItensNfEntrada: _periodo_item_nf_entrada,
+    Produtos: _periodo_produto,
+    ContratosLocacao: _periodo_contrato,
+}
+
+# Modelos alterados também por outros motivos: só estes campos afetam o DRE
+CAMPOS_POR_MODELO = {
+    Produtos: ('preco_custo',),
+    ContratosLocacao: ('cliente_id', 'inicio', 'fim'),
+}
+
+
+def _invalidar(periodo):
+    if periodo is None:
+        return
+    desde, ate = periodo
+    DREMensalService.invalidar(desde, ate)
+
+
+def guardar_periodo_anterior(sender, instance, **kwargs):
+    instance._dre_inalterado, instance._dre_periodo_anterior = False, None
+    if instance.pk is None:
+        return
+    anterior = sender.objects.filter(pk=instance.pk).first()
+    if anterior is None:
+        return
+    campos = CAMPOS_POR_MODELO.get(sender)
+    if campos and all(getattr(anterior, campo) == getattr(instance, campo) for campo in campos):
+        instance._dre_inalterado = True
+    else:
+        instance._dre_periodo_anterior = PERIODOS_POR_MODELO[sender](anterior)
+
+
+def invalidar_dre_mensal(sender, instance, signal, **kwargs):
+    if signal is post_save and getattr(instance, '_dre_inalterado', False):
+        return
+    _invalidar(getattr(instance, '_dre_periodo_anterior', None))
+    _invalidar(PERIODOS_POR_MODELO[sender](instance))
+
+
+for modelo in PERIODOS_POR_MODELO:
+    pre_save.connect(guardar_periodo_anterior, sender=modelo, dispatch_uid=f'dre_mensal_pre_save_{modelo.__name__}')
+    post_save.connect(invalidar_dre_mensal, sender=modelo, dispatch_uid=f'dre_mensal_post_save_{modelo.__name__}')
+    post_delete.connect(invalidar_dre_mensal, sender=modelo, dispatch_uid=f'dre_mensal_post_delete_{modelo.__name__}')
@@ -0,0 +1,35 @@
+"""
+Snapshots diários de estoque (estoque_snapshot) após edições de movimentações.
+
+Incluir, alterar ou excluir uma movimentação com data já coberta pelos
+snapshots refaz os snapshots do produto a partir desse dia; em alterações,
+também a partir da data (e do produto) anterior. Cargas em lote que não
+disparam signals chamam EstoqueSnapshotService.atualizar_snapshots.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from ..models.access import MovimentacoesEstoque
+from ..services.estoque_snapshot_service import EstoqueSnapshotService
+
+
+def guardar_movimentacao_anterior(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    instance._snapshot_anterior = sender.objects.filter(pk=instance.pk).values_list(
+        'produto_id', 'data_movimentacao'
+    ).first()
+
+
+def reprocessar_snapshots(sender, instance, **kwargs):
+    movimentacoes = [getattr(instance, '_snapshot_anterior', None), (instance.produto_id, instance.data_movimentacao)]
+    desde = {}
+    for produto_id, data_movimentacao in filter(None, movimentacoes):
+        if data_movimentacao is not None and (produto_id not in desde or data_movimentacao < desde[produto_id]):
+            desde[produto_id] = data_movimentacao
+    for produto_id, data_movimentacao in desde.items():
+        EstoqueSnapshotService.reprocessar_produto(produto_id, data_movimentacao)
+
+
+pre_save.connect(guardar_movimentacao_anterior, sender=MovimentacoesEstoque, dispatch_uid='estoque_snapshot_pre_save')
+post_save.connect(reprocessar_snapshots, sender=MovimentacoesEstoque, dispatch_uid='estoque_snapshot_post_save')
+post_delete.connect(reprocessar_snapshots, sender=MovimentacoesEstoque, dispatch_uid='estoque_snapshot_post_delete')
@@ -0,0 +1,65 @@
+"""
+Atualização da view materializada de saldos (view_saldos_estoque_rapido)
+após edições de movimentações fora da sincronização (API, admin).
+
+O REFRESH MATERIALIZED VIEW CONCURRENTLY recalcula a view inteira, então
+não roda na requisição: o commit de uma transação que inclui, altera ou
+exclui movimentações agenda um refresh numa thread para daqui a
+INTERVALO_ATUALIZACAO segundos, e as edições commitadas até lá (de
+qualquer requisição deste processo) são cobertas pelo mesmo refresh. Até
+ele rodar, os endpoints que leem a view mostram o saldo anterior; o
+refresh incrementa a versão da view no cache de relatórios. Falhas só são
+registradas no log; a view volta a ficar atual no próximo refresh ou na
+tarefa saldos_estoque da sincronização, que cobre as cargas em lote.
+"""
+import logging
+import threading
+
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+
+from ..models.access import MovimentacoesEstoque
+from ..services.saldo_estoque_service import SaldoEstoqueService
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_ATUALIZACAO = 5  # segundos
+
+_trava = threading.Lock()
+_agendado = False
+
+
+def atualizar_saldos():
+    global _agendado
+    with _trava:
+        # Edições commitadas a partir daqui agendam um novo refresh
+        _agendado = False
+    try:
+        SaldoEstoqueService.atualizar()
+    except Exception as e:
+        logger.error(f"Erro ao atualizar a view de saldos de estoque: {e}")
+    finally:
+        # Executado numa thread própria: fecha a conexão do ORM desta thread
+        connections.close_all()
+
+
+def agendar_refresh():
+    global _agendado
+    with _trava:
+        if _agendado:
+            return
+        _agendado = True
+    timer = threading.Timer(INTERVALO_ATUALIZACAO, atualizar_saldos)
+    timer.daemon = True
+    timer.start()
+
+
+def agendar_atualizacao(sender, **kwargs):
+    pendentes = transaction.get_connection().run_on_commit
+    if any(funcao is agendar_refresh for _, funcao, _ in pendentes):
+        return
+    transaction.on_commit(agendar_refresh, robust=True)
+
+
+post_save.connect(agendar_atualizacao, sender=MovimentacoesEstoque, dispatch_uid='saldo_estoque_post_save')
+post_delete.connect(agendar_atualizacao, sender=MovimentacoesEstoque, dispatch_uid='saldo_estoque_post_delete')
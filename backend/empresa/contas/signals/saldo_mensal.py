@@ -0,0 +1,29 @@
+"""
+Invalidação dos pontos de controle do saldo acumulado (saldos_mensais_fluxo_caixa).
+
+Criar, alterar ou excluir um lançamento apaga os pontos dos meses seguintes
+à sua data; em alterações, também a partir da data anterior do lançamento.
+Cargas em lote que não disparam signals chamam SaldoMensalService.invalidar.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from ..models.fluxo_caixa import FluxoCaixaLancamento
+from ..services.saldo_mensal_service import SaldoMensalService
+
+
+def guardar_data_anterior(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    instance._saldo_data_anterior = sender.objects.filter(pk=instance.pk).values_list('data', flat=True).first()
+
+
+def invalidar_saldo_mensal(sender, instance, **kwargs):
+    anterior = getattr(instance, '_saldo_data_anterior', None)
+    datas = [SaldoMensalService.como_date(data) for data in (anterior, instance.data) if data is not None]
+    if datas:
+        SaldoMensalService.invalidar(min(datas))
+
+
+pre_save.connect(guardar_data_anterior, sender=FluxoCaixaLancamento, dispatch_uid='saldo_mensal_pre_save')
+post_save.connect(invalidar_saldo_mensal, sender=FluxoCaixaLancamento, dispatch_uid='saldo_mensal_post_save')
+post_delete.connect(invalidar_saldo_mensal, sender=FluxoCaixaLancamento, dispatch_uid='saldo_mensal_post_delete')
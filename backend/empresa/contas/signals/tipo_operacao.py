@@ -0,0 +1,17 @@
+"""
+Tipo de operação normalizado das notas fiscais (tipo_operacao).
+
+A nota é classificada ao ser salva; cargas em lote são classificadas pela
+sincronização (`manage.py classificar_operacoes`).
+"""
+from django.db.models.signals import pre_save
+
+from ..services.tipo_operacao_service import MODELOS, TipoOperacaoService
+
+
+def classificar_nota(sender, instance, **kwargs):
+    TipoOperacaoService.aplicar(instance)
+
+
+for modelo in MODELOS:
+    pre_save.connect(classificar_nota, sender=modelo, dispatch_uid=f'tipo_operacao_{modelo.__name__}')
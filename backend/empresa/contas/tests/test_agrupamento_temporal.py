@@ -0,0 +1,70 @@
+"""
+Unit tests for AgrupamentoTemporalService
+
+Tests the SQL day/week/month bucketing with conditional sums and its use by
+the fluxo de caixa dashboard grouping.
+"""
+
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+
+from ..models.fluxo_caixa import FluxoCaixaLancamento
+from ..services.agrupamento_temporal_service import MES, SEMANA, AgrupamentoTemporalService
+from ..views.fluxo_caixa2 import FluxoCaixaViewSet
+
+
+class AgrupamentoTemporalServiceTest(TestCase):
+    """Test cases for AgrupamentoTemporalService"""
+
+    def setUp(self):
+        """Set up test data"""
+        self._create_lancamento(date(2024, 3, 4), 'entrada', '100.00', True)
+        self._create_lancamento(date(2024, 3, 4), 'saida', '30.00', False)
+        self._create_lancamento(date(2024, 3, 6), 'entrada', '50.00', False)
+        self._create_lancamento(date(2024, 4, 2), 'saida', '20.00', True)
+
+    def _create_lancamento(self, data, tipo, valor, realizado):
+        """Helper method to create a cash flow entry"""
+        return FluxoCaixaLancamento.objects.create(
+            data=data, tipo=tipo, valor=Decimal(valor), realizado=realizado, descricao='Teste',
+            categoria='outros', subcategoria='outros', fonte_tipo='manual'
+        )
+
+    def test_daily_totals_in_one_query(self):
+        """Test that days are grouped in a single query and empty days are zero-filled"""
+        with self.assertNumQueries(1):
+            dias = AgrupamentoTemporalService.fluxo_por_periodo(
+                FluxoCaixaLancamento.objects.all(), date(2024, 3, 4), date(2024, 3, 6)
+            )
+
+        self.assertEqual(list(dias), [date(2024, 3, 4), date(2024, 3, 5), date(2024, 3, 6)])
+        self.assertEqual(dias[date(2024, 3, 4)]['entradas_realizadas'], Decimal('100.00'))
+        self.assertEqual(dias[date(2024, 3, 4)]['saidas'], Decimal('30.00'))
+        self.assertEqual(dias[date(2024, 3, 5)]['entradas'], Decimal('0'))
+        self.assertEqual(dias[date(2024, 3, 5)]['quantidade'], 0)
+
+    def test_week_and_month_buckets(self):
+        """Test that weeks start on Monday and months on day one"""
+        lancamentos = FluxoCaixaLancamento.objects.all()
+        semanas = AgrupamentoTemporalService.fluxo_por_periodo(lancamentos, date(2024, 3, 5), date(2024, 3, 12), SEMANA)
+        meses = AgrupamentoTemporalService.fluxo_por_periodo(lancamentos, date(2024, 3, 5), date(2024, 4, 30), MES)
+
+        self.assertEqual(list(semanas), [date(2024, 3, 4), date(2024, 3, 11)])
+        self.assertEqual(semanas[date(2024, 3, 4)]['entradas'], Decimal('150.00'))
+        self.assertEqual(meses[date(2024, 4, 1)]['saidas_realizadas'], Decimal('20.00'))
+
+    def test_dashboard_grouping(self):
+        """Test that the dashboard days, weeks and months keep their totals"""
+        view = FluxoCaixaViewSet()
+        lancamentos = FluxoCaixaLancamento.objects.order_by('data')
+
+        with self.assertNumQueries(2):
+            dias = view._agrupar_por_dia(lancamentos, date(2024, 3, 1), date(2024, 3, 31))
+        meses = view._agrupar_por_mes(view._agrupar_por_semana(dias))
+
+        self.assertEqual(len(dias), 31)
+        self.assertEqual(len(dias[date(2024, 3, 4)]['movimentos']), 2)
+        self.assertEqual(meses[0]['total_entradas'], Decimal('150.00'))
+        self.assertEqual(meses[0]['saldo_realizado'], Decimal('100.00'))
+        self.assertEqual(meses[0]['saldo_projetado'], Decimal('20.00'))
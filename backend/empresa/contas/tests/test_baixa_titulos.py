@@ -0,0 +1,88 @@
+"""
+Unit tests for the bulk settlement of titles
+
+Tests that BaixaTitulosService settles and reverses many contas with a
+fixed number of queries, keeps valor_total_pago consistent with clean(),
+and updates the related lançamentos and daily balances.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models.access import Clientes, ContasPagar, ContasReceber, Fornecedores
+from ..models.fluxo_caixa import FluxoCaixaLancamento, SaldoDiario
+from ..services.baixa_titulos_service import BaixaTitulosService
+from ..services.fluxo_caixa_service import FluxoCaixaService
+
+
+class BaixaTitulosServiceTest(TestCase):
+    """Test cases for BaixaTitulosService"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.fornecedor = Fornecedores.objects.create(nome='Papelaria Central')
+        self.contas = [self._create_conta_pagar(dia) for dia in (5, 10, 15)]
+
+    def _create_conta_pagar(self, dia):
+        """Helper method to create an open conta a pagar and its lançamento"""
+        conta = ContasPagar.objects.create(
+            fornecedor=self.fornecedor, valor=Decimal('100.00'), juros=Decimal('2.00'), status='A',
+            vencimento=timezone.make_aware(datetime(2024, 3, dia))
+        )
+        FluxoCaixaLancamento.objects.create(
+            data=date(2024, 3, dia), tipo='saida', valor=Decimal('100.00'), realizado=False,
+            descricao='Conta', categoria='compra', fonte_tipo='conta_pagar', fonte_id=conta.id
+        )
+        return conta
+
+    def test_settlement_query_count_does_not_grow_with_titles(self):
+        """Test that settling ten titles costs the same queries as settling three"""
+        mais_ids = [self._create_conta_pagar(dia).id for dia in range(11, 21)]
+        # Both batches start after an existing daily balance
+        self._create_conta_pagar(1)
+        FluxoCaixaService.recalcular_saldos_diarios()
+
+        with CaptureQueriesContext(connection) as poucos:
+            BaixaTitulosService.baixar(ContasPagar, [conta.id for conta in self.contas], '2024-03-20', 'PIX', '100.00')
+        with CaptureQueriesContext(connection) as muitos:
+            BaixaTitulosService.baixar(ContasPagar, mais_ids, '2024-03-20', 'PIX', '100.00')
+        self.assertEqual(len(muitos), len(poucos))
+
+    def test_settlement_updates_titles_and_lancamentos(self):
+        """Test that titles are paid, totals follow clean() and lançamentos become realized"""
+        baixados = BaixaTitulosService.baixar(
+            ContasPagar, [conta.id for conta in self.contas], '2024-03-20', 'PIX', '100.00'
+        )
+        self.assertEqual(len(baixados), 3)
+
+        conta = ContasPagar.objects.get(id=self.contas[0].id)
+        self.assertEqual(conta.status, 'P')
+        self.assertEqual(conta.valor_total_pago, Decimal('102.00'))
+        self.assertEqual(timezone.localtime(conta.data_pagamento).date(), date(2024, 3, 20))
+        self.assertFalse(FluxoCaixaLancamento.objects.filter(realizado=False).exists())
+        saldo = SaldoDiario.objects.get(data=date(2024, 3, 5))
+        self.assertEqual(saldo.total_saidas_realizadas, Decimal('100.00'))
+
+        # Already paid titles are skipped
+        self.assertEqual(BaixaTitulosService.baixar(ContasPagar, baixados, '2024-03-21', 'PIX', '1.00'), [])
+
+    def test_reversal_reopens_titles(self):
+        """Test that reversing a settlement reopens the title and its lançamento"""
+        cliente = Clientes.objects.create(nome='Cliente Teste')
+        receber = ContasReceber.objects.create(
+            cliente=cliente, valor=Decimal('50.00'), status='A',
+            vencimento=timezone.make_aware(datetime(2024, 3, 8))
+        )
+        BaixaTitulosService.baixar(ContasReceber, [receber.id], date(2024, 3, 9), 'Boleto', '50.00')
+        receber.refresh_from_db()
+        self.assertEqual(receber.recebido, Decimal('50.00'))
+
+        self.assertEqual(BaixaTitulosService.estornar(ContasReceber, [receber.id]), [receber.id])
+        receber.refresh_from_db()
+        self.assertEqual(receber.status, 'A')
+        self.assertIsNone(receber.data_pagamento)
+        self.assertEqual(receber.valor_total_pago, Decimal('0.00'))
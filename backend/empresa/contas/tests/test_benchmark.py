@@ -0,0 +1,79 @@
+"""
+Unit tests for the synthetic data generator and the endpoint benchmark
+
+Tests that DadosSinteticosService produces the same dataset for the same
+seed, keeps estoque_atual consistent with the generated movements and
+removes only its own records, and that BenchmarkService measures the
+scenarios and flags regressions against a baseline.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from ..models.access import ContasPagar, Fornecedores, MovimentacoesEstoque, Produtos
+from ..services.benchmark_service import BenchmarkService
+from ..services.dados_sinteticos_service import DOCUMENTO_RESET, DadosSinteticosService
+from ..services.stock_calculation import StockCalculationService
+
+DATA_FINAL = date(2024, 6, 30)
+
+
+class DadosSinteticosServiceTest(TestCase):
+    """Test cases for DadosSinteticosService"""
+
+    def gerar(self, semente=1):
+        return DadosSinteticosService.gerar(escala=0.02, meses=3, semente=semente, data_final=DATA_FINAL)
+
+    def test_same_seed_generates_same_data(self):
+        """Test that two runs with the same seed write identical records"""
+        self.gerar()
+        primeira = list(ContasPagar.objects.order_by('id').values_list('valor', 'vencimento', 'status'))
+        DadosSinteticosService.limpar()
+        self.gerar()
+        segunda = list(ContasPagar.objects.order_by('id').values_list('valor', 'vencimento', 'status'))
+
+        self.assertTrue(primeira)
+        self.assertEqual(primeira, segunda)
+
+    def test_stock_matches_movements(self):
+        """Test that each product starts with a reset and estoque_atual matches the calculation"""
+        self.gerar()
+        produto = Produtos.objects.filter(codigo__startswith='SINT').first()
+
+        self.assertTrue(MovimentacoesEstoque.objects.filter(produto=produto, documento_referencia=DOCUMENTO_RESET).exists())
+        calculado = StockCalculationService.calculate_stock_at_date(produto.id, DATA_FINAL)
+        self.assertEqual(Decimal(produto.estoque_atual), calculado)
+
+    def test_clean_removes_only_synthetic_records(self):
+        """Test that limpar keeps records created outside the generator"""
+        Fornecedores.objects.create(nome='Papelaria Central')
+        self.gerar()
+        DadosSinteticosService.limpar()
+
+        self.assertEqual(list(Fornecedores.objects.values_list('nome', flat=True)), ['Papelaria Central'])
+        self.assertFalse(Produtos.objects.exists())
+        self.assertFalse(MovimentacoesEstoque.objects.exists())
+
+
+class BenchmarkServiceTest(TestCase):
+    """Test cases for BenchmarkService"""
+
+    def test_runs_scenarios_and_compares_with_baseline(self):
+        """Test that scenarios are measured and more queries count as regression"""
+        DadosSinteticosService.gerar(escala=0.02, meses=3, semente=1, data_final=DATA_FINAL)
+        resultados = BenchmarkService.executar(
+            date(2024, 4, 1), DATA_FINAL, repeticoes=2, cenarios=['contas_nao_pagas_por_data_corte'],
+        )
+
+        medida = resultados['contas_nao_pagas_por_data_corte']
+        self.assertEqual(medida['status'], 200)
+        self.assertGreater(medida['consultas'], 0)
+
+        baseline = {'resultados': {'contas_nao_pagas_por_data_corte': dict(medida, consultas=medida['consultas'] - 1)}}
+        comparacao, = BenchmarkService.comparar(resultados, baseline, tolerancia=10)
+        self.assertEqual(comparacao['situacao'], 'regressao')
+
+        with self.assertRaises(ValueError):
+            BenchmarkService.executar(date(2024, 4, 1), DATA_FINAL, cenarios=['inexistente'])
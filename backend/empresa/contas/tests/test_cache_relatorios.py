@@ -0,0 +1,66 @@
+"""
+Unit tests for the report response cache
+
+Tests that repeated report requests are served from cache, that saving a
+tracked model bumps its table version and invalidates the cached response,
+and that different query parameters are cached separately.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models.access import ContasPagar, Fornecedores
+from ..services.cache_relatorios_service import CacheRelatoriosService
+
+
+class CacheRelatoriosTest(TestCase):
+    """Test cases for cache_por_versao and the table version counters"""
+
+    URL = '/api/relatorios/custos-variaveis/'
+    PARAMS = {'data_inicio': '2024-03-01', 'data_fim': '2024-03-31'}
+
+    def setUp(self):
+        """Set up test data"""
+        caches['relatorios'].clear()
+        self.fornecedor = Fornecedores.objects.create(nome='Papelaria Central', especificacao='Papelaria')
+        self.conta = ContasPagar.objects.create(
+            fornecedor=self.fornecedor, valor=Decimal('80.00'), valor_pago=Decimal('80.00'),
+            historico='Resmas', status='P', data_pagamento=timezone.make_aware(datetime(2024, 3, 10))
+        )
+
+    def test_second_request_is_served_from_cache(self):
+        """Test that an unchanged report is answered with a single version lookup"""
+        primeira = self.client.get(self.URL, self.PARAMS)
+        self.assertEqual(primeira.status_code, 200)
+        self.assertEqual(primeira['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(1):
+            segunda = self.client.get(self.URL, self.PARAMS)
+        self.assertEqual(segunda['X-Cache'], 'HIT')
+        self.assertEqual(segunda.json(), primeira.json())
+
+    def test_save_invalidates_cached_report(self):
+        """Test that saving a tracked model bumps its version and refreshes the report"""
+        versao = CacheRelatoriosService.versoes(['contas_pagar'])
+        self.client.get(self.URL, self.PARAMS)
+
+        self.conta.valor_pago = Decimal('100.00')
+        self.conta.save()
+        self.assertEqual(CacheRelatoriosService.versoes(['contas_pagar']), (versao[0] + 1,))
+
+        resposta = self.client.get(self.URL, self.PARAMS)
+        self.assertEqual(resposta['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.URL, self.PARAMS)['X-Cache'], 'HIT')
+
+    def test_query_params_are_part_of_the_key(self):
+        """Test that other parameters are not answered with a cached response"""
+        self.client.get(self.URL, self.PARAMS)
+        resposta = self.client.get(self.URL, {**self.PARAMS, 'data_fim': '2024-03-15'})
+        self.assertEqual(resposta['X-Cache'], 'MISS')
+
+        # Same query with the parameters in another order
+        resposta = self.client.get(self.URL, {'data_fim': '2024-03-31', 'data_inicio': '2024-03-01'})
+        self.assertEqual(resposta['X-Cache'], 'HIT')
@@ -0,0 +1,116 @@
+"""
+Unit tests for ClassificacaoCustosService
+
+Tests the fixed/variable rule table, the classification persisted on
+contas_pagar and the GROUP BY used by the DRE cost breakdown.
+"""
+
+import importlib
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+from django.apps import apps
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models.access import ContasPagar, Fornecedores
+from ..services import classificacao_custos_service
+from ..services.classificacao_custos_service import ClassificacaoCustosService
+from ..views.dre_views import DREView
+
+
+class ClassificacaoCustosServiceTest(TestCase):
+    """Test cases for ClassificacaoCustosService"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.folha = Fornecedores.objects.create(nome='Folha de Pagamento')
+        self.oi = Fornecedores.objects.create(nome='OI S.A.', especificacao='Telefonia')
+        self.papelaria = Fornecedores.objects.create(nome='Papelaria Central', especificacao='Papelaria')
+
+        self._create_conta(self.folha, Decimal('1000.00'), 'Salários março')
+        self._create_conta(self.oi, Decimal('150.00'), 'Conta março')
+        self._create_conta(self.papelaria, Decimal('80.00'), 'Resmas')
+        self._create_conta(self.papelaria, Decimal('20.00'), 'Frete resmas')
+
+    def _create_conta(self, fornecedor, valor, historico):
+        """Helper method to create a paid account"""
+        return ContasPagar.objects.create(
+            fornecedor=fornecedor, valor=valor, valor_pago=valor, historico=historico,
+            status='P', data_pagamento=timezone.make_aware(datetime(2024, 3, 10))
+        )
+
+    def test_rules(self):
+        """Test the rule table keeps the precedence of the former if/elif chain"""
+        classificar = ClassificacaoCustosService.classificar
+        self.assertEqual(classificar('ALUGUEL SALA', 'N/A', None, None), ('FIXO', 'Aluguel'))
+        self.assertEqual(classificar('Energia SA', 'CUSTO FIXO', None, None), ('FIXO', 'Utilidades'))
+        self.assertEqual(classificar('OI S.A.', None, None, 'Conta'), ('VARIAVEL', 'Telecomunicações'))
+        self.assertEqual(classificar('Banco', None, None, 'Tarifa boleto'), ('VARIAVEL', 'Tarifas Bancárias'))
+        self.assertEqual(classificar('Loja', None, None, 'Desconto tarifa'), ('VARIAVEL', 'Outros'))
+        self.assertEqual(classificar('Loja', None, 'Lojas', 'Desconto'), ('VARIAVEL', 'Operações Financeiras'))
+        self.assertEqual(classificar('Xyz', None, 'Sem Especificação', None), ('VARIAVEL', 'Outros'))
+
+    def test_classification_is_persisted_on_save(self):
+        """Test that saving an account stores its classification"""
+        conta = ContasPagar.objects.get(historico='Frete resmas')
+        self.assertEqual((conta.tipo_custo, conta.categoria_custo), ('VARIAVEL', 'Frete'))
+        self.assertEqual(conta.versao_classificacao, classificacao_custos_service.VERSAO_REGRAS)
+
+    def test_supplier_change_and_rule_change_trigger_reclassification(self):
+        """Test that a supplier change reclassifies its accounts and a rule change reclassifies all"""
+        self.papelaria.nome = 'Aluguel Papelaria'
+        self.papelaria.save()
+        self.assertEqual(ClassificacaoCustosService.classificar_pendentes(), 0)
+        self.assertEqual(
+            set(ContasPagar.objects.filter(fornecedor=self.papelaria).values_list('tipo_custo', 'categoria_custo')),
+            {('FIXO', 'Aluguel')}
+        )
+
+        with mock.patch.object(classificacao_custos_service, 'VERSAO_REGRAS', 'nova'):
+            self.assertEqual(ClassificacaoCustosService.classificar_pendentes(), 4)
+            self.assertEqual(ClassificacaoCustosService.classificar_pendentes(), 0)
+
+    def test_dre_costs_are_grouped_from_stored_categories(self):
+        """Test that DREView groups costs by the persisted classification and does not write"""
+        ContasPagar.objects.update(tipo_custo=None, categoria_custo=None, versao_classificacao=None)
+
+        inicio, fim = datetime(2024, 3, 1), datetime(2024, 3, 31, 23, 59, 59)
+        self.assertEqual(DREView()._calcular_custos(inicio, fim), (Decimal('0'), Decimal('0'), [], []))
+        self.assertEqual(ContasPagar.objects.filter(versao_classificacao__isnull=True).count(), 4)
+
+        self.assertEqual(ClassificacaoCustosService.classificar_pendentes(), 4)
+        total_fixo, total_variavel, fixos, variaveis = DREView()._calcular_custos(inicio, fim)
+
+        self.assertEqual(total_fixo, Decimal('1000.00'))
+        self.assertEqual(total_variavel, Decimal('250.00'))
+        self.assertEqual([(c['categoria'], c['valor']) for c in fixos], [('Pessoal', 1000.0)])
+        self.assertEqual(
+            [(c['categoria'], c['valor']) for c in variaveis],
+            [('Telecomunicações', 150.0), ('Papelaria', 80.0), ('Frete', 20.0)]
+        )
+        self.assertEqual(variaveis[2]['itens'][0]['descricao'], 'Papelaria Central - Frete resmas')
+
+        with self.assertNumQueries(1):
+            DREView()._calcular_custos(inicio, fim, com_itens=False)
+
+    def test_migration_backfills_existing_accounts(self):
+        """Test that the data migration classifies accounts created before the classification columns"""
+        ContasPagar.objects.update(tipo_custo=None, categoria_custo=None, versao_classificacao=None)
+
+        migracao = importlib.import_module('contas.migrations.0026_classificar_contas_pagar')
+        migracao.classificar_contas(apps, None)
+
+        self.assertFalse(ContasPagar.objects.filter(tipo_custo__isnull=True).exists())
+        self.assertEqual(
+            ContasPagar.objects.get(historico='Salários março').categoria_custo, 'Pessoal'
+        )
+
+    def test_rule_change_is_applied_after_migrate(self):
+        """Test that migrate reclassifies accounts classified with other rules"""
+        with mock.patch.object(classificacao_custos_service, 'VERSAO_REGRAS', 'nova'):
+            call_command('migrate', verbosity=0)
+            self.assertEqual(
+                set(ContasPagar.objects.values_list('versao_classificacao', flat=True)), {'nova'}
+            )
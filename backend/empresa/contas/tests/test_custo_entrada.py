@@ -0,0 +1,89 @@
+"""
+Unit tests for CustoEntradaService
+
+Tests the in-memory entry-cost history used by the CMV and margin reports.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models.access import (
+    ItensNfEntrada, MovimentacoesEstoque, NotasFiscaisEntrada, Produtos, TiposMovimentacaoEstoque
+)
+from ..services.custo_entrada_service import CustoEntradaService
+
+
+def _aware(dia):
+    return timezone.make_aware(datetime.combine(dia, datetime.min.time()))
+
+
+class CustoEntradaServiceTest(TestCase):
+    """Test cases for CustoEntradaService"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.produto = Produtos.objects.create(codigo='CUS001', nome='Produto Custo', ativo=True)
+        self.outro_produto = Produtos.objects.create(codigo='CUS002', nome='Produto Sem Entrada', ativo=True)
+
+        self._create_entrada(date(2024, 1, 10), Decimal('10.00'))
+        self._create_entrada(date(2024, 2, 10), Decimal('12.00'))
+        self._create_entrada(date(2024, 2, 10), Decimal('13.00'))  # same day, higher id wins
+
+    def _create_entrada(self, dia, valor_unitario):
+        """Helper method to create an NF entry item"""
+        nota = NotasFiscaisEntrada.objects.create(numero_nota=f'NF{dia:%m%d}', data_entrada=_aware(dia))
+        return ItensNfEntrada.objects.create(
+            nota_fiscal=nota, produto=self.produto, quantidade=Decimal('1'),
+            valor_unitario=valor_unitario, valor_total=valor_unitario
+        )
+
+    def _ultima_entrada_por_consulta(self, produto_id, data):
+        """Original per-item lookup, used as reference"""
+        return ItensNfEntrada.objects.filter(
+            produto_id=produto_id,
+            nota_fiscal__data_entrada__lte=data
+        ).order_by('-nota_fiscal__data_entrada', '-id').first()
+
+    def test_bulk_matches_per_item_lookup(self):
+        """Test that the bulk form matches the per-item query for every pair"""
+        pares = [
+            (self.produto.id, _aware(date(2024, 1, 5))),
+            (self.produto.id, _aware(date(2024, 1, 10))),
+            (self.produto.id, _aware(date(2024, 2, 1))),
+            (self.produto.id, _aware(date(2024, 3, 1))),
+            (self.outro_produto.id, _aware(date(2024, 3, 1))),
+        ]
+
+        with self.assertNumQueries(1):
+            resultado = CustoEntradaService.ultimas_entradas_nf(pares)
+
+        for par in pares:
+            esperado = self._ultima_entrada_por_consulta(*par)
+            obtido = resultado[par]
+            self.assertEqual(obtido['id'] if obtido else None, esperado.id if esperado else None)
+
+        self.assertEqual(resultado[pares[3]]['valor_unitario'], Decimal('13.00'))
+
+    def test_last_movement_price(self):
+        """Test the movement-based price lookup, including the whole limit day"""
+        tipo_entrada = TiposMovimentacaoEstoque.objects.create(
+            id=1, codigo='ENT', descricao='Entrada de Estoque', tipo='E', ativo=True
+        )
+        MovimentacoesEstoque.objects.create(
+            produto=self.produto, tipo_movimentacao=tipo_entrada, quantidade=Decimal('5'),
+            custo_unitario=Decimal('7.5000'), documento_referencia='DOC1',
+            data_movimentacao=timezone.make_aware(datetime(2024, 1, 10, 15, 30)),
+        )
+
+        precos = CustoEntradaService.precos_ultima_entrada(
+            [self.produto.id, self.outro_produto.id], date(2024, 1, 10)
+        )
+
+        self.assertEqual(precos[self.produto.id]['preco'], 7.5)
+        self.assertEqual(precos[self.produto.id]['documento'], 'DOC1')
+        self.assertFalse(precos[self.outro_produto.id]['encontrado'])
+        self.assertFalse(
+            CustoEntradaService.precos_ultima_entrada([self.produto.id], date(2024, 1, 9))[self.produto.id]['encontrado']
+        )
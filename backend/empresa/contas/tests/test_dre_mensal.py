@@ -0,0 +1,186 @@
+"""
+Unit tests for DREMensalService
+
+Tests that closed months are computed once and persisted, that changes to
+the month's data invalidate them (including bulk loads of the sync), and
+that the current month stays live.
+"""
+
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from ..models.access import (
+    ContasPagar, ContratosLocacao, DREMensal, ItensNfSaida, NotasFiscaisEntrada, NotasFiscaisSaida, Produtos
+)
+from ..services.dre_mensal_service import DREMensalService
+from ..views.dre_views import DREView
+
+
+class DREMensalServiceTest(TestCase):
+    """Test cases for DREMensalService"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.mes = date(2024, 3, 1)
+        NotasFiscaisSaida.objects.create(
+            numero_nota='100', operacao='VENDA', valor_produtos=Decimal('500.00'),
+            data=timezone.make_aware(datetime(2024, 3, 10))
+        )
+        self.conta = ContasPagar.objects.create(
+            valor=Decimal('120.00'), status='P', historico='Aluguel',
+            data_pagamento=timezone.make_aware(datetime(2024, 3, 5))
+        )
+
+    def test_closed_month_is_persisted_and_reused(self):
+        """Test that a closed month is computed once and then read from dre_mensal"""
+        (mes, dados), = DREMensalService.obter_meses(self.mes, date(2024, 3, 31))
+
+        self.assertEqual(mes, self.mes)
+        self.assertEqual(dados['faturamento_vendas'], Decimal('500.00'))
+        self.assertEqual(dados['custos_fixos'] + dados['custos_variaveis'], Decimal('120.00'))
+        self.assertTrue(DREMensal.objects.filter(mes=self.mes).exists())
+
+        with self.assertNumQueries(1):
+            (_, dados_gravados), = DREMensalService.obter_meses(self.mes, date(2024, 3, 31))
+        self.assertEqual(dados_gravados['faturamento_vendas'], Decimal('500.00'))
+
+    def test_changes_invalidate_old_and_new_month(self):
+        """Test that moving a payment to another month invalidates both months"""
+        DREMensalService.obter_meses(date(2024, 2, 1), date(2024, 4, 30))
+        self.assertEqual(DREMensal.objects.count(), 3)
+
+        self.conta.data_pagamento = timezone.make_aware(datetime(2024, 4, 2))
+        self.conta.save()
+
+        self.assertEqual(
+            list(DREMensal.objects.values_list('mes', flat=True)), [date(2024, 2, 1)]
+        )
+        meses = dict(DREMensalService.obter_meses(date(2024, 3, 1), date(2024, 4, 30)))
+        self.assertEqual(meses[date(2024, 3, 1)]['custos_variaveis'] + meses[date(2024, 3, 1)]['custos_fixos'], 0)
+        self.assertEqual(meses[date(2024, 4, 1)]['custos_variaveis'] + meses[date(2024, 4, 1)]['custos_fixos'], Decimal('120.00'))
+
+    def test_cost_price_change_invalidates_from_first_sale(self):
+        """Test that preco_custo (the CMV fallback) invalidates from the product's first sale onward"""
+        produto = Produtos.objects.create(codigo='DRE001', nome='Toner', preco_custo=Decimal('10.00'), ativo=True)
+        ItensNfSaida.objects.create(
+            nota_fiscal=NotasFiscaisSaida.objects.get(numero_nota='100'), produto=produto, quantidade=Decimal('2')
+        )
+        DREMensalService.obter_meses(date(2024, 2, 1), date(2024, 4, 30))
+        self.assertEqual(DREMensal.objects.count(), 3)
+
+        produto.nome = 'Toner preto'
+        produto.save()
+        self.assertEqual(DREMensal.objects.count(), 3)
+
+        produto.preco_custo = Decimal('12.00')
+        produto.save()
+        self.assertEqual(list(DREMensal.objects.values_list('mes', flat=True)), [date(2024, 2, 1)])
+        (_, dados), = DREMensalService.obter_meses(self.mes, date(2024, 3, 31))
+        self.assertEqual(dados['cmv'], Decimal('24.00'))
+
+    def test_contract_invalidates_its_term(self):
+        """Test that a rental contract invalidates the months of its old and new term"""
+        DREMensalService.obter_meses(date(2024, 1, 1), date(2024, 6, 30))
+        contrato = ContratosLocacao.objects.create(contrato='C9', inicio=date(2024, 2, 10), fim=date(2024, 3, 20))
+        self.assertEqual(
+            list(DREMensal.objects.order_by('mes').values_list('mes', flat=True)),
+            [date(2024, 1, 1), date(2024, 4, 1), date(2024, 5, 1), date(2024, 6, 1)]
+        )
+
+        contrato.fim = date(2024, 5, 31)
+        contrato.save()
+        self.assertEqual(
+            list(DREMensal.objects.order_by('mes').values_list('mes', flat=True)),
+            [date(2024, 1, 1), date(2024, 6, 1)]
+        )
+
+    def test_current_month_is_not_persisted(self):
+        """Test that the current month is always computed live"""
+        hoje = timezone.localdate()
+        DREMensalService.obter_meses(hoje, hoje)
+        self.assertFalse(DREMensal.objects.filter(mes=hoje.replace(day=1)).exists())
+
+    def test_purchases_come_from_entry_invoices(self):
+        """Test that compras_periodo sums the purchase NFs de entrada entered in the period"""
+        for numero, operacao, entrada, valor in (
+            ('1', 'COMPRA P/ REVENDA', datetime(2024, 3, 12), '300.00'),
+            ('2', 'DEVOLUCAO', datetime(2024, 3, 15), '50.00'),
+            ('3', 'COMPRA', datetime(2024, 4, 1), '70.00'),
+        ):
+            NotasFiscaisEntrada.objects.create(
+                numero_nota=numero, operacao=operacao, valor_produtos=Decimal(valor),
+                data_entrada=timezone.make_aware(entrada)
+            )
+
+        dre = DREView()._calcular_dre(date(2024, 3, 1), date(2024, 3, 31))
+        self.assertEqual(dre['compras_periodo'], 300.0)
+
+
+class DREMensalSincronizacaoTest(TransactionTestCase):
+    """Test cases for the dre_mensal task of the sync (sincronizacao/migrate_dre_mensal.py)"""
+
+    def setUp(self):
+        """Set up test data"""
+        sincronizacao = str(settings.BASE_DIR.parent.parent / 'sincronizacao')
+        if sincronizacao not in sys.path:
+            sys.path.append(sincronizacao)
+        import bulk_loader
+        import migrate_dre_mensal
+        self.bulk_loader, self.migrate_dre_mensal = bulk_loader, migrate_dre_mensal
+        bulk_loader.limpar_resultados()
+
+        self.conta = ContasPagar.objects.create(
+            valor=Decimal('120.00'), status='P', historico='Aluguel',
+            data_pagamento=timezone.make_aware(datetime(2024, 3, 5))
+        )
+
+    def _custos(self, mes):
+        (_, dados), = DREMensalService.obter_meses(mes, mes)
+        return dados['custos_fixos'] + dados['custos_variaveis']
+
+    def test_bulk_load_invalidates_old_and_new_month(self):
+        """Test that a BulkLoader load moving a payment is recomputed in both months"""
+        DREMensalService.obter_meses(date(2024, 2, 1), date(2024, 6, 30))
+        self.assertEqual(DREMensal.objects.count(), 5)
+
+        # Mesma linha relida do destino, com outro valor e pagamento em maio
+        campos = ContasPagar._meta.concrete_fields
+        linha = dict(zip(
+            [campo.column for campo in campos],
+            ContasPagar.objects.filter(pk=self.conta.pk).values_list(*[campo.attname for campo in campos]).get()
+        ))
+        linha.update(valor=Decimal('200.00'), valor_total_pago=Decimal('200.00'),
+                     data_pagamento=datetime(2024, 5, 2, 12))
+        loader = self.bulk_loader.BulkLoader(
+            connection.connection, 'contas_pagar', list(linha),
+            coluna_data='COALESCE(x.data_pagamento, x.vencimento)',
+        )
+        loader.adicionar(tuple(linha.values()))
+        loader.finalizar()
+
+        self.assertEqual(self.migrate_dre_mensal.invalidar_dre_contas(), 3)
+        self.assertEqual(
+            list(DREMensal.objects.order_by('mes').values_list('mes', flat=True)),
+            [date(2024, 2, 1), date(2024, 6, 1)]
+        )
+        self.assertEqual(self._custos(date(2024, 3, 1)), 0)
+        self.assertEqual(self._custos(date(2024, 5, 1)), Decimal('200.00'))
+
+    def test_entry_invoice_invalidates_following_months(self):
+        """Test that an NF de entrada load invalidates from its month onward"""
+        resultado = self.bulk_loader.LoadResult(
+            'notas_fiscais_entrada', menor_data='2024-03-10 00:00:00', maior_data='2024-03-10 00:00:00'
+        )
+        self.assertEqual(
+            self.migrate_dre_mensal.periodo_alterado([resultado], self.migrate_dre_mensal.TABELAS_NOTAS),
+            (datetime(2024, 3, 10), None)
+        )
+        self.assertEqual(
+            self.migrate_dre_mensal.periodo_alterado([resultado], self.migrate_dre_mensal.TABELAS_CONTAS),
+            (None, None)
+        )
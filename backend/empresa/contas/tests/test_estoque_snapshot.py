@@ -0,0 +1,146 @@
+"""
+Unit tests for EstoqueSnapshotService
+
+Tests building and rolling forward the daily stock snapshots, reading
+historical positions from the nearest snapshot plus the remaining delta, and
+refreshing them after backdated movements loaded by the sync.
+"""
+
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from ..models.access import EstoqueSnapshot, MovimentacoesEstoque, Produtos, TiposMovimentacaoEstoque
+from ..services.cache_relatorios_service import CacheRelatoriosService
+from ..services.estoque_snapshot_service import EstoqueSnapshotService
+from ..services.stock_calculation import StockCalculationService
+
+
+class EstoqueSnapshotServiceTest(TestCase):
+    """Test cases for EstoqueSnapshotService"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.tipo_entrada = TiposMovimentacaoEstoque.objects.create(
+            codigo='ENT', descricao='Entrada de Estoque', tipo='E', ativo=True
+        )
+        self.tipo_saida = TiposMovimentacaoEstoque.objects.create(
+            codigo='SAI', descricao='Saída de Estoque', tipo='S', ativo=True
+        )
+        self.produto = Produtos.objects.create(
+            codigo='SNAP001', nome='Produto Snapshot', preco_custo=Decimal('2.00'), ativo=True
+        )
+
+        self._create_movement(date(2024, 1, 1), 100, self.tipo_entrada, '000000')
+        self._create_movement(date(2024, 1, 10), 20, self.tipo_entrada, custo='5.0000')
+        self._create_movement(date(2024, 1, 10), 5, self.tipo_saida)
+        self._create_movement(date(2024, 1, 20), 30, self.tipo_saida)
+
+    def _create_movement(self, dia, quantidade, tipo, documento='DOC001', custo=None):
+        """Helper method to create stock movements"""
+        return MovimentacoesEstoque.objects.create(
+            produto=self.produto,
+            data_movimentacao=timezone.make_aware(datetime.combine(dia, datetime.min.time())),
+            quantidade=Decimal(str(quantidade)),
+            custo_unitario=Decimal(custo) if custo else None,
+            tipo_movimentacao=tipo,
+            documento_referencia=documento
+        )
+
+    def test_build_writes_one_row_per_day_with_movements(self):
+        """Test that the full build writes the end-of-day position of each day"""
+        resumo = EstoqueSnapshotService.atualizar_snapshots(ate=date(2024, 1, 31))
+
+        self.assertEqual(resumo['gravados'], 3)
+        snapshots = list(
+            EstoqueSnapshot.objects.filter(produto=self.produto).order_by('data').values_list('data', 'quantidade')
+        )
+        self.assertEqual(snapshots, [
+            (date(2024, 1, 1), Decimal('100')),
+            (date(2024, 1, 10), Decimal('115')),
+            (date(2024, 1, 20), Decimal('85')),
+        ])
+
+    def test_positions_match_stock_calculation(self):
+        """Test that snapshot reads match the movement-based calculation"""
+        EstoqueSnapshotService.atualizar_snapshots(ate=date(2024, 1, 15))
+        self._create_movement(date(2024, 1, 25), 10, self.tipo_entrada)
+
+        for dia in [date(2023, 12, 31), date(2024, 1, 5), date(2024, 1, 12), date(2024, 1, 31)]:
+            quantidades = EstoqueSnapshotService.quantidades_na_data(dia, [self.produto.id])
+            self.assertEqual(
+                quantidades[self.produto.id],
+                StockCalculationService.calculate_stock_at_date(self.produto.id, dia)
+            )
+
+    def test_roll_forward_only_processes_new_days(self):
+        """Test that the incremental run keeps older snapshots untouched"""
+        EstoqueSnapshotService.atualizar_snapshots(ate=date(2024, 1, 15))
+        self._create_movement(date(2024, 2, 1), 15, self.tipo_saida)
+
+        resumo = EstoqueSnapshotService.atualizar_snapshots(ate=date(2024, 2, 28))
+
+        self.assertEqual(resumo['desde'], date(2024, 1, 10))
+        self.assertEqual(resumo['removidos'], 1)
+        self.assertEqual(resumo['gravados'], 3)
+        ultimo = EstoqueSnapshot.objects.filter(produto=self.produto).order_by('-data').first()
+        self.assertEqual((ultimo.data, ultimo.quantidade), (date(2024, 2, 1), Decimal('70')))
+
+    def test_stock_value_uses_last_entry_cost(self):
+        """Test that the stock value uses the snapshot cost with preco_custo fallback"""
+        EstoqueSnapshotService.atualizar_snapshots(ate=date(2024, 1, 31))
+
+        # Before the priced entry only preco_custo is known
+        self.assertEqual(EstoqueSnapshotService.valor_estoque_na_data(date(2024, 1, 5)), Decimal('200.00'))
+        self.assertEqual(EstoqueSnapshotService.valor_estoque_na_data(date(2024, 1, 31)), Decimal('425.0000'))
+
+
+class SnapshotsSincronizacaoTest(TransactionTestCase):
+    """Test cases for the snapshots_estoque task of the sync (sincronizacao/migrate_snapshots_estoque.py)"""
+
+    def setUp(self):
+        """Set up test data"""
+        sincronizacao = str(settings.BASE_DIR.parent.parent / 'sincronizacao')
+        if sincronizacao not in sys.path:
+            sys.path.append(sincronizacao)
+        import bulk_loader
+        import migrate_snapshots_estoque
+        self.bulk_loader, self.migrate_snapshots_estoque = bulk_loader, migrate_snapshots_estoque
+        bulk_loader.limpar_resultados()
+
+        self.tipo_entrada = TiposMovimentacaoEstoque.objects.create(codigo='ENT', descricao='Entrada', tipo='E')
+        self.produto = Produtos.objects.create(codigo='SNAP002', nome='Toner', ativo=True)
+        for dia, quantidade in ((date(2024, 1, 1), 10), (date(2024, 1, 20), 5)):
+            MovimentacoesEstoque.objects.create(
+                produto=self.produto, tipo_movimentacao=self.tipo_entrada, quantidade=Decimal(quantidade),
+                data_movimentacao=timezone.make_aware(datetime.combine(dia, datetime.min.time())),
+                documento_referencia='DOC001',
+            )
+        EstoqueSnapshotService.atualizar_snapshots()
+
+    def test_backdated_bulk_load_is_applied_to_snapshots(self):
+        """Test that a movement loaded by BulkLoader before the last snapshot reaches the snapshots"""
+        loader = self.bulk_loader.BulkLoader(
+            connection.connection, 'movimentacoes_estoque',
+            ['produto_id', 'tipo_movimentacao_id', 'data_movimentacao', 'quantidade', 'documento_referencia'],
+            chave=None, coluna_data='x.data_movimentacao',
+        )
+        loader.adicionar((self.produto.id, self.tipo_entrada.id, datetime(2024, 1, 10, 15), Decimal('3'), 'DOC002'))
+        loader.finalizar()
+
+        versao, = CacheRelatoriosService.versoes(['estoque_snapshot'])
+        resumo = self.migrate_snapshots_estoque.atualizar_snapshots_estoque()
+
+        self.assertEqual(resumo['desde'], date(2024, 1, 10))
+        self.assertEqual(CacheRelatoriosService.versoes(['estoque_snapshot']), (versao + 1,))
+        self.assertEqual(
+            EstoqueSnapshotService.quantidades_na_data(date(2024, 1, 15), [self.produto.id]),
+            {self.produto.id: Decimal('13')}
+        )
+        self.assertEqual(
+            EstoqueSnapshot.objects.get(produto=self.produto, data=date(2024, 1, 20)).quantidade, Decimal('18')
+        )
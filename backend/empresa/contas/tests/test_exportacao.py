@@ -0,0 +1,58 @@
+"""
+Unit tests for ExportacaoService
+
+Tests the streamed CSV download and the XLSX file download built from
+row iterators.
+"""
+
+import io
+from datetime import date, datetime
+from decimal import Decimal
+from django.test import TestCase
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from ..models.access import MovimentacoesEstoque, Produtos
+from ..models.fluxo_caixa import FluxoCaixaLancamento
+
+
+class ExportacaoServiceTest(TestCase):
+    """Test cases for the CSV/XLSX export endpoints"""
+
+    def setUp(self):
+        """Set up test data"""
+        produto = Produtos.objects.create(codigo='P1', nome='Toner')
+        for dia in (1, 2, 3):
+            MovimentacoesEstoque.objects.create(
+                produto=produto, quantidade=Decimal(dia), custo_unitario=Decimal('10.5000'),
+                valor_total=Decimal(dia) * Decimal('10.50'), documento_referencia=f'NF{dia}',
+                data_movimentacao=timezone.make_aware(datetime(2024, 3, dia, 10))
+            )
+
+    def test_csv_is_streamed(self):
+        """Test that the CSV export is a streaming response with one line per row"""
+        resposta = self.client.get('/api/movimentacoes_estoque/exportar/', {'data_inicial': '2024-03-02'})
+
+        self.assertTrue(resposta.streaming)
+        self.assertIn('movimentacoes_estoque.csv', resposta['Content-Disposition'])
+        linhas = b''.join(resposta.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(linhas), 3)
+        self.assertTrue(linhas[0].startswith('ID,Data,Tipo'))
+        self.assertIn('NF3', linhas[2])
+
+    def test_xlsx_is_a_binary_download(self):
+        """Test that the Excel export is a real workbook with one sheet per block"""
+        FluxoCaixaLancamento.objects.create(
+            data=date(2024, 3, 5), tipo='entrada', valor=Decimal('150.00'), descricao='Locação',
+            categoria='aluguel', subcategoria='outros', fonte_tipo='manual', realizado=True
+        )
+
+        resposta = self.client.get('/api/fluxo-caixa-lucro/exportar_excel/')
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('attachment', resposta['Content-Disposition'])
+        workbook = load_workbook(io.BytesIO(b''.join(resposta.streaming_content)))
+        self.assertEqual(workbook.sheetnames, ['Movimentações', 'Saldos Diários'])
+        linhas = list(workbook['Movimentações'].iter_rows(values_only=True))
+        self.assertEqual(linhas[1][1:], ('entrada', 'Locação', 'aluguel', 150, 'Sim'))
+        self.assertEqual(linhas[1][0].date(), date(2024, 3, 5))
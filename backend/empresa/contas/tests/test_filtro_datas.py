@@ -0,0 +1,87 @@
+"""
+Unit tests for FiltroDatasService
+
+Tests that the half-open ranges select the same rows as the __date lookups
+they replace, and (with EXPLAIN) that the database answers them from the
+column and expression indexes instead of scanning the table.
+"""
+
+import re
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models.functions import Coalesce
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models.access import ContasPagar, MovimentacoesEstoque
+from ..services.filtro_datas_service import FiltroDatasService
+
+
+def momento(dia, hora=0, minuto=0, segundo=0):
+    return timezone.make_aware(datetime(2024, 3, dia, hora, minuto, segundo))
+
+
+def nome_indice(modelo, campos):
+    return next(indice.name for indice in modelo._meta.indexes if indice.fields == campos)
+
+
+def indice_data_movimentacao() -> str:
+    """Padrão do índice de data_movimentacao no plano (no PostgreSQL, o índice de cada partição anual)"""
+    if connection.vendor == 'postgresql':
+        return r'movimentacoes_estoque_(\d{4}|padrao)_data_movimentacao_idx'
+    return re.escape(nome_indice(MovimentacoesEstoque, ['data_movimentacao']))
+
+
+class FiltroDatasServiceTest(TestCase):
+    """Test cases for FiltroDatasService"""
+
+    def setUp(self):
+        """Set up test data"""
+        for dia, hora, minuto, segundo in ((9, 23, 59, 59), (10, 0, 0, 0), (20, 23, 59, 59), (21, 0, 0, 0)):
+            ContasPagar.objects.create(
+                vencimento=momento(dia, hora, minuto, segundo), valor=Decimal('10.00'), status='P',
+            )
+
+    def plano(self, queryset) -> str:
+        """Plano de execução, sem deixar o PostgreSQL preferir seq scan nas tabelas pequenas do teste"""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_ranges_match_date_lookups(self):
+        """Test that the boundaries select exactly the rows of the __date lookups"""
+        inicio, fim = date(2024, 3, 10), date(2024, 3, 20)
+        consultas = (
+            (FiltroDatasService.entre('vencimento', inicio, fim), {'vencimento__date__range': [inicio, fim]}),
+            (FiltroDatasService.entre('vencimento', data_inicial=inicio), {'vencimento__date__gte': inicio}),
+            (FiltroDatasService.entre('vencimento', data_final=fim), {'vencimento__date__lte': fim}),
+            (FiltroDatasService.antes('vencimento', inicio), {'vencimento__date__lt': inicio}),
+        )
+        for filtro, original in consultas:
+            with self.subTest(original=original):
+                self.assertEqual(
+                    set(ContasPagar.objects.filter(filtro).values_list('id', flat=True)),
+                    set(ContasPagar.objects.filter(**original).values_list('id', flat=True)),
+                )
+        self.assertEqual(ContasPagar.objects.filter(FiltroDatasService.entre('vencimento', inicio, fim)).count(), 2)
+
+    def test_effective_date_uses_expression_index(self):
+        """Test that the Coalesce(data_pagamento, vencimento) range is served by the expression index"""
+        contas = ContasPagar.objects.annotate(data_efetiva=Coalesce('data_pagamento', 'vencimento')).filter(
+            FiltroDatasService.entre('data_efetiva', date(2024, 3, 10), date(2024, 3, 20)), status='P',
+        )
+        self.assertIn('cp_status_data_efetiva_idx', self.plano(contas))
+
+    def test_movement_range_uses_date_index(self):
+        """Test that the movement period filter is served by the data_movimentacao index"""
+        movimentacoes = MovimentacoesEstoque.objects.filter(
+            FiltroDatasService.entre('data_movimentacao', date(2024, 3, 1), date(2024, 3, 31))
+        )
+        self.assertRegex(self.plano(movimentacoes), indice_data_movimentacao())
+        convertido = MovimentacoesEstoque.objects.filter(
+            data_movimentacao__date__range=[date(2024, 3, 1), date(2024, 3, 31)]
+        )
+        self.assertNotRegex(self.plano(convertido), indice_data_movimentacao())
@@ -0,0 +1,47 @@
+"""
+Unit tests for the default list pagination
+
+Tests the keyset pagination of the router ViewSets and the fields=
+sparse-fieldset parameter of the serializers.
+"""
+
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+
+from ..models.access import ContasPagar, Fornecedores
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cases for KeysetPagination and CamposSelecionaveisSerializer"""
+
+    URL = '/api/contas_pagar/'
+
+    def setUp(self):
+        """Set up test data"""
+        fornecedor = Fornecedores.objects.create(nome='Papelaria Central')
+        self.contas = [
+            ContasPagar.objects.create(
+                fornecedor=fornecedor, valor=Decimal(valor), vencimento=date(2024, 3, dia), status='A'
+            )
+            for dia, valor in enumerate(['10.00', '20.00', '30.00', '40.00', '50.00'], start=1)
+        ]
+
+    def test_pages_follow_the_cursor(self):
+        """Test that pages are walked by cursor in descending id order"""
+        ids = []
+        url = f'{self.URL}?page_size=2'
+        while url:
+            with self.assertNumQueries(1):
+                resposta = self.client.get(url).json()
+            ids += [conta['id'] for conta in resposta['results']]
+            url = resposta['next']
+
+        self.assertEqual(ids, sorted((conta.id for conta in self.contas), reverse=True))
+
+    def test_fields_parameter_limits_the_output(self):
+        """Test that fields= returns only the requested fields"""
+        resposta = self.client.get(self.URL, {'fields': 'id,valor,fornecedor_nome'}).json()
+
+        self.assertEqual(set(resposta['results'][0]), {'id', 'valor', 'fornecedor_nome'})
+        self.assertEqual(resposta['results'][0]['fornecedor_nome'], 'Papelaria Central')
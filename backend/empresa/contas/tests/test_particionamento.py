@@ -0,0 +1,77 @@
+"""
+Unit tests for ParticionamentoService
+
+Tests the yearly partition names and bounds, and (on PostgreSQL) that new
+year partitions take the rows already in the default partition and that
+period queries read only the partition of their year.
+"""
+
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+
+from ..models.access import MovimentacoesEstoque, Produtos, TiposMovimentacaoEstoque
+from ..services.filtro_datas_service import FiltroDatasService
+from ..services.particionamento_service import ParticionamentoService
+
+
+class ParticionamentoServiceTest(TestCase):
+    """Test cases for ParticionamentoService"""
+
+    def setUp(self):
+        """Set up test data"""
+        tipo = TiposMovimentacaoEstoque.objects.create(codigo='ENT', descricao='Entrada', tipo='E')
+        produto = Produtos.objects.create(codigo='PART1', nome='Toner', grupo_id=None, ativo=True)
+        # Virada do ano em UTC: a primeira fica em 2024, as demais em 2025
+        for momento in (datetime(2024, 12, 31, 23, 30), datetime(2025, 1, 1, 0, 0), datetime(2025, 6, 1, 12, 0)):
+            MovimentacoesEstoque.objects.create(
+                produto=produto, tipo_movimentacao=tipo, quantidade=Decimal('1'), documento_referencia='DOC1',
+                data_movimentacao=momento.replace(tzinfo=dt_timezone.utc),
+            )
+
+    def test_partition_names_and_bounds(self):
+        """Test the partition names, the UTC year bounds and the years kept ahead of the loads"""
+        self.assertEqual(
+            ParticionamentoService.nome_particao('movimentacoes_estoque', 2025), 'movimentacoes_estoque_2025'
+        )
+        self.assertEqual(ParticionamentoService.nome_particao('movimentacoes_estoque'), 'movimentacoes_estoque_padrao')
+        self.assertEqual(
+            ParticionamentoService.limites(2025), ('2025-01-01 00:00:00+00', '2026-01-01 00:00:00+00')
+        )
+        self.assertEqual(ParticionamentoService.anos_correntes(date(2026, 12, 31)), [2026, 2027])
+        for tabela in ('contas_pagar', 'itens_nf_saida'):
+            with self.assertRaises(ValueError):
+                ParticionamentoService.criar_particoes([tabela])
+
+    def test_new_partitions_take_rows_from_default(self):
+        """Test that creating a year partition moves its rows out of the default partition"""
+        criadas = ParticionamentoService.criar_particoes(['movimentacoes_estoque'], anos=[2024, 2025])
+
+        if connection.vendor != 'postgresql':
+            self.assertEqual(criadas, [])
+            self.assertEqual(ParticionamentoService.particoes('movimentacoes_estoque'), [])
+            return
+
+        self.assertEqual(criadas, ['movimentacoes_estoque_2024', 'movimentacoes_estoque_2025'])
+        self.assertEqual(ParticionamentoService.criar_particoes(['movimentacoes_estoque'], anos=[2025]), [])
+        with connection.cursor() as cursor:
+            for particao, linhas in (('2024', 1), ('2025', 2), ('padrao', 0)):
+                cursor.execute(f'SELECT COUNT(*) FROM movimentacoes_estoque_{particao}')
+                self.assertEqual(cursor.fetchone()[0], linhas)
+        self.assertEqual(MovimentacoesEstoque.objects.count(), 3)
+
+    def test_period_query_reads_only_its_year(self):
+        """Test that a period filter returns the same rows and is pruned to the partition of its year"""
+        ParticionamentoService.criar_particoes(['movimentacoes_estoque'], anos=[2024, 2025])
+        movimentacoes = MovimentacoesEstoque.objects.filter(
+            FiltroDatasService.entre('data_movimentacao', date(2025, 1, 1), date(2025, 1, 31))
+        )
+
+        self.assertEqual(movimentacoes.count(), 1)
+        if connection.vendor == 'postgresql':
+            plano = movimentacoes.explain()
+            self.assertIn('movimentacoes_estoque_2025', plano)
+            self.assertNotIn('movimentacoes_estoque_2024', plano)
+            self.assertNotIn('movimentacoes_estoque_padrao', plano)
@@ -0,0 +1,72 @@
+"""
+Unit tests for the request profiler
+
+Tests that PerfilRequisicoesMiddleware records per-endpoint samples with
+query counts, that repeated SQL is grouped by signature, and that the
+statistics endpoint is restricted to admin users.
+"""
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from ..models.access import Fornecedores, PerfilEndpoint
+from ..services.perfil_requisicoes_service import Medicao, PerfilRequisicoesService
+
+
+@override_settings(PERFIL_REQUISICOES={'INTERVALO_GRAVACAO': 0})
+class PerfilRequisicoesTest(TestCase):
+    """Test cases for PerfilRequisicoesMiddleware and PerfilRequisicoesService"""
+
+    def setUp(self):
+        """Set up test data"""
+        PerfilRequisicoesService.limpar()
+        Fornecedores.objects.create(nome='Papelaria Central')
+
+    def test_requests_are_recorded_per_url_name(self):
+        """Test that each request adds a sample with its query count and size"""
+        self.client.get('/api/fornecedores/')
+        self.client.get('/contas/fornecedores/')
+
+        perfil = PerfilEndpoint.objects.get(url_nome='fornecedores-list')
+        self.assertEqual(perfil.requisicoes, 2)
+        tempo_ms, consultas, tempo_db_ms, tamanho = perfil.amostras[0]
+        self.assertGreater(consultas, 0)
+        self.assertGreater(tamanho, 0)
+
+    def test_failed_write_does_not_break_the_response(self):
+        """Test that an error while writing perfil_endpoints is logged and the response still goes out"""
+        with mock.patch.object(PerfilRequisicoesService, 'gravar', side_effect=RuntimeError('sem tabela')), \
+                self.assertLogs('contas.middleware', level='ERROR'):
+            resposta = self.client.get('/api/fornecedores/')
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertFalse(PerfilEndpoint.objects.exists())
+
+    def test_repeated_queries_share_a_signature(self):
+        """Test that queries differing only in parameters count as repetitions"""
+        medicao = Medicao()
+        with connection.execute_wrapper(medicao):
+            for nome in ('A', 'B', 'C'):
+                list(Fornecedores.objects.filter(nome=nome))
+            list(Fornecedores.objects.filter(id__in=[1, 2]))
+            list(Fornecedores.objects.filter(id__in=[1, 2, 3]))
+
+        repetidas = medicao.repetidas(5)
+        self.assertEqual(medicao.consultas, 5)
+        self.assertEqual([vezes for _, vezes in repetidas], [3, 2])
+        self.assertIn('IN (...)', repetidas[1][0])
+
+    def test_statistics_endpoint_is_admin_only(self):
+        """Test that anonymous users are refused and staff users get the percentiles"""
+        self.client.get('/api/fornecedores/')
+        self.assertEqual(self.client.get('/api/perfil-endpoints/').status_code, 403)
+
+        admin = User.objects.create_user('admin', password='senha', is_staff=True)
+        self.client.force_login(admin)
+        resposta = self.client.get('/api/perfil-endpoints/', {'ordenar': 'consultas'})
+        self.assertEqual(resposta.status_code, 200)
+        nomes = [item['url_nome'] for item in resposta.json()['endpoints']]
+        self.assertIn('fornecedores-list', nomes)
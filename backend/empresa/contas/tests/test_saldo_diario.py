@@ -0,0 +1,81 @@
+"""
+Unit tests for the daily balance rebuild
+
+Tests that FluxoCaixaService.recalcular_saldos_diarios computes the daily
+totals and running balances in a fixed number of queries, and that the
+incremental mode leaves the days before the changed date untouched.
+"""
+
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+
+from ..models.fluxo_caixa import ConfiguracaoFluxoCaixa, FluxoCaixaLancamento, SaldoDiario
+from ..services.fluxo_caixa_service import FluxoCaixaService
+
+
+class RecalcularSaldosDiariosTest(TestCase):
+    """Test cases for FluxoCaixaService.recalcular_saldos_diarios"""
+
+    def setUp(self):
+        """Set up test data"""
+        ConfiguracaoFluxoCaixa.objects.create(
+            saldo_inicial=Decimal('1000.00'), data_inicial_controle=date(2024, 1, 1)
+        )
+        self._create_lancamento(date(2024, 3, 1), 'entrada', '200.00', True)
+        self._create_lancamento(date(2024, 3, 1), 'saida', '50.00', False)
+        self._create_lancamento(date(2024, 3, 3), 'saida', '100.00', True)
+        self._create_lancamento(date(2024, 3, 5), 'entrada', '30.00', False)
+
+    def _create_lancamento(self, data, tipo, valor, realizado):
+        """Helper method to create a cash flow entry"""
+        return FluxoCaixaLancamento.objects.create(
+            data=data, tipo=tipo, valor=Decimal(valor), realizado=realizado, descricao='Teste',
+            categoria='outros', subcategoria='outros', fonte_tipo='manual'
+        )
+
+    def _saldos(self):
+        return {s.data: s for s in SaldoDiario.objects.all()}
+
+    def test_full_rebuild_running_balances(self):
+        """Test that totals and chained balances are computed for every day with entries"""
+        self.assertEqual(FluxoCaixaService.recalcular_saldos_diarios(), 3)
+
+        saldos = self._saldos()
+        primeiro = saldos[date(2024, 3, 1)]
+        self.assertEqual(primeiro.saldo_inicial, Decimal('1000.00'))
+        self.assertEqual(primeiro.total_entradas, Decimal('200.00'))
+        self.assertEqual(primeiro.total_saidas_previstas, Decimal('50.00'))
+        self.assertEqual(primeiro.saldo_final, Decimal('1150.00'))
+        self.assertEqual(saldos[date(2024, 3, 3)].saldo_inicial, Decimal('1150.00'))
+        self.assertEqual(saldos[date(2024, 3, 3)].saldo_final, Decimal('1050.00'))
+        self.assertEqual(saldos[date(2024, 3, 5)].saldo_final, Decimal('1080.00'))
+        self.assertTrue(all(s.processado for s in saldos.values()))
+
+    def test_backdated_entry_uses_constant_queries(self):
+        """Test that a backdated entry does not trigger per-day queries"""
+        FluxoCaixaService.recalcular_saldos_diarios()
+        for dia in range(10, 30):
+            self._create_lancamento(date(2024, 3, dia), 'entrada', '1.00', True)
+        FluxoCaixaService.recalcular_saldos_diarios()
+
+        self._create_lancamento(date(2024, 3, 2), 'saida', '10.00', True)
+        # Savepoint, previous balance, windowed query, bulk update, insert of the new day, release
+        with self.assertNumQueries(6):
+            FluxoCaixaService.recalcular_saldos_diarios(desde=date(2024, 3, 2))
+
+        saldos = self._saldos()
+        self.assertEqual(saldos[date(2024, 3, 2)].saldo_final, Decimal('1140.00'))
+        self.assertEqual(saldos[date(2024, 3, 29)].saldo_final, Decimal('1090.00'))
+
+    def test_incremental_mode_keeps_earlier_days(self):
+        """Test that days before the changed date are not rewritten"""
+        FluxoCaixaService.recalcular_saldos_diarios()
+        SaldoDiario.objects.filter(data=date(2024, 3, 1)).update(saldo_final=Decimal('500.00'))
+
+        FluxoCaixaService.recalcular_saldos_diarios(desde=date(2024, 3, 3))
+
+        saldos = self._saldos()
+        self.assertEqual(saldos[date(2024, 3, 1)].saldo_final, Decimal('500.00'))
+        self.assertEqual(saldos[date(2024, 3, 3)].saldo_inicial, Decimal('500.00'))
+        self.assertEqual(saldos[date(2024, 3, 5)].saldo_final, Decimal('430.00'))
@@ -0,0 +1,156 @@
+"""
+Unit tests for SaldoEstoqueService
+
+Tests that view_saldos_estoque_rapido applies the reset rule of the stock
+snapshots, that the current-stock endpoints read today's balances from it,
+that past dates follow the same rule through the snapshots, and that edits
+refresh the view once, after commit and off the request.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models.access import MovimentacoesEstoque, Produtos, SaldoEstoqueRapido, TiposMovimentacaoEstoque
+from ..services.cache_relatorios_service import CacheRelatoriosService
+from ..services.dados_sinteticos_service import DadosSinteticosService
+from ..services.estoque_snapshot_service import EstoqueSnapshotService
+from ..services.saldo_estoque_service import SaldoEstoqueService
+from ..signals import saldo_estoque
+
+
+class SaldoEstoqueServiceTest(TestCase):
+    """Test cases for SaldoEstoqueService"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.tipo_entrada = TiposMovimentacaoEstoque.objects.create(codigo='ENT', descricao='Entrada', tipo='E')
+        self.tipo_saida = TiposMovimentacaoEstoque.objects.create(codigo='SAI', descricao='Saída', tipo='S')
+        # estoque_atual desatualizado: os saldos de hoje vêm das movimentações
+        self.produto = Produtos.objects.create(
+            codigo='SALDO1', nome='Toner', preco_custo=Decimal('2.00'), estoque_atual=999, grupo_id=None, ativo=True,
+        )
+        self.movimentar(date(2024, 1, 5), 40, self.tipo_entrada)
+        self.movimentar(date(2024, 1, 10), 10, self.tipo_entrada, '000000')
+        self.movimentar(date(2024, 1, 10), 7, self.tipo_entrada)  # mesmo instante do reset: não conta
+        self.movimentar(date(2024, 1, 15), 5, self.tipo_entrada)
+        self.movimentar(date(2024, 1, 20), 3, self.tipo_saida)
+        self.movimentar(date(2024, 1, 25), 50, self.tipo_entrada, None)  # sem documento: não conta
+
+    def movimentar(self, dia, quantidade, tipo, documento='DOC1'):
+        return MovimentacoesEstoque.objects.create(
+            produto=self.produto, data_movimentacao=timezone.make_aware(datetime.combine(dia, datetime.min.time())),
+            quantidade=Decimal(quantidade), tipo_movimentacao=tipo, documento_referencia=documento,
+        )
+
+    def test_view_applies_last_reset_and_later_movements(self):
+        """Test that the balance is the last reset plus the movements strictly after it"""
+        SaldoEstoqueService.atualizar()
+        saldo = SaldoEstoqueRapido.objects.get(produto=self.produto)
+
+        self.assertEqual(saldo.saldo_atual, Decimal('12'))
+        self.assertEqual(saldo.total_movimentacoes, 6)
+        self.assertEqual(SaldoEstoqueService.quantidades_atuais([self.produto.id]), {self.produto.id: Decimal('12')})
+
+    def test_view_matches_snapshot_positions(self):
+        """Test that the view agrees with the snapshot service for generated data"""
+        DadosSinteticosService.gerar(escala=0.02, meses=3, semente=3, data_final=date.today() - timedelta(days=1))
+        produtos = Produtos.objects.filter(codigo__startswith='SINT').values_list('id', flat=True)
+
+        esperado = EstoqueSnapshotService.quantidades_na_data(date.today(), produtos)
+        atuais = SaldoEstoqueService.quantidades_atuais(produtos)
+
+        self.assertTrue(atuais)
+        self.assertEqual({pid: atuais.get(pid, Decimal('0')) for pid in esperado}, esperado)
+
+    def test_current_stock_endpoints_read_view_balances(self):
+        """Test that today's stock comes from the view and past dates from the snapshots"""
+        url = reverse('estoque-controle-estoque-atual')
+
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.data['results'][0]['quantidade_atual'], 12.0)
+
+        passado = (date.today() - timedelta(days=1)).strftime('%Y-%m-%d')
+        resposta = self.client.get(url, {'data': passado})
+        self.assertEqual(resposta.data['results'][0]['quantidade_atual'], 12.0)
+
+        resposta = self.client.get(reverse('estoque-controle-valor-total-estoque'))
+        self.assertEqual(resposta.data['valor_total_estoque'], 24.0)
+
+    def test_today_and_yesterday_match_without_movements_in_between(self):
+        """Test that today and yesterday agree, clamp negatives and ignore estoque_atual"""
+        sem_movimento = Produtos.objects.create(
+            codigo='SALDO2', nome='Papel', estoque_atual=30, grupo_id=None, ativo=True,
+        )
+        negativo = Produtos.objects.create(codigo='SALDO3', nome='Cilindro', grupo_id=None, ativo=True)
+        MovimentacoesEstoque.objects.create(
+            produto=negativo, data_movimentacao=timezone.make_aware(datetime(2024, 1, 12)),
+            quantidade=Decimal('4'), tipo_movimentacao=self.tipo_saida, documento_referencia='DOC2',
+        )
+        EstoqueSnapshotService.atualizar_snapshots()
+        SaldoEstoqueService.atualizar()
+        produtos = [self.produto.id, sem_movimento.id, negativo.id]
+
+        hoje = SaldoEstoqueService.quantidades_na_data(date.today(), produtos)
+        ontem = SaldoEstoqueService.quantidades_na_data(date.today() - timedelta(days=1), produtos)
+
+        self.assertEqual({pid: ontem.get(pid, Decimal('0')) for pid in produtos}, {
+            self.produto.id: Decimal('12'), sem_movimento.id: Decimal('0'), negativo.id: Decimal('0'),
+        })
+        self.assertEqual({pid: hoje.get(pid, Decimal('0')) for pid in produtos},
+                         {pid: ontem.get(pid, Decimal('0')) for pid in produtos})
+
+    def test_backdated_edit_refreshes_snapshots(self):
+        """Test that editing a movement already covered by the snapshots is reflected in past dates"""
+        EstoqueSnapshotService.atualizar_snapshots()
+        ontem = date.today() - timedelta(days=1)
+
+        saida = MovimentacoesEstoque.objects.get(produto=self.produto, tipo_movimentacao=self.tipo_saida)
+        saida.quantidade = Decimal('8')
+        saida.save()
+        self.assertEqual(SaldoEstoqueService.quantidades_na_data(ontem, [self.produto.id]), {self.produto.id: Decimal('7')})
+
+        saida.delete()
+        self.assertEqual(SaldoEstoqueService.quantidades_na_data(ontem, [self.produto.id]), {self.produto.id: Decimal('15')})
+
+    def test_edits_refresh_the_view_once_off_the_request(self):
+        """Test that movement edits schedule a single delayed refresh after commit"""
+        def pendentes():
+            return [funcao for _, funcao, _ in connection.run_on_commit if funcao is saldo_estoque.agendar_refresh]
+
+        self.addCleanup(setattr, saldo_estoque, '_agendado', False)
+        # setUp já editou movimentações nesta transação (a do TestCase)
+        self.assertEqual(len(pendentes()), 1)
+        with mock.patch.object(saldo_estoque.threading, 'Timer') as timer, \
+                mock.patch.object(SaldoEstoqueService, 'atualizar') as atualizar:
+            self.movimentar(date(2024, 2, 1), 2, self.tipo_entrada)
+            MovimentacoesEstoque.objects.filter(produto=self.produto).first().delete()
+            self.assertEqual(len(pendentes()), 1)
+
+            # Commits de outras transações antes do refresh reaproveitam o agendado
+            pendentes()[0]()
+            saldo_estoque.agendar_refresh()
+            timer.assert_called_once_with(saldo_estoque.INTERVALO_ATUALIZACAO, saldo_estoque.atualizar_saldos)
+            self.assertFalse(atualizar.called)
+
+            saldo_estoque.atualizar_saldos()
+            atualizar.assert_called_once_with()
+            saldo_estoque.agendar_refresh()
+            self.assertEqual(timer.call_count, 2)
+
+    def test_refresh_bumps_the_view_version(self):
+        """Test that refreshing the materialized view invalidates the cached stock reports"""
+        with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                mock.patch.object(connection, 'cursor') as cursor, \
+                mock.patch.object(CacheRelatoriosService, 'incrementar') as incrementar:
+            self.assertTrue(SaldoEstoqueService.atualizar())
+        cursor.return_value.__enter__.return_value.execute.assert_called_once_with(
+            'REFRESH MATERIALIZED VIEW CONCURRENTLY view_saldos_estoque_rapido'
+        )
+        incrementar.assert_called_once_with('view_saldos_estoque_rapido')
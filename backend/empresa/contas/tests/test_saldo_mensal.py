@@ -0,0 +1,72 @@
+"""
+Unit tests for the monthly balance checkpoints
+
+Tests that SaldoMensalService builds persisted checkpoints that match a
+plain sum of the earlier entries, that the opening balance needs a constant
+number of queries once they exist, and that changing an earlier entry
+invalidates the later checkpoints.
+"""
+
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+
+from ..models.fluxo_caixa import ConfiguracaoFluxoCaixa, FluxoCaixaLancamento, SaldoMensalFluxoCaixa
+from ..services.saldo_mensal_service import SaldoMensalService
+from ..views.fluxo_caixa2 import FluxoCaixaViewSet
+
+
+class SaldoMensalServiceTest(TestCase):
+    """Test cases for SaldoMensalService"""
+
+    def setUp(self):
+        """Set up test data"""
+        ConfiguracaoFluxoCaixa.objects.create(
+            saldo_inicial=Decimal('1000.00'), data_inicial_controle=date(2023, 6, 1)
+        )
+        self.antigo = self._create_lancamento(date(2023, 1, 15), 'entrada', '500.00', True)
+        self._create_lancamento(date(2023, 2, 10), 'saida', '80.00', False)  # previsto antes do controle
+        self._create_lancamento(date(2023, 9, 5), 'saida', '200.00', True)
+        self._create_lancamento(date(2024, 2, 20), 'entrada', '40.00', False)
+        self._create_lancamento(date(2024, 3, 3), 'entrada', '10.00', True)
+
+    def _create_lancamento(self, data, tipo, valor, realizado):
+        """Helper method to create a cash flow entry"""
+        return FluxoCaixaLancamento.objects.create(
+            data=data, tipo=tipo, valor=Decimal(valor), realizado=realizado, descricao='Teste',
+            categoria='vendas', fonte_tipo='contrato'
+        )
+
+    def test_opening_balance_matches_entries(self):
+        """Test that the opening balance uses the checkpoints and the controle date rules"""
+        saldo = FluxoCaixaViewSet()._obter_saldo_inicial(date(2024, 3, 10))
+        # 1000 + 500 - 200 + 10 (realizados) + 40 (previsto após o controle)
+        self.assertEqual(saldo, Decimal('1350.00'))
+
+        movimento = SaldoMensalService.movimento_ate(date(2024, 3, 10))
+        self.assertEqual(movimento['movimento_realizado'], Decimal('310.00'))
+        self.assertEqual(movimento['movimento_previsto'], Decimal('-40.00'))
+        # Pontos gravados do primeiro mês com lançamentos em diante
+        self.assertEqual(SaldoMensalFluxoCaixa.objects.filter(mes__gte=date(2023, 2, 1)).count(), 14)
+
+    def test_constant_queries_with_checkpoints(self):
+        """Test that an opening balance costs two queries once the checkpoint exists"""
+        SaldoMensalService.movimento_ate(date(2024, 3, 10))
+        with self.assertNumQueries(2):
+            SaldoMensalService.movimento_ate(date(2024, 3, 20))
+
+    def test_earlier_change_invalidates_later_checkpoints(self):
+        """Test that editing an older entry drops the later checkpoints and refreshes the sum"""
+        SaldoMensalService.movimento_ate(date(2024, 3, 10))
+
+        self.antigo.valor = Decimal('700.00')
+        self.antigo.save()
+        self.assertFalse(SaldoMensalFluxoCaixa.objects.filter(mes__gt=date(2023, 1, 15)).exists())
+
+        movimento = SaldoMensalService.movimento_ate(date(2024, 3, 10))
+        self.assertEqual(movimento['movimento_realizado'], Decimal('510.00'))
+
+        # Moving an entry to a later date also invalidates from the old date
+        self.antigo.data = date(2024, 1, 10)
+        self.antigo.save()
+        self.assertFalse(SaldoMensalFluxoCaixa.objects.filter(mes__gt=date(2023, 1, 15)).exists())
@@ -0,0 +1,83 @@
+"""
+Unit tests for the diff-based contas to fluxo de caixa sync
+
+Tests that SincronizacaoFluxoService inserts one lançamento per conta, that
+syncing an unchanged period issues no writes, and that changed or moved
+contas are updated in place or removed.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models.access import Clientes, ContasPagar, ContasReceber, Fornecedores
+from ..models.fluxo_caixa import FluxoCaixaLancamento
+from ..services.sincronizacao_fluxo_service import SincronizacaoFluxoService
+
+
+class SincronizacaoFluxoServiceTest(TestCase):
+    """Test cases for SincronizacaoFluxoService.sincronizar_contas"""
+
+    INICIO = date(2024, 3, 1)
+    FIM = date(2024, 3, 31)
+
+    def setUp(self):
+        """Set up test data"""
+        fornecedor = Fornecedores.objects.create(nome='Papelaria Central')
+        cliente = Clientes.objects.create(nome='Cliente Teste')
+        self.pagar = ContasPagar.objects.create(
+            fornecedor=fornecedor, valor=Decimal('80.00'), status='A', historico='Resmas',
+            vencimento=timezone.make_aware(datetime(2024, 3, 10))
+        )
+        self.receber = ContasReceber.objects.create(
+            cliente=cliente, valor=Decimal('150.00'), status='A',
+            vencimento=timezone.make_aware(datetime(2024, 3, 20))
+        )
+
+    def _lancamento(self, conta, fonte_tipo):
+        return FluxoCaixaLancamento.objects.get(fonte_tipo=fonte_tipo, fonte_id=conta.id)
+
+    def test_unchanged_period_issues_no_writes(self):
+        """Test that the first sync inserts the contas and a repeat sync only reads"""
+        resultado = SincronizacaoFluxoService.sincronizar_contas(self.INICIO, self.FIM)
+        self.assertEqual(resultado['inseridos'], 2)
+        self.assertEqual(self._lancamento(self.receber, 'contas_receber').tipo, 'entrada')
+
+        with CaptureQueriesContext(connection) as contexto:
+            resultado = SincronizacaoFluxoService.sincronizar_contas(self.INICIO, self.FIM)
+        self.assertEqual(resultado, {'inseridos': 0, 'atualizados': 0, 'removidos': 0, 'inalterados': 2})
+        escritas = [q['sql'] for q in contexto.captured_queries
+                    if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+        self.assertEqual(escritas, [])
+
+    def test_changed_conta_is_updated_in_place(self):
+        """Test that a paid conta keeps its lançamento id and gets the new values"""
+        SincronizacaoFluxoService.sincronizar_contas(self.INICIO, self.FIM)
+        lancamento_id = self._lancamento(self.pagar, 'contas_pagar').id
+
+        ContasPagar.objects.filter(id=self.pagar.id).update(
+            status='P', valor_total_pago=Decimal('82.00'),
+            data_pagamento=timezone.make_aware(datetime(2024, 3, 12))
+        )
+        resultado = SincronizacaoFluxoService.sincronizar_contas(self.INICIO, self.FIM)
+        self.assertEqual(resultado['atualizados'], 1)
+
+        lancamento = self._lancamento(self.pagar, 'contas_pagar')
+        self.assertEqual(lancamento.id, lancamento_id)
+        self.assertEqual(lancamento.valor, Decimal('82.00'))
+        self.assertEqual(lancamento.data, date(2024, 3, 12))
+        self.assertTrue(lancamento.realizado)
+
+    def test_conta_moved_out_of_period_is_removed(self):
+        """Test that a lançamento whose conta no longer falls in the period is deleted"""
+        SincronizacaoFluxoService.sincronizar_contas(self.INICIO, self.FIM)
+        ContasReceber.objects.filter(id=self.receber.id).update(
+            vencimento=timezone.make_aware(datetime(2024, 5, 20))
+        )
+
+        resultado = SincronizacaoFluxoService.sincronizar_contas(self.INICIO, self.FIM)
+        self.assertEqual(resultado['removidos'], 1)
+        self.assertFalse(FluxoCaixaLancamento.objects.filter(fonte_tipo='contas_receber').exists())
@@ -0,0 +1,125 @@
+"""
+Unit tests for the retroactive StockCalculationService
+
+Tests the calculation that starts from produtos.estoque_atual and walks back
+over the movements recorded after the target date, and the stock timeline,
+which follows the SaldoEstoqueService rule instead.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models.access import Produtos, MovimentacoesEstoque, TiposMovimentacaoEstoque
+from ..services.estoque_snapshot_service import EstoqueSnapshotService
+from ..services.saldo_estoque_service import SaldoEstoqueService
+from ..services.stock_calculation_service import StockCalculationService
+
+
+class RetroactiveStockCalculationServiceTest(TestCase):
+    """Test cases for the retroactive StockCalculationService"""
+
+    def setUp(self):
+        """Set up test data"""
+        # IDs are fixed by the service: 1 = Entrada, 2 = Saída, 3 = Estoque Inicial
+        self.tipo_entrada = TiposMovimentacaoEstoque.objects.create(
+            id=1, codigo='ENT', descricao='Entrada de Estoque', tipo='E', ativo=True
+        )
+        self.tipo_saida = TiposMovimentacaoEstoque.objects.create(
+            id=2, codigo='SAI', descricao='Saída de Estoque', tipo='S', ativo=True
+        )
+
+        self.produto = Produtos.objects.create(
+            codigo='RET001', nome='Produto Retroativo', estoque_atual=100, grupo_id=1, ativo=True
+        )
+        self.outro_produto = Produtos.objects.create(
+            codigo='RET002', nome='Produto Sem Movimento', estoque_atual=7, grupo_id=2, ativo=True
+        )
+
+        self.target_date = date(2024, 3, 31)
+
+    def _create_movement(self, produto, data_movimentacao, quantidade, tipo, documento='DOC001'):
+        """Helper method to create stock movements"""
+        return MovimentacoesEstoque.objects.create(
+            produto=produto,
+            data_movimentacao=timezone.make_aware(datetime.combine(data_movimentacao, datetime.min.time())),
+            quantidade=Decimal(str(quantidade)),
+            tipo_movimentacao=tipo,
+            documento_referencia=documento
+        )
+
+    def test_bulk_matches_single_product_calculation(self):
+        """Test that the bulk calculation matches calculate_stock_at_date"""
+        self._create_movement(self.produto, date(2024, 3, 1), 10, self.tipo_entrada)  # before target
+        self._create_movement(self.produto, date(2024, 4, 10), 30, self.tipo_entrada)
+        self._create_movement(self.produto, date(2024, 4, 15), 12, self.tipo_saida)
+        self._create_movement(self.produto, date(2024, 5, 1), 500, self.tipo_entrada, '000000')  # reset ignored
+        self._create_movement(self.produto, date(2024, 5, 2), 4, self.tipo_saida, None)
+
+        result = StockCalculationService.calculate_stock_at_date_bulk(
+            self.target_date, produto_ids=[self.produto.id, self.outro_produto.id]
+        )
+
+        # 100 - 30 (later entrada) + 12 + 4 (later saídas) = 86
+        self.assertEqual(result[self.produto.id], Decimal('86'))
+        self.assertEqual(result[self.outro_produto.id], Decimal('7'))
+        for produto_id, quantidade in result.items():
+            self.assertEqual(
+                quantidade,
+                StockCalculationService.calculate_stock_at_date(produto_id, self.target_date)
+            )
+
+    def test_bulk_by_group(self):
+        """Test restricting the bulk calculation to a product group"""
+        result = StockCalculationService.calculate_stock_at_date_bulk(self.target_date, grupo_id=2)
+        self.assertEqual(result, {self.outro_produto.id: Decimal('7')})
+
+    def test_bulk_single_query(self):
+        """Test that a page of products is resolved with one query"""
+        for produto in (self.produto, self.outro_produto):
+            self._create_movement(produto, date(2024, 4, 1), 1, self.tipo_saida)
+
+        with self.assertNumQueries(1):
+            StockCalculationService.calculate_stock_at_date_bulk(
+                self.target_date, produto_ids=[self.produto.id, self.outro_produto.id]
+            )
+
+    def test_timeline_follows_the_stock_balance_rule(self):
+        """Test that the timeline matches SaldoEstoqueService (snapshots and resets) at every point"""
+        self._create_movement(self.produto, date(2024, 3, 1), 100, self.tipo_entrada, '000000')
+        self._create_movement(self.produto, date(2024, 4, 3), 30, self.tipo_entrada)
+        self._create_movement(self.produto, date(2024, 4, 3), 5, self.tipo_saida)
+        self._create_movement(self.produto, date(2024, 4, 20), 12, self.tipo_saida)
+        self._create_movement(self.produto, date(2024, 5, 2), 50, self.tipo_entrada, '000000')
+        self._create_movement(self.outro_produto, date(2024, 4, 10), 3, self.tipo_entrada)
+        EstoqueSnapshotService.atualizar_snapshots(ate=date(2024, 4, 10))
+
+        datas = StockCalculationService.timeline_dates(date(2024, 4, 1), date(2024, 5, 5)) + [date.today()]
+        # Posição inicial (3), movimentações entre as datas (1) e view para hoje (1), qualquer que seja o número de datas
+        with self.assertNumQueries(5):
+            timeline = StockCalculationService.calculate_stock_timeline(
+                [self.produto.id, self.outro_produto.id], datas
+            )
+
+        self.assertEqual(timeline[self.produto.id][date(2024, 4, 25)], Decimal('113'))
+        self.assertEqual(timeline[self.produto.id][date(2024, 5, 2)], Decimal('50'))
+        for produto_id in (self.produto.id, self.outro_produto.id):
+            for data_ponto in datas:
+                self.assertEqual(
+                    timeline[produto_id][data_ponto],
+                    SaldoEstoqueService.quantidades_na_data(data_ponto, [produto_id]).get(produto_id, Decimal('0'))
+                )
+
+    def test_timeline_dates_monthly_uses_calendar_months(self):
+        """Test that monthly points follow calendar months, clamped to the month end"""
+        datas = StockCalculationService.timeline_dates(date(2024, 1, 31), date(2024, 5, 31), 'monthly')
+        self.assertEqual(datas, [
+            date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30), date(2024, 5, 31)
+        ])
+
+    def test_timeline_dates_respects_max_points(self):
+        """Test that the number of timeline points is capped"""
+        datas = StockCalculationService.timeline_dates(date(2024, 1, 1), date(2024, 12, 31), 'weekly', 10)
+        self.assertEqual(len(datas), 10)
+        self.assertEqual(datas[1], date(2024, 1, 8))
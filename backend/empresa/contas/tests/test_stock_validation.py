@@ -244,7 +244,7 @@ class StockValidationServiceTest(TestCase):
         # Should detect zero calculated stock
         self.assertEqual(report['analysis']['products_with_zero_calculated'], 1)
     
-    @patch.object(StockCalculationService, 'calculate_current_stock')
+    @patch.object(StockCalculationService, 'calculate_current_stock_bulk')
     def test_validation_handles_calculation_errors(self, mock_calculate):
         """Test that validation handles calculation errors gracefully"""
         # Mock calculation to raise an error
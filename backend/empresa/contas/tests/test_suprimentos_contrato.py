@@ -0,0 +1,92 @@
+"""
+Unit tests for SuprimentosContratoService
+
+Tests that the acquisition cost of each remessa uses the last entry up to
+the nota date, that notas of a client with several contracts are counted
+once, and that the report runs a fixed number of queries.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models.access import (
+    Clientes, ContratosLocacao, Fornecedores, ItensNfEntrada, ItensNfSaida, NotasFiscaisEntrada,
+    NotasFiscaisSaida, Produtos,
+)
+from ..services.suprimentos_contrato_service import SuprimentosContratoService
+
+
+def momento(ano, mes, dia):
+    return timezone.make_aware(datetime(ano, mes, dia, 10))
+
+
+class SuprimentosContratoServiceTest(TestCase):
+    """Test cases for SuprimentosContratoService"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.fornecedor = Fornecedores.objects.create(nome='Distribuidora')
+        self.toner = Produtos.objects.create(codigo='T1', nome='Toner', ativo=True)
+        self.cliente = Clientes.objects.create(nome='Escritório Alfa')
+        self.contrato = ContratosLocacao.objects.create(
+            cliente=self.cliente, contrato='C1', inicio=date(2024, 1, 1), fim=None, valorpacela=Decimal('300.00'),
+        )
+        for dia, valor in ((1, '10.00'), (15, '12.00')):
+            nota = NotasFiscaisEntrada.objects.create(
+                numero_nota=f'E{dia}', fornecedor=self.fornecedor,
+                data_emissao=momento(2024, 3, dia), data_entrada=momento(2024, 3, dia),
+            )
+            ItensNfEntrada.objects.create(
+                nota_fiscal=nota, produto=self.toner, quantidade=Decimal('10'), valor_unitario=Decimal(valor),
+            )
+
+    def remessa(self, cliente, dia, quantidade):
+        nota = NotasFiscaisSaida.objects.create(
+            numero_nota=f'S{dia}', data=momento(2024, 3, dia), cliente=cliente,
+            operacao='SIMPLES REMESSA', valor_total_nota=Decimal('50.00'),
+        )
+        ItensNfSaida.objects.create(nota_fiscal=nota, produto=self.toner, quantidade=Decimal(quantidade))
+        return nota
+
+    def test_cost_uses_last_entry_until_nota_date(self):
+        """Test that each remessa is costed with the entry in force on its date"""
+        antes = self.remessa(self.cliente, 10, 2)
+        depois = self.remessa(self.cliente, 20, 3)
+
+        custos = SuprimentosContratoService.custo_por_nota(NotasFiscaisSaida.objects.all())
+
+        self.assertEqual(custos[antes.id], Decimal('20.00'))
+        self.assertEqual(custos[depois.id], Decimal('36.00'))
+
+    def test_client_with_two_contracts_counts_notas_once(self):
+        """Test that notas go to the client's first contract and the total counts them once"""
+        ContratosLocacao.objects.create(
+            cliente=self.cliente, contrato='C2', inicio=date(2024, 2, 1), fim=date(2024, 12, 31),
+            valorpacela=Decimal('150.00'),
+        )
+        self.remessa(self.cliente, 10, 2)
+
+        relatorio = SuprimentosContratoService.relatorio(date(2024, 3, 1), date(2024, 3, 30))
+
+        primeiro, segundo = relatorio['resultados']
+        self.assertEqual(primeiro['suprimentos']['quantidade_notas'], 1)
+        self.assertEqual(segundo['suprimentos']['quantidade_notas'], 0)
+        self.assertEqual(relatorio['resumo']['total_notas'], 1)
+        self.assertEqual(relatorio['resumo_financeiro']['custo_total_suprimentos'], 20.0)
+        # 30 dias vigentes: uma parcela inteira de cada contrato
+        self.assertEqual(relatorio['resumo_financeiro']['faturamento_total_proporcional'], 450.0)
+
+    def test_query_count_does_not_grow_with_contracts(self):
+        """Test that the report runs three queries regardless of contracts and notas"""
+        for numero in range(5):
+            cliente = Clientes.objects.create(nome=f'Cliente {numero}')
+            ContratosLocacao.objects.create(cliente=cliente, contrato=f'X{numero}', inicio=date(2024, 1, 1))
+            self.remessa(cliente, 10 + numero, 1)
+
+        with self.assertNumQueries(3):
+            relatorio = SuprimentosContratoService.relatorio(date(2024, 3, 1), date(2024, 3, 31))
+        self.assertEqual(relatorio['resumo']['total_contratos_vigentes'], 6)
+        self.assertEqual(relatorio['resumo']['contratos_com_atividade'], 5)
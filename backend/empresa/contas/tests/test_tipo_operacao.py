@@ -0,0 +1,53 @@
+"""
+Unit tests for TipoOperacaoService
+
+Tests the precedence of the operation rules for each kind of nota, that
+saving a nota stores its tipo_operacao, and that the bulk classification
+fixes notas written without going through save().
+"""
+
+from django.test import TestCase
+
+from ..models.access import NotasFiscaisEntrada, NotasFiscaisSaida
+from ..services.tipo_operacao_service import (
+    COMPRA, LOCACAO, OUTROS, SIMPLES_REMESSA, VENDA, TipoOperacaoService,
+)
+
+
+class TipoOperacaoServiceTest(TestCase):
+    """Test cases for TipoOperacaoService"""
+
+    def test_rules_follow_report_precedence(self):
+        """Test that sales win on NF saída and purchases win on NF entrada"""
+        classificar = TipoOperacaoService.classificar_operacao
+
+        self.assertEqual(classificar(NotasFiscaisSaida, 'Venda de mercadoria'), VENDA)
+        self.assertEqual(classificar(NotasFiscaisSaida, 'SIMPLES REMESSA'), SIMPLES_REMESSA)
+        self.assertEqual(classificar(NotasFiscaisSaida, 'LOCAÇÃO DE EQUIPAMENTO'), LOCACAO)
+        self.assertEqual(classificar(NotasFiscaisEntrada, 'COMPRA P/ REVENDA'), COMPRA)
+        self.assertEqual(classificar(NotasFiscaisSaida, None), OUTROS)
+
+    def test_save_stores_tipo_operacao(self):
+        """Test that the pre_save signal classifies the nota"""
+        nota = NotasFiscaisSaida.objects.create(numero_nota='1', operacao='VENDA')
+        self.assertEqual(nota.tipo_operacao, VENDA)
+
+        nota.operacao = 'SIMPLES REMESSA'
+        nota.save()
+        nota.refresh_from_db()
+        self.assertEqual(nota.tipo_operacao, SIMPLES_REMESSA)
+
+    def test_bulk_classification_updates_only_stale_notas(self):
+        """Test that classificar matches the Python rules and skips notas already right"""
+        NotasFiscaisSaida.objects.create(numero_nota='1', operacao='VENDA')
+        NotasFiscaisSaida.objects.create(numero_nota='2', operacao='OUTRA')
+        entrada = NotasFiscaisEntrada.objects.create(numero_nota='3', operacao='compra p/ revenda')
+        # Carga em lote: operação alterada sem passar pelo save
+        NotasFiscaisSaida.objects.filter(numero_nota='2').update(operacao='simples remessa')
+        NotasFiscaisEntrada.objects.filter(id=entrada.id).update(tipo_operacao=OUTROS)
+
+        atualizadas = TipoOperacaoService.classificar()
+
+        self.assertEqual(atualizadas, {'notas_fiscais_saida': 1, 'notas_fiscais_entrada': 1})
+        self.assertEqual(NotasFiscaisSaida.objects.get(numero_nota='2').tipo_operacao, SIMPLES_REMESSA)
+        self.assertEqual(NotasFiscaisEntrada.objects.get(id=entrada.id).tipo_operacao, COMPRA)
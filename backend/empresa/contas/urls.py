@@ -12,6 +12,7 @@ from .views.dre_views import DREView
 from .views.access import *
 from .views.access import suprimentos_por_contrato
 from .views.comparativo_estoque import ComparativoEstoqueView
+from .views.perfil_views import perfil_endpoints
 
 router = DefaultRouter()
 router.register(r'categorias', CategoriasViewSet)
@@ -76,6 +77,7 @@ urlpatterns = [
     # DRE - Demonstrativo de Resultados
     path('dre/', DREView.as_view(), name='dre'),
     path('estoque-comparativo/', ComparativoEstoqueView.as_view(), name='estoque-comparativo'),
+    path('perfil-endpoints/', perfil_endpoints, name='perfil-endpoints'),
     
     path('', include(router.urls)),
 ]
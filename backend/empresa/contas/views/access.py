@@ -2,7 +2,8 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Sum, Q, Count, Case, When, F, DecimalField, Min, Max
+from django.utils import timezone
+from django.db.models import Sum, Q, Count, Min, Max
 from django.db.models.functions import Coalesce, TruncMonth
 from decimal import Decimal
 from datetime import date, timedelta, datetime
@@ -12,6 +13,12 @@ import time
 from ..models.access import Categorias, CategoriasProdutos, Clientes, ContagensInventario, ContasPagar, ContasReceber, ContratosLocacao, CustosAdicionaisFrete, Despesas, Empresas, Fornecedores, Fretes, Funcionarios, Grupos, HistoricoRastreamento, Inventarios, ItensContratoLocacao, ItensNfEntrada, ItensNfSaida, LocaisEstoque, Lotes, Marcas, MovimentacoesEstoque, NotasFiscaisEntrada, NotasFiscaisSaida, OcorrenciasFrete, PagamentosFuncionarios, PosicoesEstoque, Produtos, RegioesEntrega, SaldosEstoque, TabelasFrete, TiposMovimentacaoEstoque, Transportadoras
 
 from ..serializers.access import ItemContratoLocacaoSerializer, ProdutoSerializer, CategoriaSerializer, CategoriasProdutosSerializer, ClienteSerializer, ContagensInventarioSerializer, ContasPagarSerializer, ContasReceberSerializer, ContratoLocacaoSerializer, CustosAdicionaisFreteSerializer, DespesasSerializer, EmpresasSerializer, FornecedoresSerializer, FretesSerializer, FuncionariosSerializer, GruposSerializer, HistoricoRastreamentoSerializer, InventariosSerializer, ItensNfEntradaSerializer, ItensNfSaidaSerializer, LocaisEstoqueSerializer, LotesSerializer, MarcasSerializer, MovimentacoesEstoqueSerializer, NotasFiscaisEntradaSerializer, NotasFiscaisSaidaSerializer, OcorrenciasFreteSerializer, PagamentosFuncionariosSerializer, PosicoesEstoqueSerializer, RegioesEntregaSerializer, SaldosEstoqueSerializer, TabelasFreteSerializer, TiposMovimentacaoEstoqueSerializer, TransportadorasSerializer
+from ..services.estoque_snapshot_service import EstoqueSnapshotService
+from ..services.filtro_datas_service import FiltroDatasService
+from ..services.suprimentos_contrato_service import SuprimentosContratoService
+from ..services.baixa_titulos_service import BaixaTitulosService
+from ..services.cache_relatorios_service import MODELOS_ESTOQUE, MODELOS_NOTAS, cache_por_versao
+from ..services.exportacao_service import FORMATO_DATA, FORMATO_MOEDA, Coluna, ExportacaoService, Planilha
 
 class CategoriasViewSet(viewsets.ModelViewSet):
     queryset = Categorias.objects.all()
@@ -31,7 +38,7 @@ class ContagensInventarioViewSet(viewsets.ModelViewSet):
     
 
 class ContasPagarViewSet(viewsets.ModelViewSet):
-    queryset = ContasPagar.objects.all()
+    queryset = ContasPagar.objects.select_related('fornecedor')
     serializer_class = ContasPagarSerializer
 
     def parse_date(self, date_str):
@@ -270,17 +277,13 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            titulos = self.get_queryset().filter(id__in=titulos_ids, status='A')
-            
-            for titulo in titulos:
-                titulo.status = 'P'
-                titulo.data_pagamento = data_pagamento
-                titulo.forma_pagamento = forma_pagamento
-                titulo.valor_pago = valor_pago
-                titulo.save()
+            baixados = BaixaTitulosService.baixar(
+                self.queryset.model, titulos_ids, data_pagamento, forma_pagamento, valor_pago
+            )
+            titulos = self.queryset.filter(id__in=baixados)
                 
             return Response({
-                'message': f'{len(titulos)} títulos baixados com sucesso',
+                'message': f'{len(baixados)} títulos baixados com sucesso',
                 'titulos': self.get_serializer(titulos, many=True).data
             })
         except Exception as e:
@@ -326,10 +329,8 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
                 
-            titulo.status = 'A'
-            titulo.data_pagamento = None
-            titulo.valor_pago = Decimal('0.00')
-            titulo.save()
+            BaixaTitulosService.estornar(self.queryset.model, [titulo.id])
+            titulo.refresh_from_db()
             
             return Response({
                 'message': 'Baixa estornada com sucesso',
@@ -340,6 +341,31 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+    @action(detail=False, methods=['POST'])
+    def estorno_em_lote(self, request):
+        """
+        Estorna a baixa de vários títulos
+        """
+        try:
+            titulos_ids = request.data.get('titulos', [])
+            if not titulos_ids:
+                return Response(
+                    {'error': 'Nenhum título informado'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            estornados = BaixaTitulosService.estornar(self.queryset.model, titulos_ids)
+
+            return Response({
+                'message': f'{len(estornados)} baixas estornadas com sucesso',
+                'titulos': estornados
+            })
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
     @action(detail=False)
     def dashboard_agrupado(self, request):
@@ -383,7 +409,7 @@ class ContasPagarViewSet(viewsets.ModelViewSet):
 
 
 class ContasReceberViewSet(viewsets.ModelViewSet):
-    queryset = ContasReceber.objects.all()
+    queryset = ContasReceber.objects.select_related('cliente')
     serializer_class = ContasReceberSerializer
 
     def parse_date(self, date_str):
@@ -623,17 +649,13 @@ class ContasReceberViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            titulos = self.get_queryset().filter(id__in=titulos_ids, status='A')
-            
-            for titulo in titulos:
-                titulo.status = 'P'
-                titulo.data_pagamento = data_pagamento
-                titulo.forma_pagamento = forma_pagamento
-                titulo.valor_pago = valor_pago
-                titulo.save()
+            baixados = BaixaTitulosService.baixar(
+                self.queryset.model, titulos_ids, data_pagamento, forma_pagamento, valor_pago
+            )
+            titulos = self.queryset.filter(id__in=baixados)
                 
             return Response({
-                'message': f'{len(titulos)} títulos baixados com sucesso',
+                'message': f'{len(baixados)} títulos baixados com sucesso',
                 'titulos': self.get_serializer(titulos, many=True).data
             })
         except Exception as e:
@@ -679,10 +701,8 @@ class ContasReceberViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
                 
-            titulo.status = 'A'
-            titulo.data_pagamento = None
-            titulo.valor_pago = Decimal('0.00')
-            titulo.save()
+            BaixaTitulosService.estornar(self.queryset.model, [titulo.id])
+            titulo.refresh_from_db()
             
             return Response({
                 'message': 'Baixa estornada com sucesso',
@@ -693,6 +713,31 @@ class ContasReceberViewSet(viewsets.ModelViewSet):
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+    @action(detail=False, methods=['POST'])
+    def estorno_em_lote(self, request):
+        """
+        Estorna a baixa de vários títulos
+        """
+        try:
+            titulos_ids = request.data.get('titulos', [])
+            if not titulos_ids:
+                return Response(
+                    {'error': 'Nenhum título informado'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            estornados = BaixaTitulosService.estornar(self.queryset.model, titulos_ids)
+
+            return Response({
+                'message': f'{len(estornados)} baixas estornadas com sucesso',
+                'titulos': estornados
+            })
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
     @action(detail=False)
     def dashboard_agrupado(self, request):
@@ -735,7 +780,7 @@ class ContasReceberViewSet(viewsets.ModelViewSet):
             )
     
 class ContratosLocacaoViewSet(viewsets.ModelViewSet):
-    queryset = ContratosLocacao.objects.all()
+    queryset = ContratosLocacao.objects.select_related('cliente')
     serializer_class = ContratoLocacaoSerializer
 
     @action(detail=False, url_path='dashboard/(?P<contrato_numero>[^/.]+)')
@@ -880,7 +925,7 @@ class InventariosViewSet(viewsets.ModelViewSet):
     serializer_class = InventariosSerializer
     
 class ItensContratoLocacaoViewSet(viewsets.ModelViewSet):
-    queryset = ItensContratoLocacao.objects.all()
+    queryset = ItensContratoLocacao.objects.select_related('categoria')
     serializer_class = ItemContratoLocacaoSerializer
     
 class ItensNfEntradaViewSet(viewsets.ModelViewSet):
@@ -888,7 +933,7 @@ class ItensNfEntradaViewSet(viewsets.ModelViewSet):
     serializer_class = ItensNfEntradaSerializer
     
 class ItensNfSaidaViewSet(viewsets.ModelViewSet):
-    queryset = ItensNfSaida.objects.all()
+    queryset = ItensNfSaida.objects.select_related('produto')
     serializer_class = ItensNfSaidaSerializer
     
 class LocaisEstoqueViewSet(viewsets.ModelViewSet):
@@ -906,6 +951,44 @@ class MarcasViewSet(viewsets.ModelViewSet):
 class MovimentacoesEstoqueViewSet(viewsets.ModelViewSet):
     queryset = MovimentacoesEstoque.objects.all()
     serializer_class = MovimentacoesEstoqueSerializer
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta as movimentações do período em CSV (padrão) ou Excel.
+
+        GET /api/movimentacoes_estoque/exportar/?data_inicial=YYYY-MM-DD&data_final=YYYY-MM-DD&formato=csv|excel
+        """
+        try:
+            movimentacoes = MovimentacoesEstoque.objects.all()
+            data_inicial = request.query_params.get('data_inicial')
+            data_final = request.query_params.get('data_final')
+            if data_inicial:
+                movimentacoes = movimentacoes.filter(
+                    data_movimentacao__gte=timezone.make_aware(datetime.strptime(data_inicial, '%Y-%m-%d'))
+                )
+            if data_final:
+                movimentacoes = movimentacoes.filter(
+                    data_movimentacao__lt=timezone.make_aware(datetime.strptime(data_final, '%Y-%m-%d') + timedelta(days=1))
+                )
+
+            planilha = Planilha(
+                'Movimentações',
+                ['ID', Coluna('Data', FORMATO_DATA), 'Tipo', 'Código', 'Produto',
+                 'Quantidade', Coluna('Custo Unitário', FORMATO_MOEDA), Coluna('Valor Total', FORMATO_MOEDA),
+                 'Documento', 'Observações'],
+                ExportacaoService.linhas(
+                    movimentacoes.order_by('data_movimentacao', 'id'),
+                    'id', 'data_movimentacao', 'tipo_movimentacao__descricao', 'produto__codigo',
+                    'produto__nome', 'quantidade', 'custo_unitario', 'valor_total',
+                    'documento_referencia', 'observacoes'
+                )
+            )
+            return ExportacaoService.resposta(
+                request.query_params.get('formato', 'csv'), 'movimentacoes_estoque', [planilha]
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
 class NotasFiscaisEntradaViewSet(viewsets.ModelViewSet):
     queryset = NotasFiscaisEntrada.objects.all()
@@ -952,13 +1035,8 @@ class TransportadorasViewSet(viewsets.ModelViewSet):
     serializer_class = TransportadorasSerializer
 
 
-# Importações adicionais necessárias para a nova view
-from rest_framework.decorators import api_view
-from django.db.models import Q, Sum, Count, F
-from datetime import datetime
-
-
 @api_view(['GET'])
+@cache_por_versao(ContratosLocacao, ItensContratoLocacao, Clientes, *MODELOS_NOTAS)
 def suprimentos_por_contrato(request):
     """
     Endpoint para buscar suprimentos por contrato considerando a vigência do contrato
@@ -991,249 +1069,7 @@ def suprimentos_por_contrato(request):
                 'error': 'A data inicial não pode ser maior que a data final'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # 1. FILTRAR CONTRATOS VIGENTES NO PERÍODO
-        # Um contrato está vigente no período se:
-        # - Início do contrato <= data_final do período consultado
-        # - Fim do contrato >= data_inicial do período consultado (ou fim = NULL)
-        contratos_vigentes = ContratosLocacao.objects.filter(
-            Q(inicio__lte=data_final) &  # Contrato começou antes ou no final do período
-            (Q(fim__gte=data_inicial) | Q(fim__isnull=True))  # Contrato termina depois do início do período OU está ativo
-        ).select_related('cliente')
-        
-        # Aplicar filtros adicionais se fornecidos
-        if contrato_id:
-            contratos_vigentes = contratos_vigentes.filter(id=contrato_id)
-            
-        if cliente_id:
-            contratos_vigentes = contratos_vigentes.filter(cliente_id=cliente_id)
-        
-        # 2. BUSCAR NOTAS FISCAIS DE SUPRIMENTOS
-        # Query otimizada para detectar apenas "SIMPLES REMESSA"
-        filtro_remessa = Q(operacao__icontains='SIMPLES REMESSA')
-        
-        # Filtrar notas dos clientes com contratos vigentes no período
-        clientes_com_contratos_vigentes = contratos_vigentes.values_list('cliente_id', flat=True).distinct()
-        
-        notas_query = NotasFiscaisSaida.objects.filter(
-            filtro_remessa,
-            data__range=[data_inicial, data_final],
-            cliente_id__in=clientes_com_contratos_vigentes
-        ).select_related('cliente', 'vendedor', 'transportadora')
-        
-        # 2.5. CALCULAR CUSTO TOTAL ÚNICO (sem duplicação por múltiplos contratos)
-        # Isso é importante porque um cliente pode ter múltiplos contratos
-        custo_total_unico = Decimal('0.00')
-        notas_processadas_custos = set()
-        
-        for nota in notas_query:
-            if nota.id not in notas_processadas_custos:
-                notas_processadas_custos.add(nota.id)
-                # Calcular custo de aquisição para esta NF
-                itens_nota = ItensNfSaida.objects.filter(nota_fiscal=nota)
-                for item in itens_nota:
-                    quantidade = item.quantidade or Decimal('0')
-                    ultima_entrada = ItensNfEntrada.objects.filter(
-                        produto_id=item.produto_id,
-                        nota_fiscal__data_entrada__lte=nota.data
-                    ).order_by('-nota_fiscal__data_entrada', '-id').first()
-                    
-                    if ultima_entrada:
-                        custo_unitario = ultima_entrada.valor_unitario or Decimal('0')
-                    else:
-                        custo_unitario = Decimal('0')
-                    
-                    custo_total_unico += quantidade * custo_unitario
-        
-        # 3. PROCESSAR RESULTADOS POR CONTRATO VIGENTE
-        resultados = []
-        total_geral_valor = Decimal('0.00')
-        total_geral_notas = 0
-        total_contratos = 0
-        total_faturamento_periodo = Decimal('0.00')  # Faturamento baseado em valores mensais
-        
-        # Calcular faturamento proporcional ao período
-        def calcular_faturamento_proporcional(data_inicio, data_fim, contrato_inicio, contrato_fim, valor_mensal):
-            """
-            Calcula o faturamento proporcional aos dias do período consultado
-            """
-            # Período efetivo é a interseção entre período consultado e vigência do contrato
-            inicio_efetivo = max(data_inicio, contrato_inicio)
-            fim_efetivo = min(data_fim, contrato_fim) if contrato_fim else data_fim
-            
-            # Calcular dias vigentes no período
-            dias_vigentes = (fim_efetivo - inicio_efetivo).days + 1  # +1 para incluir o último dia
-            
-            # Calcular faturamento proporcional (assumindo mês de 30 dias)
-            faturamento_proporcional = (valor_mensal * dias_vigentes) / 30
-            
-            return {
-                'dias_vigentes': dias_vigentes,
-                'faturamento_proporcional': faturamento_proporcional,
-                'inicio_efetivo': inicio_efetivo,
-                'fim_efetivo': fim_efetivo
-            }
-        
-        # Rastrear NFs já processadas globalmente para evitar duplicação
-        notas_globais_processadas = set()
-        
-        for contrato in contratos_vigentes:
-            # Buscar notas específicas deste contrato no período
-            notas_contrato = notas_query.filter(
-                cliente_id=contrato.cliente.id
-            )
-            
-            # Calcular totais específicos do contrato
-            totais_contrato = notas_contrato.aggregate(
-                total_valor=Sum('valor_total_nota'),
-                quantidade_notas=Count('id')
-            )
-            
-            # Calcular faturamento proporcional do contrato no período
-            valor_mensal = contrato.valorpacela or Decimal('0.00')
-            calculo_proporcional = calcular_faturamento_proporcional(
-                data_inicial, data_final, 
-                contrato.inicio, contrato.fim,
-                valor_mensal
-            )
-            
-            dias_vigentes = calculo_proporcional['dias_vigentes']
-            faturamento_contrato = calculo_proporcional['faturamento_proporcional']
-            inicio_efetivo = calculo_proporcional['inicio_efetivo']
-            fim_efetivo = calculo_proporcional['fim_efetivo']
-            
-            # Incluir contrato nos resultados mesmo sem notas no período (para mostrar contratos vigentes)
-            # mas destacar se teve atividade de suprimentos
-            
-            # Buscar todas as notas ordenadas por data
-            todas_as_notas_contrato = notas_contrato.order_by('-data')
-            
-            notas = []
-            custo_aquisicao_contrato = Decimal('0.00')  # Custo total de aquisição do contrato
-            valor_total_notas_contrato = Decimal('0.00')
-            qtd_notas_contrato = 0
-            
-            for nota in todas_as_notas_contrato:
-                if nota.id in notas_globais_processadas:
-                    continue
-                notas_globais_processadas.add(nota.id)
-                qtd_notas_contrato += 1
-                valor_total_notas_contrato += nota.valor_total_nota or Decimal('0.00')
-
-                # Calcular custo de aquisição dos itens da NF
-                custo_nota = Decimal('0.00')
-                itens_nota = ItensNfSaida.objects.filter(nota_fiscal=nota).select_related('produto')
-                
-                for item in itens_nota:
-                    quantidade = item.quantidade or Decimal('0')
-                    # Buscar última entrada do produto antes da data da nota
-                    ultima_entrada = ItensNfEntrada.objects.filter(
-                        produto_id=item.produto_id,
-                        nota_fiscal__data_entrada__lte=nota.data
-                    ).order_by('-nota_fiscal__data_entrada', '-id').first()
-                    
-                    if ultima_entrada:
-                        custo_unitario = ultima_entrada.valor_unitario or Decimal('0')
-                    else:
-                        custo_unitario = Decimal('0')
-                    
-                    custo_nota += quantidade * custo_unitario
-                
-                custo_aquisicao_contrato += custo_nota
-                
-                notas.append({
-                    'id': nota.id,
-                    'numero_nota': nota.numero_nota,
-                    'data': nota.data.strftime('%Y-%m-%d') if nota.data else None,
-                    'operacao': nota.operacao or '',
-                    'cfop': nota.cfop or '',
-                    'valor_total_nota': float(nota.valor_total_nota or 0),
-                    'custo_aquisicao': float(custo_nota),  # Novo campo: custo de aquisição
-                    'obs': nota.obs[:100] + '...' if nota.obs and len(nota.obs) > 100 else nota.obs or ''
-                })
-            
-            resultado_contrato = {
-                'contrato_id': contrato.id,
-                'contrato_numero': contrato.contrato,
-                'vigencia': {
-                    'inicio': contrato.inicio.strftime('%Y-%m-%d') if contrato.inicio else None,
-                    'fim': contrato.fim.strftime('%Y-%m-%d') if contrato.fim else None,
-                    'ativo_no_periodo': True,  # Já filtrado por vigência
-                    'periodo_efetivo': {
-                        'inicio': inicio_efetivo.strftime('%Y-%m-%d'),
-                        'fim': fim_efetivo.strftime('%Y-%m-%d'),
-                        'dias_vigentes': dias_vigentes
-                    }
-                },
-                'valores_contratuais': {
-                    'valor_mensal': float(contrato.valorpacela or 0),  # Valor da parcela mensal
-                    'valor_total_contrato': float(contrato.valorcontrato or 0),
-                    'numero_parcelas': contrato.numeroparcelas,
-                    'faturamento_proporcional': float(faturamento_contrato),  # Valor proporcional aos dias
-                    'calculo': f"R$ {float(contrato.valorpacela or 0):.2f} × {dias_vigentes} dias ÷ 30 dias"
-                },
-                'cliente': {
-                    'id': contrato.cliente.id,
-                    'nome': contrato.cliente.nome
-                },
-                'suprimentos': {
-                    'total_valor': float(valor_total_notas_contrato),
-                    'custo_aquisicao': float(custo_aquisicao_contrato),
-                    'quantidade_notas': qtd_notas_contrato,
-                    'notas': notas
-                },
-                'analise_financeira': {
-                    'faturamento_proporcional': float(faturamento_contrato),
-                    'custo_suprimentos': float(custo_aquisicao_contrato),  # Usar custo de aquisição
-                    'margem_bruta': float(faturamento_contrato - custo_aquisicao_contrato),
-                    'percentual_margem': float(
-                        ((faturamento_contrato - custo_aquisicao_contrato) / faturamento_contrato * 100) 
-                        if faturamento_contrato > 0 else 0
-                    ),
-                    'observacao': f"Faturamento proporcional a {dias_vigentes} dias do período"
-                }
-            }
-            
-            resultados.append(resultado_contrato)
-            total_contratos += 1
-            total_faturamento_periodo += faturamento_contrato
-            
-            # Somar totais gerais usando custo de aquisição
-            if qtd_notas_contrato > 0:
-                total_geral_valor += custo_aquisicao_contrato  # Usar custo de aquisição
-                total_geral_notas += qtd_notas_contrato
-        
-        # 4. RESPOSTA FINAL COM INFORMAÇÕES DE VIGÊNCIA E FATURAMENTO
-        response_data = {
-            'periodo': {
-                'data_inicial': data_inicial.strftime('%Y-%m-%d'),
-                'data_final': data_final.strftime('%Y-%m-%d')
-            },
-            'filtros_aplicados': {
-                'vigencia_considerada': True,
-                'contrato_id': contrato_id,
-                'cliente_id': cliente_id,
-                'observacao': 'Apenas contratos vigentes no período são incluídos'
-            },
-            'resumo': {
-                'total_contratos_vigentes': total_contratos,
-                'total_suprimentos': float(custo_total_unico),  # Usar custo único (sem duplicação)
-                'total_notas': len(notas_processadas_custos),  # Quantidade de NFs únicas
-                'contratos_com_atividade': len([r for r in resultados if r['suprimentos']['quantidade_notas'] > 0])
-            },
-            'resumo_financeiro': {
-                'faturamento_total_proporcional': float(total_faturamento_periodo),
-                'custo_total_suprimentos': float(custo_total_unico),  # Usar custo único (sem duplicação)
-                'margem_bruta_total': float(total_faturamento_periodo - custo_total_unico),
-                'percentual_margem_total': float(
-                    ((total_faturamento_periodo - custo_total_unico) / total_faturamento_periodo * 100) 
-                    if total_faturamento_periodo > 0 else 0
-                ),
-                'metodo_calculo': 'proporcional',
-                'observacao': 'Faturamento calculado proporcionalmente aos dias vigentes no período (base: 30 dias/mês)'
-            },
-            'resultados': resultados
-        }
-        
+        response_data = SuprimentosContratoService.relatorio(data_inicial, data_final, contrato_id, cliente_id)
         return Response(response_data, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -1375,7 +1211,7 @@ def contas_por_data_vencimento(request):
         # 3. Filtrar Contas a Pagar
         if tipo_filtro in ['pagar', 'ambos']:
             contas_pagar_qs = ContasPagar.objects.filter(
-                vencimento__date__range=[data_inicio, data_fim]
+                FiltroDatasService.entre('vencimento', data_inicio, data_fim)
             ).select_related('fornecedor')
             
             if status_filtro != 'TODOS':
@@ -1383,7 +1219,7 @@ def contas_por_data_vencimento(request):
             
             # Separar contas vencidas
             contas_pagar_vencidas = contas_pagar_qs.filter(
-                vencimento__date__lt=hoje,
+                FiltroDatasService.antes('vencimento', hoje),
                 status='A'  # Apenas contas em aberto podem estar vencidas
             )
             
@@ -1406,7 +1242,7 @@ def contas_por_data_vencimento(request):
         # 4. Filtrar Contas a Receber
         if tipo_filtro in ['receber', 'ambos']:
             contas_receber_qs = ContasReceber.objects.filter(
-                vencimento__date__range=[data_inicio, data_fim]
+                FiltroDatasService.entre('vencimento', data_inicio, data_fim)
             ).select_related('cliente')
             
             if status_filtro != 'TODOS':
@@ -1414,7 +1250,7 @@ def contas_por_data_vencimento(request):
             
             # Separar contas vencidas
             contas_receber_vencidas = contas_receber_qs.filter(
-                vencimento__date__lt=hoje,
+                FiltroDatasService.antes('vencimento', hoje),
                 status='A'  # Apenas contas em aberto podem estar vencidas
             )
             
@@ -1521,7 +1357,7 @@ def contas_por_data_pagamento(request):
         # 3. Filtrar Contas a Pagar
         if tipo_filtro in ['pagar', 'ambos']:
             contas_pagar_qs = ContasPagar.objects.filter(
-                data_pagamento__date__range=[data_inicio, data_fim]
+                FiltroDatasService.entre('data_pagamento', data_inicio, data_fim)
             ).select_related('fornecedor')
             
             if status_filtro != 'TODOS':
@@ -1540,7 +1376,7 @@ def contas_por_data_pagamento(request):
         # 4. Filtrar Contas a Receber
         if tipo_filtro in ['receber', 'ambos']:
             contas_receber_qs = ContasReceber.objects.filter(
-                data_pagamento__date__range=[data_inicio, data_fim]
+                FiltroDatasService.entre('data_pagamento', data_inicio, data_fim)
             ).select_related('cliente')
             
             if status_filtro != 'TODOS':
@@ -1572,6 +1408,7 @@ def contas_por_data_pagamento(request):
 
 
 @api_view(['GET'])
+@cache_por_versao(*MODELOS_ESTOQUE)
 def relatorio_valor_estoque(request):
     """
     Calcula o valor total do estoque em uma data específica.
@@ -1581,53 +1418,41 @@ def relatorio_valor_estoque(request):
         data_posicao_str = request.query_params.get('data', date.today().strftime('%Y-%m-%d'))
         data_posicao = datetime.strptime(data_posicao_str, '%Y-%m-%d').date()
 
-        # 2. Calcular saldos de estoque na data
-        saldos = MovimentacoesEstoque.objects.filter(
-            data_movimentacao__date__lte=data_posicao,
-            produto__isnull=False  # Filtrar movimentações sem produto
-        ).values(
-            'produto_id', 
-            'produto__descricao', 
-            'produto__nome',
-            'produto__preco_custo',
-            'produto__grupo_id'
-        ).annotate(
-            saldo_final=Sum(
-                Case(
-                    When(tipo_movimentacao__tipo='E', then=F('quantidade')),
-                    When(tipo_movimentacao__tipo='S', then=-F('quantidade')),
-                    default=0,
-                    output_field=DecimalField()
-                )
-            )
-        ).order_by('produto__nome')
+        # 2. Saldos de estoque na data: snapshot diário mais recente + movimentações posteriores
+        quantidades = EstoqueSnapshotService.quantidades_na_data(data_posicao)
+        produtos_em_estoque = {
+            produto_id: quantidade for produto_id, quantidade in quantidades.items() if quantidade > 0
+        }
+        produtos = Produtos.objects.filter(id__in=list(produtos_em_estoque.keys())).values(
+            'id', 'descricao', 'nome', 'preco_custo', 'grupo_id'
+        ).order_by('nome')
 
         # 3. Calcular o valor total e preparar detalhes
         valor_total_estoque = Decimal('0.00')
         detalhes_produtos = []
         
         # Buscar nomes dos grupos/categorias para otimizar consultas
-        grupos_ids = [saldo['produto__grupo_id'] for saldo in saldos if saldo['produto__grupo_id'] and saldo['saldo_final'] > 0]
+        grupos_ids = [produto['grupo_id'] for produto in produtos if produto['grupo_id']]
         grupos_dict = {grupo.id: grupo.nome for grupo in Grupos.objects.filter(id__in=grupos_ids)} if grupos_ids else {}
 
-        for saldo in saldos:
-            if saldo['saldo_final'] > 0:
-                custo = saldo['produto__preco_custo'] or Decimal('0.00')
-                valor_produto = saldo['saldo_final'] * custo
-                valor_total_estoque += valor_produto
-                
-                # Obter nome da categoria/grupo
-                grupo_id = saldo['produto__grupo_id']
-                categoria_nome = grupos_dict.get(grupo_id, 'Sem categoria') if grupo_id else 'Sem categoria'
-                
-                detalhes_produtos.append({
-                    'produto_id': saldo['produto_id'],
-                    'produto_descricao': saldo['produto__descricao'] or saldo['produto__nome'] or 'Produto sem nome',
-                    'categoria': categoria_nome,
-                    'quantidade_em_estoque': saldo['saldo_final'],
-                    'custo_unitario': custo,
-                    'valor_total_produto': valor_produto
-                })
+        for produto in produtos:
+            quantidade = produtos_em_estoque[produto['id']]
+            custo = produto['preco_custo'] or Decimal('0.00')
+            valor_produto = quantidade * custo
+            valor_total_estoque += valor_produto
+            
+            # Obter nome da categoria/grupo
+            grupo_id = produto['grupo_id']
+            categoria_nome = grupos_dict.get(grupo_id, 'Sem categoria') if grupo_id else 'Sem categoria'
+            
+            detalhes_produtos.append({
+                'produto_id': produto['id'],
+                'produto_descricao': produto['descricao'] or produto['nome'] or 'Produto sem nome',
+                'categoria': categoria_nome,
+                'quantidade_em_estoque': quantidade,
+                'custo_unitario': custo,
+                'valor_total_produto': valor_produto
+            })
 
         # 4. Estruturar a resposta
         response_data = {
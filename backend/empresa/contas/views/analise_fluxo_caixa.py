@@ -9,6 +9,7 @@ from decimal import Decimal
 import time
 
 from ..models.access import ContasPagar, ContasReceber
+from ..services.filtro_datas_service import FiltroDatasService
 
 
 class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
@@ -45,9 +46,8 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
         # === DADOS REALIZADOS ===
         # Contas pagas (realizadas)
         contas_pagas = ContasPagar.objects.filter(
+            FiltroDatasService.entre('data_pagamento', data_inicio, data_fim),
             data_pagamento__isnull=False,
-            data_pagamento__date__gte=data_inicio,
-            data_pagamento__date__lte=data_fim,
             status='P'
         ).aggregate(
             total_pago=Sum('valor_pago'),
@@ -56,9 +56,8 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
 
         # Contas recebidas (realizadas)
         contas_recebidas = ContasReceber.objects.filter(
+            FiltroDatasService.entre('data_pagamento', data_inicio, data_fim),
             data_pagamento__isnull=False,
-            data_pagamento__date__gte=data_inicio,
-            data_pagamento__date__lte=data_fim,
             status='P'
         ).aggregate(
             total_recebido=Sum('recebido'),
@@ -68,8 +67,7 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
         # === DADOS PREVISTOS ===
         # Contas a pagar vencidas no período (mas ainda não pagas)
         contas_previstas_pagar = ContasPagar.objects.filter(
-            vencimento__date__gte=data_inicio,
-            vencimento__date__lte=data_fim,
+            FiltroDatasService.entre('vencimento', data_inicio, data_fim),
             status='A'  # Status aberto
         ).aggregate(
             total_previsto=Sum('valor'),
@@ -78,8 +76,7 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
 
         # Contas a receber vencidas no período (mas ainda não recebidas)
         contas_previstas_receber = ContasReceber.objects.filter(
-            vencimento__date__gte=data_inicio,
-            vencimento__date__lte=data_fim,
+            FiltroDatasService.entre('vencimento', data_inicio, data_fim),
             status='A'  # Status aberto
         ).aggregate(
             total_previsto=Sum('valor'),
@@ -144,7 +141,7 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
 
         # Contas a pagar em atraso
         contas_pagar_atraso = ContasPagar.objects.filter(
-            vencimento__date__lt=data_limite,
+            FiltroDatasService.antes('vencimento', data_limite),
             status='A',
             data_pagamento__isnull=True
         ).values(
@@ -155,7 +152,7 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
 
         # Contas a receber em atraso
         contas_receber_atraso = ContasReceber.objects.filter(
-            vencimento__date__lt=data_limite,
+            FiltroDatasService.antes('vencimento', data_limite),
             status='A',
             data_pagamento__isnull=True
         ).values(
@@ -166,7 +163,7 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
 
         # Calcular totais
         total_pagar_atraso = ContasPagar.objects.filter(
-            vencimento__date__lt=data_limite,
+            FiltroDatasService.antes('vencimento', data_limite),
             status='A',
             data_pagamento__isnull=True
         ).aggregate(
@@ -175,7 +172,7 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
         )
 
         total_receber_atraso = ContasReceber.objects.filter(
-            vencimento__date__lt=data_limite,
+            FiltroDatasService.antes('vencimento', data_limite),
             status='A',
             data_pagamento__isnull=True
         ).aggregate(
@@ -197,8 +194,7 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
             data_max = data_limite - timedelta(days=faixa['min'])
             
             pagar_faixa = ContasPagar.objects.filter(
-                vencimento__date__gte=data_min,
-                vencimento__date__lte=data_max,
+                FiltroDatasService.entre('vencimento', data_min, data_max),
                 status='A',
                 data_pagamento__isnull=True
             ).aggregate(
@@ -207,8 +203,7 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
             )
             
             receber_faixa = ContasReceber.objects.filter(
-                vencimento__date__gte=data_min,
-                vencimento__date__lte=data_max,
+                FiltroDatasService.entre('vencimento', data_min, data_max),
                 status='A',
                 data_pagamento__isnull=True
             ).aggregate(
@@ -260,8 +255,7 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
             
             # Contas a pagar na semana
             pagar_semana = ContasPagar.objects.filter(
-                vencimento__date__gte=inicio_semana,
-                vencimento__date__lte=fim_semana,
+                FiltroDatasService.entre('vencimento', inicio_semana, fim_semana),
                 status='A'
             ).aggregate(
                 total=Sum('valor'),
@@ -270,8 +264,7 @@ class AnaliseFluxoCaixaViewSet(viewsets.ViewSet):
             
             # Contas a receber na semana
             receber_semana = ContasReceber.objects.filter(
-                vencimento__date__gte=inicio_semana,
-                vencimento__date__lte=fim_semana,
+                FiltroDatasService.entre('vencimento', inicio_semana, fim_semana),
                 status='A'
             ).aggregate(
                 total=Sum('valor'),
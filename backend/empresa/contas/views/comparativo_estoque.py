@@ -14,6 +14,7 @@ from ..models.access import (
     TiposMovimentacaoEstoque,
     EstoqueInicial
 )
+from ..services.filtro_datas_service import FiltroDatasService
 from datetime import datetime, date
 
 class ComparativoEstoqueView(APIView):
@@ -126,7 +127,7 @@ class ComparativoEstoqueView(APIView):
 
         # Buscar movimentações
         movs = MovimentacoesEstoque.objects.filter(
-            data_movimentacao__date__range=[data_inicio, data_fim]
+            FiltroDatasService.entre('data_movimentacao', data_inicio, data_fim)
         ).select_related('tipo_movimentacao').values(
             'produto_id', 
             'tipo_movimentacao__tipo', 
@@ -305,7 +306,7 @@ class ComparativoEstoqueView(APIView):
 
         elif tipo == 'fisico_entrada':
             movs = MovimentacoesEstoque.objects.filter(
-                data_movimentacao__date__range=[data_inicio, data_fim],
+                FiltroDatasService.entre('data_movimentacao', data_inicio, data_fim),
                 produto_id=produto_id,
                 tipo_movimentacao__tipo='E'
             ).select_related('tipo_movimentacao').order_by('data_movimentacao')
@@ -324,7 +325,7 @@ class ComparativoEstoqueView(APIView):
 
         elif tipo == 'fisico_saida':
             movs = MovimentacoesEstoque.objects.filter(
-                data_movimentacao__date__range=[data_inicio, data_fim],
+                FiltroDatasService.entre('data_movimentacao', data_inicio, data_fim),
                 produto_id=produto_id,
                 tipo_movimentacao__tipo='S'
             ).select_related('tipo_movimentacao').order_by('data_movimentacao')
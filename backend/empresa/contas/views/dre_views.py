@@ -6,7 +6,7 @@ Endpoint para Demonstrativo de Resultados (DRE) e Saúde Financeira
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Sum, Q
+from django.db.models import DecimalField, Sum, Q, Value
 from datetime import datetime, timedelta, time
 from decimal import Decimal
 
@@ -17,12 +17,17 @@ from ..models.access import (
     NotasFiscaisEntrada,
     NotasFiscaisServico,
     MovimentacoesEstoque,
-    Produtos,
     ContratosLocacao,
-    SaldosEstoque,
     Fornecedores,
     ItensNfSaida,
-    ItensNfEntrada
+)
+from ..services.estoque_snapshot_service import EstoqueSnapshotService
+from ..services.custo_entrada_service import CustoEntradaService
+from ..services.filtro_datas_service import FiltroDatasService
+from ..services.tipo_operacao_service import COMPRA, SIMPLES_REMESSA, VENDA
+from ..services.classificacao_custos_service import TIPO_FIXO, TIPO_VARIAVEL
+from ..services.cache_relatorios_service import (
+    MODELOS_ESTOQUE, MODELOS_FINANCEIRO, MODELOS_NOTAS, cache_por_versao
 )
 
 
@@ -41,125 +46,7 @@ class DREView(APIView):
     # Percentual médio de impostos sobre vendas (Simples Nacional estimado)
     PERCENTUAL_IMPOSTOS = Decimal('0.08')  # 8%
     
-    # Mapeamento de Categorias de Custos
-    # --- Métodos de Categorização Padronizados (Portados de relatorios_views.py) ---
-    
-    def _definir_categoria_fixa(self, nome, tipo_original):
-        """
-        Define categoria para custos fixos baseado em palavras-chave.
-        Mesma lógica de RelatorioCustosFixosView.
-        """
-        nome = str(nome or '').upper()
-        tipo_original = str(tipo_original or '').upper()
-        
-        if 'FOLHA' in nome or 'SALARIO' in nome or 'SALÁRIO' in nome: return 'Pessoal'
-        if 'PROLABORE' in nome or 'PRO-LABORE' in nome: return 'Pró-Labore'
-        if 'INSS' in nome or 'FGTS' in nome or 'DARF' in nome: return 'Impostos'
-        if 'ALUGUEL' in nome: return 'Aluguel'
-        if 'LUZ' in nome or 'ENERGIA' in nome or 'AGUA' in nome or 'ÁGUA' in nome: return 'Utilidades'
-        if 'TELEFONE' in nome or 'INTERNET' in nome: return 'Telecom'
-        if 'CONTADOR' in nome or 'CONTABILIDADE' in nome: return 'Contabilidade'
-        if 'SEGURO' in nome: return 'Seguros'
-        
-        return tipo_original if tipo_original and tipo_original != 'N/A' else 'Outros Fixos'
-
-    def _definir_categoria_variavel(self, nome_fornecedor, historico, especificacao_original):
-        """
-        Define categoria para custos variáveis baseado em palavras-chave e especificação.
-        Mesma lógica de RelatorioCustosVariaveisView.
-        """
-        nome_safe = str(nome_fornecedor) if nome_fornecedor is not None else ''
-        hist_safe = str(historico) if historico is not None else ''
-        texto = (nome_safe + ' ' + hist_safe).upper()
-        
-        # --- Categorias Financeiras ---
-        if 'TARIFA' in texto and ('BANC' in texto or 'BOLETO' in texto or 'PIX' in texto or 'CHEQUE' in texto or 'MANUTENÇ' in texto or 'RELACION' in texto or 'BAIXA' in texto or 'REGISTRO' in texto or 'ALTERAÇ' in texto or 'CONCESS' in texto):
-            return 'Tarifas Bancárias'
-        elif 'JUROS' in texto:
-            return 'Juros'
-        elif 'EMPREST' in texto or 'EMPRÉSTIMO' in texto or 'CONSIGNAD' in texto:
-            return 'Empréstimos'
-        elif 'COMPRA DE TIT' in texto or 'DESCONTO' in texto and 'TARIFA' not in texto:
-            return 'Operações Financeiras'
-        
-        # --- Categorias Operacionais / Logística ---
-        elif 'FRETE' in texto or 'TRANSPORT' in texto:
-            return 'Frete'
-        elif 'COMBUSTIVEL' in texto or 'COMBUSTÍVEL' in texto:
-            return 'Combustível'
-        elif 'ESTACIONAMENTO' in texto:
-            return 'Estacionamento'
-        elif 'MANUTENÇÃ' in texto and 'VEIC' in texto or 'VIA MOTOS' in texto or 'ÓLEO' in texto or 'OLEO' in texto or 'REVISÃO' in texto:
-            return 'Manutenção Veículos'
-        elif 'VIAGEM' in texto or 'PASSAGEM' in texto:
-            return 'Despesas de Viagem'
-        elif 'RASTREAMENTO' in texto:
-            return 'Rastreamento'
-        
-        # --- Categorias de Alimentação ---
-        elif 'REFEIÇÃO' in texto or 'REFEICAO' in texto:
-            return 'Alimentação'
-        elif 'COPA' in texto or 'CAFÉ' in texto or 'CAFE' in texto or 'AGUA' in texto or 'ÁGUA' in texto:
-            return 'Materiais Copa'
-        
-        # --- Categorias de Materiais ---
-        elif 'ASSIST' in texto and 'TECN' in texto or 'ASSIST.TECN' in texto:
-            return 'Materiais Assist. Técnica'
-        elif 'ESCRITORIO' in texto or 'ESCRITÓRIO' in texto:
-            return 'Materiais Escritório'
-        
-        # --- Categorias de Serviços ---
-        elif 'DIARISTA' in texto or 'SERV.TERCEIROS' in texto or 'SERVIÇOS TERCEIROS' in texto:
-            return 'Serviços Terceiros'
-        elif 'CONTADOR' in texto or 'CONTABIL' in texto or 'CONTÁBIL' in texto:
-            return 'Contabilidade'
-        elif 'CERTIFICAÇ' in texto or 'CERTIFICADO DIGITAL' in texto:
-            return 'Certificação Digital'
-        elif 'TREINAMENTO' in texto or 'CURSO' in texto:
-            return 'Treinamento'
-        elif 'MARKETING' in texto or 'IMPULSIONAMENTO' in texto:
-            return 'Marketing'
-        elif 'INTERMAX' in texto or 'SISTEMA' in texto:
-            return 'Software/Sistemas'
-        
-        # --- Categorias de Telecomunicações e Utilidades ---
-        elif 'OI' in nome_safe.upper() and ('CONTA' in texto or 'NIO' in texto) or 'TELEFONE' in texto:
-            return 'Telecomunicações'
-        elif 'COELCE' in texto or 'ENERGIA' in texto or 'LUZ' in texto:
-            return 'Energia Elétrica'
-        
-        # --- Categorias de Impostos e Taxas ---
-        elif 'ICMS' in texto or 'IMPOSTO' in texto:
-            return 'ICMS'
-        elif 'SIMPLES' in texto or 'DARF' in texto:
-            return 'Impostos'
-        elif 'CDL' in texto or 'SINDICATO' in texto:
-            return 'Associações/Sindicatos'
-        
-        # --- Categorias de Pessoal ---
-        elif 'CONFRATERNIZAÇ' in texto or 'ANIVERSÁRIO' in texto:
-            return 'Confraternização'
-        elif 'AJUDA CUSTO' in texto:
-            return 'Ajuda de Custo'
-        
-        # --- Categorias Comerciais ---
-        elif 'COMISSAO' in texto or 'COMISSÃO' in texto or 'REPRESENTANTE' in texto:
-            return 'Comissão'
-        
-        # --- Diversos ---
-        elif 'DIVERSOS' in texto:
-            return 'Diversos'
-        
-        # --- Se já tem especificação original útil, usa ela ---
-        if especificacao_original and especificacao_original.strip() and especificacao_original != 'Sem Especificação':
-            return especificacao_original
-        
-        # --- Fallback: Verificar se o nome do fornecedor parece ser de uma empresa ---
-        if any(term in nome_safe.upper() for term in ['LTDA', 'ME', 'EIRELI', 'EPP', 'S/A', 'S.A.', 'COMERCIO', 'COMÉRCIO', 'DISTRIBUI', 'IMPORTA']):
-            return 'Fornecedor'
-        
-        return 'Outros'
-    
+    @cache_por_versao(*MODELOS_FINANCEIRO, *MODELOS_NOTAS, *MODELOS_ESTOQUE)
     def get(self, request):
         # Parâmetros de data
         data_inicio_str = request.query_params.get('data_inicio')
@@ -238,16 +125,10 @@ class DREView(APIView):
         resultado_liquido = lucro_bruto - despesas_operacionais
         margem_liquida_percent = (resultado_liquido / faturamento_bruto * 100) if faturamento_bruto > 0 else 0
         
-        # Estoques (informativo, aproximado pelo saldo atual)
-        # Idealmente necessitaria de snapshot, aqui pegamos saldo atual como referência
+        # Estoques (informativo): posição real de abertura e fechamento via snapshots diários
         estoque_fim = self._obter_valor_estoque(data_fim_dt)
-        # Estoque inicial aproximado: Final - Compras + CMV (fórmula básica de inventário reverso)
-        # Compras do período
-        compras_periodo = Decimal('0') 
-        estoque_inicio = estoque_fim - compras_periodo + cmv # Aproximação grosseira
-        
-        # Ajuste zero se negativo (pode ocorrer pela aproximação)
-        if estoque_inicio < 0: estoque_inicio = Decimal('0')
+        estoque_inicio = self._obter_valor_estoque(data_inicio_dt - timedelta(days=1))
+        compras_periodo = self._calcular_compras(data_inicio_dt, data_fim_dt)
 
         return {
             'faturamento_bruto': float(faturamento_bruto),
@@ -281,13 +162,24 @@ class DREView(APIView):
             'margem_liquida_percent': float(margem_liquida_percent)
         }
     
+    def _calcular_compras(self, data_inicio, data_fim):
+        """
+        Compras do período: valor dos produtos das NFs de entrada com
+        tipo_operacao COMPRA, pela data de entrada no estoque.
+        """
+        total = NotasFiscaisEntrada.objects.filter(
+            FiltroDatasService.entre('data_entrada', data_inicio, data_fim),
+            tipo_operacao=COMPRA,
+        ).aggregate(total=Sum('valor_produtos'))['total']
+        return total or Decimal('0')
+
     def _calcular_faturamento(self, data_inicio, data_fim):
         """Calcula faturamento bruto e detalhado."""
         
         # 1.1 Vendas de Mercadorias (NF Saída)
-        # Filtro: apenas operações que contêm "VENDA" (consistente com relatorios_views.py)
+        # Filtro: apenas notas com tipo_operacao VENDA (consistente com relatorios_views.py)
         nfs_vendas = NotasFiscaisSaida.objects.filter(
-            operacao__icontains='VENDA',
+            tipo_operacao=VENDA,
             data__range=[data_inicio, data_fim]
         ).select_related('cliente')
         
@@ -307,8 +199,7 @@ class DREView(APIView):
         contrato_pattern = re.compile(r'C\d+', re.IGNORECASE)
         
         nfs_servico = NotasFiscaisServico.objects.filter(
-            data__date__gte=data_inicio,
-            data__date__lte=data_fim
+            FiltroDatasService.entre('data', data_inicio, data_fim)
         ).select_related('cliente')
         
         faturamento_servicos_contratos = Decimal('0')
@@ -394,6 +285,13 @@ class DREView(APIView):
         lista_contratos = []
         lista_outros = []
         
+        # Custo da última entrada de todos os itens de uma vez (histórico em memória)
+        itens_vendidos = list(itens_vendidos)
+        ultimas_entradas = CustoEntradaService.ultimas_entradas_nf(
+            (item.produto_id, item.nota_fiscal.data) for item in itens_vendidos
+            if item.produto_id and item.nota_fiscal.data
+        )
+        
         for item in itens_vendidos:
             produto_id = item.produto_id
             quantidade = item.quantidade or Decimal('0')
@@ -401,15 +299,15 @@ class DREView(APIView):
             valor_venda_unitario = item.valor_unitario or Decimal('0')
             
             # Classificação do Item
-            operacao = (item.nota_fiscal.operacao or '').upper()
+            tipo_operacao = item.nota_fiscal.tipo_operacao
             cliente_id = item.nota_fiscal.cliente_id
             data_venda = item.nota_fiscal.data
             data_venda_date = data_venda.date() if isinstance(data_venda, datetime) else data_venda
             
             tipo_item = 'OUTROS'
-            if 'VENDA' in operacao:
+            if tipo_operacao == VENDA:
                 tipo_item = 'VENDA'
-            elif 'SIMPLES REMESSA' in operacao:
+            elif tipo_operacao == SIMPLES_REMESSA:
                 # Verificar se existe contrato vigente NA DATA DA VENDA
                 eh_contrato = False
                 if cliente_id in contratos_map:
@@ -422,28 +320,17 @@ class DREView(APIView):
                 if eh_contrato:
                     tipo_item = 'CONTRATO'
             
-            # Calcular Custo Unitário (Sem Cache)
+            # Calcular Custo Unitário (última entrada até a data da venda)
             custo_unit = Decimal('0')
-            try:
-                ultima_entrada = ItensNfEntrada.objects.filter(
-                    produto_id=produto_id,
-                    nota_fiscal__data_entrada__lte=data_venda
-                ).order_by('-nota_fiscal__data_entrada', '-id').first()
-                
-                if ultima_entrada:
-                    if ultima_entrada.valor_total and ultima_entrada.quantidade:
-                            custo_unit = ultima_entrada.valor_total / ultima_entrada.quantidade
-                    elif ultima_entrada.valor_unitario:
-                            custo_unit = ultima_entrada.valor_unitario
-            except:
-                pass
+            ultima_entrada = ultimas_entradas.get((produto_id, data_venda))
+            if ultima_entrada:
+                if ultima_entrada['valor_total'] and ultima_entrada['quantidade']:
+                    custo_unit = ultima_entrada['valor_total'] / ultima_entrada['quantidade']
+                elif ultima_entrada['valor_unitario']:
+                    custo_unit = ultima_entrada['valor_unitario']
             
-            if custo_unit == Decimal('0'):
-                try:
-                    produto = Produtos.objects.get(id=produto_id)
-                    custo_unit = getattr(produto, 'preco_custo', Decimal('0')) or Decimal('0')
-                except:
-                    pass
+            if custo_unit == Decimal('0') and item.produto:
+                custo_unit = getattr(item.produto, 'preco_custo', Decimal('0')) or Decimal('0')
             
             custo_total_item = quantidade * custo_unit
             cmv_total += custo_total_item
@@ -472,7 +359,7 @@ class DREView(APIView):
                 'preco_venda_unitario': float(valor_venda_unitario),
                 'preco_venda_total': float(valor_venda_total),
                 'tipo': tipo_item,
-                'operacao': operacao
+                'operacao': (item.nota_fiscal.operacao or '').upper()
             }
             
             lista_itens.append(item_data)
@@ -491,107 +378,62 @@ class DREView(APIView):
 
     def _obter_valor_estoque(self, data):
         """
-        Obtém o valor total do estoque.
-        Nota: SaldosEstoque é uma tabela de saldo atual, não histórica.
-        Para um DRE preciso, seria necessário snapshots históricos.
-        Usamos o saldo atual como aproximação.
+        Obtém o valor total do estoque ao final da data informada.
+        Usa o snapshot diário de estoque (EstoqueSnapshot) mais próximo somado às
+        movimentações posteriores; custo da última entrada, ou preco_custo do produto.
         """
-        from django.db.models import F
-        
-        # SaldosEstoque tem: quantidade, custo_medio, produto_id
-        # Valor = soma(quantidade * custo_medio)
-        total = SaldosEstoque.objects.aggregate(
-            valor_total=Sum(F('quantidade') * F('custo_medio'))
-        )['valor_total']
-        
-        if total:
-            return Decimal(str(total))
-        
-        # Fallback: calcular direto dos produtos
-        total = Decimal('0')
-        produtos = Produtos.objects.filter(ativo=True)
-        for produto in produtos:
-            qtd = produto.estoque_atual or 0
-            preco = produto.preco_custo or 0
-            total += Decimal(str(qtd)) * Decimal(str(preco))
-        
-        return total
+        if isinstance(data, datetime):
+            data = data.date()
+        return EstoqueSnapshotService.valor_estoque_na_data(data)
     
-    def _calcular_custos(self, data_inicio, data_fim):
-        """Calcula custos fixos e variáveis do período categorizados."""
-        from django.db.models.functions import Coalesce
+    def _calcular_custos(self, data_inicio, data_fim, com_itens=True):
+        """
+        Calcula custos fixos e variáveis do período categorizados.
+
+        A classificação vem de contas_pagar (tipo_custo/categoria_custo, gravada
+        por ClassificacaoCustosService fora da consulta; contas ainda sem
+        classificação ficam de fora); os totais por categoria são um GROUP BY.
+        """
+        from django.db.models.functions import Coalesce, NullIf
         
         contas_pagas = ContasPagar.objects.annotate(
             data_efetiva=Coalesce('data_pagamento', 'vencimento')
         ).filter(
-            data_efetiva__date__range=[data_inicio, data_fim],
-            status='P'
-        ).select_related('fornecedor')
+            FiltroDatasService.entre('data_efetiva', data_inicio, data_fim),
+            status='P',
+            tipo_custo__isnull=False,
+        )
 
+        # Valor pago (ou o original, se não houver pagamento registrado); contas sem valor ficam de fora
+        contas_pagas = contas_pagas.annotate(
+            valor_custo=Coalesce(
+                NullIf('valor_total_pago', Value(Decimal('0'))), 'valor', Value(Decimal('0')),
+                output_field=DecimalField(max_digits=15, decimal_places=2)
+            )
+        ).filter(valor_custo__gt=0)
         
-        # Estruturas para acumular valores
         # { 'Categoria': {'valor': Decimal, 'itens': []} }
-        fixos_map = {}
-        variaveis_map = {}
-        
-        total_fixo = Decimal('0')
-        total_variavel = Decimal('0')
-        
-        # Palavras-chave para identificar custos fixos (mesma lista de RelatorioCustosVariaveisView)
-        KEYWORDS_FIXOS = ['FOLHA', 'PROLABORE', 'PRO-LABORE', 'ALUGUEL', 'SALARIO', 'SALÁRIO', 
-                         'INSS', 'FGTS', 'CONTADOR', 'CONTABILIDADE', 'LUZ', 'ENERGIA', 
-                         'ÁGUA', 'AGUA', 'TELEFONE', 'INTERNET', 'SEGURO']
-        
-        for conta in contas_pagas:
-            valor = Decimal(str(conta.valor_total_pago or conta.valor or 0))
-            if valor <= 0: continue
-            
-            nome_fornecedor = conta.fornecedor.nome if conta.fornecedor and conta.fornecedor.nome else ''
-            tipo_fornecedor_db = conta.fornecedor.tipo if conta.fornecedor else None
-            especificacao_original = conta.fornecedor.especificacao if conta.fornecedor else None
-            historico = conta.historico or ''
-            
-            # --- Lógica de Decisão: Fixo vs Variável ---
-            # Segue a mesma lógica de exclusão/inclusão dos relatórios
-            # 1. Verifica se contém Keywords de Fixos
-            eh_fixo = False
-            texto_busca = nome_fornecedor.upper()
-            
-            # Checa se é fixo baseado nas keywords
-            for keyword in KEYWORDS_FIXOS:
-                if keyword in texto_busca:
-                     eh_fixo = True
-                     break
-            
-            # 2. Definição da Categoria Específica
-            if eh_fixo:
-                categoria = self._definir_categoria_fixa(nome_fornecedor, tipo_fornecedor_db)
-                tipo_custo = 'FIXO'
-            else:
-                categoria = self._definir_categoria_variavel(nome_fornecedor, historico, especificacao_original)
-                tipo_custo = 'VARIAVEL'
-            
-            # Prepara dados do item
-            item_data = {
-                'data': conta.data_efetiva.strftime('%d/%m/%Y') if conta.data_efetiva else '',
-                'descricao': f"{nome_fornecedor} - {historico}"[:60],
-                'valor': float(valor)
-            }
-
-            
-            # Acumula nos mapas
-            if tipo_custo == 'FIXO':
-                total_fixo += valor
-                if categoria not in fixos_map:
-                    fixos_map[categoria] = {'valor': Decimal('0'), 'itens': []}
-                fixos_map[categoria]['valor'] += valor
-                fixos_map[categoria]['itens'].append(item_data)
-            else:
-                total_variavel += valor
-                if categoria not in variaveis_map:
-                    variaveis_map[categoria] = {'valor': Decimal('0'), 'itens': []}
-                variaveis_map[categoria]['valor'] += valor
-                variaveis_map[categoria]['itens'].append(item_data)
+        mapas = {TIPO_FIXO: {}, TIPO_VARIAVEL: {}}
+        totais = {TIPO_FIXO: Decimal('0'), TIPO_VARIAVEL: Decimal('0')}
+        
+        por_categoria = contas_pagas.values('tipo_custo', 'categoria_custo').annotate(
+            valor=Sum('valor_custo')
+        ).order_by()
+        for linha in por_categoria:
+            tipo_custo = linha['tipo_custo']
+            totais[tipo_custo] += linha['valor']
+            mapas[tipo_custo][linha['categoria_custo']] = {'valor': linha['valor'], 'itens': []}
+        
+        if com_itens:
+            itens = contas_pagas.order_by('-data', '-vencimento').values_list(
+                'tipo_custo', 'categoria_custo', 'data_efetiva', 'fornecedor__nome', 'historico', 'valor_custo'
+            )
+            for tipo_custo, categoria, data_efetiva, nome_fornecedor, historico, valor in itens:
+                mapas[tipo_custo][categoria]['itens'].append({
+                    'data': data_efetiva.strftime('%d/%m/%Y') if data_efetiva else '',
+                    'descricao': f"{nome_fornecedor or ''} - {historico or ''}"[:60],
+                    'valor': float(valor)
+                })
         
         # Converter mapas para listas ordenadas
         def map_to_list(map_data):
@@ -604,10 +446,10 @@ class DREView(APIView):
                 })
             return sorted(lista, key=lambda x: x['valor'], reverse=True)
         
-        detalhe_fixos = map_to_list(fixos_map)
-        detalhe_variaveis = map_to_list(variaveis_map)
+        detalhe_fixos = map_to_list(mapas[TIPO_FIXO])
+        detalhe_variaveis = map_to_list(mapas[TIPO_VARIAVEL])
         
-        return total_fixo, total_variavel, detalhe_fixos, detalhe_variaveis
+        return totais[TIPO_FIXO], totais[TIPO_VARIAVEL], detalhe_fixos, detalhe_variaveis
     
     def _calcular_saude_financeira(self, data_corte):
         """Calcula indicadores de saúde financeira na data de corte."""
@@ -19,6 +19,9 @@ from ..models.access import (
     NotasFiscaisSaida,
 )
 from ..services.stock_calculation_service import StockCalculationService
+from ..services.custo_entrada_service import CustoEntradaService
+from ..services.filtro_datas_service import FiltroDatasService
+from ..services.saldo_estoque_service import SaldoEstoqueService
 
 
 class EstoqueViewSet(viewsets.ViewSet):
@@ -95,12 +98,14 @@ class EstoqueViewSet(viewsets.ViewSet):
             # Coleta os produtos da página
             produtos_da_pagina = list(produtos_paginados_query)
 
-            # Calcula o estoque e o valor apenas para os produtos da página
+            # Estoque da página inteira em uma consulta (saldos da view para a data de hoje)
+            quantidades = SaldoEstoqueService.quantidades_na_data(
+                data_final, produto_ids=[produto.id for produto in produtos_da_pagina]
+            )
+
             dados_completos = []
             for produto in produtos_da_pagina:
-                quantidade_na_data = StockCalculationService.calculate_stock_at_date(
-                    produto.id, data_final
-                )
+                quantidade_na_data = quantidades.get(produto.id, Decimal('0'))
                 custo_unitario = produto.preco_custo or Decimal('0')
                 valor_na_data = quantidade_na_data * custo_unitario
                 dados_completos.append({
@@ -236,8 +241,7 @@ class EstoqueViewSet(viewsets.ViewSet):
             
             # Query principal: movimentações no período
             query = MovimentacoesEstoque.objects.filter(
-                data_movimentacao__date__gte=data_inicio,
-                data_movimentacao__date__lte=data_fim
+                FiltroDatasService.entre('data_movimentacao', data_inicio, data_fim)
             ).exclude(
                 documento_referencia='EST_INICIAL_2025'
             ).select_related(
@@ -425,9 +429,10 @@ class EstoqueViewSet(viewsets.ViewSet):
                 
                 produto_data['movimentacoes_detalhadas'].append(mov_detalhada)
             
-            # Busca último preço de entrada para cada produto
+            # Busca último preço de entrada de todos os produtos de uma vez
+            ultimos_precos = CustoEntradaService.precos_ultima_entrada(produtos_ids, data_fim)
             for pid in produtos_ids:
-                ultimo_preco_info = self._obter_ultimo_preco_entrada(pid, data_fim)
+                ultimo_preco_info = ultimos_precos[pid]
                 produto_data = produtos_movimentados[pid]
                 
                 # Calcula campos derivados
@@ -523,12 +528,13 @@ class EstoqueViewSet(viewsets.ViewSet):
                 )
 
             produtos_ativos = Produtos.objects.filter(ativo=True)
+            quantidades = SaldoEstoqueService.quantidades_na_data(
+                data_final, produto_ids=produtos_ativos.values_list('id', flat=True)
+            )
             estoque_critico_list = []
 
             for produto in produtos_ativos:
-                quantidade_na_data = StockCalculationService.calculate_stock_at_date(
-                    produto.id, data_final
-                )
+                quantidade_na_data = quantidades.get(produto.id, Decimal('0'))
 
                 if 0 < quantidade_na_data <= Decimal(limite_critico):
                     custo_unitario = produto.preco_custo or Decimal('0')
@@ -641,15 +647,16 @@ class EstoqueViewSet(viewsets.ViewSet):
                 )
 
             todos_produtos = Produtos.objects.filter(ativo=True)
+            quantidades = SaldoEstoqueService.quantidades_na_data(
+                data_final, produto_ids=todos_produtos.values_list('id', flat=True)
+            )
             valor_total_estoque = Decimal('0')
             produtos_processados = 0
             produtos_com_erro = 0
 
             for produto in todos_produtos:
                 try:
-                    quantidade_na_data = StockCalculationService.calculate_stock_at_date(
-                        produto.id, data_final
-                    )
+                    quantidade_na_data = quantidades.get(produto.id, Decimal('0'))
                     custo_unitario = produto.preco_custo or Decimal('0')
                     valor_produto = quantidade_na_data * custo_unitario
                     valor_total_estoque += valor_produto
@@ -688,13 +695,14 @@ class EstoqueViewSet(viewsets.ViewSet):
                 )
 
             todos_produtos = Produtos.objects.filter(ativo=True)
+            quantidades = SaldoEstoqueService.quantidades_na_data(
+                data_final, produto_ids=todos_produtos.values_list('id', flat=True)
+            )
             estoque_por_grupo = defaultdict(Decimal)
 
             for produto in todos_produtos:
                 try:
-                    quantidade_na_data = StockCalculationService.calculate_stock_at_date(
-                        produto.id, data_final
-                    )
+                    quantidade_na_data = quantidades.get(produto.id, Decimal('0'))
                     custo_unitario = produto.preco_custo or Decimal('0')
                     valor_produto = quantidade_na_data * custo_unitario
                     
@@ -736,36 +744,6 @@ class EstoqueViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def _obter_ultimo_preco_entrada(self, produto_id, data_limite):
-        """
-        Busca o último preço de entrada do produto, mesmo anterior ao período
-        """
-        tipos_entrada = [1, 3]  # Entrada e Estoque Inicial
-        
-        # Busca última entrada com valor > 0 até a data limite
-        ultima_entrada = MovimentacoesEstoque.objects.filter(
-            produto_id=produto_id,
-            tipo_movimentacao__id__in=tipos_entrada,
-            quantidade__gt=0,
-            custo_unitario__gt=0,
-            data_movimentacao__date__lte=data_limite
-        ).order_by('-data_movimentacao', '-id').first()
-        
-        if ultima_entrada:
-            return {
-                'preco': float(ultima_entrada.custo_unitario),
-                'data': ultima_entrada.data_movimentacao.strftime('%Y-%m-%d %H:%M:%S'),
-                'documento': ultima_entrada.documento_referencia or '',
-                'encontrado': True
-            }
-        
-        return {
-            'preco': 0.0,
-            'data': None,
-            'documento': '',
-            'encontrado': False
-        }
-    
     def _get_tipo_codigo(self, tipo_id):
         """Converte ID do tipo para código legível"""
         tipos = {
@@ -1104,28 +1082,31 @@ class EstoqueViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def stock_timeline(self, request):
         """
-        Generate a timeline of stock levels for a product over a date range.
+        Generate a timeline of stock levels for one or more products over a date range.
         
         Purpose: Show how stock levels changed over time for analysis,
         reporting, and audit purposes.
         
         Parameters:
-        - produto_id (required): ID of the product
+        - produto_id (required): ID of the product, or a comma-separated list of IDs
         - start_date (required): Start date in YYYY-MM-DD format
         - end_date (required): End date in YYYY-MM-DD format
         - interval (optional): 'daily', 'weekly', 'monthly' (default: 'daily')
         
-        Returns timeline of stock levels at specified intervals.
+        Returns timeline of stock levels at specified intervals, with the rule of
+        the other stock endpoints (SaldoEstoqueService: balance view for today,
+        daily snapshots for past dates) and a fixed number of queries.
+        With several products the response holds one entry per product in 'timelines'.
         """
         try:
             # Get parameters
-            produto_id = request.query_params.get('produto_id')
+            produto_id_param = request.query_params.get('produto_id') or request.query_params.get('produto_ids')
             start_date_str = request.query_params.get('start_date')
             end_date_str = request.query_params.get('end_date')
             interval = request.query_params.get('interval', 'daily')
             
             # Validate required parameters
-            if not produto_id:
+            if not produto_id_param:
                 return Response(
                     {'error': 'Parameter produto_id is required'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -1139,7 +1120,7 @@ class EstoqueViewSet(viewsets.ViewSet):
             
             # Validate produto_id
             try:
-                produto_id = int(produto_id)
+                produto_ids = [int(pid.strip()) for pid in produto_id_param.split(',') if pid.strip()]
             except ValueError:
                 return Response(
                     {'error': 'produto_id must be a valid integer'},
@@ -1170,81 +1151,73 @@ class EstoqueViewSet(viewsets.ViewSet):
                 )
             
             # Get product information
-            try:
-                produto = Produtos.objects.get(id=produto_id)
-            except Produtos.DoesNotExist:
+            produtos = Produtos.objects.in_bulk(produto_ids)
+            missing = [pid for pid in produto_ids if pid not in produtos]
+            if missing:
                 return Response(
-                    {'error': f'Product with ID {produto_id} not found'},
+                    {'error': f'Product with ID {missing[0]} not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Generate timeline points
-            timeline_points = []
-            current_date = start_date
-            
-            # Determine date increment based on interval
-            if interval == 'daily':
-                delta = timedelta(days=1)
-                max_points = 365  # Limit to prevent excessive data
-            elif interval == 'weekly':
-                delta = timedelta(weeks=1)
-                max_points = 104  # ~2 years
-            else:  # monthly
-                delta = timedelta(days=30)  # Approximate month
-                max_points = 60   # ~5 years
-            
-            point_count = 0
-            while current_date <= end_date and point_count < max_points:
-                try:
-                    stock_level = StockCalculationService.calculate_stock_at_date(produto_id, current_date)
-                    timeline_points.append({
-                        'date': current_date.strftime('%Y-%m-%d'),
-                        'stock_level': float(stock_level)
-                    })
-                except Exception as e:
-                    # Skip dates with calculation errors
-                    timeline_points.append({
-                        'date': current_date.strftime('%Y-%m-%d'),
-                        'stock_level': None,
-                        'error': str(e)
-                    })
-                
-                current_date += delta
-                point_count += 1
-            
-            # Calculate summary statistics
-            valid_points = [p for p in timeline_points if p.get('stock_level') is not None]
-            if valid_points:
-                stock_levels = [p['stock_level'] for p in valid_points]
-                min_stock = min(stock_levels)
-                max_stock = max(stock_levels)
-                avg_stock = sum(stock_levels) / len(stock_levels)
-            else:
-                min_stock = max_stock = avg_stock = 0
+            # Limit points to prevent excessive data
+            max_points = {'daily': 365, 'weekly': 104, 'monthly': 60}[interval]
+            timeline_dates = StockCalculationService.timeline_dates(
+                start_date, end_date, interval, max_points
+            )
+            # Hoje entra junto para o estoque atual seguir a mesma regra (view de saldos)
+            hoje = date.today()
+            stock_by_product = StockCalculationService.calculate_stock_timeline(
+                produto_ids, timeline_dates + [hoje]
+            )
             
-            return Response({
-                'produto': {
-                    'id': produto.id,
-                    'codigo': produto.codigo,
-                    'nome': produto.nome,
-                    'current_stock': float(produto.estoque_atual or 0)
-                },
-                'timeline': {
-                    'period': {
-                        'start_date': start_date.strftime('%Y-%m-%d'),
-                        'end_date': end_date.strftime('%Y-%m-%d'),
-                        'interval': interval
+            timelines = []
+            for pid in produto_ids:
+                produto = produtos[pid]
+                stock_by_date = stock_by_product.get(pid, {})
+                timeline_points = [
+                    {
+                        'date': point_date.strftime('%Y-%m-%d'),
+                        'stock_level': float(stock_by_date[point_date])
+                    }
+                    for point_date in timeline_dates
+                ]
+                
+                # Calculate summary statistics
+                stock_levels = [p['stock_level'] for p in timeline_points]
+                if stock_levels:
+                    min_stock = min(stock_levels)
+                    max_stock = max(stock_levels)
+                    avg_stock = sum(stock_levels) / len(stock_levels)
+                else:
+                    min_stock = max_stock = avg_stock = 0
+                
+                timelines.append({
+                    'produto': {
+                        'id': produto.id,
+                        'codigo': produto.codigo,
+                        'nome': produto.nome,
+                        'current_stock': float(stock_by_date[hoje])
                     },
-                    'points': timeline_points,
-                    'statistics': {
-                        'total_points': len(timeline_points),
-                        'valid_points': len(valid_points),
-                        'min_stock': min_stock,
-                        'max_stock': max_stock,
-                        'avg_stock': round(avg_stock, 2)
+                    'timeline': {
+                        'period': {
+                            'start_date': start_date.strftime('%Y-%m-%d'),
+                            'end_date': end_date.strftime('%Y-%m-%d'),
+                            'interval': interval
+                        },
+                        'points': timeline_points,
+                        'statistics': {
+                            'total_points': len(timeline_points),
+                            'valid_points': len(timeline_points),
+                            'min_stock': min_stock,
+                            'max_stock': max_stock,
+                            'avg_stock': round(avg_stock, 2)
+                        }
                     }
-                }
-            })
+                })
+            
+            if len(timelines) == 1:
+                return Response(timelines[0])
+            return Response({'timelines': timelines})
             
         except Exception as e:
             return Response(
@@ -1331,10 +1304,10 @@ class EstoqueViewSet(viewsets.ViewSet):
                 reset_query = reset_query.filter(produto_id__in=produto_ids)
             
             if start_date:
-                reset_query = reset_query.filter(data_movimentacao__date__gte=start_date)
+                reset_query = reset_query.filter(FiltroDatasService.entre('data_movimentacao', data_inicial=start_date))
             
             if end_date:
-                reset_query = reset_query.filter(data_movimentacao__date__lte=end_date)
+                reset_query = reset_query.filter(FiltroDatasService.entre('data_movimentacao', data_final=end_date))
             
             # Get resets ordered by date
             resets = reset_query.order_by('-data_movimentacao')
@@ -1465,19 +1438,62 @@ class EstoqueViewSet(viewsets.ViewSet):
             end_date = date.today()
             start_date = end_date - timedelta(days=days_history)
             
-            # Get movement summary
-            movement_summary = StockCalculationService.get_stock_movements_summary(
-                produto_id, start_date, end_date
+            # Single ordered fetch of the period movements
+            period_movements = MovimentacoesEstoque.objects.filter(
+                produto_id=produto_id,
+                data_movimentacao__gte=timezone.make_aware(datetime.combine(start_date, datetime.min.time())),
+                data_movimentacao__lte=timezone.make_aware(datetime.combine(end_date, datetime.max.time()))
+            ).order_by('data_movimentacao', 'id').values(
+                'data_movimentacao', 'quantidade', 'documento_referencia', 'tipo_movimentacao_id'
+            )
+            
+            movement_summary = {
+                'stock_resets': [],
+                'regular_movimentos': [],
+                'totals': {'entrada': Decimal('0'), 'saida': Decimal('0')}
+            }
+            for movement in period_movements:
+                if movement['documento_referencia'] == '000000':
+                    movement_summary['stock_resets'].append({
+                        'date': movement['data_movimentacao'],
+                        'quantity': movement['quantidade'],
+                        'document': movement['documento_referencia']
+                    })
+                    continue
+                movement_summary['regular_movimentos'].append({
+                    'date': movement['data_movimentacao'],
+                    'quantity': movement['quantidade'],
+                    'document': movement['documento_referencia'],
+                    'type': self._get_tipo_codigo(movement['tipo_movimentacao_id'])
+                })
+                if movement['tipo_movimentacao_id'] in [1, 3]:
+                    movement_summary['totals']['entrada'] += movement['quantidade']
+                elif movement['tipo_movimentacao_id'] == 2:
+                    movement_summary['totals']['saida'] += movement['quantidade']
+            movement_summary['totals']['net_movement'] = (
+                movement_summary['totals']['entrada'] - movement_summary['totals']['saida']
             )
             
-            # Calculate stock at key points
-            stock_at_start = StockCalculationService.calculate_stock_at_date(produto_id, start_date)
-            stock_at_end = StockCalculationService.calculate_stock_at_date(produto_id, end_date)
+            # Calculate stock at key points with one timeline pass
+            hoje = date.today()
+            stock_points = StockCalculationService.calculate_stock_timeline(
+                [produto_id], [start_date, end_date, hoje]
+            )[produto_id]
+            stock_at_start = stock_points[start_date]
+            stock_at_end = stock_points[end_date]
             
             # Get stock reset information
-            base_stock, most_recent_reset = StockCalculationService.get_base_stock_reset(
-                produto_id, datetime.combine(end_date, datetime.max.time())
-            )
+            if movement_summary['stock_resets']:
+                last_reset = movement_summary['stock_resets'][-1]
+                base_stock, most_recent_reset = last_reset['quantity'], last_reset['date']
+            else:
+                last_reset = MovimentacoesEstoque.objects.filter(
+                    produto_id=produto_id,
+                    documento_referencia='000000',
+                    data_movimentacao__lt=timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+                ).order_by('-data_movimentacao').values('quantidade', 'data_movimentacao').first()
+                base_stock = last_reset['quantidade'] if last_reset else Decimal('0')
+                most_recent_reset = last_reset['data_movimentacao'] if last_reset else None
             
             # Build response
             response_data = {
@@ -1485,7 +1501,7 @@ class EstoqueViewSet(viewsets.ViewSet):
                     'id': produto.id,
                     'codigo': produto.codigo,
                     'nome': produto.nome,
-                    'current_stock': float(produto.estoque_atual or 0),
+                    'current_stock': float(stock_points[hoje]),
                     'ativo': produto.ativo
                 },
                 'analysis_period': {
@@ -1553,12 +1569,13 @@ class EstoqueViewSet(viewsets.ViewSet):
                 )
 
             produtos_ativos = Produtos.objects.filter(ativo=True)
+            quantidades = SaldoEstoqueService.quantidades_na_data(
+                data_final, produto_ids=produtos_ativos.values_list('id', flat=True)
+            )
             estoque_critico_list = []
 
             for produto in produtos_ativos:
-                quantidade_na_data = StockCalculationService.calculate_stock_at_date(
-                    produto.id, data_final
-                )
+                quantidade_na_data = quantidades.get(produto.id, Decimal('0'))
 
                 if 0 < quantidade_na_data <= Decimal(limite_critico):
                     custo_unitario = produto.preco_custo or Decimal('0')
@@ -1610,8 +1627,8 @@ class EstoqueViewSet(viewsets.ViewSet):
 
             # Buscar movimentações de reset no período
             resets_query = MovimentacoesEstoque.objects.filter(
+                FiltroDatasService.entre('data_movimentacao', data_inicial=data_limite),
                 documento_referencia='000000',
-                data_movimentacao__date__gte=data_limite
             ).select_related('produto', 'tipo_movimentacao')
             
             # Agrupar por produto e pegar o reset mais recente
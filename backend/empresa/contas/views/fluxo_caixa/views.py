@@ -28,8 +28,9 @@ class FluxoCaixaViewSet(FluxoCaixaAnaliseMixin, FluxoCaixaBaseMixin, ClienteAnal
     """
     ViewSet para gerenciamento do fluxo de caixa
     """
-    queryset = FluxoCaixaLancamento.objects.all()
+    queryset = FluxoCaixaLancamento.objects.select_related('cliente')
     serializer_class = FluxoCaixaLancamentoSerializer
+    ordenacao_paginacao = ('-data', '-id')
     #permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
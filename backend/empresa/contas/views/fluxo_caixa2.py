@@ -10,7 +10,7 @@ from calendar import monthrange
 from decimal import Decimal
 from django.utils import timezone
 from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
-from ..models.access import ItensNfEntrada, ItensNfSaida, ContasPagar, ContasReceber
+from ..models.access import ItensNfEntrada, ItensNfSaida
 
 from ..models.fluxo_caixa import (
     FluxoCaixaLancamento,
@@ -25,6 +25,13 @@ from ..serializers.fluxo_caixa import (
     FluxoCaixaResponseSerializer
 )
 from django.utils.dateparse import parse_date
+from ..services.agrupamento_temporal_service import MES, AgrupamentoTemporalService
+from ..services.fluxo_caixa_service import FluxoCaixaService
+from ..services.saldo_mensal_service import SaldoMensalService
+from ..services.sincronizacao_fluxo_service import SincronizacaoFluxoService
+from ..services.exportacao_service import (
+    FORMATO_DATA, FORMATO_MOEDA, Coluna, ExportacaoService, Planilha
+)
 
 class FluxoCaixaViewSet(viewsets.ModelViewSet):
     queryset = FluxoCaixaLancamento.objects.all()
@@ -91,46 +98,32 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
             )
 
     def _agrupar_por_dia(self, lancamentos, data_inicial, data_final):
-        """Agrupa os lançamentos por dia"""
+        """Agrupa os lançamentos por dia: totais em uma consulta, movimentos em uma passada"""
+        totais = AgrupamentoTemporalService.fluxo_por_periodo(lancamentos, data_inicial, data_final)
+        movimentos = AgrupamentoTemporalService.agrupar_itens(
+            lancamentos.values(
+                'id', 'valor', 'tipo', 'realizado', 'descricao', 'categoria', 'fonte_tipo',
+                'fonte_id', 'observacoes', 'data', 'data_realizacao'
+            ),
+            lambda movimento: movimento['data']
+        )
+
         dias = {}
-        data_atual = data_inicial
-          
-        while data_atual <= data_final:
-            dias[data_atual] = {
-                'data': data_atual,
-                'movimentos': [],
-                'total_entradas': Decimal('0'),
-                'total_saidas': Decimal('0'),
+        for data_dia, total in totais.items():
+            dias[data_dia] = {
+                'data': data_dia,
+                'movimentos': movimentos.get(data_dia, []),
+                'total_entradas': total['entradas'],
+                'total_saidas': total['saidas'],
                 'saldo_inicial': Decimal('0'),
                 'saldo_final': Decimal('0'),
-                'saldo_realizado': Decimal('0'),  # Adicionado este campo
-                'saldo_projetado': Decimal('0')  # Adicionado este campo
+                'saldo_realizado': total['entradas_realizadas'] - total['saidas_realizadas'],
+                'saldo_projetado': (
+                    (total['entradas'] - total['entradas_realizadas'])
+                    - (total['saidas'] - total['saidas_realizadas'])
+                )
             }
 
-            for lancamento in lancamentos:
-                if lancamento.data == data_atual:
-                    movimento = {
-                        'id': lancamento.id,
-                        'valor': lancamento.valor,
-                        'tipo': lancamento.tipo,
-                        'realizado': lancamento.realizado,
-                        'descricao': lancamento.descricao,
-                        'categoria': lancamento.categoria,
-                        'fonte_tipo': lancamento.fonte_tipo,
-                        'fonte_id': lancamento.fonte_id,
-                        'observacoes': lancamento.observacoes,
-                        'data': lancamento.data,
-                        'data_realizacao': lancamento.data_realizacao                        
-                    }
-                    dias[data_atual]['movimentos'].append(movimento)
-                    
-                    if lancamento.tipo == 'entrada':
-                        dias[data_atual]['total_entradas'] += lancamento.valor
-                    else:
-                        dias[data_atual]['total_saidas'] += lancamento.valor
-
-            data_atual += timedelta(days=1)
-        
         return dias
 
     @action(detail=False, methods=['get'])
@@ -476,36 +469,20 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
                 data__range=[hoje, data_final]
             ).order_by('data')
 
-            # Prepara projeção mês a mês
+            # Prepara projeção mês a mês (totais de todos os meses em uma consulta)
             projecao = []
             saldo_atual = self._obter_saldo_inicial(hoje)
-            data_mes = hoje.replace(day=1)
-
-            while data_mes < data_final:
-                proximo_mes = (data_mes + relativedelta(months=1))
-                
-                # Filtra lançamentos do mês
-                lancamentos_mes = lancamentos_futuros.filter(
-                    data__range=[data_mes, proximo_mes - timedelta(days=1)]
-                )
+            totais_por_mes = AgrupamentoTemporalService.fluxo_por_periodo(
+                lancamentos_futuros, hoje, data_final - timedelta(days=1), MES
+            )
 
+            for data_mes, totais in totais_por_mes.items():
                 # Calcula totais do mês
                 totais_mes = {
-                    'entradas_confirmadas': lancamentos_mes.filter(
-                        tipo='entrada', realizado=True
-                    ).aggregate(total=Sum('valor'))['total'] or Decimal('0'),
-                    
-                    'entradas_previstas': lancamentos_mes.filter(
-                        tipo='entrada', realizado=False
-                    ).aggregate(total=Sum('valor'))['total'] or Decimal('0'),
-                    
-                    'saidas_confirmadas': lancamentos_mes.filter(
-                        tipo='saida', realizado=True
-                    ).aggregate(total=Sum('valor'))['total'] or Decimal('0'),
-                    
-                    'saidas_previstas': lancamentos_mes.filter(
-                        tipo='saida', realizado=False
-                    ).aggregate(total=Sum('valor'))['total'] or Decimal('0')
+                    'entradas_confirmadas': totais['entradas_realizadas'],
+                    'entradas_previstas': totais['entradas'] - totais['entradas_realizadas'],
+                    'saidas_confirmadas': totais['saidas_realizadas'],
+                    'saidas_previstas': totais['saidas'] - totais['saidas_realizadas']
                 }
 
                 # Calcula indicadores
@@ -542,8 +519,6 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
                     }
                 })
 
-                data_mes = proximo_mes
-
             return Response({
                 'data_base': hoje,
                 'periodo_projecao': f"{meses} meses",
@@ -721,65 +696,41 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def exportar_excel(self, request):
-        """Exporta dados do fluxo de caixa para Excel"""
-        import xlsxwriter
-        from io import BytesIO
-        
+        """
+        Exporta lançamentos e saldos diários para Excel (?formato=csv para CSV).
+        As linhas são lidas do banco em lotes e gravadas direto no arquivo.
+        """
         try:
-            buffer = BytesIO()
-            workbook = xlsxwriter.Workbook(buffer)
-            
-            # Formatos
-            header_format = workbook.add_format({
-                'bold': True,
-                'bg_color': '#CCCCCC'
-            })
-            
-            date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
-            currency_format = workbook.add_format({'num_format': 'R$ #,##0.00'})
-            
-            # Planilha de Movimentações
-            ws_movimentacoes = workbook.add_worksheet('Movimentações')
-            headers = ['Data', 'Tipo', 'Descrição', 'Categoria', 'Valor', 'Realizado']
-            
-            for col, header in enumerate(headers):
-                ws_movimentacoes.write(0, col, header, header_format)
-            
-            lancamentos = self.get_queryset().order_by('data')
-            for row, lancamento in enumerate(lancamentos, start=1):
-                ws_movimentacoes.write(row, 0, lancamento.data, date_format)
-                ws_movimentacoes.write(row, 1, lancamento.tipo)
-                ws_movimentacoes.write(row, 2, lancamento.descricao)
-                ws_movimentacoes.write(row, 3, lancamento.categoria)
-                ws_movimentacoes.write(row, 4, float(lancamento.valor), currency_format)
-                ws_movimentacoes.write(row, 5, 'Sim' if lancamento.realizado else 'Não')
-            
-            # Planilha de Saldos Diários
-            ws_saldos = workbook.add_worksheet('Saldos Diários')
-            headers_saldo = ['Data', 'Saldo Inicial', 'Entradas', 'Saídas', 'Saldo Final']
-            
-            for col, header in enumerate(headers_saldo):
-                ws_saldos.write(0, col, header, header_format)
-            
-            saldos = SaldoDiario.objects.filter(
-                processado=True
-            ).order_by('data')
-            
-            for row, saldo in enumerate(saldos, start=1):
-                ws_saldos.write(row, 0, saldo.data, date_format)
-                ws_saldos.write(row, 1, float(saldo.saldo_inicial), currency_format)
-                ws_saldos.write(row, 2, float(saldo.total_entradas), currency_format)
-                ws_saldos.write(row, 3, float(saldo.total_saidas), currency_format)
-                ws_saldos.write(row, 4, float(saldo.saldo_final), currency_format)
-            
-            workbook.close()
-            buffer.seek(0)
-            
-            return Response({
-                'file_base64': base64.b64encode(buffer.getvalue()).decode('utf-8'),
-                'filename': f'fluxo_caixa_{date.today().strftime("%Y%m%d")}.xlsx'
-            })
-            
+            planilhas = [
+                Planilha(
+                    'Movimentações',
+                    [Coluna('Data', FORMATO_DATA), 'Tipo', 'Descrição', 'Categoria',
+                     Coluna('Valor', FORMATO_MOEDA), 'Realizado'],
+                    (
+                        (data, tipo, descricao, categoria, valor, 'Sim' if realizado else 'Não')
+                        for data, tipo, descricao, categoria, valor, realizado in ExportacaoService.linhas(
+                            self.get_queryset().order_by('data', 'id'),
+                            'data', 'tipo', 'descricao', 'categoria', 'valor', 'realizado'
+                        )
+                    )
+                ),
+                Planilha(
+                    'Saldos Diários',
+                    [Coluna('Data', FORMATO_DATA), Coluna('Saldo Inicial', FORMATO_MOEDA),
+                     Coluna('Entradas', FORMATO_MOEDA), Coluna('Saídas', FORMATO_MOEDA),
+                     Coluna('Saldo Final', FORMATO_MOEDA)],
+                    ExportacaoService.linhas(
+                        SaldoDiario.objects.filter(processado=True).order_by('data'),
+                        'data', 'saldo_inicial', 'total_entradas', 'total_saidas', 'saldo_final'
+                    )
+                ),
+            ]
+            return ExportacaoService.resposta(
+                request.query_params.get('formato', 'excel'),
+                f'fluxo_caixa_{date.today().strftime("%Y%m%d")}',
+                planilhas
+            )
+
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -1194,22 +1145,8 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
             semana_atual['fim'] = data
             semana_atual['total_entradas'] += dia['total_entradas']
             semana_atual['total_saidas'] += dia['total_saidas']
-            
-            # Atualiza saldos da semana
-            realizados = [m for m in dia['movimentos'] if m['realizado']]
-            previstos = [m for m in dia['movimentos'] if not m['realizado']]
-            
-            for movimento in realizados:
-                if movimento['tipo'] == 'entrada':
-                    semana_atual['saldo_realizado'] += movimento['valor']
-                else:
-                    semana_atual['saldo_realizado'] -= movimento['valor']
-                    
-            for movimento in previstos:
-                if movimento['tipo'] == 'entrada':
-                    semana_atual['saldo_projetado'] += movimento['valor']
-                else:
-                    semana_atual['saldo_projetado'] -= movimento['valor']
+            semana_atual['saldo_realizado'] += dia['saldo_realizado']
+            semana_atual['saldo_projetado'] += dia['saldo_projetado']
         
         if semana_atual:
             semanas.append(semana_atual)
@@ -1220,12 +1157,14 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
         """Agrupa as semanas em meses"""
         meses = []
         mes_atual = None
+        mes_ano_atual = None
         
         for semana in semanas:
             data_inicio = semana['inicio']
             mes_ano = (data_inicio.year, data_inicio.month)
             
-            if not mes_atual or mes_atual['ano'] != mes_ano[0] or mes_atual['mes'] != mes_ano[1]:
+            if not mes_atual or mes_ano != mes_ano_atual:
+                mes_ano_atual = mes_ano
                 if mes_atual:
                     meses.append(mes_atual)
                 mes_atual = {
@@ -1251,18 +1190,23 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
 
     def _calcular_totalizadores(self, lancamentos):
         """Calcula totalizadores do período"""
-        realizados = lancamentos.filter(realizado=True)
-        previstos = lancamentos.filter(realizado=False)
-        
+        totais = AgrupamentoTemporalService.totais_fluxo(lancamentos)
+
         totalizadores = {
-            'entradas_realizadas': realizados.filter(tipo='entrada').aggregate(total=Sum('valor'))['total'] or Decimal('0'),
-            'saidas_realizadas': realizados.filter(tipo='saida').aggregate(total=Sum('valor'))['total'] or Decimal('0'),
-            'entradas_previstas': previstos.filter(tipo='entrada').aggregate(total=Sum('valor'))['total'] or Decimal('0'),
-            'saidas_previstas': previstos.filter(tipo='saida').aggregate(total=Sum('valor'))['total'] or Decimal('0')
+            'entradas_realizadas': totais['entradas_realizadas'],
+            'saidas_realizadas': totais['saidas_realizadas'],
+            'entradas_previstas': totais['entradas'] - totais['entradas_realizadas'],
+            'saidas_previstas': totais['saidas'] - totais['saidas_realizadas']
         }
-        
+
         return totalizadores
 
+    def _recalcular_saldos(self, data_inicial):
+        """Recalcula os saldos diários a partir da data (dias anteriores ficam como estão)"""
+        if isinstance(data_inicial, str):
+            data_inicial = parse_date(data_inicial)
+        FluxoCaixaService.recalcular_saldos_diarios(desde=data_inicial)
+
     def _obter_saldo_inicial(self, data_inicial):
         """Obtém o saldo inicial para a data especificada"""
         try:
@@ -1274,21 +1218,15 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
             if data_inicial < config.data_inicial_controle:
                 return config.saldo_inicial
                 
-            # Caso contrário, calcula o saldo até a data inicial
-            lancamentos_anteriores = FluxoCaixaLancamento.objects.filter(
-                data__lt=data_inicial
-            ).filter(
-                Q(realizado=True) | 
-                Q(data__gte=config.data_inicial_controle)
+            # Caso contrário, soma os realizados anteriores e os previstos desde a data de controle
+            ate_data = SaldoMensalService.movimento_ate(data_inicial)
+            ate_controle = SaldoMensalService.movimento_ate(config.data_inicial_controle)
+            saldo = (
+                config.saldo_inicial
+                + ate_data['movimento_realizado']
+                + ate_data['movimento_previsto'] - ate_controle['movimento_previsto']
             )
-            
-            saldo = config.saldo_inicial
-            for lancamento in lancamentos_anteriores:
-                if lancamento.tipo == 'entrada':
-                    saldo += lancamento.valor
-                else:
-                    saldo -= lancamento.valor
-                    
+
             return saldo
             
         except Exception as e:
@@ -1296,97 +1234,9 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
             return Decimal('0')
 
     def _sincronizar_contas_com_fluxo(self, data_inicial, data_final):
-        """Sincroniza contas a pagar, receber e notas fiscais com o fluxo de caixa"""
-        from ..models.access import NotasFiscaisEntrada, NotasFiscaisSaida
-        from django.db.models import Q
-        
+        """Sincroniza contas a pagar e a receber do período com o fluxo de caixa (só as diferenças)"""
         try:
-            print(f"DEBUG: Starting sync for {data_inicial} to {data_final}")
-            
-            # 1. Busca contas a pagar (Abertas e Pagas)
-            contas_pagar = ContasPagar.objects.filter(
-                Q(vencimento__date__range=[data_inicial, data_final]) |
-                Q(data_pagamento__date__range=[data_inicial, data_final]),
-            )
-            
-            # 2. Busca contas a receber (Abertas e Pagas)
-            contas_receber = ContasReceber.objects.filter(
-                Q(vencimento__date__range=[data_inicial, data_final]) |
-                Q(data_pagamento__date__range=[data_inicial, data_final]),
-            )
-
-            # 3. Limpa lançamentos AUTOMÁTICOS do período para evitar duplicidade e permitir regeneração
-            deleted_count, _ = FluxoCaixaLancamento.objects.filter(
-                data__range=[data_inicial, data_final],
-                fonte_tipo__in=['contas_pagar', 'contas_receber', 'nfe', 'nfs']
-            ).delete()
-            print(f"DEBUG: Deleted {deleted_count} old entries.")
-            
-            new_objects = []
-
-            # Sincroniza Contas a Pagar
-            count_cp = 0
-            for conta in contas_pagar:
-                # Se paga, usa data de pagamento. Se aberta, usa vencimento.
-                data_lancamento = conta.data_pagamento.date() if conta.status == 'P' and conta.data_pagamento else conta.vencimento.date()
-                if not data_lancamento: continue # Safety check
-                
-                # Só processa se a data definida cair no período solicitado
-                if not (data_inicial <= data_lancamento <= data_final):
-                    continue
-
-                new_objects.append(FluxoCaixaLancamento(
-                    fonte_tipo='contas_pagar',
-                    fonte_id=str(conta.id),
-                    data=data_lancamento,
-                    valor=conta.valor_total_pago if conta.status == 'P' and conta.valor_total_pago else conta.valor,
-                    tipo='saida',
-                    descricao=f'Conta a Pagar - {conta.fornecedor.nome if conta.fornecedor else "Sem fornecedor"}',
-                    categoria='Contas a Pagar',
-                    realizado=(conta.status == 'P'),
-                    observacoes=conta.historico or f'Vencimento: {conta.vencimento.strftime("%d/%m/%Y")}' if conta.vencimento else '',
-                    fornecedor=conta.fornecedor
-                ))
-                count_cp += 1
-            
-            # Sincroniza Contas a Receber
-            count_cr = 0
-            for conta in contas_receber:
-                data_lancamento = conta.data_pagamento.date() if conta.status == 'P' and conta.data_pagamento else conta.vencimento.date()
-                if not data_lancamento: continue
-
-                if not (data_inicial <= data_lancamento <= data_final):
-                    continue
-
-                new_objects.append(FluxoCaixaLancamento(
-                    fonte_tipo='contas_receber',
-                    fonte_id=str(conta.id),
-                    data=data_lancamento,
-                    valor=conta.valor_total_pago if conta.status == 'P' and conta.valor_total_pago else conta.valor,
-                    tipo='entrada',
-                    descricao=f'Conta a Receber - {conta.cliente.nome if conta.cliente else "Sem cliente"}',
-                    categoria='Contas a Receber',
-                    realizado=(conta.status == 'P'),
-                    observacoes=conta.historico or f'Vencimento: {conta.vencimento.strftime("%d/%m/%Y")}' if conta.vencimento else '',
-                    cliente=conta.cliente
-                ))
-                count_cr += 1
-
-
-            # SKIPPING NFe/NFS synchronization to avoid double counting with Accounts Payable/Receivable.
-            # Entries are deleted above but not regenerated.
-            
-            # Bulk Create
-            if new_objects:
-                FluxoCaixaLancamento.objects.bulk_create(new_objects)
-                
-            print(f"DEBUG: Sync complete. Created {len(new_objects)} entries.")
-            print(f"  Distribution by source:")
-            print(f"  nfe: 0 (Disabled)")
-            print(f"  nfs: 0 (Disabled)")
-            print(f"  contas_pagar: {count_cp}")
-            print(f"  contas_receber: {count_cr}")
-            
+            SincronizacaoFluxoService.sincronizar_contas(data_inicial, data_final)
         except Exception as e:
             print(f"Erro na sincronização: {str(e)}")
             import traceback
@@ -1464,18 +1314,19 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
             
             lancamentos = self.get_queryset().filter(data=data).order_by('tipo')
             saldo_inicial = self._obter_saldo_inicial(data)
-            
-            entradas = lancamentos.filter(tipo='entrada')
-            saidas = lancamentos.filter(tipo='saida')
+            totais = AgrupamentoTemporalService.totais_fluxo(lancamentos)
+
+            # Uma leitura dos lançamentos, separada por tipo
+            movimentos = FluxoCaixaLancamentoSerializer(lancamentos, many=True).data
             
             return Response({
                 'data': data,
                 'saldo_inicial': saldo_inicial,
-                'total_entradas': entradas.aggregate(total=Sum('valor'))['total'] or Decimal('0'),
-                'total_saidas': saidas.aggregate(total=Sum('valor'))['total'] or Decimal('0'),
+                'total_entradas': totais['entradas'],
+                'total_saidas': totais['saidas'],
                 'movimentos': {
-                    'entradas': FluxoCaixaLancamentoSerializer(entradas, many=True).data,
-                    'saidas': FluxoCaixaLancamentoSerializer(saidas, many=True).data
+                    'entradas': [m for m in movimentos if m['tipo'] == 'entrada'],
+                    'saidas': [m for m in movimentos if m['tipo'] == 'saida']
                 }
             })
         except Exception as e:
@@ -1495,17 +1346,17 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
             # Busca lançamentos futuros
             lancamentos = self.get_queryset().filter(
                 data__range=[data_inicial, data_final]
-            ).order_by('data')
+            )
             
-            # Calcula saldo dia a dia
+            # Calcula saldo dia a dia (totais diários em uma consulta)
             saldo_atual = self._obter_saldo_inicial(data_inicial)
             previsao = []
             
-            data = data_inicial
-            while data <= data_final:
-                movimentos_dia = lancamentos.filter(data=data)
-                entradas = sum(m.valor for m in movimentos_dia if m.tipo == 'entrada')
-                saidas = sum(m.valor for m in movimentos_dia if m.tipo == 'saida')
+            for data, totais in AgrupamentoTemporalService.fluxo_por_periodo(
+                lancamentos, data_inicial, data_final
+            ).items():
+                entradas = totais['entradas']
+                saidas = totais['saidas']
                 
                 saldo_atual += (entradas - saidas)
                 previsao.append({
@@ -1515,8 +1366,6 @@ class FluxoCaixaViewSet(viewsets.ModelViewSet):
                     'saldo': saldo_atual
                 })
                 
-                data += timedelta(days=1)
-                
             return Response(previsao)
             
         except Exception as e:
@@ -9,12 +9,17 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Sum, Count, Q, Value, DecimalField, F, DateTimeField, Case, When
-from django.db.models.functions import TruncMonth, TruncDay, Coalesce
+from django.db.models.functions import TruncMonth, Coalesce
 from datetime import datetime, date
 import time
 
 from ..models.access import ContasPagar, ContasReceber, ContratosLocacao
-from .dre_views import DREView
+from ..services.dre_mensal_service import DREMensalService
+from ..services.agrupamento_temporal_service import DIA, AgrupamentoTemporalService
+from ..services.filtro_datas_service import FiltroDatasService
+from ..services.cache_relatorios_service import (
+    MODELOS_ESTOQUE, MODELOS_FINANCEIRO, MODELOS_NOTAS, cache_por_versao
+)
 from datetime import timedelta
 from decimal import Decimal
 
@@ -31,6 +36,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
             return None
 
     @action(detail=False, methods=['get'])
+    @cache_por_versao(*MODELOS_FINANCEIRO)
     def movimentacoes_realizadas(self, request):
         """
         Movimentações efetivadas (pagas/recebidas) no período.
@@ -63,7 +69,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
             data_efetiva=Coalesce('data_pagamento', 'vencimento')
         ).filter(
             queries_pagar,
-            data_efetiva__date__range=[data_inicio, data_fim],
+            FiltroDatasService.entre('data_efetiva', data_inicio, data_fim),
             status='P'
         ).select_related('fornecedor').values(
             'id', 'data_efetiva', 'valor_total_pago', 'valor',
@@ -102,7 +108,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         contas_receber = qs_receber.annotate(
             data_efetiva=Coalesce('data_pagamento', 'vencimento')
         ).filter(
-            data_efetiva__date__range=[data_inicio, data_fim],
+            FiltroDatasService.entre('data_efetiva', data_inicio, data_fim),
             status='P'
         ).select_related('cliente').values(
             'id', 'data_efetiva', 'valor_total_pago', 'valor',
@@ -271,9 +277,11 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         scope = request.query_params.get('scope', 'periodo')
 
         # --- CÁLCULO DOS TOTAIS E CONTAGENS PARA TODOS OS ESCOPOS ---
+        # Limites do período como instantes [inicio, fim), comparados direto com vencimento
+        inicio_periodo, fim_periodo = FiltroDatasService.intervalo(data_inicio, data_fim)
         
         # 1. ANTES DO PERÍODO (< data_inicio)
-        filters_cp_antes = {'vencimento__date__lt': data_inicio, 'status': 'A'}
+        filters_cp_antes = {'vencimento__lt': inicio_periodo, 'status': 'A'}
         agg_cp_antes = ContasPagar.objects.filter(q_cat_pagar, **filters_cp_antes).aggregate(
             total=Coalesce(Sum('valor'), Value(0, output_field=DecimalField())),
             count=Count('id')
@@ -281,7 +289,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         total_saidas_antes = agg_cp_antes['total']
         count_antes_cp = agg_cp_antes['count']
 
-        filters_cr_antes = {'vencimento__date__lt': data_inicio, 'status': 'A'}
+        filters_cr_antes = {'vencimento__lt': inicio_periodo, 'status': 'A'}
         qs_receber_antes = ContasReceber.objects.filter(q_cat_receber, **filters_cr_antes)
         if origem_receita: qs_receber_antes = qs_receber_antes.filter(q_origem)
         agg_cr_antes = qs_receber_antes.aggregate(
@@ -293,7 +301,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         count_antes = count_antes_cp + count_antes_cr
 
         # 2. NO PERÍODO (>= data_inicio e <= data_fim)
-        filters_cp_periodo = {'vencimento__date__gte': data_inicio, 'vencimento__date__lte': data_fim, 'status': 'A'}
+        filters_cp_periodo = {'vencimento__gte': inicio_periodo, 'vencimento__lt': fim_periodo, 'status': 'A'}
         agg_cp_periodo = ContasPagar.objects.filter(q_cat_pagar, **filters_cp_periodo).aggregate(
             total=Coalesce(Sum('valor'), Value(0, output_field=DecimalField())),
             count=Count('id')
@@ -301,7 +309,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         total_saidas_periodo = agg_cp_periodo['total']
         count_periodo_cp = agg_cp_periodo['count']
 
-        filters_cr_periodo = {'vencimento__date__gte': data_inicio, 'vencimento__date__lte': data_fim, 'status': 'A'}
+        filters_cr_periodo = {'vencimento__gte': inicio_periodo, 'vencimento__lt': fim_periodo, 'status': 'A'}
         qs_receber_periodo = ContasReceber.objects.filter(q_cat_receber, **filters_cr_periodo)
         if origem_receita: qs_receber_periodo = qs_receber_periodo.filter(q_origem)
         agg_cr_periodo = qs_receber_periodo.aggregate(
@@ -313,7 +321,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         count_periodo = count_periodo_cp + count_periodo_cr
 
         # 3. DEPOIS DO PERÍODO (> data_fim)
-        filters_cp_depois = {'vencimento__date__gt': data_fim, 'status': 'A'}
+        filters_cp_depois = {'vencimento__gte': fim_periodo, 'status': 'A'}
         agg_cp_depois = ContasPagar.objects.filter(q_cat_pagar, **filters_cp_depois).aggregate(
             total=Coalesce(Sum('valor'), Value(0, output_field=DecimalField())),
             count=Count('id')
@@ -321,7 +329,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         total_saidas_depois = agg_cp_depois['total']
         count_depois_cp = agg_cp_depois['count']
 
-        filters_cr_depois = {'vencimento__date__gt': data_fim, 'status': 'A'}
+        filters_cr_depois = {'vencimento__gte': fim_periodo, 'status': 'A'}
         qs_receber_depois = ContasReceber.objects.filter(q_cat_receber, **filters_cr_depois)
         if origem_receita: qs_receber_depois = qs_receber_depois.filter(q_origem)
         agg_cr_depois = qs_receber_depois.aggregate(
@@ -342,16 +350,16 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         filters_cr_list = {'status': 'A'}
 
         if scope == 'antes':
-            filters_cp_list['vencimento__date__lt'] = data_inicio
-            filters_cr_list['vencimento__date__lt'] = data_inicio
+            filters_cp_list['vencimento__lt'] = inicio_periodo
+            filters_cr_list['vencimento__lt'] = inicio_periodo
         elif scope == 'depois':
-            filters_cp_list['vencimento__date__gt'] = data_fim
-            filters_cr_list['vencimento__date__gt'] = data_fim
+            filters_cp_list['vencimento__gte'] = fim_periodo
+            filters_cr_list['vencimento__gte'] = fim_periodo
         else: # periodo (default)
-            filters_cp_list['vencimento__date__gte'] = data_inicio
-            filters_cp_list['vencimento__date__lte'] = data_fim
-            filters_cr_list['vencimento__date__gte'] = data_inicio
-            filters_cr_list['vencimento__date__lte'] = data_fim
+            filters_cp_list['vencimento__gte'] = inicio_periodo
+            filters_cp_list['vencimento__lt'] = fim_periodo
+            filters_cr_list['vencimento__gte'] = inicio_periodo
+            filters_cr_list['vencimento__lt'] = fim_periodo
 
         # Buscando listas efetivas para paginação
         contas_pagar = ContasPagar.objects.filter(q_cat_pagar, **filters_cp_list).select_related('fornecedor').values(
@@ -445,6 +453,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @cache_por_versao(*MODELOS_FINANCEIRO, *MODELOS_NOTAS, *MODELOS_ESTOQUE)
     def resumo_mensal(self, request):
         """
         Retorna resumo mensal baseado na metodologia do DRE (Competência para Receitas, Caixa para Despesas + CMV).
@@ -456,23 +465,11 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         if not data_inicio or not data_fim:
             return Response({'error': 'Parâmetros data inválidos'}, status=400)
 
-        # Ajustar para o primeiro dia do mês inicial
-        current_date = data_inicio.replace(day=1)
-        
         meses_list = []
 
-        while current_date <= data_fim:
-            # Definir intervalo do mês corrente
-            # Próximo mês
-            next_month = (current_date.replace(day=28) + timedelta(days=4)).replace(day=1)
-            month_end = next_month - timedelta(days=1)
-            
-            # Instanciar DREView e configurar para sem impostos (comparação direta)
-            dre_view = DREView()
-            dre_view.PERCENTUAL_IMPOSTOS = Decimal(0)
-            
-            # Calcular DRE para este mês
-            dre_data = dre_view._calcular_dre(current_date, month_end)
+        # DRE de cada mês (sem impostos): meses fechados vêm do agregado
+        # persistido em dre_mensal, o mês corrente é calculado na hora
+        for current_date, dre_data in DREMensalService.obter_meses(data_inicio, data_fim):
             
             # Mapear dados para o formato ResumoMensal
             # Receitas (Competência)
@@ -541,9 +538,6 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
                 'detalhe_variaveis': detalhe_variaveis_v3
             })
 
-            
-            current_date = next_month
-
         # Calcular totais
         totais = {
             'entradas_contrato': sum(m['entradas_contrato'] for m in meses_list),
@@ -570,6 +564,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
 
 
     @action(detail=False, methods=['get'])
+    @cache_por_versao(*MODELOS_FINANCEIRO)
     def resumo_diario(self, request):
         """
         Resumo diário do fluxo de caixa realizado.
@@ -582,57 +577,33 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
 
         dias_dict = {}
 
-        # Contas a Pagar (Saídas)
-        pagar_diario = ContasPagar.objects.annotate(
-            data_efetiva=Coalesce('data_pagamento', 'vencimento', output_field=DateTimeField())
-        ).filter(
-            data_efetiva__date__gte=data_inicio,
-            data_efetiva__date__lte=data_fim,
-            status='P'
-        ).annotate(
-            dia=TruncDay('data_efetiva'),
-            valor_final=Case(
-                When(valor_total_pago__gt=0, then=F('valor_total_pago')),
-                default=F('valor'),
-                output_field=DecimalField()
+        def totais_por_dia(modelo):
+            """Total pago/recebido e quantidade por dia, em uma consulta"""
+            contas = modelo.objects.annotate(
+                data_efetiva=Coalesce('data_pagamento', 'vencimento', output_field=DateTimeField())
+            ).filter(
+                FiltroDatasService.entre('data_efetiva', data_inicio, data_fim),
+                status='P'
+            ).annotate(
+                valor_final=Case(
+                    When(valor_total_pago__gt=0, then=F('valor_total_pago')),
+                    default=F('valor'),
+                    output_field=DecimalField()
+                )
             )
-        ).values('dia').annotate(
-            total=Sum('valor_final'),
-            quantidade=Count('id')
-        )
-
-        for item in pagar_diario:
-            dia = item['dia']
-            if dia not in dias_dict:
-                dias_dict[dia] = {'data': dia, 'entradas': 0, 'saidas': 0, 'saldo': 0, 'qtd_entradas': 0, 'qtd_saidas': 0}
-            dias_dict[dia]['saidas'] += float(item['total'] or 0)
-            dias_dict[dia]['qtd_saidas'] += item['quantidade']
-
-        # Contas a Receber (Entradas)
-        receber_diario = ContasReceber.objects.annotate(
-            data_efetiva=Coalesce('data_pagamento', 'vencimento', output_field=DateTimeField())
-        ).filter(
-            data_efetiva__date__gte=data_inicio,
-            data_efetiva__date__lte=data_fim,
-            status='P'
-        ).annotate(
-            dia=TruncDay('data_efetiva'),
-            valor_final=Case(
-                When(valor_total_pago__gt=0, then=F('valor_total_pago')),
-                default=F('valor'),
-                output_field=DecimalField()
+            return AgrupamentoTemporalService.agregar(
+                contas, 'data_efetiva', DIA, output_field=DateTimeField(),
+                total=Sum('valor_final'), quantidade=Count('id')
             )
-        ).values('dia').annotate(
-            total=Sum('valor_final'),
-            quantidade=Count('id')
-        )
 
-        for item in receber_diario:
-            dia = item['dia']
-            if dia not in dias_dict:
-                dias_dict[dia] = {'data': dia, 'entradas': 0, 'saidas': 0, 'saldo': 0, 'qtd_entradas': 0, 'qtd_saidas': 0}
-            dias_dict[dia]['entradas'] += float(item['total'] or 0)
-            dias_dict[dia]['qtd_entradas'] += item['quantidade']
+        # Contas a Pagar (Saídas) e a Receber (Entradas)
+        for modelo, campo_total, campo_qtd in ((ContasPagar, 'saidas', 'qtd_saidas'),
+                                               (ContasReceber, 'entradas', 'qtd_entradas')):
+            for dia, item in totais_por_dia(modelo).items():
+                if dia not in dias_dict:
+                    dias_dict[dia] = {'data': dia, 'entradas': 0, 'saidas': 0, 'saldo': 0, 'qtd_entradas': 0, 'qtd_saidas': 0}
+                dias_dict[dia][campo_total] += float(item['total'] or 0)
+                dias_dict[dia][campo_qtd] += item['quantidade']
 
         # Calcular saldos
         dias_list = []
@@ -653,6 +624,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @cache_por_versao(*MODELOS_FINANCEIRO, *MODELOS_NOTAS, *MODELOS_ESTOQUE)
     def fluxo_completo(self, request):
         """
         Retorna fluxo de caixa combinado: realizado + previsto.
@@ -674,9 +646,8 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
             
             # CP Realizadas
             cp_realizadas = ContasPagar.objects.filter(
+                FiltroDatasService.entre('data_pagamento', data_inicio, data_fim_passado - timedelta(days=1)),
                 data_pagamento__isnull=False,
-                data_pagamento__date__gte=data_inicio,
-                data_pagamento__date__lt=data_fim_passado,
                 status='P'
             ).select_related('fornecedor').values(
                 'id', 'data_pagamento', 'valor_pago', 'fornecedor__nome', 'historico'
@@ -694,9 +665,8 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
 
             # CR Realizadas
             cr_realizadas = ContasReceber.objects.filter(
+                FiltroDatasService.entre('data_pagamento', data_inicio, data_fim_passado - timedelta(days=1)),
                 data_pagamento__isnull=False,
-                data_pagamento__date__gte=data_inicio,
-                data_pagamento__date__lt=data_fim_passado,
                 status='P'
             ).select_related('cliente').values(
                 'id', 'data_pagamento', 'recebido', 'cliente__nome', 'historico'
@@ -718,8 +688,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
             
             # CP Previstas
             cp_previstas = ContasPagar.objects.filter(
-                vencimento__date__gte=data_inicio_futuro,
-                vencimento__date__lte=data_fim,
+                FiltroDatasService.entre('vencimento', data_inicio_futuro, data_fim),
                 status='A'
             ).select_related('fornecedor').values(
                 'id', 'vencimento', 'valor', 'fornecedor__nome', 'historico'
@@ -737,8 +706,7 @@ class FluxoCaixaRealizadoViewSet(viewsets.ViewSet):
 
             # CR Previstas
             cr_previstas = ContasReceber.objects.filter(
-                vencimento__date__gte=data_inicio_futuro,
-                vencimento__date__lte=data_fim,
+                FiltroDatasService.entre('vencimento', data_inicio_futuro, data_fim),
                 status='A'
             ).select_related('cliente').values(
                 'id', 'vencimento', 'valor', 'cliente__nome', 'historico'
@@ -0,0 +1,30 @@
+# contas/views/perfil_views.py
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from ..services.perfil_requisicoes_service import PerfilRequisicoesService
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def perfil_endpoints(request):
+    """
+    Percentis de tempo, consultas e tamanho por endpoint (PerfilRequisicoesMiddleware).
+
+    GET ?ordenar=tempo|consultas|tempo_db|requisicoes&limite=N; DELETE zera as estatísticas.
+    """
+    if request.method == 'DELETE':
+        removidos = PerfilRequisicoesService.limpar()
+        return Response({'message': f'{removidos} endpoints removidos'})
+
+    try:
+        estatisticas = PerfilRequisicoesService.estatisticas(request.query_params.get('ordenar', 'tempo'))
+        limite = int(request.query_params.get('limite', 0))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if limite > 0:
+        estatisticas = estatisticas[:limite]
+    return Response({'endpoints': estatisticas})
@@ -2,10 +2,17 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Max
 from datetime import datetime
 
-from ..models.access import Fornecedores, ContasPagar, NotasFiscaisEntrada, NotasFiscaisSaida, NotasFiscaisServico, ItensNfSaida, MovimentacoesEstoque, SaldosEstoque
+from ..models.access import Fornecedores, ContasPagar, NotasFiscaisEntrada, NotasFiscaisSaida, NotasFiscaisServico, ItensNfSaida, SaldosEstoque
+from ..services.custo_entrada_service import CustoEntradaService
+from ..services.filtro_datas_service import FiltroDatasService
+from ..services.tipo_operacao_service import COMPRA, VENDA
+from ..services.classificacao_custos_service import (
+    ClassificacaoCustosService, TIPO_FIXO, TIPO_VARIAVEL
+)
+from ..services.cache_relatorios_service import MODELOS_ESTOQUE, MODELOS_NOTAS, cache_por_versao
 
 class RelatorioCustosFixosView(APIView):
     """
@@ -18,6 +25,7 @@ class RelatorioCustosFixosView(APIView):
     - Período de pagamento especificado
     """
     
+    @cache_por_versao(ContasPagar, Fornecedores)
     def get(self, request, *args, **kwargs):
         # 1. Validação de Parâmetros
         data_inicio_str = request.query_params.get('data_inicio')
@@ -52,53 +60,19 @@ class RelatorioCustosFixosView(APIView):
             # Categorias padrão para custos e despesas fixas
             categorias_filtro = ['despesas_operacionais', 'despesas_administrativas', 'impostos', 'aluguel']
 
-        # 2. Lógica de Negócio - Filtrar por nome do fornecedor contendo palavras-chave de custos fixos
+        # 2. Lógica de Negócio - Contas classificadas como custo fixo (tipo_custo gravado
+        # por ClassificacaoCustosService, o mesmo usado pelo DRE e pelo fluxo de caixa)
         
-        # Palavras-chave para identificar custos fixos no nome do fornecedor
-        # (alinhado com a classificação do fluxo de caixa)
-        KEYWORDS_FIXOS = ['FOLHA', 'PROLABORE', 'PRO-LABORE', 'ALUGUEL', 'SALARIO', 'SALÁRIO', 
-                         'INSS', 'FGTS', 'CONTADOR', 'CONTABILIDADE', 'LUZ', 'ENERGIA', 
-                         'ÁGUA', 'AGUA', 'TELEFONE', 'INTERNET', 'SEGURO']
-        
-        # Construir query para buscar fornecedores com nomes contendo palavras-chave
-        nome_query = Q()
-        for keyword in KEYWORDS_FIXOS:
-            nome_query |= Q(nome__icontains=keyword)
-        
-        fornecedores_fixos = Fornecedores.objects.filter(nome_query).values_list('id', flat=True)
-        
-        # Filtrar contas pagas por esses fornecedores no período
-        queryset = ContasPagar.objects.filter(
+        # Filtrar contas pagas no período já classificadas como fixas
+        contas_periodo = ContasPagar.objects.filter(
+            FiltroDatasService.entre('data_pagamento', data_inicio, data_fim),
             status='P',  # Apenas contas pagas
-            data_pagamento__date__range=(data_inicio, data_fim),
-            fornecedor_id__in=fornecedores_fixos
-        ).select_related('fornecedor', 'conta').order_by('-data_pagamento')
-        
-        # 3. Estrutura da Resposta
-        
-        # 3. Estrutura da Resposta - Agregação via Python para permitir categorização inteligente
+            fornecedor__isnull=False
+        )
+        queryset = contas_periodo.filter(tipo_custo=TIPO_FIXO).select_related('fornecedor', 'conta').order_by('-data_pagamento')
         
+        # 3. Estrutura da Resposta - a categoria vem gravada na conta (categoria_custo)
         pagamentos_detalhados = []
-        resumo_por_tipo = {} # Dicionário para acumular totais por categoria
-        resumo_por_fornecedor = {} # Dicionário para acumular totais por fornecedor
-
-        def definir_categoria_fixa(nome, tipo_original):
-            # Se já tiver um tipo definido no banco, respeita (opcional, pode-se forçar a regra também)
-            # Mas dada a queixa do usuário, vamos priorizar a regra de palavras-chave se o tipo for nulo ou genérico
-            
-            nome = str(nome or '').upper()
-            tipo_original = str(tipo_original or '').upper()
-            
-            if 'FOLHA' in nome or 'SALARIO' in nome or 'SALÁRIO' in nome: return 'Pessoal'
-            if 'PROLABORE' in nome or 'PRO-LABORE' in nome: return 'Pró-Labore'
-            if 'INSS' in nome or 'FGTS' in nome or 'DARF' in nome: return 'Impostos'
-            if 'ALUGUEL' in nome: return 'Aluguel'
-            if 'LUZ' in nome or 'ENERGIA' in nome or 'AGUA' in nome or 'ÁGUA' in nome: return 'Utilidades'
-            if 'TELEFONE' in nome or 'INTERNET' in nome: return 'Telecom'
-            if 'CONTADOR' in nome or 'CONTABILIDADE' in nome: return 'Contabilidade'
-            if 'SEGURO' in nome: return 'Seguros'
-            
-            return tipo_original if tipo_original and tipo_original != 'N/A' else 'Outros Fixos'
 
         for conta in queryset:
             # Função auxiliar para tratar valores numéricos None
@@ -108,12 +82,7 @@ class RelatorioCustosFixosView(APIView):
             val_tarifas = float(conta.tarifas or 0)
             
             nome_fornecedor = conta.fornecedor.nome if conta.fornecedor else 'N/A'
-            tipo_fornecedor_db = conta.fornecedor.tipo if conta.fornecedor else None
             
-            # Categoria Inteligente
-            categoria = definir_categoria_fixa(nome_fornecedor, tipo_fornecedor_db)
-            
-            # 1. Adicionar aos Detalhes
             pagamentos_detalhados.append({
                 'id': conta.id,
                 'data_pagamento': conta.data_pagamento.strftime('%Y-%m-%d') if conta.data_pagamento else 'N/A',
@@ -125,51 +94,40 @@ class RelatorioCustosFixosView(APIView):
                 'valor_total_pago': val_pago,
                 'historico': conta.historico or 'N/A',
                 'fornecedor_nome': nome_fornecedor,
-                'fornecedor_tipo': categoria, # Usamos a categoria calculada aqui também
+                'fornecedor_tipo': conta.categoria_custo,
                 'conta_bancaria': str(conta.conta) if conta.conta else 'N/A',
                 'forma_pagamento': conta.forma_pagamento or 'N/A',
                 'numero_duplicata': conta.numero_duplicata or 'N/A',
             })
-            
-            # 2. Agregação por Categoria (Tipo)
-            if categoria not in resumo_por_tipo:
-                resumo_por_tipo[categoria] = {
-                    'fornecedor__tipo': categoria,
-                    'total_pago': 0.0,
-                    'quantidade_contas': 0,
-                    'total_valor_original': 0.0,
-                    'total_juros': 0.0,
-                    'total_tarifas': 0.0
-                }
-            resumo_por_tipo[categoria]['total_pago'] += val_pago
-            resumo_por_tipo[categoria]['quantidade_contas'] += 1
-            resumo_por_tipo[categoria]['total_valor_original'] += val_original
-            resumo_por_tipo[categoria]['total_juros'] += val_juros
-            resumo_por_tipo[categoria]['total_tarifas'] += val_tarifas
-            
-            # 3. Agregação por Fornecedor (Nome)
-            if nome_fornecedor not in resumo_por_fornecedor:
-                resumo_por_fornecedor[nome_fornecedor] = {
-                    'fornecedor__nome': nome_fornecedor,
-                    'fornecedor__tipo': categoria,
-                    'total_pago': 0.0,
-                    'quantidade_contas': 0,
-                    'total_valor_original': 0.0,
-                    'total_juros': 0.0,
-                    'total_tarifas': 0.0
-                }
-            resumo_por_fornecedor[nome_fornecedor]['total_pago'] += val_pago
-            resumo_por_fornecedor[nome_fornecedor]['quantidade_contas'] += 1
-            resumo_por_fornecedor[nome_fornecedor]['total_valor_original'] += val_original
-            resumo_por_fornecedor[nome_fornecedor]['total_juros'] += val_juros
-            resumo_por_fornecedor[nome_fornecedor]['total_tarifas'] += val_tarifas
-
-        # Converter dicionários de resumo para listas
-        resumo_por_tipo_limpo = list(resumo_por_tipo.values())
-        resumo_por_tipo_limpo.sort(key=lambda x: x['total_pago'], reverse=True)
         
-        resumo_por_fornecedor_limpo = list(resumo_por_fornecedor.values())
-        resumo_por_fornecedor_limpo.sort(key=lambda x: x['total_pago'], reverse=True)
+        # Agregações por categoria e por fornecedor (GROUP BY)
+        def totais_agrupados(*campos, **extras):
+            return queryset.values(*campos).annotate(
+                total_pago=Sum('valor_total_pago'),
+                quantidade_contas=Count('id'),
+                total_valor_original=Sum('valor'),
+                total_juros=Sum('juros'),
+                total_tarifas=Sum('tarifas'),
+                **extras
+            ).order_by('-total_pago')
+        
+        def totais_float(linha):
+            return {
+                'total_pago': float(linha['total_pago'] or 0),
+                'quantidade_contas': linha['quantidade_contas'],
+                'total_valor_original': float(linha['total_valor_original'] or 0),
+                'total_juros': float(linha['total_juros'] or 0),
+                'total_tarifas': float(linha['total_tarifas'] or 0),
+            }
+        
+        resumo_por_tipo_limpo = [
+            {'fornecedor__tipo': linha['categoria_custo'], **totais_float(linha)}
+            for linha in totais_agrupados('categoria_custo')
+        ]
+        resumo_por_fornecedor_limpo = [
+            {'fornecedor__nome': linha['fornecedor__nome'], 'fornecedor__tipo': linha['categoria'], **totais_float(linha)}
+            for linha in totais_agrupados('fornecedor__nome', categoria=Max('categoria_custo'))
+        ]
         
         # Helper não é mais necessário dentro do loop pois fizemos conversão direta
         def safe_aggregate_value(value):
@@ -184,14 +142,14 @@ class RelatorioCustosFixosView(APIView):
         )
         
         # Estatísticas dos fornecedores
-        total_fornecedores_fixos = len(fornecedores_fixos)
+        total_fornecedores_fixos = ClassificacaoCustosService.total_fornecedores(TIPO_FIXO)
         fornecedores_com_pagamentos = queryset.values('fornecedor_id').distinct().count()
         
         return Response({
             'parametros': {
                 'data_inicio': data_inicio,
                 'data_fim': data_fim,
-                'filtro_aplicado': 'Fornecedores com nome contendo: FOLHA, PROLABORE, ALUGUEL, SALARIO, INSS, FGTS, CONTADOR, LUZ, ENERGIA, ÁGUA, TELEFONE, INTERNET, SEGURO',
+                'filtro_aplicado': 'Contas classificadas como custo fixo (fornecedor com nome contendo: FOLHA, PROLABORE, ALUGUEL, SALARIO, INSS, FGTS, CONTADOR, LUZ, ENERGIA, ÁGUA, TELEFONE, INTERNET, SEGURO)',
                 'fonte_dados': 'Contas a Pagar (status: Pago)',
             },
             'estatisticas_fornecedores': {
@@ -230,6 +188,7 @@ class RelatorioCustosVariaveisView(APIView):
             return 0.0
         return float(value)
     
+    @cache_por_versao(ContasPagar, Fornecedores)
     def get(self, request, *args, **kwargs):
         # 1. Validação de Parâmetros
         data_inicio_str = request.query_params.get('data_inicio')
@@ -256,49 +215,16 @@ class RelatorioCustosVariaveisView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        # 2. Lógica: Custos Variáveis = tudo que NÃO é custo fixo
-        # Palavras-chave para identificar custos fixos (a serem EXCLUÍDOS)
-        KEYWORDS_FIXOS = ['FOLHA', 'PROLABORE', 'PRO-LABORE', 'ALUGUEL', 'SALARIO', 'SALÁRIO', 
-                         'INSS', 'FGTS', 'CONTADOR', 'CONTABILIDADE', 'LUZ', 'ENERGIA', 
-                         'ÁGUA', 'AGUA', 'TELEFONE', 'INTERNET', 'SEGURO']
-        
-        # Construir query para EXCLUIR fornecedores com nomes contendo palavras-chave de custos fixos
-        exclude_query = Q()
-        for keyword in KEYWORDS_FIXOS:
-            exclude_query |= Q(nome__icontains=keyword)
-        
-        # Fornecedores variáveis = todos EXCETO os fixos
-        fornecedores_variaveis = Fornecedores.objects.exclude(exclude_query).values_list('id', flat=True)
-        
-        if not fornecedores_variaveis.exists():
-            return Response({
-                'parametros': {
-                    'data_inicio': data_inicio,
-                    'data_fim': data_fim,
-                    'filtro_aplicado': 'Fornecedores que NÃO são custos fixos (excluindo: FOLHA, PROLABORE, ALUGUEL, etc)',
-                    'fonte_dados': 'Contas a Pagar (status: Pago)',
-                },
-                'message': 'Nenhum fornecedor encontrado com tipo relacionado a custos variáveis.',
-                'totais_gerais': {
-                    'total_valor_original': 0.0,
-                    'total_valor_pago': 0.0,
-                    'total_juros': 0.0,
-                    'total_tarifas': 0.0,
-                },
-                'resumo_por_especificacao': [],
-                'total_contas_pagas': 0,
-                'contas_pagas': []
-            })
-        
-        # 3. Consultar contas pagas no período para fornecedores variáveis
-        queryset = ContasPagar.objects.filter(
+        # 2. Custos Variáveis = tudo que NÃO é custo fixo (tipo_custo gravado por
+        # ClassificacaoCustosService): contas pagas no período classificadas como variáveis
+        contas_periodo = ContasPagar.objects.filter(
+            FiltroDatasService.entre('data_pagamento', data_inicio, data_fim),
             status='P',  # Apenas contas pagas
-            fornecedor_id__in=fornecedores_variaveis,
-            data_pagamento__date__gte=data_inicio,
-            data_pagamento__date__lte=data_fim
-        ).select_related('fornecedor')
+            fornecedor__isnull=False,
+        )
+        queryset = contas_periodo.filter(tipo_custo=TIPO_VARIAVEL).select_related('fornecedor')
         
-        # 4. Calcular totais gerais
+        # 3. Calcular totais gerais
         totais_gerais = queryset.aggregate(
             soma_valor_original=Sum('valor'),
             soma_total_pago=Sum('valor_total_pago'),
@@ -306,176 +232,61 @@ class RelatorioCustosVariaveisView(APIView):
             soma_tarifas=Sum('tarifas')
         )
         
-        # 5. Agrupar por especificação do fornecedor
-        # 5. Agrupar por especificação do fornecedor e Detalhar Contas (Single Loop)
-        resumo_por_especificacao = {}
-        pagamentos_detalhados = []
+        # 4. Resumo por categoria (categoria_custo gravada na conta) via GROUP BY
+        fornecedores_por_categoria = {}
+        for categoria, nome in queryset.values_list('categoria_custo', 'fornecedor__nome').distinct().order_by():
+            fornecedores_por_categoria.setdefault(categoria, []).append(nome)
         
-        # Determinar categoria (Helper function) - Categorização Expandida
-        def definir_categoria(nome_fornecedor, historico, especificacao_original):
-            # Garantir strings seguras
-            nome_safe = str(nome_fornecedor) if nome_fornecedor is not None else ''
-            hist_safe = str(historico) if historico is not None else ''
-            texto = (nome_safe + ' ' + hist_safe).upper()
-            
-            # --- Categorias Financeiras ---
-            if 'TARIFA' in texto and ('BANC' in texto or 'BOLETO' in texto or 'PIX' in texto or 'CHEQUE' in texto or 'MANUTENÇ' in texto or 'RELACION' in texto or 'BAIXA' in texto or 'REGISTRO' in texto or 'ALTERAÇ' in texto or 'CONCESS' in texto):
-                return 'Tarifas Bancárias'
-            elif 'JUROS' in texto:
-                return 'Juros'
-            elif 'EMPREST' in texto or 'EMPRÉSTIMO' in texto or 'CONSIGNAD' in texto:
-                return 'Empréstimos'
-            elif 'COMPRA DE TIT' in texto or 'DESCONTO' in texto and 'TARIFA' not in texto:
-                return 'Operações Financeiras'
-            
-            # --- Categorias Operacionais / Logística ---
-            elif 'FRETE' in texto or 'TRANSPORT' in texto:
-                return 'Frete'
-            elif 'COMBUSTIVEL' in texto or 'COMBUSTÍVEL' in texto:
-                return 'Combustível'
-            elif 'ESTACIONAMENTO' in texto:
-                return 'Estacionamento'
-            elif 'MANUTENÇÃ' in texto and 'VEIC' in texto or 'VIA MOTOS' in texto or 'ÓLEO' in texto or 'OLEO' in texto or 'REVISÃO' in texto:
-                return 'Manutenção Veículos'
-            elif 'VIAGEM' in texto or 'PASSAGEM' in texto:
-                return 'Despesas de Viagem'
-            elif 'RASTREAMENTO' in texto:
-                return 'Rastreamento'
-            
-            # --- Categorias de Alimentação ---
-            elif 'REFEIÇÃO' in texto or 'REFEICAO' in texto:
-                return 'Alimentação'
-            elif 'COPA' in texto or 'CAFÉ' in texto or 'CAFE' in texto or 'AGUA' in texto or 'ÁGUA' in texto:
-                return 'Materiais Copa'
-            
-            # --- Categorias de Materiais ---
-            elif 'ASSIST' in texto and 'TECN' in texto or 'ASSIST.TECN' in texto:
-                return 'Materiais Assist. Técnica'
-            elif 'ESCRITORIO' in texto or 'ESCRITÓRIO' in texto:
-                return 'Materiais Escritório'
-            
-            # --- Categorias de Serviços ---
-            elif 'DIARISTA' in texto or 'SERV.TERCEIROS' in texto or 'SERVIÇOS TERCEIROS' in texto:
-                return 'Serviços Terceiros'
-            elif 'CONTADOR' in texto or 'CONTABIL' in texto or 'CONTÁBIL' in texto:
-                return 'Contabilidade'
-            elif 'CERTIFICAÇ' in texto or 'CERTIFICADO DIGITAL' in texto:
-                return 'Certificação Digital'
-            elif 'TREINAMENTO' in texto or 'CURSO' in texto:
-                return 'Treinamento'
-            elif 'MARKETING' in texto or 'IMPULSIONAMENTO' in texto:
-                return 'Marketing'
-            elif 'INTERMAX' in texto or 'SISTEMA' in texto:
-                return 'Software/Sistemas'
-            
-            # --- Categorias de Telecomunicações e Utilidades ---
-            elif 'OI' in nome_safe.upper() and ('CONTA' in texto or 'NIO' in texto) or 'TELEFONE' in texto:
-                return 'Telecomunicações'
-            elif 'COELCE' in texto or 'ENERGIA' in texto or 'LUZ' in texto:
-                return 'Energia Elétrica'
-            
-            # --- Categorias de Impostos e Taxas ---
-            elif 'ICMS' in texto or 'IMPOSTO' in texto:
-                return 'ICMS'
-            elif 'SIMPLES' in texto or 'DARF' in texto:
-                return 'Impostos'
-            elif 'CDL' in texto or 'SINDICATO' in texto:
-                return 'Associações/Sindicatos'
-            
-            # --- Categorias de Pessoal ---
-            elif 'CONFRATERNIZAÇ' in texto or 'ANIVERSÁRIO' in texto:
-                return 'Confraternização'
-            elif 'AJUDA CUSTO' in texto:
-                return 'Ajuda de Custo'
-            
-            # --- Categorias Comerciais ---
-            elif 'COMISSAO' in texto or 'COMISSÃO' in texto or 'REPRESENTANTE' in texto:
-                return 'Comissão'
-            
-            # --- Diversos ---
-            elif 'DIVERSOS' in texto:
-                return 'Diversos'
-            
-            # --- Se já tem especificação original útil, usa ela ---
-            if especificacao_original and especificacao_original.strip() and especificacao_original != 'Sem Especificação':
-                return especificacao_original
-            
-            # --- Fallback: Verificar se o nome do fornecedor parece ser de uma empresa (contém LTDA, ME, EIRELI, etc.) ---
-            if any(term in nome_safe.upper() for term in ['LTDA', 'ME', 'EIRELI', 'EPP', 'S/A', 'S.A.', 'COMERCIO', 'COMÉRCIO', 'DISTRIBUI', 'IMPORTA']):
-                return 'Fornecedor'
-            
-            return 'Outros'
-
+        resumo_por_especificacao_limpo = []
+        por_categoria = queryset.values('categoria_custo').annotate(
+            valor_original_total=Sum('valor'),
+            valor_pago_total=Sum('valor_total_pago'),
+            juros_total=Sum('juros'),
+            tarifas_total=Sum('tarifas'),
+            quantidade_contas=Count('id'),
+        ).order_by('-valor_pago_total')
+        for linha in por_categoria:
+            fornecedores = fornecedores_por_categoria.get(linha['categoria_custo'], [])
+            resumo_por_especificacao_limpo.append({
+                'especificacao': linha['categoria_custo'],
+                'valor_original_total': self.safe_aggregate_value(linha['valor_original_total']),
+                'valor_pago_total': self.safe_aggregate_value(linha['valor_pago_total']),
+                'juros_total': self.safe_aggregate_value(linha['juros_total']),
+                'tarifas_total': self.safe_aggregate_value(linha['tarifas_total']),
+                'quantidade_contas': linha['quantidade_contas'],
+                'fornecedores': fornecedores,
+                'quantidade_fornecedores': len(fornecedores),
+            })
+        
+        # 5. Detalhar contas
+        pagamentos_detalhados = []
         for conta in queryset.order_by('-data_pagamento'):
-            # Preparar dados
-            nome_fornecedor = conta.fornecedor.nome if conta.fornecedor else 'N/A'
-            tipo_fornecedor = conta.fornecedor.tipo if conta.fornecedor else 'N/A'
-            espec_original = conta.fornecedor.especificacao if conta.fornecedor else None
-            
-            categoria = definir_categoria(nome_fornecedor, conta.historico, espec_original)
-            
-            val_original = float(conta.valor or 0)
-            val_pago = float(conta.valor_total_pago or 0)
-            val_juros = float(conta.juros or 0)
-            val_tarifas = float(conta.tarifas or 0)
-            
-            # --- 1. Adicionar ao Resumo ---
-            if categoria not in resumo_por_especificacao:
-                resumo_por_especificacao[categoria] = {
-                    'especificacao': categoria,
-                    'valor_original_total': 0.0,
-                    'valor_pago_total': 0.0,
-                    'juros_total': 0.0,
-                    'tarifas_total': 0.0,
-                    'quantidade_contas': 0,
-                    'fornecedores': set()
-                }
-            
-            resumo_por_especificacao[categoria]['valor_original_total'] += val_original
-            resumo_por_especificacao[categoria]['valor_pago_total'] += val_pago
-            resumo_por_especificacao[categoria]['juros_total'] += val_juros
-            resumo_por_especificacao[categoria]['tarifas_total'] += val_tarifas
-            resumo_por_especificacao[categoria]['quantidade_contas'] += 1
-            
-            if conta.fornecedor:
-                resumo_por_especificacao[categoria]['fornecedores'].add(conta.fornecedor.nome)
-            
-            # --- 2. Adicionar aos Detalhes ---
             pagamentos_detalhados.append({
                 'id': conta.id,
                 'data_pagamento': conta.data_pagamento.strftime('%Y-%m-%d') if conta.data_pagamento else 'N/A',
-                'fornecedor_nome': nome_fornecedor,
-                'fornecedor_tipo': tipo_fornecedor,
-                'fornecedor_especificacao': categoria, 
-                'valor_original': val_original,
-                'valor_pago': val_pago,
-                'juros': val_juros,
-                'tarifas': val_tarifas,
+                'fornecedor_nome': conta.fornecedor.nome if conta.fornecedor else 'N/A',
+                'fornecedor_tipo': conta.fornecedor.tipo if conta.fornecedor else 'N/A',
+                'fornecedor_especificacao': conta.categoria_custo,
+                'valor_original': float(conta.valor or 0),
+                'valor_pago': float(conta.valor_total_pago or 0),
+                'juros': float(conta.juros or 0),
+                'tarifas': float(conta.tarifas or 0),
                 'historico': conta.historico or 'N/A',
                 'forma_pagamento': conta.forma_pagamento or 'N/A',
             })
         
-        # Converter sets para listas no resumo e ordenar
-        resumo_por_especificacao_limpo = []
-        for especificacao_data in resumo_por_especificacao.values():
-            especificacao_data['fornecedores'] = list(especificacao_data['fornecedores'])
-            especificacao_data['quantidade_fornecedores'] = len(especificacao_data['fornecedores'])
-            resumo_por_especificacao_limpo.append(especificacao_data)
-        
-        resumo_por_especificacao_limpo.sort(key=lambda x: x['valor_pago_total'], reverse=True)
-        
         # Detalhes já estão ordenados pela query loop
 
         
         # Estatísticas dos fornecedores
-        total_fornecedores_variaveis = fornecedores_variaveis.count()
+        total_fornecedores_variaveis = ClassificacaoCustosService.total_fornecedores(TIPO_VARIAVEL)
         fornecedores_com_pagamentos = queryset.values('fornecedor_id').distinct().count()
         
         return Response({
             'parametros': {
                 'data_inicio': data_inicio,
                 'data_fim': data_fim,
-                'filtro_aplicado': 'Fornecedores que NÃO são custos fixos (excluindo: FOLHA, PROLABORE, ALUGUEL, SALARIO, INSS, FGTS, etc)',
+                'filtro_aplicado': 'Contas classificadas como custo variável (fornecedores que NÃO são custos fixos: FOLHA, PROLABORE, ALUGUEL, SALARIO, INSS, FGTS, etc)',
                 'fonte_dados': 'Contas a Pagar (status: Pago)',
             },
             'estatisticas_fornecedores': {
@@ -504,8 +315,8 @@ class RelatorioFaturamentoView(APIView):
     - Notas Fiscais de Serviço (todas, pois são prestação de serviços)
     
     Filtros aplicados:
-    - NF Entrada: operação contendo 'COMPRA'
-    - NF Saída: operação contendo 'VENDA'
+    - NF Entrada: tipo_operacao COMPRA (operação contendo 'COMPRA')
+    - NF Saída: tipo_operacao VENDA (operação contendo 'VENDA')
     - NF Serviço: todas as notas de serviço
     - Período: data de emissão/data entre data_inicio e data_fim
     """
@@ -516,45 +327,29 @@ class RelatorioFaturamentoView(APIView):
             return 0.0
         return float(value)
     
-    def _obter_ultimo_preco_entrada(self, produto_id, data_limite):
+    def _obter_ultimos_precos_entrada(self, produto_ids, data_limite):
         """
-        Busca o último preço de entrada do produto, mesmo anterior ao período
+        Busca o último preço de entrada de cada produto, mesmo anterior ao período.
+        Retorna {produto_id: {'preco', 'data', 'documento', 'encontrado'}}.
         """
-        tipos_entrada = [1, 3]  # Entrada e Estoque Inicial
-        
-        # Busca última entrada com valor > 0 até a data limite
-        ultima_entrada = MovimentacoesEstoque.objects.filter(
-            produto_id=produto_id,
-            tipo_movimentacao__id__in=tipos_entrada,
-            quantidade__gt=0,
-            custo_unitario__gt=0,
-            data_movimentacao__date__lte=data_limite
-        ).order_by('-data_movimentacao', '-id').first()
-        
-        if ultima_entrada:
-            return {
-                'preco': float(ultima_entrada.custo_unitario),
-                'data': ultima_entrada.data_movimentacao.strftime('%Y-%m-%d %H:%M:%S'),
-                'documento': ultima_entrada.documento_referencia or '',
-                'encontrado': True
-            }
+        precos = CustoEntradaService.precos_ultima_entrada(produto_ids, data_limite)
         
         # Se não encontrou, tenta buscar no SaldosEstoque
-        saldo = SaldosEstoque.objects.filter(produto_id=produto_id, custo_medio__gt=0).first()
-        if saldo and saldo.custo_medio:
-            return {
-                'preco': float(saldo.custo_medio),
-                'data': None,
-                'documento': 'Custo médio atual',
-                'encontrado': True
-            }
-        
-        return {
-            'preco': 0.0,
-            'data': None,
-            'documento': '',
-            'encontrado': False
-        }
+        sem_entrada = [pid for pid, info in precos.items() if not info['encontrado']]
+        if sem_entrada:
+            saldos = SaldosEstoque.objects.filter(
+                produto_id__in=sem_entrada, custo_medio__gt=0
+            ).order_by('produto_id', 'id').values_list('produto_id', 'custo_medio')
+            for produto_id, custo_medio in saldos:
+                if not precos[produto_id]['encontrado']:
+                    precos[produto_id] = {
+                        'preco': float(custo_medio),
+                        'data': None,
+                        'documento': 'Custo médio atual',
+                        'encontrado': True
+                    }
+        
+        return precos
     
     def _calcular_valores_preco_entrada(self, nf_saida_queryset, data_fim):
         """
@@ -565,14 +360,18 @@ class RelatorioFaturamentoView(APIView):
         produtos_sem_preco_entrada = 0
         
         # Busca todos os itens das notas fiscais de saída no período
-        itens_vendas = ItensNfSaida.objects.filter(
+        itens_vendas = list(ItensNfSaida.objects.filter(
             nota_fiscal__in=nf_saida_queryset
-        ).select_related('produto')
+        ).select_related('produto'))
+        
+        precos_entrada = self._obter_ultimos_precos_entrada(
+            {item.produto_id for item in itens_vendas if item.produto_id}, data_fim
+        )
         
         for item in itens_vendas:
             if item.produto and item.quantidade:
-                # Busca último preço de entrada do produto
-                preco_info = self._obter_ultimo_preco_entrada(item.produto.id, data_fim)
+                # Último preço de entrada do produto
+                preco_info = precos_entrada[item.produto.id]
                 
                 if preco_info['encontrado']:
                     valor_item_preco_entrada = float(item.quantidade) * preco_info['preco']
@@ -587,6 +386,7 @@ class RelatorioFaturamentoView(APIView):
             'produtos_sem_preco_entrada': produtos_sem_preco_entrada
         }
     
+    @cache_por_versao(*MODELOS_NOTAS, *MODELOS_ESTOQUE)
     def get(self, request, *args, **kwargs):
         # 1. Validação de Parâmetros
         data_inicio_str = request.query_params.get('data_inicio')
@@ -615,22 +415,19 @@ class RelatorioFaturamentoView(APIView):
         
         # 2. Consultar Notas Fiscais de Entrada (Compras)
         nf_entrada = NotasFiscaisEntrada.objects.filter(
-            Q(operacao__icontains='COMPRA'),
-            data_emissao__date__gte=data_inicio,
-            data_emissao__date__lte=data_fim
+            FiltroDatasService.entre('data_emissao', data_inicio, data_fim),
+            tipo_operacao=COMPRA,
         ).select_related('fornecedor')
         
         # 3. Consultar Notas Fiscais de Saída (Vendas)
         nf_saida = NotasFiscaisSaida.objects.filter(
-            Q(operacao__icontains='VENDA'),
-            data__date__gte=data_inicio,
-            data__date__lte=data_fim
+            FiltroDatasService.entre('data', data_inicio, data_fim),
+            tipo_operacao=VENDA,
         ).select_related('cliente')
         
         # 4. Consultar Notas Fiscais de Serviço
         nf_servico = NotasFiscaisServico.objects.filter(
-            data__date__gte=data_inicio,
-            data__date__lte=data_fim
+            FiltroDatasService.entre('data', data_inicio, data_fim)
         ).select_related('cliente')
         
         # 5. Calcular totais por tipo de nota
@@ -813,13 +610,17 @@ class RelatorioFaturamentoView(APIView):
             })
         
         # Vendas
-        for nf in nf_saida.order_by('-data'):
+        notas_vendas = list(nf_saida.order_by('-data').prefetch_related('itens__produto'))
+        precos_entrada = self._obter_ultimos_precos_entrada(
+            {item.produto_id for nf in notas_vendas for item in nf.itens.all() if item.produto_id}, data_fim
+        )
+        for nf in notas_vendas:
             # Calcular custo estimado desta nota
             custo_estimado_nota = 0.0
             itens_nota = []
             for item in nf.itens.all():
                 if item.produto and item.quantidade:
-                    preco_info = self._obter_ultimo_preco_entrada(item.produto.id, data_fim)
+                    preco_info = precos_entrada[item.produto.id]
                     custo_item = 0.0
                     if preco_info['encontrado']:
                         custo_item = float(item.quantidade) * preco_info['preco']
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Adicione no topo
     'django.middleware.security.SecurityMiddleware',
+    'contas.middleware.PerfilRequisicoesMiddleware',  # Tempo, consultas e tamanho por endpoint
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -94,6 +95,42 @@ DATABASES = {
     }
 }
 
+# Cache
+# Respostas dos relatórios pesados ficam em 'relatorios', com chave que inclui a
+# versão das tabelas consultadas (contas.services.cache_relatorios_service).
+# LocMem é por processo; para compartilhar entre workers use
+# django.core.cache.backends.filebased.FileBasedCache ou Redis.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'relatorios': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'relatorios',
+        'TIMEOUT': 60 * 60 * 12,
+        'OPTIONS': {'MAX_ENTRIES': 500},
+    },
+}
+
+# Django REST Framework
+# Listagens dos ViewSets paginadas por keyset (contas.pagination)
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'contas.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
+}
+
+# Perfil de desempenho por endpoint (contas.middleware.PerfilRequisicoesMiddleware)
+# Consultar em /api/perfil-endpoints/ (admin) ou com `manage.py perfil_endpoints`.
+
+PERFIL_REQUISICOES = {
+    'ATIVO': True,
+    'AMOSTRAS': 500,           # Janela dos percentis por endpoint
+    'INTERVALO_GRAVACAO': 60,  # Segundos entre gravações em perfil_endpoints
+    'LIMITE_LENTO_MS': 1000,   # Acima disso a requisição vai para o log
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -37,8 +37,8 @@ def refresh_view_materializada():
     """Atualiza view materializada de estoque"""
     print("🔄 Atualizando view materializada...")
     
-    with connection.cursor() as cursor:
-        cursor.execute("REFRESH MATERIALIZED VIEW view_saldos_estoque_rapido;")
+    from contas.services.saldo_estoque_service import SaldoEstoqueService
+    if SaldoEstoqueService.atualizar():
         print("  ✅ View atualizada")
 
 def limpar_cache_antigo():
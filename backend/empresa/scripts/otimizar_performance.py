@@ -1,145 +1,19 @@
 #!/usr/bin/env python
 """
 Script para aplicar otimizações de performance
-Cria índices e implementa melhorias nos endpoints
+Implementa melhorias nos endpoints (os índices e a view de saldos ficam nas migrações do app contas)
 """
 
 import os
 import sys
 import django
 from datetime import datetime
-from django.db import connection
 
 # Configurar Django
 sys.path.append(os.path.abspath('.'))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'empresa.settings')
 django.setup()
 
-def criar_indices_performance():
-    """Cria índices para melhorar performance"""
-    print("🔧 CRIANDO ÍNDICES PARA PERFORMANCE")
-    print("=" * 60)
-    
-    indices = [
-        {
-            'nome': 'idx_movimentacoes_data_movimentacao',
-            'sql': 'CREATE INDEX IF NOT EXISTS idx_movimentacoes_data_movimentacao ON movimentacoes_estoque(data_movimentacao);',
-            'descricao': 'Índice para consultas por data'
-        },
-        {
-            'nome': 'idx_movimentacoes_data_date', 
-            'sql': 'CREATE INDEX IF NOT EXISTS idx_movimentacoes_data_date ON movimentacoes_estoque(DATE(data_movimentacao));',
-            'descricao': 'Índice para consultas por data (apenas data)'
-        },
-        {
-            'nome': 'idx_movimentacoes_produto_data',
-            'sql': 'CREATE INDEX IF NOT EXISTS idx_movimentacoes_produto_data ON movimentacoes_estoque(produto_id, data_movimentacao);',
-            'descricao': 'Índice composto produto + data'
-        },
-        {
-            'nome': 'idx_movimentacoes_tipo_data',
-            'sql': 'CREATE INDEX IF NOT EXISTS idx_movimentacoes_tipo_data ON movimentacoes_estoque(tipo_movimentacao_id, data_movimentacao);',
-            'descricao': 'Índice composto tipo + data'
-        },
-        {
-            'nome': 'idx_saldos_quantidade',
-            'sql': 'CREATE INDEX IF NOT EXISTS idx_saldos_quantidade ON saldos_estoque(quantidade) WHERE quantidade > 0;',
-            'descricao': 'Índice parcial para saldos positivos'
-        },
-        {
-            'nome': 'idx_contas_pagar_status_venc',
-            'sql': 'CREATE INDEX IF NOT EXISTS idx_contas_pagar_status_venc ON contas_pagar(status, data_vencimento);',
-            'descricao': 'Índice composto status + vencimento'
-        },
-        {
-            'nome': 'idx_contas_receber_status_venc',
-            'sql': 'CREATE INDEX IF NOT EXISTS idx_contas_receber_status_venc ON contas_receber(status, data_vencimento);',
-            'descricao': 'Índice composto status + vencimento'
-        }
-    ]
-    
-    sucessos = 0
-    erros = 0
-    
-    with connection.cursor() as cursor:
-        for indice in indices:
-            try:
-                print(f"📝 Criando {indice['nome']}...")
-                cursor.execute(indice['sql'])
-                print(f"✅ {indice['descricao']}")
-                sucessos += 1
-            except Exception as e:
-                print(f"❌ Erro ao criar {indice['nome']}: {str(e)}")
-                erros += 1
-    
-    print(f"\n📊 Resultado: {sucessos} sucessos, {erros} erros")
-    print()
-
-def criar_view_materializada_estoque():
-    """Cria view materializada para consultas de estoque rápidas"""
-    print("📊 CRIANDO VIEW MATERIALIZADA PARA ESTOQUE")
-    print("=" * 60)
-    
-    sql_view = """
-    CREATE MATERIALIZED VIEW IF NOT EXISTS view_saldos_estoque_rapido AS
-    SELECT 
-        me.produto_id,
-        p.codigo as produto_codigo,
-        p.nome as produto_nome,
-        p.preco_custo as custo_unitario,
-        SUM(CASE 
-            WHEN tme.tipo = 'E' THEN me.quantidade 
-            WHEN tme.tipo = 'S' THEN -me.quantidade 
-            ELSE 0 
-        END) as saldo_atual,
-        MAX(me.data_movimentacao) as ultima_movimentacao,
-        COUNT(*) as total_movimentacoes
-    FROM movimentacoes_estoque me
-    INNER JOIN produtos p ON me.produto_id = p.id
-    INNER JOIN tipos_movimentacao_estoque tme ON me.tipo_movimentacao_id = tme.id
-    GROUP BY me.produto_id, p.codigo, p.nome, p.preco_custo
-    HAVING SUM(CASE 
-        WHEN tme.tipo = 'E' THEN me.quantidade 
-        WHEN tme.tipo = 'S' THEN -me.quantidade 
-        ELSE 0 
-    END) > 0;
-    """
-    
-    sql_index = """
-    CREATE UNIQUE INDEX IF NOT EXISTS idx_view_saldos_produto 
-    ON view_saldos_estoque_rapido(produto_id);
-    """
-    
-    sql_index2 = """
-    CREATE INDEX IF NOT EXISTS idx_view_saldos_codigo 
-    ON view_saldos_estoque_rapido(produto_codigo);
-    """
-    
-    try:
-        with connection.cursor() as cursor:
-            print("📝 Criando view materializada...")
-            cursor.execute(sql_view)
-            print("✅ View materializada criada")
-            
-            print("📝 Criando índices na view...")
-            cursor.execute(sql_index)
-            cursor.execute(sql_index2)
-            print("✅ Índices da view criados")
-            
-            print("📝 Atualizando dados da view...")
-            cursor.execute("REFRESH MATERIALIZED VIEW view_saldos_estoque_rapido;")
-            print("✅ View atualizada")
-            
-            # Verifica quantos registros foram criados
-            cursor.execute("SELECT COUNT(*) FROM view_saldos_estoque_rapido;")
-            count = cursor.fetchone()[0]
-            print(f"📊 {count:,} produtos com estoque na view")
-            
-    except Exception as e:
-        print(f"❌ Erro ao criar view materializada: {str(e)}")
-    
-    print()
-
 def otimizar_configuracoes_django():
     """Cria arquivo com configurações otimizadas"""
     print("⚙️ GERANDO CONFIGURAÇÕES OTIMIZADAS")
@@ -476,8 +350,8 @@ def refresh_view_materializada():
     """Atualiza view materializada de estoque"""
     print("🔄 Atualizando view materializada...")
     
-    with connection.cursor() as cursor:
-        cursor.execute("REFRESH MATERIALIZED VIEW view_saldos_estoque_rapido;")
+    from contas.services.saldo_estoque_service import SaldoEstoqueService
+    if SaldoEstoqueService.atualizar():
         print("  ✅ View atualizada")
 
 def limpar_cache_antigo():
@@ -548,8 +422,7 @@ def main():
     print("=" * 80)
     
     try:
-        criar_indices_performance()
-        criar_view_materializada_estoque()
+        # Os índices e view_saldos_estoque_rapido vêm das migrações do app contas (python manage.py migrate)
         otimizar_configuracoes_django()
         criar_endpoint_otimizado()
         criar_script_manutencao()
@@ -559,7 +432,7 @@ def main():
         print("=" * 80)
         
         print("🎯 PRÓXIMOS PASSOS:")
-        print("1. ✅ Índices criados no banco de dados")
+        print("1. ✅ Índices: aplicados por python manage.py migrate")
         print("2. ✅ View materializada criada") 
         print("3. 📄 Arquivo de configurações gerado (configuracoes_performance.py)")
         print("4. 🚀 Endpoint otimizado criado (endpoint_estoque_otimizado.py)")
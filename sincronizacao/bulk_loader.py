@@ -0,0 +1,624 @@
+"""
+Carga em lote compartilhada pelos scripts migrate_*.
+
+Cada tabela é carregada em duas etapas:
+  1. as linhas já limpas são enviadas por COPY FROM STDIN para uma tabela
+     temporária de staging com as mesmas colunas do destino;
+  2. um único INSERT ... SELECT ... ON CONFLICT DO UPDATE leva o staging para
+     a tabela final (última ocorrência de cada chave vence).
+
+Se o merge em conjunto falhar (FK, NOT NULL, etc.), as linhas são aplicadas
+uma a uma dentro de SAVEPOINTs para isolar e contar as linhas com erro.
+
+Com chave, a carga é incremental: o hash de cada linha (ou grupo de linhas)
+fica em sync_hashes no próprio destino e só o que é novo ou mudou desde a
+última carga vai para o staging; extrações por data guardam o high-water
+mark em sync_marcas. SYNC_COMPLETO=1 ignora esse estado (recarga completa).
+Cargas que alteram linhas incrementam a versão da tabela em versoes_tabelas
+(cache de relatórios do Django) no mesmo commit. Com coluna_data, a menor e
+a maior data das linhas alteradas (novas e substituídas) ficam no resultado,
+para as tarefas que invalidam agregados por período (ex.: dre_mensal).
+
+Para testes locais o destino pode ser uma conexão sqlite3 (staging via
+executemany) e a origem pode ser um arquivo SQLite ou um diretório de CSVs
+no lugar dos .mdb do Access (ver conectar_origem / SYNC_ORIGEM_DIR).
+"""
+import csv
+import hashlib
+import io
+import ntpath
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from pathlib import Path
+
+EXTENSOES_ACCESS = ('.mdb', '.accdb')
+EXTENSOES_SQLITE = ('.sqlite', '.sqlite3', '.db')
+
+# Resultados das cargas da execução atual (consumidos pelo resumo do sync)
+_resultados = []
+
+
+@dataclass
+class LoadResult:
+    tabela: str
+    linhas: int = 0
+    inseridas: int = 0
+    atualizadas: int = 0
+    ignoradas: int = 0
+    inalteradas: int = 0
+    erros: int = 0
+    segundos: float = 0.0
+    marca: object = None
+    menor_data: object = None
+    maior_data: object = None
+
+    def imprimir(self):
+        marca = f" | marca: {self.marca}" if self.marca is not None else ""
+        print(
+            f"[{self.tabela}] linhas: {self.linhas} | inseridas: {self.inseridas} | "
+            f"atualizadas: {self.atualizadas} | inalteradas: {self.inalteradas} | "
+            f"ignoradas: {self.ignoradas} | erros: {self.erros} | tempo: {self.segundos:.2f}s{marca}"
+        )
+
+
+def resultados():
+    return list(_resultados)
+
+
+def limpar_resultados():
+    _resultados.clear()
+
+
+def imprimir_resumo():
+    if not _resultados:
+        return
+    print("\n=== RESUMO DAS CARGAS ===")
+    for resultado in _resultados:
+        resultado.imprimir()
+
+
+# ---------------------------------------------------------------------------
+# Conexões
+# ---------------------------------------------------------------------------
+
+def _nome_base(db_path):
+    caminho = str(db_path)
+    return ntpath.basename(caminho) if '\\' in caminho else os.path.basename(caminho)
+
+
+def _resolver_origem(db_path):
+    """
+    Com SYNC_ORIGEM_DIR definido, troca o .mdb do Access por um substituto
+    local de mesmo nome: <dir>/<Nome>.sqlite|.sqlite3|.db ou <dir>/<Nome>/ (CSVs).
+    """
+    diretorio = os.environ.get('SYNC_ORIGEM_DIR')
+    if not diretorio:
+        return str(db_path)
+
+    nome = os.path.splitext(_nome_base(db_path))[0]
+    for extensao in EXTENSOES_SQLITE:
+        candidato = Path(diretorio) / f"{nome}{extensao}"
+        if candidato.exists():
+            return str(candidato)
+    candidato = Path(diretorio) / nome
+    if candidato.is_dir():
+        return str(candidato)
+    raise FileNotFoundError(f"Substituto local para {nome} não encontrado em {diretorio}")
+
+
+def _csv_para_sqlite(diretorio):
+    """Carrega cada <Tabela>.csv do diretório em uma tabela [Tabela] de um SQLite em memória."""
+    conn = sqlite3.connect(':memory:')
+    for arquivo in sorted(Path(diretorio).glob('*.csv')):
+        with open(arquivo, newline='', encoding='utf-8-sig') as f:
+            leitor = csv.reader(f)
+            cabecalho = next(leitor, None)
+            if not cabecalho:
+                continue
+            colunas = ', '.join(f'[{coluna}]' for coluna in cabecalho)
+            marcadores = ', '.join('?' for _ in cabecalho)
+            conn.execute(f"CREATE TABLE [{arquivo.stem}] ({colunas})")
+            conn.executemany(
+                f"INSERT INTO [{arquivo.stem}] VALUES ({marcadores})",
+                ([valor if valor != '' else None for valor in linha] for linha in leitor)
+            )
+    conn.commit()
+    return conn
+
+
+def conectar_origem(db_path):
+    """
+    Abre a base de origem: Access via pyodbc, ou um substituto local
+    (arquivo SQLite ou diretório de CSVs) com a mesma interface DB-API.
+    """
+    caminho = _resolver_origem(db_path)
+    extensao = os.path.splitext(caminho)[1].lower()
+
+    if extensao in EXTENSOES_ACCESS:
+        import pyodbc
+        from config import ACCESS_PASSWORD
+        conn_str = (
+            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
+            f'DBQ={caminho};'
+            f'PWD={ACCESS_PASSWORD};'
+        )
+        return pyodbc.connect(conn_str)
+    if extensao in EXTENSOES_SQLITE:
+        return sqlite3.connect(caminho, detect_types=sqlite3.PARSE_DECLTYPES)
+    if os.path.isdir(caminho):
+        return _csv_para_sqlite(caminho)
+    raise ValueError(f"Origem não suportada: {caminho}")
+
+
+def listar_tabelas_origem(conn):
+    """Nomes das tabelas de usuário da origem (Access ou SQLite)."""
+    if isinstance(conn, sqlite3.Connection):
+        return [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )]
+    return [row.table_name for row in conn.cursor().tables(tableType='TABLE')]
+
+
+def conectar_destino():
+    import psycopg2
+    from config import PG_CONFIG
+    return psycopg2.connect(**PG_CONFIG)
+
+
+# ---------------------------------------------------------------------------
+# Carga
+# ---------------------------------------------------------------------------
+
+def _texto_copy(valor):
+    """Formata um valor para o formato texto do COPY (tab como separador, \\N como NULL)."""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    if isinstance(valor, datetime):
+        return valor.isoformat(sep=' ')
+    if isinstance(valor, (date, dt_time)):
+        return valor.isoformat()
+    texto = str(valor)
+    return (
+        texto.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _hash_linha(valores):
+    return hashlib.md5('\x1f'.join(_texto_copy(v) for v in valores).encode('utf-8')).hexdigest()
+
+
+def _texto_chave(valores):
+    return '\x1f'.join('' if v is None else str(v) for v in valores)
+
+
+class BulkLoader:
+    """
+    Carga de uma tabela via staging + merge.
+
+    chave: colunas do ON CONFLICT (padrão: id). None = INSERT simples, sem merge.
+    atualizar: colunas atualizadas no conflito (padrão: todas fora da chave);
+               lista vazia = ON CONFLICT DO NOTHING (primeira ocorrência vence).
+    substituir: a chave identifica um grupo de linhas sem id próprio (ex.: itens
+                de uma nota); grupos alterados são apagados e reinseridos.
+    incremental: guarda o hash de cada chave (ou grupo) em sync_hashes e só
+                 envia ao destino o que é novo ou mudou desde a última carga.
+    sem_hash: colunas fora do hash (valores gerados na carga, ex.: datetime.now()).
+    coluna_data: expressão SQL com a data de uma linha, sobre o alias x (ex.:
+                 'x.data' ou uma subconsulta à nota); registra em menor_data e
+                 maior_data o intervalo das linhas enviadas e das que elas substituem.
+    """
+
+    TAMANHO_LOTE = 20000
+
+    def __init__(self, conn, tabela, colunas, chave=('id',), atualizar=None,
+                 substituir=False, incremental=True, sem_hash=(), coluna_data=None):
+        self.conn = conn
+        self.tabela = tabela
+        self.colunas = list(colunas)
+        self.chave = list(chave) if chave else None
+        if atualizar is None:
+            atualizar = [c for c in self.colunas if not self.chave or c not in self.chave]
+        self.atualizar = list(atualizar)
+        self.substituir = bool(substituir and self.chave)
+        self.incremental = bool(incremental and self.chave)
+        self.coluna_data = coluna_data
+        self.staging = f"_stg_{tabela}"
+        self.sqlite = isinstance(conn, sqlite3.Connection)
+        self.cursor = conn.cursor()
+        self.resultado = LoadResult(tabela)
+        self._lote = []
+        self._enviadas = 0
+        self._falhas = set()
+        self._marca = None
+        self._inicio = time.perf_counter()
+
+        self._indices_chave = [self.colunas.index(c) for c in self.chave or []]
+        self._indices_hash = [i for i, c in enumerate(self.colunas) if c not in sem_hash]
+        self._grupos = {}
+        self._hashes_anteriores = {}
+        self._hashes_novos = {}
+        if self.incremental:
+            garantir_tabelas_estado(self.conn)
+            if not modo_completo() and self._destino_tem_linhas():
+                self._hashes_anteriores = self._carregar_hashes()
+
+        self._criar_staging()
+
+    # -- API usada pelos scripts ------------------------------------------------
+
+    def adicionar(self, linha):
+        if len(linha) != len(self.colunas):
+            raise ValueError(
+                f"{self.tabela}: linha com {len(linha)} valores para {len(self.colunas)} colunas"
+            )
+        self.resultado.linhas += 1
+        if self.incremental:
+            chave = tuple(linha[i] for i in self._indices_chave)
+            self._grupos.setdefault(chave, []).append(tuple(linha))
+            return
+        self._enfileirar(linha)
+
+    def ignorar(self):
+        """Linha descartada pela validação do script (ex.: cliente inexistente)."""
+        self.resultado.ignoradas += 1
+
+    def registrar_erro(self, identificador, erro):
+        """Linha que falhou na limpeza/conversão antes de chegar ao staging."""
+        self.resultado.erros += 1
+        print(f"Erro ao processar {self.tabela} {identificador}: {erro}")
+
+    def definir_marca(self, valor):
+        """High-water mark gravado em sync_marcas no mesmo commit da carga."""
+        self._marca = valor
+
+    def aplicar(self):
+        """Envia e aplica o merge sem commit (para cargas que compartilham a transação)."""
+        self._selecionar_alteradas()
+        self._enviar_lote()
+        self._merge()
+        self.cursor.execute(f"DROP TABLE IF EXISTS {self.staging}")
+
+    def finalizar(self):
+        """Envia o restante, aplica o merge, grava o estado incremental, faz commit e devolve as estatísticas."""
+        try:
+            self.aplicar()
+            self._gravar_estado()
+            if self.resultado.inseridas or self.resultado.atualizadas:
+                incrementar_versao(self.conn, self.tabela)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.resultado.segundos = time.perf_counter() - self._inicio
+
+        _resultados.append(self.resultado)
+        self.resultado.imprimir()
+        return self.resultado
+
+    # -- estado incremental ---------------------------------------------------------
+
+    def _destino_tem_linhas(self):
+        """Destino vazio (truncado ou recriado) invalida os hashes guardados."""
+        self.cursor.execute(f"SELECT 1 FROM {self.tabela} LIMIT 1")
+        return self.cursor.fetchone() is not None
+
+    def _carregar_hashes(self):
+        self.cursor.execute(
+            f"SELECT chave, hash FROM sync_hashes WHERE tabela = {_marcador(self.conn)}", (self.tabela,)
+        )
+        return dict(self.cursor.fetchall())
+
+    def _selecionar_alteradas(self):
+        """Envia ao staging só as chaves (ou grupos) cujo hash mudou."""
+        if not self.incremental:
+            return
+        for chave, linhas in self._grupos.items():
+            if not self.substituir:
+                # Mesma regra do merge: última ocorrência (DO UPDATE) ou primeira (DO NOTHING)
+                self.resultado.ignoradas += len(linhas) - 1
+                linhas = [linhas[-1] if self.atualizar else linhas[0]]
+
+            texto_chave = _texto_chave(chave)
+            assinatura = _hash_linha(
+                valor for linha in linhas for valor in (linha[i] for i in self._indices_hash)
+            )
+            if self._hashes_anteriores.get(texto_chave) == assinatura:
+                self.resultado.inalteradas += len(linhas)
+                continue
+
+            self._hashes_novos[texto_chave] = assinatura
+            for linha in linhas:
+                self._enfileirar(linha)
+        self._grupos = {}
+
+    def _gravar_estado(self):
+        for chave in self._falhas:
+            self._hashes_novos.pop(_texto_chave(chave), None)
+        if self._hashes_novos:
+            estado = BulkLoader(
+                self.conn, 'sync_hashes', ['tabela', 'chave', 'hash'],
+                chave=('tabela', 'chave'), incremental=False
+            )
+            for chave, assinatura in self._hashes_novos.items():
+                estado.adicionar((self.tabela, chave, assinatura))
+            estado.aplicar()
+        if self._marca is not None:
+            gravar_marca(self.conn, self.tabela, self._marca)
+        self.resultado.marca = self._marca
+
+    # -- staging ------------------------------------------------------------------
+
+    def _lista(self, colunas, prefixo=''):
+        return ', '.join(f'{prefixo}{c}' for c in colunas)
+
+    def _criar_staging(self):
+        self.cursor.execute(f"DROP TABLE IF EXISTS {self.staging}")
+        if self.sqlite:
+            self.cursor.execute(
+                f"CREATE TEMP TABLE {self.staging} AS "
+                f"SELECT {self._lista(self.colunas)} FROM {self.tabela} WHERE 0"
+            )
+            self.cursor.execute(f"ALTER TABLE {self.staging} ADD COLUMN _seq INTEGER")
+        else:
+            self.cursor.execute(
+                f"CREATE TEMP TABLE {self.staging} AS "
+                f"SELECT {self._lista(self.colunas)} FROM {self.tabela} WITH NO DATA"
+            )
+            self.cursor.execute(f"ALTER TABLE {self.staging} ADD COLUMN _seq bigint")
+
+    def _enfileirar(self, linha):
+        self._enviadas += 1
+        self._lote.append(tuple(linha) + (self._enviadas,))
+        if len(self._lote) >= self.TAMANHO_LOTE:
+            self._enviar_lote()
+
+    def _enviar_lote(self):
+        if not self._lote:
+            return
+        colunas = self._lista(self.colunas + ['_seq'])
+        if self.sqlite:
+            marcadores = ', '.join('?' for _ in range(len(self.colunas) + 1))
+            self.cursor.executemany(
+                f"INSERT INTO {self.staging} ({colunas}) VALUES ({marcadores})",
+                [tuple(str(v) if isinstance(v, Decimal) else v for v in linha) for linha in self._lote]
+            )
+        else:
+            buffer = io.StringIO()
+            for linha in self._lote:
+                buffer.write('\t'.join(_texto_copy(valor) for valor in linha))
+                buffer.write('\n')
+            buffer.seek(0)
+            self.cursor.copy_expert(f"COPY {self.staging} ({colunas}) FROM STDIN", buffer)
+        self._lote = []
+
+    # -- merge ----------------------------------------------------------------------
+
+    def _filtro_unicas(self):
+        """Uma linha por chave: a última (DO UPDATE) ou a primeira (DO NOTHING)."""
+        if not self.chave or self.substituir:
+            return "1 = 1"
+        agregado = 'MAX' if self.atualizar else 'MIN'
+        return (
+            f"_seq IN (SELECT {agregado}(_seq) FROM {self.staging} "
+            f"GROUP BY {self._lista(self.chave)})"
+        )
+
+    def _condicao_chave(self, tabela, outra):
+        return ' AND '.join(f"{tabela}.{c} = {outra}.{c}" for c in self.chave)
+
+    def _sql_remover_grupos(self, filtro):
+        return (
+            f"DELETE FROM {self.tabela} WHERE EXISTS (SELECT 1 FROM {self.staging} s "
+            f"WHERE {filtro} AND {self._condicao_chave('s', self.tabela)})"
+        )
+
+    def _sql_merge(self, filtro):
+        sql = (
+            f"INSERT INTO {self.tabela} ({self._lista(self.colunas)}) "
+            f"SELECT {self._lista(self.colunas)} FROM {self.staging} "
+            f"WHERE {filtro} ORDER BY _seq"
+        )
+        if self.chave and not self.substituir:
+            if self.atualizar:
+                atribuicoes = ', '.join(f"{c} = EXCLUDED.{c}" for c in self.atualizar)
+                sql += f" ON CONFLICT ({self._lista(self.chave)}) DO UPDATE SET {atribuicoes}"
+            else:
+                sql += f" ON CONFLICT ({self._lista(self.chave)}) DO NOTHING"
+        return sql
+
+    def _contar_existentes(self):
+        if not self.chave:
+            return 0
+        self.cursor.execute(
+            f"SELECT COUNT(*) FROM {self.staging} s WHERE {self._filtro_unicas()} "
+            f"AND EXISTS (SELECT 1 FROM {self.tabela} t WHERE {self._condicao_chave('t', 's')})"
+        )
+        return self.cursor.fetchone()[0]
+
+    def _registrar_datas(self):
+        """Intervalo de datas das linhas do staging e das linhas do destino com as mesmas chaves."""
+        if not self.coluna_data:
+            return
+        sql = f"SELECT {self.coluna_data} AS d FROM {self.staging} x"
+        if self.chave:
+            sql += (
+                f" UNION ALL SELECT {self.coluna_data} AS d FROM {self.tabela} x "
+                f"WHERE EXISTS (SELECT 1 FROM {self.staging} s WHERE {self._condicao_chave('s', 'x')})"
+            )
+        self.cursor.execute(f"SELECT MIN(d), MAX(d) FROM ({sql}) datas")
+        self.resultado.menor_data, self.resultado.maior_data = self.cursor.fetchone()
+
+    def _merge(self):
+        if not self._enviadas:
+            return
+        self._registrar_datas()
+        self.cursor.execute(f"SELECT COUNT(*) FROM {self.staging} WHERE {self._filtro_unicas()}")
+        unicas = self.cursor.fetchone()[0]
+        existentes = self._contar_existentes()
+
+        self.cursor.execute("SAVEPOINT carga_merge")
+        try:
+            if self.substituir:
+                self.cursor.execute(self._sql_remover_grupos("1 = 1"))
+            self.cursor.execute(self._sql_merge(self._filtro_unicas()))
+            self.cursor.execute("RELEASE SAVEPOINT carga_merge")
+        except Exception as e:
+            self.cursor.execute("ROLLBACK TO SAVEPOINT carga_merge")
+            print(f"[{self.tabela}] merge em conjunto falhou ({e}); aplicando linha a linha")
+            self._merge_por_chave()
+            return
+
+        if self.chave and (self.atualizar or self.substituir):
+            self.resultado.atualizadas += existentes
+            self.resultado.inseridas += unicas - existentes
+        else:
+            self.resultado.inseridas += unicas - existentes
+            self.resultado.ignoradas += existentes
+        # Chaves repetidas na própria origem: só uma ocorrência chega ao destino
+        self.resultado.ignoradas += self._enviadas - unicas
+
+    def _merge_por_chave(self):
+        """Aplica cada linha (ou grupo, em modo substituir) em um SAVEPOINT próprio."""
+        marcador = _marcador(self.conn)
+        colunas_chave = self.chave or []
+        if self.substituir:
+            self.cursor.execute(
+                f"SELECT {self._lista(colunas_chave)}, COUNT(*) FROM {self.staging} "
+                f"GROUP BY {self._lista(colunas_chave)}"
+            )
+            pendentes = [(None, tuple(linha[:-1]), linha[-1]) for linha in self.cursor.fetchall()]
+        else:
+            self.cursor.execute(
+                f"SELECT _seq{''.join(', ' + c for c in colunas_chave)} FROM {self.staging} "
+                f"WHERE {self._filtro_unicas()} ORDER BY _seq"
+            )
+            pendentes = [(linha[0], tuple(linha[1:]), 1) for linha in self.cursor.fetchall()]
+            self.resultado.ignoradas += self._enviadas - len(pendentes)
+
+        condicao = ' AND '.join(f"{c} = {marcador}" for c in colunas_chave)
+        condicao_staging = ' AND '.join(f"s.{c} = {marcador}" for c in colunas_chave)
+        for seq, valores_chave, quantidade in pendentes:
+            existia = False
+            if colunas_chave:
+                self.cursor.execute(f"SELECT 1 FROM {self.tabela} WHERE {condicao}", valores_chave)
+                existia = self.cursor.fetchone() is not None
+
+            self.cursor.execute("SAVEPOINT carga_linha")
+            try:
+                if self.substituir:
+                    self.cursor.execute(self._sql_remover_grupos(condicao_staging), valores_chave)
+                    self.cursor.execute(self._sql_merge(condicao), valores_chave)
+                else:
+                    self.cursor.execute(self._sql_merge(f"_seq = {int(seq)}"))
+                self.cursor.execute("RELEASE SAVEPOINT carga_linha")
+            except Exception as e:
+                self.cursor.execute("ROLLBACK TO SAVEPOINT carga_linha")
+                self._falhas.add(valores_chave)
+                self.resultado.erros += quantidade - 1
+                self.registrar_erro(valores_chave[0] if len(valores_chave) == 1 else valores_chave or seq, e)
+                continue
+
+            if existia and (self.atualizar or self.substituir):
+                self.resultado.atualizadas += quantidade
+            elif existia:
+                self.resultado.ignoradas += quantidade
+            else:
+                self.resultado.inseridas += quantidade
+
+
+# ---------------------------------------------------------------------------
+# Estado da sincronização incremental (no próprio destino, no mesmo commit da carga)
+# ---------------------------------------------------------------------------
+
+def modo_completo():
+    """SYNC_COMPLETO=1 ignora hashes e marcas guardados (recarga completa)."""
+    return os.environ.get('SYNC_COMPLETO') == '1'
+
+
+def _marcador(conn):
+    return '?' if isinstance(conn, sqlite3.Connection) else '%s'
+
+
+def garantir_tabelas_estado(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_hashes (
+            tabela VARCHAR(100) NOT NULL,
+            chave VARCHAR(200) NOT NULL,
+            hash VARCHAR(32) NOT NULL,
+            PRIMARY KEY (tabela, chave)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_marcas (
+            tabela VARCHAR(100) PRIMARY KEY,
+            marca VARCHAR(100),
+            atualizado_em TIMESTAMP
+        )
+    """)
+
+
+def obter_marca(conn, tabela):
+    """High-water mark (texto) da última carga da tabela, ou None."""
+    if modo_completo():
+        return None
+    garantir_tabelas_estado(conn)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT marca FROM sync_marcas WHERE tabela = {_marcador(conn)}", (tabela,))
+    linha = cursor.fetchone()
+    return linha[0] if linha else None
+
+
+def gravar_marca(conn, tabela, valor):
+    garantir_tabelas_estado(conn)
+    marcador = _marcador(conn)
+    texto = valor.isoformat(sep=' ') if isinstance(valor, datetime) else str(valor)
+    conn.cursor().execute(
+        f"INSERT INTO sync_marcas (tabela, marca, atualizado_em) "
+        f"VALUES ({marcador}, {marcador}, {marcador}) "
+        f"ON CONFLICT (tabela) DO UPDATE SET marca = EXCLUDED.marca, atualizado_em = EXCLUDED.atualizado_em",
+        (tabela, texto, datetime.now())
+    )
+
+
+def incrementar_versao(conn, tabela):
+    """
+    Incrementa a versão da tabela em versoes_tabelas (tabela do Django usada
+    pelo cache de relatórios). Se a tabela ainda não existe (migrations não
+    aplicadas), nada é feito e a carga segue.
+    """
+    marcador = _marcador(conn)
+    cursor = conn.cursor()
+    cursor.execute("SAVEPOINT versao_tabela")
+    try:
+        cursor.execute(
+            f"INSERT INTO versoes_tabelas (tabela, versao, atualizado_em) "
+            f"VALUES ({marcador}, 1, {marcador}) "
+            f"ON CONFLICT (tabela) DO UPDATE SET versao = versoes_tabelas.versao + 1, "
+            f"atualizado_em = EXCLUDED.atualizado_em",
+            (tabela, datetime.now())
+        )
+        cursor.execute("RELEASE SAVEPOINT versao_tabela")
+    except Exception:
+        cursor.execute("ROLLBACK TO SAVEPOINT versao_tabela")
+        cursor.execute("RELEASE SAVEPOINT versao_tabela")
+
+
+def esquecer_estado(conn, tabelas):
+    """Descarta hashes e marcas das tabelas (após TRUNCATE ou recarga manual)."""
+    garantir_tabelas_estado(conn)
+    marcador = _marcador(conn)
+    cursor = conn.cursor()
+    for tabela in tabelas:
+        cursor.execute(f"DELETE FROM sync_hashes WHERE tabela = {marcador}", (tabela,))
+        cursor.execute(f"DELETE FROM sync_marcas WHERE tabela = {marcador}", (tabela,))
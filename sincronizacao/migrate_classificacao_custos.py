@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Reclassifica as contas a pagar em custo fixo/variável após a carga de
+fornecedores e contas a pagar (que não passam pelos signals do Django).
+Usado pelo sync_database.py; equivale a `manage.py classificar_custos --todas`.
+"""
+
+import os
+import sys
+import django
+
+# Configurar o path para encontrar o projeto Django
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+backend_dir = os.path.join(base_dir, 'backend', 'empresa')
+
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+# Configurar Django se ainda não estiver configurado
+try:
+    django.setup()
+except Exception:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'empresa.settings')
+    try:
+        django.setup()
+    except Exception as e:
+        print(f"Aviso: Django setup falhou ou já estava configurado: {e}")
+
+from django.db import connections
+from contas.services.classificacao_custos_service import ClassificacaoCustosService
+
+
+def classificar_custos():
+    try:
+        total = ClassificacaoCustosService.classificar_todas()
+        print(f"Classificação de custos: {total} contas a pagar atualizadas")
+        return total
+    finally:
+        # Executado numa thread do sync_database: fecha a conexão do ORM desta thread
+        connections.close_all()
+
+
+if __name__ == "__main__":
+    classificar_custos()
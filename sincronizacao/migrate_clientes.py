@@ -1,10 +1,10 @@
-import pyodbc # type: ignore
 import psycopg2 # type: ignore
 import pandas as pd # type: ignore
 import re
 from datetime import datetime
 from decimal import Decimal
-from config import PG_CONFIG, ACCESS_PASSWORD, CADASTROS_DB # type: ignore
+from config import PG_CONFIG, CADASTROS_DB # type: ignore
+from bulk_loader import BulkLoader, conectar_origem
 
 def clean_string(value):
     if pd.isna(value) or value is None:
@@ -31,11 +31,6 @@ def clean_decimal(value):
     except:
         return Decimal('0.00')
 
-def get_existing_clients(pg_cursor):
-    """Recupera os clientes existentes no PostgreSQL"""
-    pg_cursor.execute("SELECT id, data_cadastro FROM clientes")
-    return {row[0]: row[1] for row in pg_cursor.fetchall()}
-
 def get_access_clients(access_cursor):
     """Recupera os clientes do Access"""
     access_cursor.execute("""
@@ -73,74 +68,31 @@ def process_client_row(row):
         clean_string(row[10])       # contato
     )
 
+COLUNAS_CLIENTES = [
+    'id', 'tipo_pessoa', 'nome', 'cpf_cnpj', 'rg_ie',
+    'endereco', 'bairro', 'cidade', 'estado', 'cep',
+    'telefone', 'email', 'limite_credito', 'data_cadastro',
+    'ativo', 'contato'
+]
+
 def migrar_clientes():
     try:
-        db_path = CADASTROS_DB
-        conn_str = (
-            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
-            f'DBQ={db_path};'
-            'PWD=010182;'
-        )
-        
-        with pyodbc.connect(conn_str) as access_conn, \
+        with conectar_origem(CADASTROS_DB) as access_conn, \
              psycopg2.connect(**PG_CONFIG) as pg_conn:
             
             pg_cursor = pg_conn.cursor()
             access_cursor = access_conn.cursor()
 
-            # Obtém clientes existentes e do Access
-            existing_clients = get_existing_clients(pg_cursor)
             access_rows = get_access_clients(access_cursor)
 
-            insert_sql = """
-                INSERT INTO clientes (
-                    id, tipo_pessoa, nome, cpf_cnpj, rg_ie, 
-                    endereco, bairro, cidade, estado, cep,
-                    telefone, email, limite_credito, data_cadastro, 
-                    ativo, contato
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO UPDATE SET
-                    tipo_pessoa = EXCLUDED.tipo_pessoa,
-                    nome = EXCLUDED.nome,
-                    cpf_cnpj = EXCLUDED.cpf_cnpj,
-                    rg_ie = EXCLUDED.rg_ie,
-                    endereco = EXCLUDED.endereco,
-                    bairro = EXCLUDED.bairro,
-                    cidade = EXCLUDED.cidade,
-                    estado = EXCLUDED.estado,
-                    cep = EXCLUDED.cep,
-                    telefone = EXCLUDED.telefone,
-                    email = EXCLUDED.email,
-                    limite_credito = EXCLUDED.limite_credito,
-                    data_cadastro = EXCLUDED.data_cadastro,
-                    ativo = EXCLUDED.ativo,
-                    contato = EXCLUDED.contato
-            """
-
-            contador_insercoes: int = 0
-            contador_atualizacoes: int = 0
-            erros: int = 0
-
+            loader = BulkLoader(pg_conn, 'clientes', COLUNAS_CLIENTES, sem_hash=('data_cadastro',))
             for row in access_rows:
                 try:
-                    client_id = int(row[0])
-                    dados = process_client_row(row)
-                    
-                    if client_id in existing_clients:
-                        contador_atualizacoes += 1
-                    else:
-                        contador_insercoes += 1
-                        
-                    pg_cursor.execute(insert_sql, dados)
-                    pg_conn.commit()
-
-                    if (contador_insercoes + contador_atualizacoes) % 100 == 0:
-                        print(f"Processados {contador_insercoes + contador_atualizacoes} clientes...")
-                
+                    loader.adicionar(process_client_row(row))
                 except Exception as e:
-                    erros += 1
-                    print(f"Erro ao processar cliente {row[0]}: {str(e)}")
-                    pg_conn.rollback()
+                    loader.registrar_erro(row[0], e)
+
+            resultado = loader.finalizar()
 
             # Atualiza a sequence
             pg_cursor.execute("""
@@ -150,12 +102,12 @@ def migrar_clientes():
             pg_conn.commit()
 
             print("\nMigração concluída!")
-            print(f"Clientes inseridos: {contador_insercoes}")
-            print(f"Clientes atualizados: {contador_atualizacoes}")
-            print(f"Erros: {erros}")
+            print(f"Clientes inseridos: {resultado.inseridas}")
+            print(f"Clientes atualizados: {resultado.atualizadas}")
+            print(f"Erros: {resultado.erros}")
 
             return True
 
     except Exception as e:
         print(f"Erro durante a migração: {str(e)}")
-        return False
\ No newline at end of file
+        return False
@@ -1,9 +1,9 @@
-import pyodbc
 import psycopg2
 from datetime import datetime, date
 from decimal import Decimal
 import re
-from config import PG_CONFIG, ACCESS_PASSWORD, CADASTROS_DB, CONTAS_DB # ou o DB específico
+from config import PG_CONFIG, CONTAS_DB # ou o DB específico
+from bulk_loader import BulkLoader, conectar_origem
 
 def clean_string(value):
     return str(value).strip() if value else None
@@ -42,10 +42,6 @@ def determinar_status(row):
         return 'P'
     return 'A'
 
-def get_existing_contas(pg_cursor):
-    pg_cursor.execute("SELECT id FROM contas_pagar")
-    return {row[0] for row in pg_cursor.fetchall()}
-
 def get_valid_entities(pg_cursor):
     pg_cursor.execute("SELECT id FROM fornecedores")
     fornecedores = {row[0] for row in pg_cursor.fetchall()}
@@ -55,20 +51,20 @@ def get_valid_entities(pg_cursor):
     
     return fornecedores, contas
 
+COLUNAS_CONTAS_PAGAR = [
+    'id', 'data', 'valor', 'fornecedor_id', 'vencimento',
+    'valor_total_pago', 'historico', 'forma_pagamento',
+    'condicoes', 'confirmacao', 'juros', 'tarifas',
+    'numero_duplicata', 'data_pagamento', 'valor_pago',
+    'local', 'status', 'conta_id'
+]
+
 def migrar_contas_pagar():
     try:
-        db_path = CONTAS_DB
-        conn_str = (
-            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
-            f'DBQ={db_path};'
-            'PWD=010182;'
-        )
-
-        with pyodbc.connect(conn_str) as access_conn, \
+        with conectar_origem(CONTAS_DB) as access_conn, \
              psycopg2.connect(**PG_CONFIG) as pg_conn:
             
             pg_cursor = pg_conn.cursor()
-            existing_contas = get_existing_contas(pg_cursor)
             fornecedores, contas = get_valid_entities(pg_cursor)
 
             access_cursor = access_conn.cursor()
@@ -81,35 +77,10 @@ def migrar_contas_pagar():
                 ORDER BY [CodConta a Pagar]
             """)
 
-            insert_sql = """
-                INSERT INTO contas_pagar (
-                    id, data, valor, fornecedor_id, vencimento,
-                    valor_total_pago, historico, forma_pagamento,
-                    condicoes, confirmacao, juros, tarifas,
-                    numero_duplicata, data_pagamento, valor_pago,
-                    local, status, conta_id
-                ) VALUES %s
-                ON CONFLICT (id) DO UPDATE SET
-                    data = EXCLUDED.data,
-                    valor = EXCLUDED.valor,
-                    fornecedor_id = EXCLUDED.fornecedor_id,
-                    vencimento = EXCLUDED.vencimento,
-                    valor_total_pago = EXCLUDED.valor_total_pago,
-                    historico = EXCLUDED.historico,
-                    forma_pagamento = EXCLUDED.forma_pagamento,
-                    condicoes = EXCLUDED.condicoes,
-                    confirmacao = EXCLUDED.confirmacao,
-                    juros = EXCLUDED.juros,
-                    tarifas = EXCLUDED.tarifas,
-                    numero_duplicata = EXCLUDED.numero_duplicata,
-                    data_pagamento = EXCLUDED.data_pagamento,
-                    valor_pago = EXCLUDED.valor_pago,
-                    local = EXCLUDED.local,
-                    status = EXCLUDED.status,
-                    conta_id = EXCLUDED.conta_id
-            """
-
-            insercoes = atualizacoes = erros = 0
+            loader = BulkLoader(
+                pg_conn, 'contas_pagar', COLUNAS_CONTAS_PAGAR,
+                coluna_data='COALESCE(x.data_pagamento, x.vencimento)',
+            )
             zerados = 0
 
             for row in access_cursor.fetchall():
@@ -123,6 +94,7 @@ def migrar_contas_pagar():
                     fornecedor_id = int(row[3]) if row[3] and str(row[3]).strip() != '0' else None
                     if fornecedor_id not in fornecedores:
                         if not row[6]:
+                            loader.ignorar()
                             continue
                         fornecedor_id = None
 
@@ -135,46 +107,36 @@ def migrar_contas_pagar():
                         except (ValueError, TypeError):
                             pass
 
-                    dados = (
-                        (
-                            conta_id,
-                            clean_date(row[1]),
-                            clean_decimal(row[2]),
-                            fornecedor_id,
-                            clean_date(row[4]),
-                            clean_decimal(row[5]),
-                            clean_string(row[6]),
-                            clean_string(row[7]),
-                            clean_string(row[8]),
-                            clean_string(row[9]),
-                            clean_decimal(row[10]),
-                            clean_decimal(row[11]),
-                            clean_string(row[12]),
-                            clean_date(row[13]),
-                            clean_decimal(row[14]),
-                            clean_string(row[15]),
-                            determinar_status(row),
-                            conta_bancaria_id
-                        ),
-                    )
-
-                    pg_cursor.execute(insert_sql, dados)
-                    pg_conn.commit()
-
-                    if conta_id in existing_contas:
-                        atualizacoes += 1
-                    else:
-                        insercoes += 1
+                    loader.adicionar((
+                        conta_id,
+                        clean_date(row[1]),
+                        clean_decimal(row[2]),
+                        fornecedor_id,
+                        clean_date(row[4]),
+                        clean_decimal(row[5]),
+                        clean_string(row[6]),
+                        clean_string(row[7]),
+                        clean_string(row[8]),
+                        clean_string(row[9]),
+                        clean_decimal(row[10]),
+                        clean_decimal(row[11]),
+                        clean_string(row[12]),
+                        clean_date(row[13]),
+                        clean_decimal(row[14]),
+                        clean_string(row[15]),
+                        determinar_status(row),
+                        conta_bancaria_id
+                    ))
 
                 except Exception as e:
-                    erros += 1
-                    print(f"Erro ao processar conta a pagar {row[0]}: {str(e)}")
-                    pg_conn.rollback()
+                    loader.registrar_erro(row[0], e)
+
+            resultado = loader.finalizar()
 
-            print(f"\nContas a pagar inseridas: {insercoes}")
-            print(f"Contas a pagar atualizadas: {atualizacoes}")
+            print(f"\nContas a pagar inseridas: {resultado.inseridas}")
+            print(f"Contas a pagar atualizadas: {resultado.atualizadas}")
             print(f"Contas com valor zero: {zerados}")
-            print(f"Erros: {erros}")
+            print(f"Erros: {resultado.erros}")
 
             return True
 
@@ -1,9 +1,9 @@
-import pyodbc
 import psycopg2
 from datetime import datetime
 from decimal import Decimal
 import re
-from config import PG_CONFIG, ACCESS_PASSWORD, CADASTROS_DB # ou o DB específico
+from config import PG_CONFIG, CADASTROS_DB # ou o DB específico
+from bulk_loader import BulkLoader, conectar_origem
 
 def clean_string(value):
     return str(value).strip() if value else None
@@ -26,28 +26,24 @@ def clean_date(value):
     except:
         return None
 
-def get_existing_contratos(pg_cursor):
-    pg_cursor.execute("SELECT id FROM contratos_locacao")
-    return {row[0] for row in pg_cursor.fetchall()}
-
 def get_valid_clientes(pg_cursor):
     pg_cursor.execute("SELECT id FROM clientes")
     return {row[0] for row in pg_cursor.fetchall()}
 
+COLUNAS_CONTRATOS = [
+    'id', 'contrato', 'cliente_id', 'tipocontrato', 'renovado',
+    'totalmaquinas', 'valorcontrato', 'numeroparcelas',
+    'valorpacela', 'referencia', 'data', 'inicio', 'fim',
+    'ultimoatendimento', 'nmaquinas', 'clientereal',
+    'tipocontratoreal', 'obs'
+]
+
 def migrar_contratos():
     try:
-        db_path = CADASTROS_DB
-        conn_str = (
-            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
-            f'DBQ={db_path};'
-            'PWD=010182;'
-        )
-
-        with pyodbc.connect(conn_str) as access_conn, \
+        with conectar_origem(CADASTROS_DB) as access_conn, \
              psycopg2.connect(**PG_CONFIG) as pg_conn:
             
             pg_cursor = pg_conn.cursor()
-            existing_contratos = get_existing_contratos(pg_cursor)
             valid_clientes = get_valid_clientes(pg_cursor)
 
             access_cursor = access_conn.cursor()
@@ -61,38 +57,7 @@ def migrar_contratos():
                 ORDER BY Contrato
             """)
 
-            insert_sql = """
-                INSERT INTO contratos_locacao (
-                    id, contrato, cliente_id, tipocontrato, renovado,
-                    totalmaquinas, valorcontrato, numeroparcelas,
-                    valorpacela, referencia, data, inicio, fim,
-                    ultimoatendimento, nmaquinas, clientereal,
-                    tipocontratoreal, obs
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s, %s, %s, %s
-                )
-                ON CONFLICT (id) DO UPDATE SET
-                    contrato = EXCLUDED.contrato,
-                    cliente_id = EXCLUDED.cliente_id,
-                    tipocontrato = EXCLUDED.tipocontrato,
-                    renovado = EXCLUDED.renovado,
-                    totalmaquinas = EXCLUDED.totalmaquinas,
-                    valorcontrato = EXCLUDED.valorcontrato,
-                    numeroparcelas = EXCLUDED.numeroparcelas,
-                    valorpacela = EXCLUDED.valorpacela,
-                    referencia = EXCLUDED.referencia,
-                    data = EXCLUDED.data,
-                    inicio = EXCLUDED.inicio,
-                    fim = EXCLUDED.fim,
-                    ultimoatendimento = EXCLUDED.ultimoatendimento,
-                    nmaquinas = EXCLUDED.nmaquinas,
-                    clientereal = EXCLUDED.clientereal,
-                    tipocontratoreal = EXCLUDED.tipocontratoreal,
-                    obs = EXCLUDED.obs
-            """
-
-            insercoes = atualizacoes = erros = 0
+            loader = BulkLoader(pg_conn, 'contratos_locacao', COLUNAS_CONTRATOS)
 
             for row in access_cursor.fetchall():
                 try:
@@ -101,9 +66,10 @@ def migrar_contratos():
 
                     if cliente_id and cliente_id not in valid_clientes:
                         print(f"Cliente {cliente_id} não encontrado para o contrato {row[0]}")
+                        loader.ignorar()
                         continue
 
-                    dados = (
+                    loader.adicionar((
                         contrato_id,
                         row[0],
                         cliente_id,
@@ -122,27 +88,19 @@ def migrar_contratos():
                         clean_string(row[14]),
                         clean_string(row[15]),
                         clean_string(row[16])
-                    )
-
-                    pg_cursor.execute(insert_sql, dados)
-                    pg_conn.commit()
-
-                    if contrato_id in existing_contratos:
-                        atualizacoes += 1
-                    else:
-                        insercoes += 1
+                    ))
 
                 except Exception as e:
-                    erros += 1
-                    print(f"Erro ao processar contrato {row[0]}: {str(e)}")
-                    pg_conn.rollback()
+                    loader.registrar_erro(row[0], e)
+
+            resultado = loader.finalizar()
 
             pg_cursor.execute("SELECT setval('contratos_locacao_id_seq', (SELECT MAX(id) FROM contratos_locacao));")
             pg_conn.commit()
 
-            print(f"\nContratos inseridos: {insercoes}")
-            print(f"Contratos atualizados: {atualizacoes}")
-            print(f"Erros: {erros}")
+            print(f"\nContratos inseridos: {resultado.inseridas}")
+            print(f"Contratos atualizados: {resultado.atualizadas}")
+            print(f"Erros: {resultado.erros}")
 
             return True
 
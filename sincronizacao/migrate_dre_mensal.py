@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Invalida os meses de dre_mensal alterados pelas cargas de NFs e contas a
+pagar, que não passam pelos signals do Django (signals/dre_mensal.py).
+O intervalo vem de bulk_loader.resultados() (menor_data/maior_data das
+linhas alteradas); NFs de entrada mudam o custo usado no CMV, então
+invalidam do mês da entrada em diante. Usado pelo sync_database.py;
+equivale a `manage.py dre_mensal --invalidar --desde <mês>`.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import django
+
+# Configurar o path para encontrar o projeto Django
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+backend_dir = os.path.join(base_dir, 'backend', 'empresa')
+
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+# Configurar Django se ainda não estiver configurado
+try:
+    django.setup()
+except Exception:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'empresa.settings')
+    try:
+        django.setup()
+    except Exception as e:
+        print(f"Aviso: Django setup falhou ou já estava configurado: {e}")
+
+from django.db import connections
+from contas.services.dre_mensal_service import DREMensalService
+
+import bulk_loader
+
+# tabela -> invalida também os meses seguintes
+TABELAS_NOTAS = {
+    'notas_fiscais_entrada': True,
+    'itens_nf_entrada': True,
+    'notas_fiscais_saida': False,
+    'itens_nf_saida': False,
+    'notas_fiscais_servico': False,
+    'itens_nf_servico': False,
+}
+TABELAS_CONTAS = {'contas_pagar': False}
+
+
+def _como_data(valor):
+    """Datas do destino SQLite (testes) chegam como texto ISO."""
+    return datetime.fromisoformat(valor) if isinstance(valor, str) else valor
+
+
+def periodo_alterado(resultados, tabelas):
+    """
+    (desde, ate) dos meses a invalidar pelas cargas das tabelas; ate=None
+    significa em diante e desde=None, que nenhuma carga alterou linhas.
+    """
+    desde = ate = None
+    em_diante = False
+    for resultado in resultados:
+        if resultado.tabela not in tabelas or resultado.menor_data is None:
+            continue
+        menor, maior = _como_data(resultado.menor_data), _como_data(resultado.maior_data)
+        desde = menor if desde is None else min(desde, menor, key=DREMensalService.inicio_do_mes)
+        ate = maior if ate is None else max(ate, maior, key=DREMensalService.inicio_do_mes)
+        em_diante = em_diante or tabelas[resultado.tabela]
+    return desde, None if em_diante else ate
+
+
+def invalidar_dre_mensal(tabelas):
+    try:
+        desde, ate = periodo_alterado(bulk_loader.resultados(), tabelas)
+        if desde is None:
+            print("DRE mensal: nenhum mês alterado pelas cargas")
+            return 0
+        removidos = DREMensalService.invalidar(desde, ate)
+        print(f"DRE mensal: {removidos} meses invalidados (desde {desde}, até {ate or 'o fim'})")
+        return removidos
+    finally:
+        # Executado numa thread do sync_database: fecha a conexão do ORM desta thread
+        connections.close_all()
+
+
+def invalidar_dre_notas():
+    return invalidar_dre_mensal(TABELAS_NOTAS)
+
+
+def invalidar_dre_contas():
+    return invalidar_dre_mensal(TABELAS_CONTAS)
+
+
+if __name__ == "__main__":
+    invalidar_dre_mensal({**TABELAS_NOTAS, **TABELAS_CONTAS})
@@ -8,12 +8,11 @@ Adaptado para ser usado pelo sync_database.py
 import os
 import sys
 import django
-import pyodbc
+import numpy as np
 import pandas as pd
-from datetime import datetime, date, time
+from datetime import date, timedelta
 import logging
-from decimal import Decimal, InvalidOperation
-import pytz
+from decimal import Decimal
 
 # Configurar o path para encontrar o projeto Django
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -34,23 +33,27 @@ except Exception:
         print(f"Aviso: Django setup falhou ou já estava configurado: {e}")
 
 from contas.models.access import MovimentacoesEstoque, Produtos, TiposMovimentacaoEstoque
-from django.db import transaction
+from django.db import connections
 from django.utils import timezone
+from bulk_loader import BulkLoader, conectar_destino, conectar_origem, listar_tabelas_origem, obter_marca
 try:
     from config import EXTRATOS_DB
 except ImportError:
     # Fallback se executado diretamente
     EXTRATOS_DB = r"C:\Users\Cirilo\Documents\programas\empresa\InterMax.03.02.2026\Bancos\Extratos\Extratos.mdb"
 
-# Configuração de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('migrate_estoque.log'),
-        logging.StreamHandler()
-    ]
-)
+COLUNAS_MOVIMENTACOES = [
+    'produto_id', 'tipo_movimentacao_id', 'data_movimentacao', 'quantidade',
+    'custo_unitario', 'valor_total', 'documento_referencia', 'observacoes',
+    'data_cadastro'
+]
+
+# Chave usada para reconhecer movimentações já importadas
+CHAVE_MOVIMENTACAO = ['produto_id', 'data_movimentacao', 'documento_referencia', 'quantidade']
+
+# A extração incremental relê alguns dias antes da última data importada,
+# para pegar lançamentos retroativos; as repetições caem na verificação de existência
+JANELA_DIAS = int(os.environ.get('SYNC_JANELA_DIAS', '7'))
 
 class MovimentacoesExtratosImporter:
     def __init__(self):
@@ -102,37 +105,33 @@ class MovimentacoesExtratosImporter:
             raise
         
     def connect_to_access(self):
-        """Conecta ao banco de dados Access"""
+        """Conecta ao banco de dados Access (ou ao substituto local, ver bulk_loader)"""
         try:
-            conn_str = (
-                r'DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};'
-                f'DBQ={self.mdb_file};'
-                'PWD=010182;'
-            )
-            return pyodbc.connect(conn_str)
+            return conectar_origem(self.mdb_file)
         except Exception as e:
             logging.error(f"Erro ao conectar ao Access: {e}")
             return None
     
-    def extract_data_from_access(self):
-        """Extrai dados da tabela NotasFiscais (movimentações) do Access"""
+    def extract_data_from_access(self, desde=None):
+        """Extrai dados da tabela NotasFiscais (movimentações) do Access, a partir de `desde` se informado"""
         conn = self.connect_to_access()
         if not conn:
             return None
             
         try:
             # Verificar se a tabela existe
-            cursor = conn.cursor()
-            tables = [table.table_name for table in cursor.tables(tableType='TABLE')]
+            tables = listar_tabelas_origem(conn)
             
             if 'NotasFiscais' not in tables:
                 logging.error("Tabela 'NotasFiscais' não encontrada!")
                 return None
             
-            # Extrair todos os dados
-            logging.info("Extraindo dados da tabela NotasFiscais (movimentações)...")
-            query = "SELECT * FROM NotasFiscais"
-            df = pd.read_sql(query, conn)
+            if desde is None:
+                logging.info("Extraindo dados da tabela NotasFiscais (movimentações)...")
+                df = pd.read_sql("SELECT * FROM NotasFiscais", conn)
+            else:
+                logging.info(f"Extraindo movimentações a partir de {desde:%d/%m/%Y}...")
+                df = pd.read_sql("SELECT * FROM NotasFiscais WHERE Data >= ?", conn, params=[desde])
             
             logging.info(f"Extraídos {len(df)} registros da tabela NotasFiscais")
             
@@ -144,210 +143,196 @@ class MovimentacoesExtratosImporter:
         finally:
             conn.close()
     
-    def clean_decimal_value(self, value):
-        """Limpa e converte valores para Decimal"""
-        if pd.isna(value) or value is None:
-            return Decimal('0.00')
+    def clean_decimal_series(self, serie):
+        """Converte a coluna para número (vírgula decimal aceita); inválidos viram 0"""
+        if pd.api.types.is_numeric_dtype(serie):
+            return pd.to_numeric(serie, errors='coerce').fillna(0)
+        texto = serie.astype(str).str.strip().str.replace(',', '.', regex=False)
+        return pd.to_numeric(texto, errors='coerce').fillna(0)
+
+    def clean_time_series(self, serie):
+        """Hora do movimento como timedelta; ausente ou inválida vira 12:00"""
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            horas = serie - serie.dt.normalize()
+        else:
+            # Aceita 'HH:MM:SS', datetime completo (Access guarda 1899-12-30 HH:MM:SS) ou time
+            texto = serie.astype(str).str.extract(r'(\d{1,2}:\d{2}:\d{2})', expand=False)
+            horas = pd.to_timedelta(texto, errors='coerce')
+        return horas.fillna(pd.Timedelta(hours=12))
+
+    def clean_datetime_series(self, datas, horas):
+        """
+        Combina data e hora e converte de America/Sao_Paulo para UTC.
+        Datas inválidas ficam NaT (a linha é descartada).
+        """
+        datas = pd.to_datetime(datas, errors='coerce')
+        if datas.dt.tz is not None:
+            datas = datas.dt.tz_localize(None)
+        combinadas = datas.dt.normalize() + self.clean_time_series(horas)
+        # Mesmo critério do pytz.localize: horário ambíguo fica no horário padrão
+        # e horário inexistente (início do horário de verão) avança uma hora
+        return combinadas.dt.tz_localize(
+            'America/Sao_Paulo', ambiguous=np.zeros(len(combinadas), dtype=bool),
+            nonexistent=pd.Timedelta(hours=1)
+        ).dt.tz_convert('UTC')
+
+    def resolve_produtos(self, codigos):
+        """
+        Mapeia código -> id de produto com uma consulta; códigos ausentes são
+        criados num único bulk_create como produtos básicos.
+        """
+        produtos = {}
+        for codigo, produto_id in Produtos.objects.values_list('codigo', 'id'):
+            produtos.setdefault(codigo, produto_id)
+
+        faltantes = sorted({c for c in codigos if c not in produtos}, key=int)
+        if faltantes:
+            logging.info(f"Criando {len(faltantes)} produtos básicos ausentes...")
+            criados = Produtos.objects.bulk_create([
+                Produtos(codigo=codigo, nome=f"Produto {codigo}", ativo=True,
+                         preco_venda=Decimal('0.00'), grupo_id=None)
+                for codigo in faltantes
+            ])
+            if any(produto.id is None for produto in criados):
+                # Backend sem RETURNING: relê os ids criados
+                criados = Produtos.objects.filter(codigo__in=faltantes)
+            for produto in criados:
+                produtos.setdefault(produto.codigo, produto.id)
+        return produtos
+
+    def map_movimentacoes(self, df):
+        """
+        Mapeia as linhas do Access para colunas de MovimentacoesEstoque, coluna a coluna.
+        Linhas sem produto, data ou tipo (ENTRADA/SAIDA) válidos são descartadas.
+        """
+        def coluna(nome, padrao=''):
+            return df[nome] if nome in df.columns else pd.Series(padrao, index=df.index, dtype=object)
+
+        codigos = pd.to_numeric(coluna('Produto', None), errors='coerce')
+        datas = self.clean_datetime_series(coluna('Data', None), coluna('Horario', None))
+        movimentacao = coluna('Movimentacao').astype(str).str.upper().str.strip()
+        tipos = movimentacao.map({'ENTRADA': self.tipo_entrada.id, 'SAIDA': self.tipo_saida.id})
+
+        validas = codigos.notna() & (codigos != 0) & datas.notna() & tipos.notna()
+        if not validas.any():
+            return pd.DataFrame(columns=COLUNAS_MOVIMENTACOES[:-1])
+
+        codigos = codigos[validas].astype('int64').astype(str)
+        produtos = self.resolve_produtos(codigos.unique())
+        quantidade = self.clean_decimal_series(coluna('Quantidade', 0)[validas]).round(3)
+        custo = self.clean_decimal_series(coluna('Unitario', 0)[validas]).round(4)
+
+        # str() de cada campo como no mapeamento original (NaN vira 'nan'), para
+        # continuar casando com as movimentações já importadas
+        def texto(nome):
+            return coluna(nome)[validas].map(str)
+
+        observacoes = texto('Historico') + ' - ' + texto('Movimentacao') + ' - Operador: ' + texto('OPERADOR')
+
+        return pd.DataFrame({
+            'produto_id': codigos.map(produtos),
+            'tipo_movimentacao_id': tipos[validas].astype('int64'),
+            'data_movimentacao': datas[validas],
+            'quantidade': quantidade,
+            'custo_unitario': custo,
+            'valor_total': (quantidade * custo).round(2),
+            'documento_referencia': texto('Documento').str[:50],
+            'observacoes': observacoes.str[:500],
+        })
+
+    def existing_keys(self, desde):
+        """Chaves (produto, data, documento, quantidade) já importadas a partir de `desde`, como DataFrame"""
+        existentes = pd.DataFrame.from_records(
+            MovimentacoesEstoque.objects.filter(data_movimentacao__gte=desde).values_list(
+                'produto_id', 'data_movimentacao', 'documento_referencia', 'quantidade'
+            ),
+            columns=CHAVE_MOVIMENTACAO,
+        )
+        existentes['data_movimentacao'] = pd.to_datetime(existentes['data_movimentacao'], utc=True)
+        existentes['quantidade'] = pd.to_numeric(existentes['quantidade']).astype(float).round(3)
+        return existentes
+
+    def remove_existing(self, movimentos):
+        """Anti-join com as movimentações já importadas: devolve só as novas"""
+        existentes = self.existing_keys(movimentos['data_movimentacao'].min().to_pydatetime())
+        if existentes.empty:
+            return movimentos
+        chaves = movimentos[CHAVE_MOVIMENTACAO].astype({'produto_id': 'int64'})
+        existentes = existentes.drop_duplicates().astype(chaves.dtypes.to_dict())
+        cruzamento = chaves.merge(
+            existentes,
+            on=CHAVE_MOVIMENTACAO, how='left', indicator=True,
+        )
+        novas = (cruzamento['_merge'] == 'left_only').to_numpy()
+        return movimentos[novas]
+
+    def import_to_postgresql(self, df, pg_conn):
+        """Importa os dados para o PostgreSQL"""
+        logging.info("Iniciando importação para PostgreSQL...")
         
-        try:
-            # Converter para string e limpar
-            str_value = str(value).strip().replace(',', '.')
-            return Decimal(str_value)
-        except (InvalidOperation, ValueError):
-            # logging.warning(f"Valor inválido para decimal: {value}")
-            return Decimal('0.00')
-    
-    def clean_datetime_value(self, date_value, time_value):
-        """Combina data e hora em datetime"""
-        try:
-            # Limpar data
-            if pd.isna(date_value) or date_value is None:
-                return None
-            
-            # Converter data
-            if hasattr(date_value, 'date'):
-                clean_date = date_value.date()
-            elif isinstance(date_value, str):
-                try:
-                    clean_date = datetime.strptime(date_value, '%Y-%m-%d').date()
-                except ValueError:
-                    try:
-                        clean_date = datetime.strptime(date_value, '%Y-%m-%d %H:%M:%S').date()
-                    except ValueError:
-                        clean_date = datetime.now().date()
-            else:
-                clean_date = date_value
-            
-            # Limpar hora
-            clean_time = None
-            if not pd.isna(time_value) and time_value is not None:
-                if hasattr(time_value, 'time'):
-                    clean_time = time_value.time()
-                elif isinstance(time_value, str):
-                    try:
-                        # Se time_value tem formato datetime completo, extrair só a hora
-                        if ' ' in time_value:
-                            time_part = time_value.split(' ')[1]
-                        else:
-                            time_part = time_value
-                        clean_time = datetime.strptime(time_part, '%H:%M:%S').time()
-                    except ValueError:
-                        clean_time = time(12, 0)
-                elif hasattr(time_value, 'hour'):
-                    # time_value já é um objeto time
-                    clean_time = time_value
-                else:
-                    clean_time = time(12, 0)
-            else:
-                clean_time = time(12, 0)
-            
-            # Combinar data e hora
-            combined_datetime = datetime.combine(clean_date, clean_time)
-            
-            # Converter para timezone aware (UTC)
-            if timezone.is_naive(combined_datetime):
-                # Assumir que as datas do Access estão em horário local do Brasil
-                brazil_tz = pytz.timezone('America/Sao_Paulo')
-                combined_datetime = brazil_tz.localize(combined_datetime)
-                combined_datetime = combined_datetime.astimezone(pytz.UTC)
-            
-            return combined_datetime
-            
-        except Exception as e:
-            logging.warning(f"Erro ao processar datetime: {e}, ignorando registro")
-            return None
-    
-    def find_or_create_produto(self, produto_codigo):
-        """Encontra ou cria um produto baseado no código"""
-        if not produto_codigo or pd.isna(produto_codigo):
-            return None
+        # Intervalo das movimentações inseridas: a tarefa snapshots_estoque refaz os snapshots a partir dele
+        loader = BulkLoader(
+            pg_conn, 'movimentacoes_estoque', COLUNAS_MOVIMENTACOES, chave=None, coluna_data='x.data_movimentacao'
+        )
+        data_cadastro = timezone.now()
         
         try:
-            codigo = int(produto_codigo)
-            
-            # Tentar encontrar produto existente
-            produto = Produtos.objects.filter(codigo=codigo).first()
-            if produto:
-                return produto
-            
-            # Se não encontrar, criar um produto básico
-            produto = Produtos.objects.create(
-                codigo=codigo,
-                nome=f"Produto {codigo}",
-                ativo=True,
-                preco_venda=Decimal('0.00'),
-                grupo_id=None
-            )
-            # logging.info(f"Produto criado: {produto.nome} (código: {codigo})")
-            return produto
-            
-        except Exception as e:
-            # logging.warning(f"Erro ao processar produto '{produto_codigo}': {e}")
-            return None
-    
-    def map_movimentacao_data(self, row):
-        """Mapeia os dados do Access para o modelo MovimentacoesEstoque"""
-        try:
-            # Encontrar produto
-            produto = self.find_or_create_produto(row.get('Produto'))
-            if not produto:
-                # logging.warning(f"Produto não encontrado para código: {row.get('Produto')}")
-                return None
-            
-            # Criar datetime
-            data_movimento = self.clean_datetime_value(row.get('Data'), row.get('Horario'))
-            if not data_movimento:
-                return None
-            
-            # Determinar tipo de movimentação
-            movimentacao_tipo = str(row.get('Movimentacao', '')).upper().strip()
-            tipo_movimentacao = None
-            
-            if movimentacao_tipo == 'ENTRADA':
-                tipo_movimentacao = self.tipo_entrada
-            elif movimentacao_tipo == 'SAIDA':
-                tipo_movimentacao = self.tipo_saida
-            else:
-                return None
-            
-            mapped_data = {
-                'produto': produto,
-                'tipo_movimentacao': tipo_movimentacao,
-                'data_movimentacao': data_movimento,
-                'quantidade': self.clean_decimal_value(row.get('Quantidade', 0)),
-                'custo_unitario': self.clean_decimal_value(row.get('Unitario', 0)),
-                'documento_referencia': str(row.get('Documento', ''))[:50],
-                'observacoes': f"{row.get('Historico', '')} - {row.get('Movimentacao', '')} - Operador: {row.get('OPERADOR', '')}"[:500],
-            }
-            
-            # Calcular valor total
-            mapped_data['valor_total'] = mapped_data['quantidade'] * mapped_data['custo_unitario']
-            
-            return mapped_data
+            movimentos = self.map_movimentacoes(df)
+            self.error_count += len(df) - len(movimentos)
+
+            if not movimentos.empty:
+                novas = self.remove_existing(movimentos)
+                self.skipped_count += len(movimentos) - len(novas)
+
+                linhas = pd.DataFrame({
+                    'produto_id': novas['produto_id'].astype('int64'),
+                    'tipo_movimentacao_id': novas['tipo_movimentacao_id'].astype('int64'),
+                    'data_movimentacao': novas['data_movimentacao'],
+                    'quantidade': novas['quantidade'].map('{:.3f}'.format).map(Decimal),
+                    'custo_unitario': novas['custo_unitario'].map('{:.4f}'.format).map(Decimal),
+                    'valor_total': novas['valor_total'].map('{:.2f}'.format).map(Decimal),
+                    'documento_referencia': novas['documento_referencia'],
+                    'observacoes': novas['observacoes'],
+                })
+                for linha in linhas.itertuples(index=False, name=None):
+                    loader.adicionar((
+                        int(linha[0]), int(linha[1]), linha[2].to_pydatetime(), *linha[3:], data_cadastro
+                    ))
             
-        except Exception as e:
-            logging.error(f"Erro ao mapear dados da linha: {e}")
+            ultima_data = pd.to_datetime(df['Data'], errors='coerce').max()
+            if not pd.isna(ultima_data):
+                loader.definir_marca(ultima_data.date())
+
+            resultado = loader.finalizar()
+            self.imported_count = resultado.inseridas
+            self.error_count += resultado.erros
+        finally:
+            pg_conn.close()
+
+    def data_inicial_extracao(self, pg_conn):
+        """Data a partir da qual extrair: última data importada menos a janela, ou None (tudo)"""
+        marca = obter_marca(pg_conn, 'movimentacoes_estoque')
+        if not marca:
             return None
-    
-    def import_to_postgresql(self, df):
-        """Importa os dados para o PostgreSQL"""
-        logging.info("Iniciando importação para PostgreSQL...")
-        
-        # Otimização: Carregar chaves existentes para evitar queries repetitivas
-        # Como a tabela pode ser grande, vamos filtrar por data ou assumir verificação one-by-one se necessário
-        # Para simplificar e manter segurança, verificamos um a um mas com transação em lote
-        
-        batch_size = 1000
-        batch_data = []
-        
-        for index, row in df.iterrows():
-            try:
-                mapped_data = self.map_movimentacao_data(row)
-                if not mapped_data:
-                    self.error_count += 1
-                    continue
-                
-                # Verificação de existência
-                if MovimentacoesEstoque.objects.filter(
-                    produto=mapped_data['produto'],
-                    data_movimentacao=mapped_data['data_movimentacao'],
-                    documento_referencia=mapped_data['documento_referencia'],
-                    quantidade=mapped_data['quantidade']
-                ).exists():
-                    self.skipped_count += 1
-                    continue
-                
-                batch_data.append(MovimentacoesEstoque(**mapped_data))
-                self.imported_count += 1
-                
-                if len(batch_data) >= batch_size:
-                    with transaction.atomic():
-                        MovimentacoesEstoque.objects.bulk_create(batch_data)
-                    logging.info(f"Importados {self.imported_count} registros...")
-                    batch_data = []
-                
-            except Exception as e:
-                self.error_count += 1
-                logging.error(f"Erro ao processar linha {index}: {e}")
-                continue
-        
-        # Processar restante
-        if batch_data:
-            with transaction.atomic():
-                MovimentacoesEstoque.objects.bulk_create(batch_data)
-            logging.info(f"Importados {self.imported_count} registros (final)...")
+        return date.fromisoformat(marca[:10]) - timedelta(days=JANELA_DIAS)
 
     def run_migration(self):
         """Executa a migração completa"""
         logging.info("=== INICIANDO MIGRAÇÃO DE MOVIMENTAÇÕES (EXTRATOS) ===")
         
-        df = self.extract_data_from_access()
+        pg_conn = conectar_destino()
+        desde = self.data_inicial_extracao(pg_conn)
+        df = self.extract_data_from_access(desde)
         if df is None or df.empty:
+            pg_conn.close()
+            if desde is not None and df is not None:
+                logging.info("Nenhuma movimentação nova desde a última sincronização")
+                return True
             logging.error("Nenhum dado extraído do Access")
             return False
         
         logging.info(f"Dados extraídos: {len(df)} registros")
-        self.import_to_postgresql(df)
+        self.import_to_postgresql(df, pg_conn)
         
         logging.info("=== RELATÓRIO FINAL ===")
         logging.info(f"Total processados: {len(df)}")
@@ -357,9 +342,25 @@ class MovimentacoesExtratosImporter:
         
         return True
 
+def configurar_log():
+    """Log em arquivo só na execução da migração, não ao importar o módulo."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('migrate_estoque.log'),
+            logging.StreamHandler()
+        ]
+    )
+
 def migrar_estoque():
-    importer = MovimentacoesExtratosImporter()
-    return importer.run_migration()
+    configurar_log()
+    try:
+        importer = MovimentacoesExtratosImporter()
+        return importer.run_migration()
+    finally:
+        # Executado numa thread do sync_database: fecha a conexão do ORM desta thread
+        connections.close_all()
 
 if __name__ == "__main__":
     migrar_estoque()
@@ -1,8 +1,8 @@
-import pyodbc
 import psycopg2
 from datetime import datetime
 from decimal import Decimal
-from config import PG_CONFIG, ACCESS_PASSWORD, CADASTROS_DB, OUTROS_MOVIMENTOS_DB # ou o DB específico
+from config import PG_CONFIG, OUTROS_MOVIMENTOS_DB # ou o DB específico
+from bulk_loader import BulkLoader, conectar_origem
 
 def clean_string(value):
     return str(value).strip() if value else None
@@ -15,28 +15,23 @@ def clean_decimal(value):
     except:
         return Decimal('0.00')
 
-def get_existing_fretes(pg_cursor):
-    pg_cursor.execute("SELECT id FROM fretes")
-    return {row[0] for row in pg_cursor.fetchall()}
-
 def get_valid_transportadoras(pg_cursor):
     pg_cursor.execute("SELECT id FROM transportadoras")
     return {row[0] for row in pg_cursor.fetchall()}
 
+COLUNAS_FRETES = [
+    'id', 'numero', 'data_emissao', 'data_entrada', 'transportadora_id',
+    'cfop', 'valor_total', 'base_calculo', 'aliquota', 'icms',
+    'ufcoleta', 'municipiocoleta', 'ibge', 'tipo_cte', 'tipo_fob_cif',
+    'chave', 'fatura', 'formulario'
+]
+
 def migrar_fretes():
     try:
-        db_path = OUTROS_MOVIMENTOS_DB
-        conn_str = (
-            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
-            f'DBQ={db_path};'
-            'PWD=010182;'
-        )
-
-        with pyodbc.connect(conn_str) as access_conn, \
+        with conectar_origem(OUTROS_MOVIMENTOS_DB) as access_conn, \
              psycopg2.connect(**PG_CONFIG) as pg_conn:
             
             pg_cursor = pg_conn.cursor()
-            existing_fretes = get_existing_fretes(pg_cursor)
             transportadoras = get_valid_transportadoras(pg_cursor)
 
             access_cursor = access_conn.cursor()
@@ -49,34 +44,7 @@ def migrar_fretes():
                 ORDER BY Codigo
             """)
 
-            insert_sql = """
-                INSERT INTO fretes (
-                    id, numero, data_emissao, data_entrada, transportadora_id,
-                    cfop, valor_total, base_calculo, aliquota, icms,
-                    ufcoleta, municipiocoleta, ibge, tipo_cte, tipo_fob_cif,
-                    chave, fatura, formulario
-                ) VALUES %s
-                ON CONFLICT (id) DO UPDATE SET
-                    numero = EXCLUDED.numero,
-                    data_emissao = EXCLUDED.data_emissao,
-                    data_entrada = EXCLUDED.data_entrada,
-                    transportadora_id = EXCLUDED.transportadora_id,
-                    cfop = EXCLUDED.cfop,
-                    valor_total = EXCLUDED.valor_total,
-                    base_calculo = EXCLUDED.base_calculo,
-                    aliquota = EXCLUDED.aliquota,
-                    icms = EXCLUDED.icms,
-                    ufcoleta = EXCLUDED.ufcoleta,
-                    municipiocoleta = EXCLUDED.municipiocoleta,
-                    ibge = EXCLUDED.ibge,
-                    tipo_cte = EXCLUDED.tipo_cte,
-                    tipo_fob_cif = EXCLUDED.tipo_fob_cif,
-                    chave = EXCLUDED.chave,
-                    fatura = EXCLUDED.fatura,
-                    formulario = EXCLUDED.formulario
-            """
-
-            insercoes = atualizacoes = erros = 0
+            loader = BulkLoader(pg_conn, 'fretes', COLUNAS_FRETES)
 
             for row in access_cursor.fetchall():
                 try:
@@ -86,48 +54,38 @@ def migrar_fretes():
                     if transportadora_id and transportadora_id not in transportadoras:
                         transportadora_id = None
 
-                    dados = (
-                        (
-                            frete_id,
-                            clean_string(row[1]),
-                            row[2],
-                            row[3],
-                            transportadora_id,
-                            clean_string(row[6]),
-                            clean_decimal(row[7]),
-                            clean_decimal(row[8]),
-                            clean_decimal(row[9]),
-                            clean_decimal(row[10]),
-                            clean_string(row[11]),
-                            clean_string(row[12]),
-                            clean_string(row[13]),
-                            clean_string(row[14]),
-                            clean_string(row[4]),
-                            clean_string(row[15]),
-                            clean_string(row[16]),
-                            clean_string(row[17])
-                        ),
-                    )
-
-                    pg_cursor.execute(insert_sql, dados)
-                    pg_conn.commit()
-
-                    if frete_id in existing_fretes:
-                        atualizacoes += 1
-                    else:
-                        insercoes += 1
+                    loader.adicionar((
+                        frete_id,
+                        clean_string(row[1]),
+                        row[2],
+                        row[3],
+                        transportadora_id,
+                        clean_string(row[6]),
+                        clean_decimal(row[7]),
+                        clean_decimal(row[8]),
+                        clean_decimal(row[9]),
+                        clean_decimal(row[10]),
+                        clean_string(row[11]),
+                        clean_string(row[12]),
+                        clean_string(row[13]),
+                        clean_string(row[14]),
+                        clean_string(row[4]),
+                        clean_string(row[15]),
+                        clean_string(row[16]),
+                        clean_string(row[17])
+                    ))
 
                 except Exception as e:
-                    erros += 1
-                    print(f"Erro ao processar frete {row[0]}: {str(e)}")
-                    pg_conn.rollback()
+                    loader.registrar_erro(row[0], e)
+
+            resultado = loader.finalizar()
 
             pg_cursor.execute("SELECT setval('fretes_id_seq', (SELECT MAX(id) FROM fretes));")
             pg_conn.commit()
 
-            print(f"\nFretes inseridos: {insercoes}")
-            print(f"Fretes atualizados: {atualizacoes}")
-            print(f"Erros: {erros}")
+            print(f"\nFretes inseridos: {resultado.inseridas}")
+            print(f"Fretes atualizados: {resultado.atualizadas}")
+            print(f"Erros: {resultado.erros}")
 
             return True
 
@@ -1,8 +1,8 @@
-import pyodbc
 import psycopg2
 from datetime import datetime
 from decimal import Decimal
-from config import PG_CONFIG, ACCESS_PASSWORD, CADASTROS_DB, MOVIMENTOS_DB # ou o DB específico
+from config import PG_CONFIG, MOVIMENTOS_DB # ou o DB específico
+from bulk_loader import BulkLoader, conectar_origem
 
 def clean_string(value):
     return str(value).strip() if value else None
@@ -15,13 +15,6 @@ def clean_decimal(value):
     except:
         return Decimal('0.00')
 
-def get_existing_items(pg_cursor):
-    pg_cursor.execute("""
-        SELECT DISTINCT nota_fiscal_id, produto_id
-        FROM itens_nf_entrada
-    """)
-    return {(row[0], row[1]) for row in pg_cursor.fetchall()}
-
 def get_valid_entities(pg_cursor):
     pg_cursor.execute("SELECT id, numero_nota FROM notas_fiscais_entrada WHERE numero_nota IS NOT NULL")
     notas = {clean_string(row[1]): row[0] for row in pg_cursor.fetchall()}
@@ -31,20 +24,24 @@ def get_valid_entities(pg_cursor):
     
     return notas, produtos
 
+COLUNAS_ITENS_NFE = [
+    'nota_fiscal_id', 'data', 'produto_id', 'quantidade',
+    'valor_unitario', 'valor_total', 'percentual_ipi',
+    'status', 'aliquota', 'desconto', 'cfop',
+    'base_substituicao', 'icms_substituicao',
+    'outras_despesas', 'frete', 'aliquota_substituicao',
+    'ncm', 'controle'
+]
+
+# Data da nota (mês usado pelo DRE mensal), para o intervalo alterado pela carga
+DATA_NOTA = '(SELECT n.data_entrada FROM notas_fiscais_entrada n WHERE n.id = x.nota_fiscal_id)'
+
 def migrar_itens_nfe():
     try:
-        db_path = MOVIMENTOS_DB
-        conn_str = (
-            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
-            f'DBQ={db_path};'
-            'PWD=010182;'
-        )
-
-        with pyodbc.connect(conn_str) as access_conn, \
+        with conectar_origem(MOVIMENTOS_DB) as access_conn, \
              psycopg2.connect(**PG_CONFIG) as pg_conn:
             
             pg_cursor = pg_conn.cursor()
-            existing_items = get_existing_items(pg_cursor)
             notas_fiscais, produtos = get_valid_entities(pg_cursor)
 
             access_cursor = access_conn.cursor()
@@ -57,18 +54,11 @@ def migrar_itens_nfe():
                 ORDER BY NumNFE
             """)
 
-            insert_sql = """
-                INSERT INTO itens_nf_entrada (
-                    nota_fiscal_id, data, produto_id, quantidade,
-                    valor_unitario, valor_total, percentual_ipi,
-                    status, aliquota, desconto, cfop,
-                    base_substituicao, icms_substituicao,
-                    outras_despesas, frete, aliquota_substituicao,
-                    ncm, controle
-                ) VALUES %s
-            """
-
-            insercoes = atualizacoes = erros = 0
+            # Itens não têm id na origem: cada nota alterada tem seus itens substituídos
+            loader = BulkLoader(
+                pg_conn, 'itens_nf_entrada', COLUNAS_ITENS_NFE, chave=('nota_fiscal_id',), substituir=True,
+                coluna_data=DATA_NOTA,
+            )
 
             for row in access_cursor.fetchall():
                 try:
@@ -77,47 +67,40 @@ def migrar_itens_nfe():
                     produto_id = int(row[2]) if row[2] is not None else None
 
                     if not nota_fiscal_id or produto_id not in produtos:
+                        loader.ignorar()
                         continue
 
-                    dados = (
-                        (
-                            nota_fiscal_id,
-                            row[1],
-                            produto_id,
-                            clean_decimal(row[3]),
-                            clean_decimal(row[4]),
-                            clean_decimal(row[5]),
-                            clean_decimal(row[6]),
-                            clean_string(row[7]),
-                            clean_decimal(row[8]),
-                            clean_decimal(row[9]),
-                            clean_string(row[10]),
-                            clean_decimal(row[11]),
-                            clean_decimal(row[12]),
-                            clean_decimal(row[13]),
-                            clean_decimal(row[14]),
-                            clean_decimal(row[15]),
-                            clean_string(row[16]),
-                            clean_string(row[17])
-                        ),
-                    )
-
-                    pg_cursor.execute(insert_sql, dados)
-                    pg_conn.commit()
-
-                    if (nota_fiscal_id, produto_id) in existing_items:
-                        atualizacoes += 1
-                    else:
-                        insercoes += 1
+                    loader.adicionar((
+                        nota_fiscal_id,
+                        row[1],
+                        produto_id,
+                        clean_decimal(row[3]),
+                        clean_decimal(row[4]),
+                        clean_decimal(row[5]),
+                        clean_decimal(row[6]),
+                        clean_string(row[7]),
+                        clean_decimal(row[8]),
+                        clean_decimal(row[9]),
+                        clean_string(row[10]),
+                        clean_decimal(row[11]),
+                        clean_decimal(row[12]),
+                        clean_decimal(row[13]),
+                        clean_decimal(row[14]),
+                        clean_decimal(row[15]),
+                        clean_string(row[16]),
+                        clean_string(row[17])
+                    ))
 
                 except Exception as e:
-                    erros += 1
-                    print(f"Erro ao processar item da NFE {row[0]}: {str(e)}")
-                    pg_conn.rollback()
+                    loader.registrar_erro(row[0], e)
+
+            resultado = loader.finalizar()
 
-            print(f"\nItens inseridos: {insercoes}")
-            print(f"Itens atualizados: {atualizacoes}")
-            print(f"Erros: {erros}")
+            print(f"\nItens inseridos: {resultado.inseridas}")
+            print(f"Itens substituídos: {resultado.atualizadas}")
+            print(f"Itens inalterados: {resultado.inalteradas}")
+            print(f"Itens ignorados: {resultado.ignoradas}")
+            print(f"Erros: {resultado.erros}")
 
             return True
 
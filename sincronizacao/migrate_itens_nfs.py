@@ -1,8 +1,8 @@
-import pyodbc
 import psycopg2
 from datetime import datetime
 from decimal import Decimal
-from config import PG_CONFIG, ACCESS_PASSWORD, CADASTROS_DB, MOVIMENTOS_DB # ou o DB específico
+from config import PG_CONFIG, MOVIMENTOS_DB # ou o DB específico
+from bulk_loader import BulkLoader, conectar_origem
 
 def clean_string(value):
     return str(value).strip() if value else None
@@ -15,10 +15,6 @@ def clean_decimal(value):
     except:
         return Decimal('0.00')
 
-def get_existing_items(pg_cursor):
-    pg_cursor.execute("SELECT id FROM itens_nf_saida")
-    return set(row[0] for row in pg_cursor.fetchall())
-
 def get_valid_nfs(pg_cursor):
     pg_cursor.execute("SELECT id, numero_nota FROM notas_fiscais_saida")
     return {clean_string(row[1]): row[0] for row in pg_cursor.fetchall()}
@@ -27,20 +23,21 @@ def get_valid_produtos(pg_cursor):
     pg_cursor.execute("SELECT id FROM produtos")
     return {row[0] for row in pg_cursor.fetchall()}
 
+COLUNAS_ITENS_NFS = [
+    'nota_fiscal_id', 'data', 'produto_id', 'quantidade', 'valor_unitario',
+    'valor_total', 'percentual_ipi', 'status', 'aliquota', 'reducao',
+    'desconto', 'cst_a', 'cst_b', 'controle', 'frete', 'outras_despesas', 'seguro'
+]
+
+# Data da nota (mês usado pelo DRE mensal), para o intervalo alterado pela carga
+DATA_NOTA = '(SELECT n.data FROM notas_fiscais_saida n WHERE n.id = x.nota_fiscal_id)'
+
 def migrar_itens_nfs():
     try:
-        db_path = MOVIMENTOS_DB
-        conn_str = (
-            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
-            f'DBQ={db_path};'
-            'PWD=010182;'
-        )
-
-        with pyodbc.connect(conn_str) as access_conn, \
+        with conectar_origem(MOVIMENTOS_DB) as access_conn, \
              psycopg2.connect(**PG_CONFIG) as pg_conn:
             
             pg_cursor = pg_conn.cursor()
-            existing_items = get_existing_items(pg_cursor)
             notas_fiscais = get_valid_nfs(pg_cursor)
             produtos = get_valid_produtos(pg_cursor)
 
@@ -53,7 +50,11 @@ def migrar_itens_nfs():
                 ORDER BY NumNFS
             """)
 
-            insercoes = atualizacoes = erros = 0
+            # Itens não têm id na origem: cada nota alterada tem seus itens substituídos
+            loader = BulkLoader(
+                pg_conn, 'itens_nf_saida', COLUNAS_ITENS_NFS, chave=('nota_fiscal_id',), substituir=True,
+                coluna_data=DATA_NOTA,
+            )
 
             for row in access_cursor.fetchall():
                 try:
@@ -62,11 +63,13 @@ def migrar_itens_nfs():
                     produto_id = int(row[3]) if row[3] is not None else None
 
                     if not nota_fiscal_id:
+                        loader.ignorar()
                         continue
                     if produto_id not in produtos:
+                        loader.ignorar()
                         continue
 
-                    dados = (
+                    loader.adicionar((
                         nota_fiscal_id,
                         row[2],
                         produto_id,
@@ -84,31 +87,18 @@ def migrar_itens_nfs():
                         clean_decimal(row[15]),
                         clean_decimal(row[16]),
                         clean_decimal(row[17])
-                    )
-
-                    pg_cursor.execute("""
-                        INSERT INTO itens_nf_saida (
-                            nota_fiscal_id, data, produto_id, quantidade, valor_unitario,
-                            valor_total, percentual_ipi, status, aliquota, reducao,
-                            desconto, cst_a, cst_b, controle, frete, outras_despesas, seguro
-                        ) VALUES %s
-                    """, (dados,))
-                    
-                    pg_conn.commit()
-
-                    if (nota_fiscal_id, produto_id) in existing_items:
-                        atualizacoes += 1
-                    else:
-                        insercoes += 1
+                    ))
 
                 except Exception as e:
-                    erros += 1
-                    print(f"Erro ao processar item da NF {row[1]}: {str(e)}")
-                    pg_conn.rollback()
+                    loader.registrar_erro(row[1], e)
+
+            resultado = loader.finalizar()
 
-            print(f"\nItens inseridos: {insercoes}")
-            print(f"Itens atualizados: {atualizacoes}")
-            print(f"Erros: {erros}")
+            print(f"\nItens inseridos: {resultado.inseridas}")
+            print(f"Itens substituídos: {resultado.atualizadas}")
+            print(f"Itens inalterados: {resultado.inalteradas}")
+            print(f"Itens ignorados: {resultado.ignoradas}")
+            print(f"Erros: {resultado.erros}")
 
             return True
 
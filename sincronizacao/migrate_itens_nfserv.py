@@ -1,8 +1,8 @@
-import pyodbc
 import psycopg2
 from datetime import datetime
 from decimal import Decimal
-from config import PG_CONFIG, ACCESS_PASSWORD, CADASTROS_DB, MOVIMENTOS_DB # ou o DB específico
+from config import PG_CONFIG, MOVIMENTOS_DB # ou o DB específico
+from bulk_loader import BulkLoader, conectar_origem
 
 def clean_string(value):
     return str(value).strip() if value else None
@@ -15,28 +15,24 @@ def clean_decimal(value):
     except:
         return Decimal('0.00')
 
-def get_existing_items(pg_cursor):
-    pg_cursor.execute("SELECT nota_fiscal_id FROM itens_nf_servico")
-    return {row[0] for row in pg_cursor.fetchall()}
-
 def get_valid_nfs(pg_cursor):
     pg_cursor.execute("SELECT id, numero_nota FROM notas_fiscais_servico")
     return {row[1]: row[0] for row in pg_cursor.fetchall()}
 
+COLUNAS_ITENS_NFSERV = [
+    'nota_fiscal_id', 'data', 'servico', 'quantidade',
+    'valor_unitario', 'valor_total'
+]
+
+# Data da nota (mês usado pelo DRE mensal), para o intervalo alterado pela carga
+DATA_NOTA = '(SELECT n.data FROM notas_fiscais_servico n WHERE n.id = x.nota_fiscal_id)'
+
 def migrar_itens_nf_servico():
     try:
-        db_path = MOVIMENTOS_DB
-        conn_str = (
-            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
-            f'DBQ={db_path};'
-            'PWD=010182;'
-        )
-
-        with pyodbc.connect(conn_str) as access_conn, \
+        with conectar_origem(MOVIMENTOS_DB) as access_conn, \
              psycopg2.connect(**PG_CONFIG) as pg_conn:
             
             pg_cursor = pg_conn.cursor()
-            existing_items = get_existing_items(pg_cursor)
             notas_fiscais = get_valid_nfs(pg_cursor)
 
             access_cursor = access_conn.cursor()
@@ -47,14 +43,11 @@ def migrar_itens_nf_servico():
                 ORDER BY NumNFSERV
             """)
 
-            insert_sql = """
-                INSERT INTO itens_nf_servico (
-                    nota_fiscal_id, data, servico, quantidade,
-                    valor_unitario, valor_total
-                ) VALUES %s
-            """
-
-            insercoes = atualizacoes = erros = 0
+            # Itens não têm id na origem: cada nota alterada tem seus itens substituídos
+            loader = BulkLoader(
+                pg_conn, 'itens_nf_servico', COLUNAS_ITENS_NFSERV, chave=('nota_fiscal_id',), substituir=True,
+                coluna_data=DATA_NOTA,
+            )
 
             for row in access_cursor.fetchall():
                 try:
@@ -62,35 +55,28 @@ def migrar_itens_nf_servico():
                     nota_fiscal_id = notas_fiscais.get(num_nfs)
                     
                     if not nota_fiscal_id:
+                        loader.ignorar()
                         continue
 
-                    dados = (
-                        (
-                            nota_fiscal_id,
-                            row[2],
-                            clean_string(row[3]),
-                            clean_decimal(row[4]),
-                            clean_decimal(row[5]),
-                            clean_decimal(row[6])
-                        ),
-                    )
-
-                    pg_cursor.execute(insert_sql, dados)
-                    pg_conn.commit()
-
-                    if nota_fiscal_id in existing_items:
-                        atualizacoes += 1
-                    else:
-                        insercoes += 1
+                    loader.adicionar((
+                        nota_fiscal_id,
+                        row[2],
+                        clean_string(row[3]),
+                        clean_decimal(row[4]),
+                        clean_decimal(row[5]),
+                        clean_decimal(row[6])
+                    ))
 
                 except Exception as e:
-                    erros += 1
-                    print(f"Erro ao processar item da NFS {row[1]}: {str(e)}")
-                    pg_conn.rollback()
+                    loader.registrar_erro(row[1], e)
+
+            resultado = loader.finalizar()
 
-            print(f"\nItens inseridos: {insercoes}")
-            print(f"Itens atualizados: {atualizacoes}")
-            print(f"Erros: {erros}")
+            print(f"\nItens inseridos: {resultado.inseridas}")
+            print(f"Itens substituídos: {resultado.atualizadas}")
+            print(f"Itens inalterados: {resultado.inalteradas}")
+            print(f"Itens ignorados: {resultado.ignoradas}")
+            print(f"Erros: {resultado.erros}")
 
             return True
 
@@ -1,8 +1,8 @@
-import pyodbc
 import psycopg2
 from datetime import datetime
 from decimal import Decimal
-from config import PG_CONFIG, ACCESS_PASSWORD, CADASTROS_DB, MOVIMENTOS_DB # ou o DB específico
+from config import PG_CONFIG, MOVIMENTOS_DB # ou o DB específico
+from bulk_loader import BulkLoader, conectar_origem
 
 def clean_string(value):
     return str(value).strip() if value else None
@@ -15,10 +15,6 @@ def clean_decimal(value):
     except:
         return Decimal('0.00')
 
-def get_existing_nfs(pg_cursor):
-    pg_cursor.execute("SELECT numero_nota FROM notas_fiscais_saida")
-    return {row[0] for row in pg_cursor.fetchall()}
-
 def get_valid_entities(pg_cursor):
     pg_cursor.execute("SELECT id FROM clientes")
     clientes = {row[0] for row in pg_cursor.fetchall()}
@@ -31,20 +27,23 @@ def get_valid_entities(pg_cursor):
 
     return clientes, funcionarios, transportadoras
 
+# A origem não traz o id: o merge usa a chave única (numero_nota, n_serie)
+COLUNAS_NFS = [
+    'numero_nota', 'data', 'cliente_id', 'valor_produtos', 'base_calculo',
+    'desconto', 'valor_frete', 'tipo_frete', 'valor_icms', 'valor_ipi',
+    'valor_icms_fonte', 'valor_total_nota', 'forma_pagamento', 'condicoes',
+    'vendedor_id', 'operador', 'transportadora_id', 'formulario', 'peso',
+    'volume', 'obs', 'operacao', 'cfop', 'imposto_federal_total', 'n_serie',
+    'comissao', 'parcelas', 'val_ref', 'percentual_icms', 'detalhes',
+    'nf_referencia', 'finalidade', 'outras_despesas', 'seguro'
+]
+
 def migrar_nfs():
     try:
-        db_path = MOVIMENTOS_DB
-        conn_str = (
-            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
-            f'DBQ={db_path};'
-            'PWD=010182;'
-        )
-
-        with pyodbc.connect(conn_str) as access_conn, \
+        with conectar_origem(MOVIMENTOS_DB) as access_conn, \
              psycopg2.connect(**PG_CONFIG) as pg_conn:
             
             pg_cursor = pg_conn.cursor()
-            existing_nfs = get_existing_nfs(pg_cursor)
             clientes, funcionarios, transportadoras = get_valid_entities(pg_cursor)
 
             access_cursor = access_conn.cursor()
@@ -59,55 +58,8 @@ def migrar_nfs():
                 FROM NFS ORDER BY NumNFS
             """)
 
-            insert_sql = """
-                INSERT INTO notas_fiscais_saida (
-                    numero_nota, data, cliente_id, valor_produtos, base_calculo,
-                    desconto, valor_frete, tipo_frete, valor_icms, valor_ipi,
-                    valor_icms_fonte, valor_total_nota, forma_pagamento, condicoes,
-                    vendedor_id, operador, transportadora_id, formulario, peso,
-                    volume, obs, operacao, cfop, imposto_federal_total, n_serie,
-                    comissao, parcelas, val_ref, percentual_icms, detalhes,
-                    nf_referencia, finalidade, outras_despesas, seguro
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                         %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                         %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO UPDATE SET
-                    data = EXCLUDED.data,
-                    cliente_id = EXCLUDED.cliente_id,
-                    valor_produtos = EXCLUDED.valor_produtos,
-                    base_calculo = EXCLUDED.base_calculo,
-                    desconto = EXCLUDED.desconto,
-                    valor_frete = EXCLUDED.valor_frete,
-                    tipo_frete = EXCLUDED.tipo_frete,
-                    valor_icms = EXCLUDED.valor_icms,
-                    valor_ipi = EXCLUDED.valor_ipi,
-                    valor_icms_fonte = EXCLUDED.valor_icms_fonte,
-                    valor_total_nota = EXCLUDED.valor_total_nota,
-                    forma_pagamento = EXCLUDED.forma_pagamento,
-                    condicoes = EXCLUDED.condicoes,
-                    vendedor_id = EXCLUDED.vendedor_id,
-                    operador = EXCLUDED.operador,
-                    transportadora_id = EXCLUDED.transportadora_id,
-                    formulario = EXCLUDED.formulario,
-                    peso = EXCLUDED.peso,
-                    volume = EXCLUDED.volume,
-                    obs = EXCLUDED.obs,
-                    operacao = EXCLUDED.operacao,
-                    cfop = EXCLUDED.cfop,
-                    imposto_federal_total = EXCLUDED.imposto_federal_total,
-                    n_serie = EXCLUDED.n_serie,
-                    comissao = EXCLUDED.comissao,
-                    parcelas = EXCLUDED.parcelas,
-                    val_ref = EXCLUDED.val_ref,
-                    percentual_icms = EXCLUDED.percentual_icms,
-                    detalhes = EXCLUDED.detalhes,
-                    nf_referencia = EXCLUDED.nf_referencia,
-                    finalidade = EXCLUDED.finalidade,
-                    outras_despesas = EXCLUDED.outras_despesas,
-                    seguro = EXCLUDED.seguro
-            """
-
-            insercoes = atualizacoes = erros = 0
+            loader = BulkLoader(pg_conn, 'notas_fiscais_saida', COLUNAS_NFS, chave=('numero_nota', 'n_serie'),
+                                coluna_data='x.data')
 
             for row in access_cursor.fetchall():
                 try:
@@ -117,13 +69,14 @@ def migrar_nfs():
                     transportadora_id = int(row[16]) if row[16] and row[16] != '-' else None
 
                     if cliente_id and cliente_id not in clientes:
+                        loader.ignorar()
                         continue
                     if vendedor_id and vendedor_id not in funcionarios:
                         vendedor_id = None
                     if transportadora_id and transportadora_id not in transportadoras:
                         transportadora_id = None
 
-                    dados = (
+                    loader.adicionar((
                         nf_numero,
                         row[1],
                         cliente_id,
@@ -158,24 +111,17 @@ def migrar_nfs():
                         clean_string(row[31]),
                         clean_decimal(row[32]),
                         clean_decimal(row[33])
-                    )
-
-                    pg_cursor.execute(insert_sql, dados)
-                    pg_conn.commit()
-
-                    if nf_numero in existing_nfs:
-                        atualizacoes += 1
-                    else:
-                        insercoes += 1
+                    ))
 
                 except Exception as e:
-                    erros += 1
-                    print(f"Erro ao processar NF {row[0]}: {str(e)}")
-                    pg_conn.rollback()
+                    loader.registrar_erro(row[0], e)
+
+            resultado = loader.finalizar()
 
-            print(f"\nNotas fiscais inseridas: {insercoes}")
-            print(f"Notas fiscais atualizadas: {atualizacoes}")
-            print(f"Erros: {erros}")
+            print(f"\nNotas fiscais inseridas: {resultado.inseridas}")
+            print(f"Notas fiscais atualizadas: {resultado.atualizadas}")
+            print(f"Notas fiscais inalteradas: {resultado.inalteradas}")
+            print(f"Erros: {resultado.erros}")
 
             return True
 
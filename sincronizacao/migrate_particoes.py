@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Cria as partições anuais (ano atual e seguinte) de movimentacoes_estoque
+antes da carga, para que as linhas novas já caiam na partição do seu ano e
+não na partição padrão.
+Usado pelo sync_database.py; equivale a `manage.py manter_particoes`.
+"""
+
+import os
+import sys
+import django
+
+# Configurar o path para encontrar o projeto Django
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+backend_dir = os.path.join(base_dir, 'backend', 'empresa')
+
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+# Configurar Django se ainda não estiver configurado
+try:
+    django.setup()
+except Exception:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'empresa.settings')
+    try:
+        django.setup()
+    except Exception as e:
+        print(f"Aviso: Django setup falhou ou já estava configurado: {e}")
+
+from django.db import connections
+from contas.services.particionamento_service import ParticionamentoService
+
+
+def criar_particoes(*tabelas):
+    try:
+        for nome in ParticionamentoService.criar_particoes(tabelas or None):
+            print(f"Partição {nome} criada")
+    finally:
+        # Executado numa thread do sync_database: fecha a conexão do ORM desta thread
+        connections.close_all()
+
+
+def criar_particoes_estoque():
+    criar_particoes('movimentacoes_estoque')
+
+
+if __name__ == "__main__":
+    criar_particoes()
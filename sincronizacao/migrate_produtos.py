@@ -1,5 +1,4 @@
 
-import pyodbc
 import psycopg2
 from datetime import datetime
 from decimal import Decimal
@@ -43,6 +42,7 @@ def limpar_tabelas(pg_conn):
                 qtd_antes = cursor.fetchone()[0]
                 print(f"Registros encontrados em {tabela}: {qtd_antes}")
                 
+                esquecer_estado(pg_conn, [tabela])
                 if qtd_antes > 0:
                     print(f"Limpando tabela {tabela}...")
                     cursor.execute(f"TRUNCATE TABLE {tabela} CASCADE")
@@ -96,6 +96,14 @@ def criar_tabela_produtos(pg_cursor):
     pg_cursor.execute(create_table_sql)
 
 from config import PG_CONFIG, CADASTROS_DB
+from bulk_loader import BulkLoader, conectar_origem, esquecer_estado, modo_completo
+
+COLUNAS_PRODUTOS = [
+    'id', 'codigo', 'nome', 'unidade_medida', 'grupo_id',
+    'referencia', 'preco_custo', 'preco_venda',
+    'estoque_atual', 'data_cadastro',
+    'ativo', 'estoque_minimo'
+]
 
 def migrar_produtos():
     db_path = CADASTROS_DB
@@ -103,16 +111,12 @@ def migrar_produtos():
     try:
         # Conexões
         print("Conectando aos bancos de dados...")
-        conn_str = (
-            r'Driver={Microsoft Access Driver (*.mdb, *.accdb)};'
-            f'DBQ={db_path};'
-            'PWD=010182;'
-        )
-        access_conn = pyodbc.connect(conn_str)
+        access_conn = conectar_origem(db_path)
         pg_conn = psycopg2.connect(**PG_CONFIG)
         
-        # Limpar tabelas
-        if not limpar_tabelas(pg_conn):
+        # Limpar tabelas só na carga completa; na incremental os produtos são mesclados
+        completo = modo_completo()
+        if completo and not limpar_tabelas(pg_conn):
             raise Exception("Falha na limpeza das tabelas. Abortando importação.")
 
         pg_cursor = pg_conn.cursor()
@@ -134,21 +138,12 @@ def migrar_produtos():
             ORDER BY Codigo
         """)
 
-        # SQL de inserção
-        insert_sql = """
-            INSERT INTO produtos (
-                id, codigo, nome, unidade_medida, grupo_id,
-                referencia, preco_custo, preco_venda,
-                estoque_atual, data_cadastro,
-                ativo, estoque_minimo
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-            )
-        """
-
-        # Processo de migração
-        contador = 0
-        erros = 0
+        # Carga completa (tabela recém-truncada): chave repetida na origem mantém a
+        # primeira ocorrência; na incremental os produtos alterados são atualizados
+        loader = BulkLoader(
+            pg_conn, 'produtos', COLUNAS_PRODUTOS,
+            atualizar=[] if completo else None, sem_hash=('data_cadastro',)
+        )
         
         print("\nIniciando migração dos produtos...")
         
@@ -162,7 +157,7 @@ def migrar_produtos():
                     # Determinar status
                     ativo = True if row[12] is None or row[12].upper() != 'INATIVO' else False
                     
-                    dados = (
+                    loader.adicionar((
                         int(row[0]),                # id (Codigo)
                         clean_string(row[0]),       # codigo
                         clean_string(row[1]),       # nome (Descricao)
@@ -175,24 +170,18 @@ def migrar_produtos():
                         row[10] if row[10] else datetime.now(),  # data_cadastro
                         ativo,                      # ativo
                         int(row[14]) if row[14] else 0,  # estoque_minimo
-                    )
-                    
-                    pg_cursor.execute(insert_sql, dados)
-                    pg_conn.commit()
-                    contador += 1
-                    
-                    if contador % 100 == 0:
-                        print(f"Migrados {contador} produtos...")
+                    ))
                 
                 except Exception as e:
-                    erros += 1
-                    print(f"Erro ao migrar produto {row[0]}: {str(e)}")
-                    pg_conn.rollback()
-                    continue
+                    loader.registrar_erro(row[0], e)
+
+        resultado = loader.finalizar()
 
         print("\nMigração concluída!")
-        print(f"Total de produtos migrados: {contador}")
-        print(f"Total de erros: {erros}")
+        print(f"Total de produtos migrados: {resultado.inseridas}")
+        print(f"Total de produtos atualizados: {resultado.atualizadas}")
+        print(f"Total de produtos inalterados: {resultado.inalteradas}")
+        print(f"Total de erros: {resultado.erros}")
         
     except Exception as e:
         print(f"Erro durante a migração: {str(e)}")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Atualiza a view materializada de saldos de estoque (view_saldos_estoque_rapido)
+após a carga das movimentações, com REFRESH ... CONCURRENTLY, e incrementa
+a versão da view no cache de relatórios (respostas calculadas entre a carga
+e o refresh deixam de valer).
+Usado pelo sync_database.py; equivale a `manage.py atualizar_saldos_estoque`.
+"""
+
+import os
+import sys
+import django
+
+# Configurar o path para encontrar o projeto Django
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+backend_dir = os.path.join(base_dir, 'backend', 'empresa')
+
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+# Configurar Django se ainda não estiver configurado
+try:
+    django.setup()
+except Exception:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'empresa.settings')
+    try:
+        django.setup()
+    except Exception as e:
+        print(f"Aviso: Django setup falhou ou já estava configurado: {e}")
+
+from django.db import connections
+from contas.services.saldo_estoque_service import VIEW_SALDOS, SaldoEstoqueService
+
+
+def atualizar_saldos_estoque():
+    try:
+        if SaldoEstoqueService.atualizar():
+            print(f"Saldos de estoque: {VIEW_SALDOS} atualizada")
+    finally:
+        # Executado numa thread do sync_database: fecha a conexão do ORM desta thread
+        connections.close_all()
+
+
+if __name__ == "__main__":
+    atualizar_saldos_estoque()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Atualiza os snapshots diários de estoque (estoque_snapshot) depois da carga
+de movimentações, que não passa pelos signals do Django. A extração relê os
+últimos dias (JANELA_DIAS de migrate_estoque), então podem entrar
+movimentações anteriores ao último snapshot: os snapshots são refeitos a
+partir do dia da mais antiga inserida (menor_data do bulk_loader). A
+reconstrução incrementa a versão de estoque_snapshot no cache de relatórios.
+Usado pelo sync_database.py; equivale a `manage.py snapshot_estoque --desde <dia>`.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import django
+
+# Configurar o path para encontrar o projeto Django
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+backend_dir = os.path.join(base_dir, 'backend', 'empresa')
+
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+# Configurar Django se ainda não estiver configurado
+try:
+    django.setup()
+except Exception:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'empresa.settings')
+    try:
+        django.setup()
+    except Exception as e:
+        print(f"Aviso: Django setup falhou ou já estava configurado: {e}")
+
+from django.db import connections
+from django.utils import timezone
+from contas.services.estoque_snapshot_service import EstoqueSnapshotService
+
+import bulk_loader
+
+
+def primeiro_dia_inserido(resultados):
+    """Dia (local) da movimentação mais antiga inserida pelas cargas, ou None."""
+    datas = [
+        resultado.menor_data for resultado in resultados
+        if resultado.tabela == 'movimentacoes_estoque' and resultado.menor_data is not None
+    ]
+    if not datas:
+        return None
+    # Datas do destino SQLite (testes) chegam como texto ISO
+    datas = [datetime.fromisoformat(data) if isinstance(data, str) else data for data in datas]
+    return min(timezone.localtime(data).date() if timezone.is_aware(data) else data.date() for data in datas)
+
+
+def atualizar_snapshots_estoque():
+    try:
+        desde = primeiro_dia_inserido(bulk_loader.resultados())
+        ultima = EstoqueSnapshotService.ultima_data_snapshot()
+        # Sem retroativas, retoma do último snapshot; com a tabela vazia, carga completa
+        if desde is not None and ultima is not None and desde < ultima:
+            resumo = EstoqueSnapshotService.atualizar_snapshots(desde=desde)
+        else:
+            resumo = EstoqueSnapshotService.atualizar_snapshots()
+        print(f"Snapshots de estoque: {resumo['gravados']} gravados desde {resumo['desde'] or 'o início'}")
+        return resumo
+    finally:
+        # Executado numa thread do sync_database: fecha a conexão do ORM desta thread
+        connections.close_all()
+
+
+if __name__ == "__main__":
+    atualizar_snapshots_estoque()
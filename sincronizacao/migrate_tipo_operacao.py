@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Classifica a operação das notas fiscais de entrada e saída (tipo_operacao)
+após as cargas de NF, que não passam pelos signals do Django.
+Usado pelo sync_database.py; equivale a `manage.py classificar_operacoes`.
+"""
+
+import os
+import sys
+import django
+
+# Configurar o path para encontrar o projeto Django
+current_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(current_dir)
+backend_dir = os.path.join(base_dir, 'backend', 'empresa')
+
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+# Configurar Django se ainda não estiver configurado
+try:
+    django.setup()
+except Exception:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'empresa.settings')
+    try:
+        django.setup()
+    except Exception as e:
+        print(f"Aviso: Django setup falhou ou já estava configurado: {e}")
+
+from django.db import connections
+from contas.services.tipo_operacao_service import TipoOperacaoService
+
+
+def classificar_operacoes():
+    try:
+        atualizadas = TipoOperacaoService.classificar()
+        print(f"Tipo de operação: {sum(atualizadas.values())} notas fiscais atualizadas")
+        return atualizadas
+    finally:
+        # Executado numa thread do sync_database: fecha a conexão do ORM desta thread
+        connections.close_all()
+
+
+if __name__ == "__main__":
+    classificar_operacoes()
@@ -1,15 +1,28 @@
-import pyodbc
+import argparse
 import psycopg2
 from datetime import datetime
 import hashlib
 import json
 from pathlib import Path
 import importlib
+import os
+import sys
+import time
 from config import *
+import bulk_loader
+import tarefas_sync
 
 class DatabaseSync:
-    def __init__(self, sync_state_file="sync_state.json"):
+    """
+    O hash MD5 de cada .mdb só serve para pular arquivos que não mudaram.
+    Quando um arquivo muda, as cargas são incrementais por linha (ver
+    bulk_loader): apenas linhas novas ou alteradas são gravadas. Com
+    completo=True os hashes e marcas são ignorados e tudo é recarregado.
+    """
+    def __init__(self, sync_state_file="sync_state.json", completo=False, workers=None):
         self.sync_state_file = sync_state_file
+        self.completo = completo
+        self.workers = workers or int(os.environ.get('SYNC_WORKERS', '4'))
         self.sync_state = self.load_sync_state()
         
     def load_sync_state(self):
@@ -33,149 +46,136 @@ class DatabaseSync:
         current_hash = self.get_file_hash(filepath)
         last_hash = self.sync_state.get(str(filepath), None)
         
-        if last_hash != current_hash:
+        if self.completo or last_hash != current_hash:
             self.sync_state[str(filepath)] = current_hash
             return True
         return False
 
-    def sync_cadastros(self):
-        if self.should_sync_file(CADASTROS_DB):
-            print("\nSincronizando Cadastros...")
-            
-            migrate_clientes = importlib.import_module('migrate_clientes')
-            migrate_fornecedores = importlib.import_module('migrate_fornecedores')
-            migrate_contratos = importlib.import_module('migrate_contratos')
-            migrate_contratos = importlib.import_module('migrate_contratos')
-            migrate_itens_contrato = importlib.import_module('migrate_itens_contrato')
-            migrate_itens_contrato = importlib.import_module('migrate_itens_contrato')
-            migrate_grupos = importlib.import_module('migrate_grupos')
-            migrate_produtos = importlib.import_module('migrate_produtos')
-            
-            migrate_clientes.migrar_clientes()
-            migrate_fornecedores.migrate_fornecedores()
-            migrate_contratos.migrar_contratos()
-            migrate_contratos.migrar_contratos()
-            migrate_itens_contrato.migrar_itens_contrato()
-            migrate_itens_contrato.migrar_itens_contrato()
-            migrate_grupos.migrar_grupos()
-            migrate_produtos.migrar_produtos()
-            return True
-        return False
-
-    def sync_movimentos(self, force=False):
-        if force or self.should_sync_file(MOVIMENTOS_DB):
-            print("\nSincronizando Movimentos...")
-            
-            migrate_nfe = importlib.import_module('migrate_nfe')
-            migrate_nfs = importlib.import_module('migrate_nfs')
-            migrate_nfserv = importlib.import_module('migrate_nfserv')
-            migrate_itens_nfe = importlib.import_module('migrate_itens_nfe')
-            migrate_itens_nfs = importlib.import_module('migrate_itens_nfs')
-            migrate_itens_nfserv = importlib.import_module('migrate_itens_nfserv')
-            
-            migrate_nfe.migrar_nfe()
-            migrate_nfs.migrar_nfs()
-            migrate_nfserv.migrar_nf_servico()
-            migrate_itens_nfe.migrar_itens_nfe()
-            migrate_itens_nfs.migrar_itens_nfs()
-            migrate_itens_nfserv.migrar_itens_nf_servico()
-            return True
-        return False
-
-    def sync_outros_movimentos(self, force=False):
-        if force or self.should_sync_file(OUTROS_MOVIMENTOS_DB):
-            print("\nSincronizando Outros Movimentos...")
-            
-            migrate_nfconsumo = importlib.import_module('migrate_nfconsumo')
-            migrate_frete = importlib.import_module('migrate_frete')
-            
-            migrate_nfconsumo.migrar_nf_consumo()
-            migrate_frete.migrar_fretes()
-            return True
-        return False
-
-    def sync_contas(self, force=False):
-        if force or self.should_sync_file(CONTAS_DB):
-            print("\nSincronizando Contas...")
-            
-            migrate_contas_receber = importlib.import_module('migrate_contas_receber')
-            migrate_pagar = importlib.import_module('migrate_contas_pagar')
-            
-            migrate_contas_receber.migrar_contas_receber()
-            migrate_pagar.migrar_contas_pagar()
-            return True
-        return False
-
-    def sync_estoque(self, force=False):
+    def arquivo_estoque(self):
         # Fallback para caso EXTRATOS_DB não esteja definido no config (versões antigas em memória)
         try:
-            db_path = EXTRATOS_DB
+            return EXTRATOS_DB
         except NameError:
             # Caminho hardcoded como fallback seguro
-            db_path = r"C:\Users\Cirilo\Documents\programas\empresa\InterMax.03.02.2026\Bancos\Extratos\Extratos.mdb"
-
-        if force or self.should_sync_file(db_path):
-            print("\nSincronizando Estoque (Movimentações)...")
-            try:
-                # Adicionar path para garantir que importe o arquivo local
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                if current_dir not in sys.path:
-                    sys.path.append(current_dir)
-                    
-                import migrate_estoque
-                migrate_estoque.migrar_estoque()
-                return True
-            except Exception as e:
-                print(f"Erro ao sincronizar estoque: {e}")
-                # Não retornamos False para não impedir o update do hash se for algo simples?
-                # Melhor retornar False e não atualizar hash se falhar?
-                # O metodo should_sync_file já atualizou o hash.
-                # Se falhar, talvez devêssemos reverter, mas por simplicidade mantemos assim.
-                return True # Hash já foi atualizado
-        return False
+            return r"C:\Users\Cirilo\Documents\programas\empresa\InterMax.03.02.2026\Bancos\Extratos\Extratos.mdb"
+
+    def montar_tarefas(self):
+        """
+        Grafo das cargas: cada tarefa indica o arquivo de origem e as tabelas
+        (tarefas) cujas chaves estrangeiras ela precisa já carregadas.
+        migrar_produtos, na carga completa, trunca itens de NF, itens de
+        contrato e movimentações, por isso essas cargas dependem de produtos.
+        """
+        def tarefa(nome, modulo, funcao, arquivo, depende=()):
+            def rodar():
+                return getattr(importlib.import_module(modulo), funcao)()
+            return tarefas_sync.Tarefa(nome, rodar, tuple(depende), arquivo, modulo)
+
+        return [
+            tarefa('clientes', 'migrate_clientes', 'migrar_clientes', CADASTROS_DB),
+            tarefa('fornecedores', 'migrate_fornecedores', 'migrate_fornecedores', CADASTROS_DB),
+            tarefa('grupos', 'migrate_grupos', 'migrar_grupos', CADASTROS_DB),
+            tarefa('produtos', 'migrate_produtos', 'migrar_produtos', CADASTROS_DB, ['grupos']),
+            tarefa('contratos', 'migrate_contratos', 'migrar_contratos', CADASTROS_DB, ['clientes']),
+            tarefa('itens_contrato', 'migrate_itens_contrato', 'migrar_itens_contrato', CADASTROS_DB,
+                   ['contratos', 'grupos', 'produtos']),
+
+            tarefa('fretes', 'migrate_frete', 'migrar_fretes', OUTROS_MOVIMENTOS_DB),
+            tarefa('nf_consumo', 'migrate_nfconsumo', 'migrar_nf_consumo', OUTROS_MOVIMENTOS_DB, ['fornecedores']),
+
+            tarefa('nfe', 'migrate_nfe', 'migrar_nfe', MOVIMENTOS_DB, ['fornecedores', 'fretes']),
+            tarefa('nfs', 'migrate_nfs', 'migrar_nfs', MOVIMENTOS_DB, ['clientes']),
+            tarefa('nfserv', 'migrate_nfserv', 'migrar_nf_servico', MOVIMENTOS_DB, ['clientes']),
+            tarefa('itens_nfe', 'migrate_itens_nfe', 'migrar_itens_nfe', MOVIMENTOS_DB, ['nfe', 'produtos']),
+            tarefa('itens_nfs', 'migrate_itens_nfs', 'migrar_itens_nfs', MOVIMENTOS_DB, ['nfs', 'produtos']),
+            tarefa('itens_nfserv', 'migrate_itens_nfserv', 'migrar_itens_nf_servico', MOVIMENTOS_DB, ['nfserv']),
+            # Tipo de operação normalizado das NFs carregadas sem passar pelos signals
+            tarefa('tipo_operacao', 'migrate_tipo_operacao', 'classificar_operacoes', MOVIMENTOS_DB, ['nfe', 'nfs']),
+            # Meses de dre_mensal alterados pelas cargas de NFs (do mês da NF de entrada em diante)
+            tarefa('dre_mensal_notas', 'migrate_dre_mensal', 'invalidar_dre_notas', MOVIMENTOS_DB,
+                   ['nfe', 'nfs', 'nfserv', 'itens_nfe', 'itens_nfs', 'itens_nfserv', 'tipo_operacao']),
+
+            tarefa('contas_receber', 'migrate_contas_receber', 'migrar_contas_receber', CONTAS_DB, ['clientes']),
+            tarefa('contas_pagar', 'migrate_contas_pagar', 'migrar_contas_pagar', CONTAS_DB, ['fornecedores']),
+            # Reclassifica fixo/variável: roda sempre que Contas muda (Cadastros alterado força Contas)
+            tarefa('classificacao_custos', 'migrate_classificacao_custos', 'classificar_custos', CONTAS_DB,
+                   ['fornecedores', 'contas_pagar']),
+            tarefa('dre_mensal_contas', 'migrate_dre_mensal', 'invalidar_dre_contas', CONTAS_DB,
+                   ['contas_pagar', 'classificacao_custos']),
+
+            tarefa('particoes_estoque', 'migrate_particoes', 'criar_particoes_estoque', self.arquivo_estoque()),
+            tarefa('estoque', 'migrate_estoque', 'migrar_estoque', self.arquivo_estoque(),
+                   ['produtos', 'particoes_estoque']),
+            # Snapshots diários a partir da movimentação mais antiga inserida (retroativas da janela)
+            tarefa('snapshots_estoque', 'migrate_snapshots_estoque', 'atualizar_snapshots_estoque',
+                   self.arquivo_estoque(), ['estoque']),
+            # View materializada de saldos atuais: REFRESH CONCURRENTLY depois das movimentações
+            tarefa('saldos_estoque', 'migrate_saldos_estoque', 'atualizar_saldos_estoque', self.arquivo_estoque(),
+                   ['estoque']),
+        ]
+
+    def selecionar_tarefas(self, tarefas):
+        """Tarefas dos arquivos alterados; se Cadastros mudou, todos os arquivos são sincronizados."""
+        force_dependents = self.should_sync_file(CADASTROS_DB)
+        arquivos = [CADASTROS_DB] if force_dependents else []
+        for arquivo in dict.fromkeys(t.arquivo for t in tarefas):
+            if arquivo != CADASTROS_DB and (force_dependents or self.should_sync_file(arquivo)):
+                arquivos.append(arquivo)
+        return [t for t in tarefas if t.arquivo in arquivos]
 
     def sync_all(self):
         print("=== INICIANDO SINCRONIZAÇÃO ===")
         print(f"Data/Hora: {datetime.now()}\n")
-        
-        changes = False
-        force_dependents = False
+        bulk_loader.limpar_resultados()
+        inicio = time.perf_counter()
         
         try:
-            if self.sync_cadastros():
-                print("Cadastros sincronizados com sucesso!")
-                changes = True
-                force_dependents = True # Se cadastros mudou (e possivelmente limpou tabelas), força o resto
-            
-            if self.sync_movimentos(force=force_dependents):
-                print("Movimentos sincronizados com sucesso!")
-                changes = True
-            
-            if self.sync_outros_movimentos(force=force_dependents):
-                print("Outros movimentos sincronizados com sucesso!")
-                changes = True
-            
-            if self.sync_contas(force=force_dependents):
-                print("Contas sincronizadas com sucesso!")
-                changes = True
-                
-            if self.sync_estoque(force=force_dependents):
-                print("Estoque sincronizado com sucesso!")
-                changes = True
-            
-            if not changes:
+            tarefas = self.selecionar_tarefas(self.montar_tarefas())
+            if not tarefas:
                 print("Nenhuma alteração detectada nos bancos de dados.")
+                self.save_sync_state()
+                return
+
+            # Imports (e o django.setup de migrate_estoque) acontecem antes do pool
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            if current_dir not in sys.path:
+                sys.path.append(current_dir)
+            for modulo in sorted({t.modulo for t in tarefas}):
+                importlib.import_module(modulo)
+
+            print(f"Executando {len(tarefas)} tarefas com {self.workers} workers...")
+            resultados = tarefas_sync.executar(tarefas, self.workers)
             
+            # Arquivo com tarefa falha ou pulada não grava o hash: é reprocessado na próxima execução
+            arquivos = {t.nome: t.arquivo for t in tarefas}
+            for resultado in resultados.values():
+                if resultado.status != 'ok':
+                    self.sync_state.pop(str(arquivos[resultado.nome]), None)
+
             self.save_sync_state()
+            bulk_loader.imprimir_resumo()
+            tarefas_sync.imprimir_tempos(resultados, time.perf_counter() - inicio)
+
+            falhas = [r.nome for r in resultados.values() if r.status == 'erro']
+            if falhas:
+                raise RuntimeError(f"Tarefas com erro: {', '.join(falhas)}")
             print("\nSincronização finalizada com sucesso!")
             
         except Exception as e:
             print(f"\nErro durante a sincronização: {str(e)}")
             raise
 
-def sync_databases():
-    syncer = DatabaseSync()
+def sync_databases(completo=False, workers=None):
+    if completo:
+        os.environ['SYNC_COMPLETO'] = '1'
+    syncer = DatabaseSync(completo=completo, workers=workers)
     syncer.sync_all()
 
 if __name__ == "__main__":
-    sync_databases()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Sincroniza os bancos Access com o PostgreSQL')
+    parser.add_argument('--completo', action='store_true',
+                        help='Ignora o estado incremental e recarrega todas as tabelas')
+    parser.add_argument('--workers', type=int,
+                        help='Cargas executadas em paralelo (padrão: SYNC_WORKERS ou 4)')
+    args = parser.parse_args()
+    sync_databases(completo=args.completo, workers=args.workers)
\ No newline at end of file
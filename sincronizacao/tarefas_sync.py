@@ -0,0 +1,152 @@
+"""
+Execução das cargas da sincronização como um grafo de dependências.
+
+Cada Tarefa declara de quais outras depende (por exemplo, itens de NF dependem
+das NFs e dos produtos); tarefas independentes rodam em paralelo num pool de
+threads. Como cada migrate_* abre a própria conexão com o Access e com o
+PostgreSQL, cada tarefa trabalha na sua conexão. Se uma tarefa falha (exceção
+ou retorno False), as que dependem dela são puladas e as demais continuam.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Tarefa:
+    nome: str
+    funcao: object
+    depende: tuple = ()
+    arquivo: str = None
+    modulo: str = None
+
+
+@dataclass
+class ResultadoTarefa:
+    nome: str
+    status: str = 'pendente'
+    inicio: float = 0.0
+    segundos: float = 0.0
+    erro: str = None
+    depende: tuple = field(default_factory=tuple)
+
+
+def ordenar(tarefas):
+    """Valida o grafo (nomes e ciclos) e devolve as tarefas em ordem topológica."""
+    por_nome = {t.nome: t for t in tarefas}
+    ordem, visitando, visitadas = [], set(), set()
+
+    def visitar(nome, caminho):
+        if nome in visitadas:
+            return
+        if nome in visitando:
+            raise ValueError(f"Ciclo de dependências: {' -> '.join(caminho + [nome])}")
+        visitando.add(nome)
+        for dep in por_nome[nome].depende:
+            if dep in por_nome:
+                visitar(dep, caminho + [nome])
+        visitando.discard(nome)
+        visitadas.add(nome)
+        ordem.append(por_nome[nome])
+
+    for tarefa in tarefas:
+        visitar(tarefa.nome, [])
+    return ordem
+
+
+def executar(tarefas, workers=4):
+    """
+    Executa as tarefas respeitando as dependências e devolve {nome: ResultadoTarefa}.
+
+    Dependências que não estão na lista (arquivo de origem não mudou) são
+    consideradas satisfeitas. Com workers=1 a execução é serial, na ordem
+    topológica.
+    """
+    ordem = ordenar(tarefas)
+    nomes = {t.nome for t in ordem}
+    pendentes = {t.nome: {d for d in t.depende if d in nomes} for t in ordem}
+    resultados = {t.nome: ResultadoTarefa(t.nome, depende=tuple(t.depende)) for t in ordem}
+    inicio_geral = time.perf_counter()
+    trava = threading.Lock()
+
+    def rodar(tarefa):
+        resultado = resultados[tarefa.nome]
+        resultado.inicio = time.perf_counter() - inicio_geral
+        resultado.status = 'executando'
+        try:
+            # Os migrar_* tratam as próprias exceções e devolvem False na falha
+            if tarefa.funcao() is False:
+                raise RuntimeError("a carga retornou False")
+            resultado.status = 'ok'
+        except Exception as e:
+            resultado.status = 'erro'
+            resultado.erro = str(e)
+            with trava:
+                print(f"\nErro na tarefa {tarefa.nome}: {e}")
+        finally:
+            resultado.segundos = time.perf_counter() - inicio_geral - resultado.inicio
+        return tarefa.nome
+
+    def pular_dependentes(nome):
+        for outra, deps in pendentes.items():
+            if nome in deps and resultados[outra].status == 'pendente':
+                resultados[outra].status = 'pulada'
+                resultados[outra].erro = f"depende de {nome}"
+                pular_dependentes(outra)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='sync') as pool:
+        em_execucao = {}
+        while True:
+            for tarefa in ordem:
+                nome = tarefa.nome
+                if resultados[nome].status == 'pendente' and not pendentes[nome]:
+                    if len(em_execucao) >= max(1, workers):
+                        break
+                    resultados[nome].status = 'agendada'
+                    em_execucao[pool.submit(rodar, tarefa)] = nome
+
+            if not em_execucao:
+                break
+
+            concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidas:
+                nome = em_execucao.pop(futuro)
+                if resultados[nome].status == 'ok':
+                    for deps in pendentes.values():
+                        deps.discard(nome)
+                else:
+                    pular_dependentes(nome)
+
+    return resultados
+
+
+def caminho_critico(resultados):
+    """Maior soma de durações ao longo de uma cadeia de dependências."""
+    memo = {}
+
+    def custo(nome):
+        if nome not in memo:
+            resultado = resultados[nome]
+            anteriores = [custo(d) for d in resultado.depende if d in resultados]
+            memo[nome] = resultado.segundos + max(anteriores, default=0.0)
+        return memo[nome]
+
+    return max((custo(nome) for nome in resultados), default=0.0)
+
+
+def imprimir_tempos(resultados, segundos_total):
+    """Resumo por tarefa: status, início relativo e duração."""
+    if not resultados:
+        return
+    print("\n=== TEMPOS POR TAREFA ===")
+    for resultado in sorted(resultados.values(), key=lambda r: (r.status == 'pulada', r.inicio)):
+        linha = f"{resultado.nome:<22} {resultado.status:<8}"
+        if resultado.status != 'pulada':
+            linha += f" início +{resultado.inicio:7.1f}s  duração {resultado.segundos:7.1f}s"
+        if resultado.erro:
+            linha += f"  ({resultado.erro})"
+        print(linha)
+    serial = sum(r.segundos for r in resultados.values())
+    print(f"Tempo total: {segundos_total:.1f}s | soma serial: {serial:.1f}s "
+          f"| caminho crítico: {caminho_critico(resultados):.1f}s")
@@ -0,0 +1,124 @@
+"""
+Testes do bulk_loader com origem CSV/SQLite e destino SQLite.
+
+Uso: python -m unittest test_bulk_loader  (a partir de sincronizacao/)
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import bulk_loader
+from bulk_loader import BulkLoader, conectar_origem
+
+
+class BulkLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        bulk_loader.limpar_resultados()
+        self.destino = sqlite3.connect(':memory:')
+        self.destino.execute("CREATE TABLE grupos (id INTEGER PRIMARY KEY, nome TEXT NOT NULL)")
+        self.destino.execute("INSERT INTO grupos VALUES (1, 'Antigo')")
+        self.destino.commit()
+
+    def test_csv_source_is_merged_into_target(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            os.mkdir(os.path.join(diretorio, 'Cadastros'))
+            with open(os.path.join(diretorio, 'Cadastros', 'Grupos.csv'), 'w', encoding='utf-8') as f:
+                f.write("Codigo,Descricao\n1,Toner\n2,Papel\n2,Papel A4\n")
+
+            with mock.patch.dict(os.environ, {'SYNC_ORIGEM_DIR': diretorio}):
+                origem = conectar_origem(r"C:\Bancos\Cadastros\Cadastros.mdb")
+
+            loader = BulkLoader(self.destino, 'grupos', ['id', 'nome'])
+            for codigo, descricao in origem.execute("SELECT Codigo, Descricao FROM Grupos"):
+                loader.adicionar((int(codigo), descricao))
+            resultado = loader.finalizar()
+
+        self.assertEqual(
+            self.destino.execute("SELECT id, nome FROM grupos ORDER BY id").fetchall(),
+            [(1, 'Toner'), (2, 'Papel A4')]
+        )
+        self.assertEqual((resultado.linhas, resultado.inseridas, resultado.atualizadas), (3, 1, 1))
+        self.assertEqual(resultado.ignoradas, 1)
+        self.assertEqual(bulk_loader.resultados(), [resultado])
+
+    def test_invalid_rows_are_counted_without_losing_the_batch(self):
+        loader = BulkLoader(self.destino, 'grupos', ['id', 'nome'])
+        loader.adicionar((2, 'Papel'))
+        loader.adicionar((3, None))
+        resultado = loader.finalizar()
+
+        self.assertEqual(resultado.inseridas, 1)
+        self.assertEqual(resultado.erros, 1)
+        self.assertEqual(
+            self.destino.execute("SELECT id FROM grupos ORDER BY id").fetchall(), [(1,), (2,)]
+        )
+
+    def test_second_run_only_writes_changed_rows(self):
+        def carregar(linhas):
+            loader = BulkLoader(self.destino, 'grupos', ['id', 'nome'])
+            for linha in linhas:
+                loader.adicionar(linha)
+            return loader.finalizar()
+
+        carregar([(1, 'Toner'), (2, 'Papel')])
+        resultado = carregar([(1, 'Toner'), (2, 'Papel A4')])
+
+        self.assertEqual((resultado.inalteradas, resultado.atualizadas, resultado.inseridas), (1, 1, 0))
+        self.assertEqual(
+            self.destino.execute("SELECT nome FROM grupos ORDER BY id").fetchall(), [('Toner',), ('Papel A4',)]
+        )
+
+    def test_changed_group_is_replaced(self):
+        self.destino.execute("CREATE TABLE itens (nota_id INTEGER, produto TEXT)")
+
+        def carregar(linhas):
+            loader = BulkLoader(self.destino, 'itens', ['nota_id', 'produto'], chave=('nota_id',), substituir=True)
+            for linha in linhas:
+                loader.adicionar(linha)
+            return loader.finalizar()
+
+        carregar([(1, 'A'), (1, 'B'), (2, 'C')])
+        resultado = carregar([(1, 'A'), (1, 'B'), (2, 'C'), (2, 'D')])
+
+        self.assertEqual(resultado.inalteradas, 2)
+        self.assertEqual(
+            self.destino.execute("SELECT nota_id, produto FROM itens ORDER BY nota_id, produto").fetchall(),
+            [(1, 'A'), (1, 'B'), (2, 'C'), (2, 'D')]
+        )
+
+    def test_changed_table_version_is_bumped(self):
+        self.destino.execute("CREATE TABLE versoes_tabelas (tabela TEXT PRIMARY KEY, versao INTEGER, atualizado_em TEXT)")
+
+        def carregar(linhas):
+            loader = BulkLoader(self.destino, 'grupos', ['id', 'nome'])
+            for linha in linhas:
+                loader.adicionar(linha)
+            loader.finalizar()
+            return self.destino.execute("SELECT versao FROM versoes_tabelas WHERE tabela = 'grupos'").fetchone()
+
+        self.assertEqual(carregar([(2, 'Papel')]), (1,))
+        self.assertEqual(carregar([(2, 'Papel')]), (1,))
+        self.assertEqual(carregar([(2, 'Papel A4')]), (2,))
+
+    def test_date_range_covers_sent_and_replaced_rows(self):
+        self.destino.execute("CREATE TABLE notas (id INTEGER PRIMARY KEY, data TEXT)")
+
+        def carregar(linhas):
+            loader = BulkLoader(self.destino, 'notas', ['id', 'data'], coluna_data='x.data')
+            for linha in linhas:
+                loader.adicionar(linha)
+            return loader.finalizar()
+
+        carregar([(1, '2024-01-15'), (2, '2024-02-10'), (3, '2024-06-01')])
+        resultado = carregar([(1, '2024-01-15'), (2, '2024-04-20'), (3, '2024-06-01')])
+
+        # Só a nota 2 mudou: o intervalo vai da data antiga à nova
+        self.assertEqual((resultado.menor_data, resultado.maior_data), ('2024-02-10', '2024-04-20'))
+        self.assertEqual(carregar([(1, '2024-01-15')]).menor_data, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
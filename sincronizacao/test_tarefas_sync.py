@@ -0,0 +1,72 @@
+"""
+Testes do grafo de tarefas da sincronização.
+
+Uso: python -m unittest test_tarefas_sync  (a partir de sincronizacao/)
+"""
+import threading
+import unittest
+
+import tarefas_sync
+from tarefas_sync import Tarefa
+
+
+class TarefasSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.eventos = []
+        self.trava = threading.Lock()
+
+    def tarefa(self, nome, depende=(), erro=False, retorno=None):
+        def rodar():
+            with self.trava:
+                self.eventos.append(nome)
+            if erro:
+                raise ValueError('falhou')
+            return retorno
+        return Tarefa(nome, rodar, depende)
+
+    def test_dependencies_run_first(self):
+        resultados = tarefas_sync.executar([
+            self.tarefa('itens', ('notas', 'produtos')),
+            self.tarefa('notas', ('clientes',)),
+            self.tarefa('clientes'),
+            self.tarefa('produtos'),
+        ], workers=3)
+
+        self.assertTrue(all(r.status == 'ok' for r in resultados.values()))
+        self.assertLess(self.eventos.index('clientes'), self.eventos.index('notas'))
+        self.assertEqual(self.eventos[-1], 'itens')
+
+    def test_failure_skips_only_dependents(self):
+        resultados = tarefas_sync.executar([
+            self.tarefa('notas', erro=True),
+            self.tarefa('itens', ('notas',)),
+            self.tarefa('contas'),
+        ], workers=2)
+
+        self.assertEqual(resultados['notas'].status, 'erro')
+        self.assertEqual(resultados['itens'].status, 'pulada')
+        self.assertEqual(resultados['contas'].status, 'ok')
+        self.assertNotIn('itens', self.eventos)
+
+    def test_false_return_counts_as_failure(self):
+        resultados = tarefas_sync.executar([
+            self.tarefa('nfe', retorno=False),
+            self.tarefa('itens_nfe', ('nfe',)),
+            self.tarefa('tipo_operacao', ('itens_nfe',)),
+            self.tarefa('clientes', retorno=True),
+        ], workers=2)
+
+        self.assertEqual(resultados['nfe'].status, 'erro')
+        self.assertEqual(resultados['itens_nfe'].status, 'pulada')
+        self.assertEqual(resultados['tipo_operacao'].status, 'pulada')
+        self.assertEqual(resultados['clientes'].status, 'ok')
+        self.assertNotIn('itens_nfe', self.eventos)
+
+    def test_cycle_is_rejected(self):
+        with self.assertRaises(ValueError):
+            tarefas_sync.ordenar([self.tarefa('a', ('b',)), self.tarefa('b', ('a',))])
+
+
+if __name__ == '__main__':
+    unittest.main()